@@ -0,0 +1,262 @@
+# *******************************************************************************************
+# message service library benchmark program - time the classes in messageServerLibrary.py
+# ----------------------------------------------------------------------------------
+#
+# *. operating instructions
+#    ----------------------
+#
+#    invoke as
+#       python messageServerBenchmarks.py  (benchmark ...)
+#
+#    preconditions for program execution:
+#    *.  the presence of the Python 3 command interpreter, python, in a directory in the
+#        command line's PATH variable
+#    *.  the presence of the program's supporting library, messageServerLibrary.py,
+#        in Python's import path, sys.path.  (By default, sys.path includes the current directory).
+#
+# *. command line parameters
+#    -----------------------
+#
+#    -.  benchmark - the name of a benchmark to run (default: all benchmarks).  the benchmarks are
+#        -.  fanout - the cost of an append, as the number of the queue's readers and of all readers grow
+#        -.  memory - the memory held per million small messages, and the cost of appends and retrievals, by buffer class
+#        -.  durability - the throughput of concurrent appends to queues on disk, by durability mode
+#        -.  batch - the cost per message of appending it alone, and as part of batches of growing size
+#        -.  parser - the cost of parsing requests of several types with the request patterns, and without them
+#        -.  aliases - the cost of a call to a map method by its own name, and by its alias, as aliases have been resolved
+#
+# *. effect
+#    ------
+#
+#     run each benchmark, printing one line per configuration measured.
+#     the benchmarks work with the library's classes directly, so that no network traffic is measured
+#
+# *******************************************************************************************
+
+# supporting codes for the message server
+#
+from messageServerLibrary import *
+
+import sys
+import time
+import tracemalloc
+import tempfile
+import threading
+import functools
+import shutil
+
+# ************************************************************************************************************
+# utility classes
+# ************************************************************************************************************
+
+# ============================================================================================================
+# deliverer that stands in for readers that acknowledge everything they're sent:
+# it counts the readers that it's asked to serve and advances their positions, without using the network.
+# readers are served only once they have SAPs, which register_reader gives them
+# ============================================================================================================
+#
+class AcknowledgingDeliverer(MessageDeliverer):
+  def __init__(self, queue_to_readers, reader_to_SAP, **kwargs):
+    super().__init__(queue_to_readers, reader_to_SAP, **kwargs)
+    self.readers_served = 0
+  def deliver(self, reader_name, queue_names):
+    self.readers_served += 1
+    for queue_name in queue_names:
+      position, messages = self.queue_to_readers.unread_messages(queue_name, reader_name)
+      if messages:  self.queue_to_readers.advance_position(queue_name, reader_name, position + len(messages))
+  def register_reader(self, queue_name, reader_name):
+    self.queue_to_readers.register(queue_name, reader_name)
+    self.reader_to_SAP.register(reader_name, 'localhost', '0')
+
+# ============================================================================================================
+# queue to writers map that resolves its aliases as maps once did:  on each call, by a failed attribute lookup,
+# then a lookup in a dictionary of bound methods
+# ============================================================================================================
+#
+class GetattrAliasedQueueToWriters(MessageBufferToUsers):
+  method_aliases = {}
+  def add_aliases(self, **kwargs):
+    self.aliases_keyvalue = kwargs['entity_aliases']
+    self.method_aliases = { alias: getattr(self, original) for alias, original in MethodAliases.aliases(self.aliases_keyvalue) if hasattr(self, original) }
+  def __getattr__(self, attr):
+    if attr not in self.method_aliases:  return super().__getattribute__(attr)
+    return self.method_aliases[attr]
+
+# ************************************************************************************************************
+# benchmarks
+# ************************************************************************************************************
+
+# ============================================================================================================
+# fanout -
+#    time appends to one queue while varying the queue's subscribers and, separately, the readers of all
+#    other queues.  the cost per append should follow the first, and not the second
+# ============================================================================================================
+#
+def fanout_benchmark(appends=2000):
+  print('{:>12} {:>12} {:>16} {:>16}'.format('subscribers', 'all readers', 'readers served', 'usec per append'))
+  for subscribers, other_readers in [ (10, 0), (10, 1000), (10, 10000), (100, 10000), (1000, 10000) ]:
+    reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+    queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+    queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+    deliverer = AcknowledgingDeliverer(queue_to_readers, reader_to_SAP)
+    append = AppendMessageToQueue(**{'queue_to_writers': queue_to_writers, 'queue_to_readers': queue_to_readers, 'communicator_to_SAP': reader_to_SAP, 'deliverer': deliverer})
+    #
+    # one busy queue, plus 100 other queues that share the other readers among them
+    queue_to_writers.register_queue('hot')
+    queue_to_writers.register('hot', 'w')
+    for k in range(subscribers):  deliverer.register_reader('hot', 'hot_reader{}'.format(k))
+    for q in range(100):  queue_to_writers.register_queue('cold{}'.format(q))
+    for k in range(other_readers):  deliverer.register_reader('cold{}'.format(k % 100), 'cold_reader{}'.format(k))
+    #
+    start = time.perf_counter()
+    for k in range(appends):  append('w hot m{}'.format(k))
+    elapsed = time.perf_counter() - start
+    print('{:>12} {:>12} {:>16} {:>16.1f}'.format(subscribers, subscribers + other_readers, deliverer.readers_served // appends, 1e6 * elapsed / appends))
+
+# ============================================================================================================
+# memory -
+#    fill one buffer of each class with a million small messages, and report the memory traced per
+#    million messages, along with the cost per append and per retrieval
+# ============================================================================================================
+#
+def memory_benchmark(messages=1000000):
+  print('{:>24} {:>16} {:>16} {:>16}'.format('buffer class', 'MiB per million', 'usec per append', 'usec per read'))
+  for buffer_class in [ MessageBuffer, CompactMessageBuffer ]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    buffer = buffer_class()
+    for k in range(messages):  buffer.append_message('message {}'.format(k))
+    appended = time.perf_counter() - start
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for k in range(messages):  buffer.retrieve_message(k)
+    retrieved = time.perf_counter() - start
+    print('{:>24} {:>16.1f} {:>16.2f} {:>16.2f}'.format(buffer_class.__name__, held * 1e6 / messages / (1 << 20), 1e6 * appended / messages, 1e6 * retrieved / messages))
+
+# ============================================================================================================
+# durability -
+#    have concurrent writers append to queues held on disk, under each durability mode, and report the
+#    appends per second, along with the number of syncs that made them durable
+# ============================================================================================================
+#
+def durability_benchmark(appends=100):
+  print('{:>10} {:>10} {:>16} {:>10}'.format('mode', 'writers', 'appends per sec', 'syncs'))
+  for mode, writers in [ (mode, writers) for mode in [ 'none', 'batch', 'message' ] for writers in [ 1, 16, 64 ] ]:
+    directory = tempfile.mkdtemp()
+    collection = MessageBufferCollection(**{'buffers': {}, 'buffer_factory': functools.partial(SegmentedMessageBuffer, directory=directory)})
+    reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+    queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+    queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+    committer = GroupCommitter(collection, mode=mode).start()
+    append = AppendMessageToQueue(**{'queue_to_writers': queue_to_writers, 'queue_to_readers': queue_to_readers, 'communicator_to_SAP': reader_to_SAP,
+                                     'deliverer': AcknowledgingDeliverer(queue_to_readers, reader_to_SAP), 'committer': committer})
+    for k in range(4):
+      queue_to_writers.register_queue('q{}'.format(k))
+      for w in range(writers):  queue_to_writers.register('q{}'.format(k), 'w{}'.format(w))
+    #
+    def write(w):
+      for k in range(appends):  append('w{} q{} message {} from writer {}'.format(w, k % 4, k, w))
+    threads = [ threading.Thread(target=write, args=(w,)) for w in range(writers) ]
+    start = time.perf_counter()
+    for thread in threads:  thread.start()
+    for thread in threads:  thread.join()
+    elapsed = time.perf_counter() - start
+    committer.stop()
+    print('{:>10} {:>10} {:>16.0f} {:>10}'.format(mode, writers, writers * appends / elapsed, committer.syncs))
+    for buffer_name in collection.buffers():  collection.unregister(buffer_name)
+    shutil.rmtree(directory, ignore_errors=True)
+  MessageBufferCollection(**{'buffers': {}, 'buffer_factory': MessageBuffer})
+
+# ============================================================================================================
+# batch -
+#    dispatch appends to a queue with ten readers, one message per request and then in batches of growing size,
+#    and report the cost per message, parsing and fan-out included
+# ============================================================================================================
+#
+def batch_benchmark(messages=20000):
+  print('{:>12} {:>16} {:>16}'.format('batch size', 'usec per message', 'readers served'))
+  for batch_size in [ 1, 10, 100, 1000 ]:
+    reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+    queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+    queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+    deliverer = AcknowledgingDeliverer(queue_to_readers, reader_to_SAP)
+    dispatcher = RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP, deliverer=deliverer)
+    queue_to_writers.register_queue('q')
+    queue_to_writers.register('q', 'w')
+    for k in range(10):  deliverer.register_reader('q', 'reader{}'.format(k))
+    lines = [ 'log line {} from a bursty producer'.format(k) for k in range(messages) ]
+    if batch_size == 1:  requests = [ 'append_message_to_q w q ' + line for line in lines ]
+    else:                requests = [ 'append_batch_to_q w q {}\n'.format(batch_size) + '\n'.join(lines[k:k+batch_size]) for k in range(0, messages, batch_size) ]
+    start = time.perf_counter()
+    for request in requests:  dispatcher(request)
+    elapsed = time.perf_counter() - start
+    print('{:>12} {:>16.2f} {:>16}'.format(batch_size, 1e6 * elapsed / messages, deliverer.readers_served))
+
+# ============================================================================================================
+# parser -
+#    parse requests of several types as the dispatcher once did - by matching the request pattern, then the
+#    responder's pattern, and taking their groups - and as it now does - by partitioning off the request type and
+#    splitting the body by its responder's layout - and report the cost per request of each
+# ============================================================================================================
+#
+def parser_benchmark(parses=100000):
+  print('{:>24} {:>16} {:>16} {:>10}'.format('request type', 'usec (patterns)', 'usec (layouts)', 'speedup'))
+  reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  dispatcher = RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP)
+  for request in [ 'append_message_to_q writer_1 orders a new order for 12 widgets, to ship today\n',
+                   'append_message_to_qs writer_1 orders,audit,billing a new order for 12 widgets\n',
+                   'fetch_from_q reader_1 orders 100 500\n', 'set_writer_for_q writer_1 orders\n', 'position_of_reader reader_1 orders\n' ]:
+    responders = dispatcher.request_to_responder
+    start = time.perf_counter()
+    for k in range(parses):
+      match_dict = dispatcher.request_pattern.match(request).groupdict()
+      responders[match_dict['request_name']].pattern.match(match_dict['request_body']).groupdict()
+    with_patterns = time.perf_counter() - start
+    start = time.perf_counter()
+    for k in range(parses):
+      request_type, separator, request_body = request.partition(' ')
+      responders[request_type].parse(request_body)
+    with_layouts = time.perf_counter() - start
+    print('{:>24} {:>16.2f} {:>16.2f} {:>10.1f}'.format(request.split()[0], 1e6 * with_patterns / parses, 1e6 * with_layouts / parses, with_patterns / with_layouts))
+
+# ============================================================================================================
+# aliases -
+#    call a queue to writers map's users_for_buffer by its own name, and as writers_for_queue, with the alias
+#    compiled into the class, bound to the instance, and looked up on each call, and report the cost per call of each
+# ============================================================================================================
+#
+def aliases_benchmark(calls=200000):
+  print('{:>24} {:>16} {:>16}'.format('resolution', 'usec per call', 'overhead (usec)'))
+  kwargs = {'buffers': {}, 'buffer_to_users': {}}
+  compiled = MessageQueueToWriters(**kwargs)
+  bound = MessageBufferToUsers(**dict(kwargs, entity_aliases=('queue', 'writer')))
+  looked_up = GetattrAliasedQueueToWriters(**dict(kwargs, entity_aliases=('queue', 'writer')))
+  compiled.register_queue('q')
+  for writers in [ compiled, bound, looked_up ]:
+    for k in range(10):  writers.register('q', 'w{}'.format(k))
+  direct = None
+  for resolution, call in [ ('none (direct call)', lambda q: compiled.users_for_buffer(q)), ('compiled into class', lambda q: compiled.writers_for_queue(q)),
+                            ('bound to instance', lambda q: bound.writers_for_queue(q)), ('__getattr__ lookup', lambda q: looked_up.writers_for_queue(q)) ]:
+    start = time.perf_counter()
+    for k in range(calls):  call('q')
+    elapsed = 1e6 * (time.perf_counter() - start) / calls
+    if direct is None:  direct = elapsed
+    print('{:>24} {:>16.2f} {:>16.2f}'.format(resolution, elapsed, elapsed - direct))
+
+# **************************************
+# program main
+# **************************************
+
+benchmarks = { 'fanout': fanout_benchmark, 'memory': memory_benchmark, 'durability': durability_benchmark, 'batch': batch_benchmark, 'parser': parser_benchmark, 'aliases': aliases_benchmark }
+
+if __name__ == '__main__':
+  for name in sys.argv[1:] or sorted(benchmarks):
+    if name not in benchmarks:
+      print('?? unknown benchmark {} (known: {})'.format(name, ', '.join(sorted(benchmarks))), file=sys.stderr)
+      continue
+    print('*** benchmark {}'.format(name))
+    benchmarks[name]()
+    print()
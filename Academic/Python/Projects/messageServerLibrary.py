@@ -1,1210 +1,4065 @@
-# *************************************************************************************************************************
-# message service library module - support the processing of requests related to the organizing, capturing, 
-# and distributing of client messages
-# ------------------------------------------------------------------------------------------------------------------------
-#
-# organization
-# ------------
-#
-# The module is organized as a series of classes.  No free functions have been harmed in the construction
-# of this module.
-#
-# Inter-class dependencies are ordered bottom-up:  
-# i.e., if a class B depends on a class A, then A will appear before B in file order.
-#
-# All external module dependencies have been placed at the head of the file.  All of these dependencies
-# involve Python library modules.
-#
-# other
-# -----
-#
-# The code below assumes Python 3 or better.  It has been tested with Python 3.4.2 on Windows
-# (see messageServerTests.py)
-#
-# -- Phil Pfeiffer
-#    27 April 2015
-# *************************************************************************************************************************
-
-# =========================================================================================================================
-# dependencies on Python library modules
-# =========================================================================================================================
-
-import sys          # errors reported to sys.stderr
-import copy         # copy.copy used to copy mutable keyed datasets in support of incremental dataset deletion
-import socket       # message receipt and response supported using TCP connections
-import re           # regular expressions used to parse incoming requests
-import abc          # abc.ABCMeta used to declare a class as an abstract base class
-import functools    # functoools.reduce used to concatenate lists of strings into individual strings for message output
-
-
-# *************************************************************************************************************************
-# utility classes
-# *************************************************************************************************************************
-
-# =========================================================================================================================
-# metaclass for converting classes to singletons
-# =========================================================================================================================
-
-class Singleton(type):
-  _instances = {}
-  def __call__(cls, *args, **kwargs):
-    if cls not in cls._instances:      # instantiate shared class instance on first object instantiation
-      Singleton._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
-    else:   # reinvoke __init__ for the lone instance on subsequent instantiations.  remove clause if re-init not desired
-      Singleton._instances[cls].__init__(*args, **kwargs)
-    return Singleton._instances[cls]
-
-# ===========================================================================================================================
-# mixin class for supporting aliaising of map methods in a class that
-# -.  maps elements in a first 'from' domain to elements in a second 'to' domain
-# -.  whose methods follow the following naming conventions:
-#
-#     -. register( fromelt, toelt )  -    add element ( fromelt, { toelt } )      to a map
-#     -. register_from( fromelt ) -       add element ( fromelt, { } )            to a map
-#     -. register_to( toelt ) -           add element ( toelt, { } }              to the map's inverse  (where supported)
-#     -. froms( ) -                       return set of all elements in map's domain
-#     -. tos_for_from( fromelt ) -        return set of all elements toelt such that map( from ) = toelt
-#     -. tos( ) -                         return set of all elements in map's codomain
-#     -. tos_for_from( fromelt ) -        return set of all elements toelt such that map( from ) = toelt
-#     -. unregister( fromelt, toelt )  -  remove element  ( fromelt, { toelt } ) from a map   [not aliased]
-#     -. unregister_from( fromelt ) -     remove all elements from the map whose domain element is fromelt
-#     -. unregister_to( toelt ) -         remove all elements from the map whose codomain element is toelt
-#
-#  parameters:
-# -. kwargs['entity_aliases'] -
-#       a list of values of the form  (( from, ( from_alias | None )), ( to, ( to_alias | None )))
-#       each of which specifies how __getattr__ supports aliasing of map name procedures, with
-#    -.  instances of 'from' mapped to 'from_alias' (if present) or themselves (if None)
-#    -.  instances of 'to'   ampped to 'to_alias;   (if present) or themselves (if None)
-#
-#  effect:  supports parallel set of methods, with
-#    -.  from in method names replaced with from_alias
-#    -.  to   in method names replaced with to_alias
-#
-#  example:
-#    assume entity_aliases: [(( 'lodging', 'motel' ), ( 'locale', 'state' ))]
-#    assumed names with aliases would then be as follows:
-#
-#     -. register()  -                    (no alias)
-#     -. register_lodging( ) -            register_motel()
-#     -. register_locale( ) -             register_state()
-#     -. lodgings( ) -                    motels()
-#     -. locales_for_lodging( ) -         states_for_motel()
-#     -. locales( ) -                     states()
-#     -. lodgings_for_locale( ) -         motels_for_state()
-#     -. unregister( )  -                 (no alias)
-#     -. unregister_lodging( ) -          unregister_motel()
-#     -. unregister_locale( ) -           unregister_state()
-#
-#   With a map of [(( 'lodging', 'motel' ), ( 'locale', None ))], the following aliases would be supported:
-#
-#     -. register()  -                    (no alias)
-#     -. register_lodging( ) -            register_motel()
-#     -. register_locale( ) -             (no alias)
-#     -. lodgings( ) -                    motels()
-#     -. locales_for_lodging( ) -         locales_for_motel()
-#     -. locales( ) -                     (no alias)
-#     -. lodgings_for_locale( ) -         motels_for_locale()
-#     -. unregister( )  -                 (no alias)
-#     -. unregister_lodging( ) -          unregister_motel()
-#     -. unregister_locale( ) -           (no alias)
-# =========================================================================================================================
-
-class AddMapMethodAliases(object):
-  #
-  # __init__:  initialize the alias dictionary
-  def __init__(self):
-    #
-    # support easier-to-read method names for names for domain, codomain
-    if 'entity_aliases' not in dir(self):  self.method_aliases = {}
-  #
-  # add_aliases:  initialize the aliases
-  def add_aliases(self, **kwargs):
-    if 'entity_aliases' in kwargs:
-      self.aliases_keyvalue = kwargs['entity_aliases']
-      for alias_map in self.aliases_keyvalue:
-        try:
-          ((frum, from_alias), (to, to_alias)) = alias_map
-          if from_alias == frum:  from_alias = None     # avoid infinite recursion that could arise if attributes were aliased to themselves
-          if to_alias == to:      to_alias = None
-          if from_alias is None and to_alias is None:  return
-          if from_alias is not None:
-            if 'register_'+to in dir(self):      self.method_aliases.update( { 'register_' + to_alias   : eval('self.register_'+to) } )
-            if to+'s' in dir(self):              self.method_aliases.update( { to_alias+'s'             : eval('self.' + to + 's') } )
-            if 'unregister_'+to in dir(self):    self.method_aliases.update( { 'unregister_' + to_alias : eval('self.unregister_'+to) } )
-          if to_alias is not None:
-            if 'register_'+frum in dir(self):    self.method_aliases.update( { 'register_' + from_alias   : eval('self.register_'+frum) } )
-            if frum+'s' in dir(self):            self.method_aliases.update( { from_alias+'s'             : eval('self.' + frum + 's') } )
-            if 'unregister_'+frum in dir(self):  self.method_aliases.update( { 'unregister_' + from_alias : eval('self.unregister_'+frum) } )
-          if from_alias is not None and to_alias is not None:
-            if frum+'s_for_'+to in dir(self):    self.method_aliases.update( { from_alias+'s_for_'+to_alias : eval('self.' + frum + 's_for_' + to) } )
-            if to+'s_for_'+frum in dir(self):    self.method_aliases.update( { to_alias+'s_for_'+from_alias : eval('self.' + to + 's_for_' + frum) } )
-          if from_alias is None and to_alias is not None:
-            if frum+'s_for_'+to in dir(self):    self.method_aliases.update( { frum+'s_for_'+to_alias   : eval('self.' + frum + 's_for_' + to) } )
-            if to+'s_for_'+frum in dir(self):    self.method_aliases.update( { to_alias+'s_for_'+frum   : eval('self.' + to + 's_for_' + frum) } )
-          if from_alias is not None and to_alias is None:
-            if frum+'s_for_'+to in dir(self):    self.method_aliases.update( { from_alias+'s_for_'+to   : eval('self.' + frum + 's_for_' + to) } )
-            if to+'s_for_'+frum in dir(self):    self.method_aliases.update( { to_alias+'s_for_'+frum   : eval('self.' + to + 's_for_' + frum) } )
-        except:
-          pass
-  #
-  # support method name aliases - return null set on failed lookups
-  def __getattr__(self, attr):
-    if attr not in self.method_aliases:
-      print('{}.{}unknown attribute: {}', self.__class__.__name__, '__getattr__', attr, file=sys.stdout)
-      return super().__getattribute__(attr)
-    else:  return self.method_aliases[attr]
-  #
-  # auxiliary methods
-  #
-  def alias_keywords(self):
-    return {} if 'aliases_keyvalue' not in dir(self) else { 'entity_aliases' : self.aliases_keyvalue }
-
-
-# ============================================================================================================
-# collection class for supporting
-# -.  1<->N associations between domain, codmain objects
-# *.  allows for
-# -.  registering and updating (domain, codomain) bindings
-# -.  removing a particular (domain, codomain) binding from the collection
-# -.  removing a domain element from collection and all associated (domain element, codomain element)
-# -.  removing a codomain element from collection  and all associated (domain element, codomain element)
-# -.  aliasing the names of the methods, using Alias
-# ============================================================================================================
-#
-class InvertibleMap(AddMapMethodAliases):
-  #
-  # __init__:  initialize the two-way mapping.
-  #
-  def __init__(self, **kwargs):
-    #
-    # pre-populate maps if explicitly requested to do so
-    self.forward_map, self.reverse_map = {}, {}
-    if 'forward_map' in kwargs:
-      for (domain_element, codomain_element_set) in kwargs['forward_map'].items():
-        for codomain_element in codomain_element_set:
-          self.register(domain_element, codomain_element)
-    #
-    # support easier-to-read method names for names containing 'domain', 'codomain'
-    super().__init__()
-    self.add_aliases(**kwargs)
-  #
-  # register domain_element <-> codomain_element element binding
-  def register(self, domain_element, codomain_element):
-    if domain_element not in self.forward_map: self.forward_map[domain_element] = set([])
-    self.forward_map[domain_element] |= {codomain_element}
-    if codomain_element not in self.reverse_map: self.reverse_map[codomain_element] = set([])
-    self.reverse_map[codomain_element] |= {domain_element}
-  #
-  # break all bindings for domain_element
-  def unregister_domain_element(self, domain_element):
-    if domain_element not in self.forward_map: return
-    for codomain_element in self.forward_map[domain_element]:
-      self.reverse_map[codomain_element] -= { domain_element }
-      if self.reverse_map[codomain_element] == set(): del self.reverse_map[codomain_element]
-    del self.forward_map[domain_element]
-  #
-  # break all bindings for codomain_element
-  def unregister_codomain_element(self, codomain_element):
-    if codomain_element not in self.reverse_map: return
-    for domain_element in self.reverse_map[codomain_element]:
-      self.forward_map[domain_element] -= { codomain_element }
-      if self.forward_map[domain_element] == set(): del self.forward_map[domain_element]
-    del self.reverse_map[codomain_element]
-  #
-  # break a specific domain_element <-> codomain_element element binding
-  def unregister(self, domain_element, codomain_element):
-    if domain_element in self.forward_map:
-      self.forward_map[domain_element] -= { codomain_element }
-    if codomain_element in self.reverse_map:
-      self.reverse_map[codomain_element] -= { domain_element }
-  #
-  # retrieve all domain elements
-  def domain_elements(self): return set(self.forward_map.keys())
-  #
-  # retrieve all codomain elements bound to domain_element
-  def codomain_elements_for_domain_element(self, domain_element):
-    return self.forward_map.get(domain_element, set([]))
-  #
-  # retrieve all codomain elements
-  def codomain_elements(self): return set(self.reverse_map.keys())
-  #
-  # retrieve all domain elements bound to codomain_element
-  def domain_elements_for_codomain_element(self, codomain_element):
-    return self.reverse_map.get(codomain_element, set([]))
-  #
-  # auxiliary methods
-  # the forward map suffices here, because the backward map inverts the forward
-  #
-  def me(self, methodname):    return "{}.{}".format(self.__class__.__name__, methodname)
-  def __repr__(self):
-    return "{}(**{!r})".format( self.__class__.__name__, self.state_by_keyword())
-  def __eq__(self, other):   return isinstance( other, self.__class__ ) and self.state_by_keyword() == other.state_by_keyword()
-  def state_by_keyword(self):
-    keywords = { } if 'forward_map' not in dir(self) else { 'forward_map': self.forward_map }
-    keywords.update( self.alias_keywords() )
-    return keywords
-
-
-# ************************************************************************************************************
-# classes for binding message collections to their defining properties: i.e.,
-# -.  their associated  buffers
-# -.  the names of the entities that use them
-# ************************************************************************************************************
-
-# ============================================================================================================
-# classes for buffering groups of messages by name
-# ============================================================================================================
-
-# --------------------------------------------------------------------------------------
-# class that corresponds to a message buffer - i.e., a list of messages
-# --------------------------------------------------------------------------------------
-#
-class MessageBuffer(object):
-  #
-  # __init__:  initialize the buffer.
-  #
-  # kwargs parameters (all optional):
-  # *.  'buffer' - if present, the message list will be prepopulated with the values in this list
-  #
-  def __init__(self, **kwargs):
-    # pre-populate buffer if explicitly requested to do so
-    if 'buffer' in kwargs:  self.message_list = kwargs['buffer']
-    else:
-      # instantiate buffer collection if nothing defined as of yet
-      if 'buffer' not in dir(self):  self.message_list = []
-  #
-  # add next message to stream
-  def append_message(self, message):  self.message_list += [message]
-  #
-  # return specified message from stream
-  def retrieve_message(self, k):   return None if k not in range(len(self.message_list)) else self.message_list[k]
-  #
-  # auxiliary methods
-  def __repr__(self):          return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
-  def __eq__(self, other):     return isinstance( other, self.__class__ ) and self.state_by_keyword() == other.state_by_keyword()
-  def state_by_keyword(self):
-    return {} if 'message_list' not in dir(self) else { 'buffer': self.message_list }
-
-
-# --------------------------------------------------------------------------------------
-# collection class for MessageBuffer objects
-# *.  allows for registering, looking up, unregistering message buffers by name
-# *.  assures
-# -.  uniqueness of names in collection
-# -.  consistency of state on attempted re-registration
-# --------------------------------------------------------------------------------------
-#
-class MessageBufferCollection(metaclass=Singleton):
-  #
-  # __init__:  initialize the collection
-  #
-  # kwargs parameters (all optional):
-  # *.  'buffers' - if present, the collection of buffers will be pre-populated with the buffer objects in this list:
-  #       e.g.,  MessageBufferCollection(**{'buffers': {'foo': MessageBuffer(**{'buffer': []})}})
-  #              pre-populates the collection with one, empty buffer called 'foo'
-  #
-  def __init__(self, **kwargs):
-    # pre-populate map if explicitly requested to do so
-    if 'buffers' in kwargs:  self.buffer_collection = kwargs['buffers']
-    else:
-      # instantiate buffer collection if nothing defined as of yet
-      if 'buffer_collection' not in dir(self):  self.buffer_collection = {}
-  #
-  # check if (named) buffer registered
-  def is_registered(self, buffer_name):  return buffer_name in self.buffer_collection
-  #
-  # instantiate and register (named) buffer
-  def register(self, buffer_name):
-    if buffer_name not in self.buffer_collection:  self.buffer_collection[buffer_name] = MessageBuffer()
-    else:  print("{}: advisory - buffer {} already registered".format(self.me('register'), buffer_name), file=sys.stderr)
-  #
-  # return buffer names
-  def buffers(self):  return set(self.buffer_collection.keys())
-  #
-  # unregister specified buffer
-  def unregister(self, buffer_name):
-    if buffer_name in self.buffer_collection:  del self.buffer_collection[buffer_name]
-    else: print("{}: advisory - buffer {} not currently registered".format(self.me('unregister'), buffer_name), file=sys.stderr)
-  #
-  # add message to specified buffer
-  def append_message(self, buffer_name, message):
-    if buffer_name in self.buffer_collection:  self.buffer_collection[buffer_name].append_message(message)
-    else:  print("{}: advisory - buffer {} not currently registered".format(self.me('append_message'), buffer_name), file=sys.stderr)
-  #
-  # return specified message from specified buffer
-  def retrieve_message(self, buffer_name, k):
-    if buffer_name in self.buffer_collection:  return self.buffer_collection[buffer_name].retrieve_message(k)
-    else:  print("{}: advisory - buffer {} not currently registered".format(self.me('retrieve_messages'), buffer_name), file=sys.stderr)
-  #
-  # auxiliary methods
-  def me(self, methodname):    return "{}.{}".format(self.__class__.__name__, methodname)
-  def __repr__(self):          return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
-  def __eq__(self, other):     return isinstance( other, self.__class__ )     # keywords check not needed due to singleton status
-  def state_by_keyword(self):
-    return {} if 'buffer_collection' not in dir(self) else { 'buffers': self.buffer_collection }
-
-
-# ============================================================================================================
-#  classes for associating named message buffers with named users - i.e., readers and writers -
-#  along with positional information for the readers
-# ============================================================================================================
-
-# -----------------------------------------------------------------------------------------
-# class for associating named buffers from a message buffer collection with named users
-# ----------------------------------------------------------------------------------------
-
-class MessageBufferToUsers(AddMapMethodAliases):
-  #
-  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-  #  supporting class for managing the mapping of buffer names to user names
-  #
-  class MessageBufferNameToUsers(InvertibleMap):
-    #
-    # initialize the map itself
-    #
-    # kwargs parameter (optional):
-    # *.  'buffer_to_users' - if present, the map will be pre-populated with the key => value set pairings in this list:  e.g.,
-    #                         if 'buffer_to_users' = {'stuff': {'joan', 'joe'}}}, 
-    #                         then the initial map will have 'stuff' -> {'joan', 'joe'} as its one (key, value set) pair
-    #
-    def __init__(self, **kwargs):
-      if 'buffer_to_users' in kwargs:
-        buffer_to_users = kwargs['buffer_to_users']
-        forward_map = buffer_to_users.get('forward_map',{})
-        del kwargs['buffer_to_users']
-        kwargs.update({'forward_map': forward_map})
-      kwargs.update({'entity_aliases': [(('domain_element', 'buffer'), ('codomain_element', 'user'))]})
-      super().__init__(**kwargs)
-  #
-  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-  #
-  # initialize content for MessageBufferToUsers instances  -
-  #    i.e., a named message buffer collection, along with a map from named message buffers to named buffer users
-  #
-  # kwargs parameters (all optional):
-  #
-  # *.  'buffers'          - if present, the collection of buffers will be pre-populated with the buffer objects in this list:
-  #                          e.g.,  MessageBufferToUsers(**{'buffers': {'foo': MessageBuffer(**{'buffer': []})}}) 
-  #                                 pre-populates the collection with one, empty buffer called 'foo'
-  # *.  'buffer_to_users'  - if present, use this value to pre-populate the map from buffers to users, as described above, under MessageBufferNameToUsers
-  # *.  'entity_aliases'   - if present, a pair of values that are to alias the terms for the domain elements and codomain elements, respectively,
-  #                          in the MessageBufferCollection and MessageBufferNameToUsers method names
-  #
-  def __init__(self, **kwargs):
-    #
-    # initialize the buffers argument, if requested to do so
-    self.buffer_collection = MessageBufferCollection(**kwargs)
-    #
-    # craft aliases for this class's methods - again, if requested to do so
-    super().__init__()
-    self.buffer_alias, self.user_alias = None, None
-    if 'entity_aliases' in kwargs:
-      self.entity_aliases = kwargs['entity_aliases']
-      try:
-        (self.buffer_alias, self.user_alias) = self.entity_aliases
-        self.add_aliases(**{'entity_aliases': [(('buffer', self.buffer_alias), ('user', self.user_alias))]})
-      except:
-        pass
-    #
-    # finally, initialize the map.  'buffer_to_users' will be checked in the constructor for MessageBufferNameToUsers
-    self.buffer_to_users = MessageBufferToUsers.MessageBufferNameToUsers(**kwargs)
-  #
-  # register (i.e., create) a named buffer
-  def register_buffer(self, buffer_name):
-    if not self.buffer_collection.is_registered(buffer_name):  self.buffer_collection.register(buffer_name)
-    else:  print("{}: advisory - {} {} already registered".format(self.me('register'), 'buffer' if self.buffer_alias is None else self.buffer_alias, buffer_name), file=sys.stderr)
-  #
-  # return names of all buffers
-  def buffers(self):  return self.buffer_collection.buffers()
-  #
-  # register a user for a buffer.  require prior buffer registration.
-  def register(self, buffer_name, user_name):
-    if self.buffer_collection.is_registered(buffer_name):
-      self.buffer_to_users.register(buffer_name, user_name)
-      return True
-    else:
-      print("{}: advisory - {} {} not yet registered".format(self.me('register'), 'buffer' if self.buffer_alias is None else self.buffer_alias, buffer_name), file=sys.stderr)
-      return False
-  #
-  # return names of all buffers for a given user
-  def buffers_for_user(self, user_name):  return self.buffer_to_users.buffers_for_user(user_name)
-  #
-  # return names of all users for all buffers
-  def users(self):  return self.buffer_to_users.users()
-  #
-  # return names of all users for a given buffer
-  def users_for_buffer(self, buffer_name):  return self.buffer_to_users.users_for_buffer(buffer_name)
-  #
-  # unregister a user for a buffer
-  def unregister(self, buffer_name, user_name):
-    self.buffer_to_users.unregister(buffer_name, user_name)
-  #
-  # unregister a buffer and all (buffer, user) bindings for that buffer
-  def unregister_buffer(self, buffer_name):
-    if self.buffer_collection.is_registered(buffer_name):
-      users_for_buffer = copy.copy(self.users_for_buffer(buffer_name))
-      for user in users_for_buffer:  self.unregister(buffer_name, user)
-      self.buffer_collection.unregister(buffer_name)
-    else:  print("{}: advisory - {} {} already unregistered".format(self.me('unregister_buffer'), 'buffer' if self.buffer_alias is None else self.buffer_alias, buffer_name), file=sys.stderr)
-  #
-  # unregister user from all message buffers
-  def unregister_user(self, user_name):
-    self.buffer_to_users.unregister_user(user_name)
-  #
-  # auxiliary methods
-  def me(self, methodname):  return "{}.{}".format(self.__class__.__name__, methodname)
-  def __repr__(self):        return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
-  def __eq__(self, other):   return isinstance( other, self.__class__ )     # keywords check not needed due to singleton status
-  def state_by_keyword(self):
-    keywords = self.buffer_collection.state_by_keyword()
-    keywords.update( { 'buffer_to_users': self.buffer_to_users.state_by_keyword() } )
-    if 'entity_aliases' in dir(self): keywords.update( { 'entity_aliases':  self.entity_aliases } )
-    return keywords
-
-
-# -----------------------------------------------------------------------------------------------------------------
-# class for associating queues -- 
-#    -- i.e., **append-only** message buffers from a message buffer collection 
-# -- with users who may update those queues.
-#
-# terms of association:  
-# -.  a writer may be associated with any number of queues
-# -.  a queue may be associated with any number of writers
-# -.  a given writer may be associated with at most one instance of a given queue
-#
-# design notes:
-# -.  MessageQueueToReaders and MessageQueueToWriters use a common set of queue names:  i.e., if a given queue is 
-#     registered under the name 'foo' in the former, it will be registered as 'foo' under the latter.
-# -.  as is typical for python, method hiding is a convention.  in particular, note the comments that
-#     MessageQueueToReaders.retrieve_position() and MessageQueueToReaders.retrieve_message() are meant to support testing 
-#     rather than "production" usage
-# -----------------------------------------------------------------------------------------------------------------
-
-class MessageQueueToWriters(MessageBufferToUsers):
-  #
-  # initialize the class's (queues, map from queues to writers) pair
-  #
-  # kwargs parameters (all optional):
-  # *.  'buffers' - if present, the collection of queues will be pre-populated with the buffer objects in this list:
-  #       e.g.,  MessageQueueToWriters(**{'buffers': {'foo': MessageBuffer(**{'buffer': []})}})
-  #              pre-populates the collection with one, empty buffer called 'foo'
-  # *.  'buffers_to_users' - if present, use this value to pre-populate the map from queues to writers
-  #
-  def __init__(self, **kwargs):
-    #
-    # initialize the buffers argument, if requested to do so
-    kwargs.update( { 'entity_aliases': ('queue', 'writer') } )
-    super().__init__(**kwargs)
-  #
-  # retrieve message k from queue -- strictly for testing purposes
-  def retrieve_message(self, queue_name, k):
-    return self.buffer_collection.retrieve_message(queue_name, k)
-  #
-  # add message from writer to queue, requiring registration as precondition for writing
-  def append_message(self, queue_name, writer_name, message):
-    if queue_name in self.buffer_collection.buffers():
-      if writer_name in self.writers_for_queue(queue_name):
-        self.buffer_collection.append_message(queue_name, message)
-        return True
-      else:
-        print("{}: queue {} not currently registered to {}".format(self.me('append_message'), queue_name, writer_name), file=sys.stderr)
-        return False
-    else:
-      print("{}: queue {} not currently registered".format(self.me('retrieve_messages'), queue_name), file=sys.stderr)
-      return False
-
-
-# ------------------------------------------------------------------------------------------------------------------------------
-# class for associating queues -- 
-#    -- i.e., read-from-the-end buffers from a message buffer collection 
-# -- with users who may access those queues. 
-#
-# terms of association:  
-# -.  a reader may be associated with any number of queues
-# -.  a queue may be associated with any number of reader
-# -.  a given reader may be associated with at most one instance of a given queue
-#
-# design notes:
-# -.  for this class, the name "queue" was chosen for simplicity.  what is referred to here as "queues" are actually streams, 
-#     in that each reader-queue association is further associated with an implicit "current message" parameter, 
-#     -.  initially set to 0, then
-#     -.  bumped up as messages are retrieved from the underlying buffer
-# -.  MessageQueueToReaders and MessageQueueToWriters use a common set of queue names:  i.e., if a given queue is 
-#     registered under the name 'foo' in the former, it will be registered as 'foo' under the latter.
-# -.  as is typical for python, method hiding is a convention.  in particular, note the comments that
-#     MessageQueueToReaders.retrieve_position() and MessageQueueToReaders.retrieve_message() are meant to support testing 
-#     rather than "production" usage
-# ------------------------------------------------------------------------------------------------------------------------------
-
-class MessageQueueToReaders(MessageBufferToUsers):
-  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-  #
-  # initialize the class's (queues, map from queues to readers) pair
-  #
-  # kwargs parameters (all optional):
-  # *.  'queues' - if present, the collection of queues will be pre-populated with the buffer objects in this list:
-  #       e.g.,  MessageQueueToReaders(**{'queues': {'foo': MessageBuffer(**{'buffer': []})}})
-  #              pre-populates the collection with one, empty buffer called 'foo'
-  # *.  'queue_to_readers' - if present, use this value to pre-populate the map from queues to readers, as described above, under MessageQueueNameToWriters
-  # *.  'queue_to_readers_to_positinos' -
-  #        if present, use this value to pre-populate the map from queues to readers to their positions
-  #        otherwise, initialize all reader positions to 0
-  #
-  def __init__(self, **kwargs):
-    #
-    # initialize the buffers argument, if requested to do so
-    kwargs.update( { 'entity_aliases': ('queue', 'reader') } )
-    super().__init__(**kwargs)
-    #
-    # pre-populate map of queue positions by reader
-    if 'queue_to_readers_to_positions' in kwargs:  self.queue_to_readers_to_positions = kwargs['queue_to_readers_to_positions']
-    else:
-      # instantiate buffer collection if nothing defined as of yet
-      if 'queue_to_readers_to_positions' not in dir(self):
-        self.queue_to_readers_to_positions = {}
-        for queue in self.queues():
-          self.queue_to_readers_to_positions[queue] = {}
-          for reader in self.readers_for_queue(queue):
-            self.queue_to_readers_to_positions[queue][reader] = 0
-  #
-  # register a reader for a queue.  require prior queue registration.
-  def register(self, queue_name, reader_name):
-    if super().register(queue_name, reader_name):
-      if queue_name not in self.queue_to_readers_to_positions:  self.queue_to_readers_to_positions[queue_name] = {}
-      if reader_name not in self.queue_to_readers_to_positions[queue_name]:  self.queue_to_readers_to_positions[queue_name][reader_name] = 0
-      return True
-    else:
-      return False
-  #
-  # return next message from queue to reader, requiring registration as precondition for reading
-  def next_message(self, queue_name, reader_name):
-    if queue_name in self.queues():
-      if reader_name in self.readers_for_queue(queue):
-        next = self.queue_to_readers_to_positions[queue_name][reader_name]
-        message = self.buffer_collection[queue_name].retrieve_message(next)
-        if message is not None: self.queue_to_readers_to_positions[queue_name][reader_name] = next+1
-        return message
-      else:  print("{}: queue {} not currently registered to {}".format(self.me('next_message'), queue_name, reader_name), file=sys.stderr)
-    else:  print("{}: queue {} not currently registered".format(self.me('next_message'), queue_name), file=sys.stderr)
-  #
-  # retrieve current stream position for queue reader  -- strictly for testing purposes
-  def retrieve_position(self, queue_name, reader_name):
-    if queue_name in self.queues():
-      if reader_name in self.readers_for_queue(queue):
-        return self.queue_to_readers_to_positions[queue_name][reader_name]
-      else:  print("{}: queue {} not currently registered to {}".format(self.me('next_message'), queue_name, reader_name), file=sys.stderr)
-    else:  print("{}: queue {} not currently registered".format(self.me('next_message'), queue_name), file=sys.stderr)
-  #
-  # retrieve message k from queue -- strictly for testing purposes
-  def retrieve_message(self, queue_name, k):
-    return self.buffer_collection.retrieve_message(queue_name, k)
-  #
-  # unregister a reader for a queue
-  def unregister(self, queue_name, reader_name):
-    super().unregister(queue_name, reader_name)
-    if reader_name in self.queue_to_readers_to_positions[queue_name]:  del self.queue_to_readers_to_positions[queue_name][reader_name]
-  #
-  # unregister a queue and all (queue, reader) bindings for that queue
-  def unregister_queue(self, queue_name):
-    self.unregister_buffer(queue_name)
-    del self.queue_to_readers_to_positions[queue_name]
-  #
-  # unregister reader from all message queues
-  def unregister_reader(self, reader_name):
-    self.unregister_user(reader_name)
-    for queue_name in self.queues():
-      if reader_name in self.queue_to_readers_to_positions[queue_name]:  del self.queue_to_readers_to_positions[queue_name][reader_name]
-  #
-  # auxiliary methods
-  def me(self, methodname):  return "{}.{}".format(self.__class__.__name__, methodname)
-  def __repr__(self):        return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
-  def __eq__(self, other):   return isinstance( other, self.__class__ )     # keywords check not needed due to singleton status
-  def state_by_keyword(self):
-    keywords = super().state_by_keyword()
-    if 'queue_to_readers_to_positions' in dir(self):  keywords.update( { 'queue_to_readers_to_positions': self.queue_to_readers_to_positions } )
-    return keywords
-
-
-# ===========================================================================================================================
-# class that track associations between communicators and their service access points (SAPs) - i.e., (host/ port) pairs
-#
-# terms of association:  
-# -.  a communicator may be associated with at most one SAP
-#
-# design notes:
-# -.  no restrictions have been placed on associations between SAPs and communicators.  
-#     while each SAP may, in practice, be associated with at most one communicator, the use of SAPs to demultiplex
-#     messages to multiple communicators is feasible and should therefore be allowed.
-# -.  while the class uses the term "communicators", at present only readers need register:
-#     asynchronous updates of message queue status are only being sent to readers
-# ===========================================================================================================================
-#
-class CommunicatorToSAP(metaclass=Singleton):
-  #
-  # initialize binding mappings, limiting sources to one per stream
-  def __init__(self, **kwargs):
-    if 'communicator_to_SAP' in kwargs:  self.communicator_to_SAP = kwargs['communicator_to_SAP']
-    else:
-      if 'communicator_to_SAP' not in dir(self): self.communicator_to_SAP = {}
-  #
-  def register(self, communicator, host, port):  self.communicator_to_SAP[communicator] = (host, port)
-  #
-  def unregister(self, communicator):
-    if communicator in self.communicator_to_SAP:  del self.communicator_to_SAP[communicator]
-  #
-  def SAP(self, communicator):    return self.communicator_to_SAP.get(communicator, None)
-  #
-  # retrieve all communicators
-  def communicators(self): return set(self.communicator_to_SAP.keys())
-  #
-  # auxiliary methods
-  def __repr__(self):          return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
-  def __eq__(self, other):     return isinstance( other, self.__class__ ) and self.state_by_keyword() == other.state_by_keyword()
-  def state_by_keyword(self):
-    return {} if 'communicator_to_SAP' not in dir(self) else { 'communicator_to_SAP': self.communicator_to_SAP }
-
-
-# ************************************************************************************************************
-# classes for exchanging one-line messages with other processes
-# design:
-# -.  messages will be exchanged via file system readline/writeline APIs
-#     (this can be supported since sockets can be configured to work like files)
-# ************************************************************************************************************
-#
-# ============================================================================================================
-# class that supports line-by-line-based communication with other entities via two half-duplex files:
-# -.  one for receiving messages  (infile)
-# -.  one for sending messages    (outfile)
-# ============================================================================================================
-#
-class MessageExchanger(object):
-  #
-  # specify infile for sending, outfile for receiving messages, 
-  # allowing for optional one-time initialization of the two file parameters
-  def __init__(self, **kwargs):
-    self.infile, self.outfile = kwargs.get('infile', None), kwargs.get('outfile', None)
-  #
-  # read line from a co-communicator, returning (status, line) pair.
-  # allow for overriding of __init__-time file specification with kwargs' 'infile' keyword
-  def get_line(self, **kwargs):
-    infile = self.resolve_infile( 'get_line', **kwargs )
-    try:
-      next_line = infile.readline()
-      return ( True, next_line )
-    except Exception:
-      print("{}: read failure".format(self.me('get_line')), file=sys.stderr)
-      return ( False, None )
-  #
-  # send line to a co-communicator, returning status of write.
-  # allow for overriding of __init__-time file specification with kwargs' 'outfile' keyword
-  def put_line(self, line, **kwargs):
-    outfile = self.resolve_outfile( 'put_line', **kwargs )
-    try:
-      outfile.write( line )
-      outfile.flush( )            # essential for assuring immediate receipt of message
-      return True
-    except Exception:
-      print("{}: write failure (output: {})".format(self.me('put_line'), line), file=sys.stderr)
-      return False
-  #
-  # auxiliary methods
-  def resolve_infile(self, methodname, **kwargs):
-    assert 'infile' in kwargs or 'infile' in dir(self), "{}: infile not defined".format(self.me(methodname))
-    return kwargs.get('infile', self.infile)
-  def resolve_outfile(self, methodname, **kwargs):
-    assert 'outfile' in kwargs or 'outfile' in dir(self), "{}: outfile not defined".format(self.me(methodname))
-    return kwargs.get('outfile', self.outfile)
-  #
-  def me(self, methodname):    return "{}.{}".format(self.__class__.__name__, methodname)
-  def __repr__(self):          return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
-  def __eq__(self, other):     return isinstance( other, self.__class__ ) and self.state_by_keyword() == other.state_by_keyword()
-  def state_by_keyword(self):
-    keywords = {}
-    if 'infile'  in dir(self): keywords.update( { 'infile': self.infile } )
-    if 'outfile' in dir(self): keywords.update( { 'outfile': self.outfile } )
-    return keywords
-
-
-# ============================================================================================================
-# class that uses an open socket as a message exchanger.
-# key addition to message exchanger functionality:  
-#    use of the socket API to derive an object that allows for file-like treatment of sockets:
-#    in particular, the use of readline and writelines with open sockets.
-# ============================================================================================================
-#
-class OpenSocketMessageExchanger(MessageExchanger):
-  def __init__(self, sock, **kwargs):
-    self.sock = sock
-    #
-    # pre-populate state if explicitly requested to do so
-    self.infile  = kwargs.get('infile', sock.makefile(mode='r'))
-    if not 'infile' in kwargs: kwargs['infile'] = self.infile
-    self.outfile  = kwargs.get('outfile', sock.makefile(mode='w'))
-    if not 'outfile' in kwargs: kwargs['outfile'] = self.outfile
-    super().__init__( **kwargs )
-  def close(self):
-    self.infile.close()
-    self.outfile.close()
-  #
-  # auxiliary methods
-  def __repr__(self):          return "{}({}, **{!r})".format(self.__class__.__name__, self.sock, self.state_by_keyword())
-  def __eq__(self, other):     return isinstance( other, self.__class__ ) and self.state_by_keyword() == other.state_by_keyword()
-  def state_by_keyword(self):
-    keywords = super().state_by_keyword()
-    keywords.update( self.local_state_by_keyword() )
-    return keywords
-  def local_state_by_keyword(self):
-    keywords = {}
-    if 'infile'  in dir(self): keywords.update( { 'infile': self.infile } )
-    if 'outfile' in dir(self): keywords.update( { 'outfile': self.outfile } )
-    return keywords
-
-
-# ===========================================================================================================================
-# class that uses a service access point (SAP) - i.e.., a (host, port) pair - to generate a socket message exchanger
-# ===========================================================================================================================
-#
-class SAPMessageExchanger(OpenSocketMessageExchanger):
-  def __init__(self, **kwargs):
-    try:
-      self.sock = kwargs.get('sock', socket.socket(socket.AF_INET, socket.SOCK_STREAM))
-      if 'timeout' in kwargs:  self.sock.settimeout(kwargs['timeout'])
-      self.hostport = kwargs.get('hostport', ('', 80))
-      self.sock.connect(self.hostport)
-      super().__init__(self.sock, **kwargs)
-    except Exception:
-      print("{}: can't connect to {}{}port {}".format(self.me('__init__'), self.hostport[0], '' if self.hostport[0] == '' else ', ', self.hostport[1]), file=sys.stderr)
-  #
-  def close(self):  self.sock.close()
-  #
-  # auxiliary methods
-  def __repr__(self):          return "{}({}, **{!r})".format(self.__class__.__name__, self.hostport, self.state_by_keyword())
-  def __eq__(self, other):     return isinstance( other, self.__class__ ) and (self.hostport, self.state_by_keyword()) == (other.hostport, other.state_by_keyword())
-  def state_by_keyword(self):
-    keywords = super().state_by_keyword()
-    if 'sock' in dir(self): keywords.update( { 'sock': self.sock } )
-    return keywords
-
-
-# ***************************************************************************************************************************
-# define classes for parsing bodies of client requests and generating bodies for responses to these requests
-# all requests as welll as all generated responses are limited to one text line
-#
-# Response generator classes can be partioned into three groups
-# -.  side-effect free generators:
-#       QueuesForReader, QueuesForWriter
-# -.  generators whose only effects are on local data structures
-#       RegisterQueue, RegisterWriterForQueue,
-#       UnregisterReaderForQueue, UnregisterWriterForQueue, UnregisterEntity, UnregisterQueue
-# -.  generators that also issue messages to clients
-#       RegisterReaderForQueue, which also sends all backlogged messages to the new reader
-#       AppendMessageToQueue, which also sends the message to all registered queue readers
-# ***************************************************************************************************************************
-
-# ============================================================================================================
-# abstract class for common functionality for individual response generators
-# ============================================================================================================
-
-class AbstractResponseGenerator(metaclass=abc.ABCMeta):
-  #
-  # patterns for request tokens
-  #
-  def _p_queue():        return "(?P<queue>[A-Za-z_]\w*)"
-  def _p_reader():       return "(?P<reader>[A-Za-z_]\w*)"
-  def _p_writer():       return "(?P<writer>[A-Za-z_]\w*)"
-  def _p_message():      return "(?P<message>.*)"
-  def _p_communicator(): return "(?P<communicator>[A-Za-z_]\w*)"
-  def _p_SAP():          return "(?P<host>[A-Za-z_\.]*)\s+(?P<port>\d{1,5})"
-  #
-  # initialize the pattern that the current instance of a response generator uses a pattern to parse requests.
-  # also, check that the parameters that the current response generator requires are present in the keywords dict. 
-  def __init__(self, pattern, required_keywords, kwargs):
-    self.require_keywords(required_keywords, kwargs, '__init__')
-    self.pattern, self.required_keywords, self.kwargs = re.compile("^" + pattern + "$"), required_keywords, kwargs
-  #
-  # respond to a request by
-  # -.  checking to see if it matches the expected request pattern
-  # -.  calling the derived class's generate_response method if so, with the results of the parse
-  def __call__(self, request_body):
-    match = self.pattern.match(request_body)
-    if match is None:  return (False, 'error (syntax error)')
-    return self.generate_response(match.groupdict())
-  #
-  # auxiliary methods
-  #
-  # check that the keyword parameters that the concrete class requires are in actual_keywords
-  def require_keywords(self, required_keywords, actual_keywords, methodname):
-    missing_keys = set(required_keywords) - set(actual_keywords.keys())
-    if len(missing_keys) == 0:  return
-    missing_keycount  = "{} keyword{}".format(len(missing_keys), '' if len(missing_keys) == 1 else 's')
-    missing_keynames  = functools.reduce(lambda s, n: s + ", " + n, missing_keys, "")[2:]
-    raise Exception("?? {}: kwargs missing {}: {}".format(self.me(methodname), missing_keycount, missing_keynames))
-  #
-  def me(self, methodname):  return "{}.{}".format(self.__class__.__name__, methodname)
-  def __repr__(self):        return "{}({!r}, {!r}, {!r})".format(self.__class__.__name__,  self.pattern, self.required_keywords, self.kwargs)
-  def __eq__(self, other):   return isinstance( other, self.__class__ ) and ( self.pattern, self.required_keywords, self.kwargs ) ==  ( other.pattern, other.required_keywords, other.kwargs )
-
-
-# ===================================================================================================================================
-# request-specific response generators
-# 
-# each class below is responsible for recognizing and responding to one particular type of request.
-#
-# design notes:
-# -.  each response generator has two methods:
-#     -.  one __init__ that establishes the context for parsing requests
-#     -.  a response_generator method that 
-#         -.  generates a response
-#         -.  realizes any additional effects associated with the request
-# -.  the format for each class's associated request is specified by the pattern parameter passed to its base class's __init__ method,
-#     AbstractResponseGenerator.__init__.
-# -.  the implementation assumes that the queue readers (kwargs['queue_to_readers']) and queue writers (kwargs['queue_to_writers'])
-#     classes associate entities with queues in a common, underlying message buffer
-# ===================================================================================================================================
-
-# ----------------------------------------------------------------------
-# register a queue under the specified name
-# ----------------------------------------------------------------------
-#
-class RegisterQueue(AbstractResponseGenerator):
-  #
-  def __init__(self, **kwargs):
-    parent = self.__class__.__bases__[0]
-    pattern = parent._p_queue() + "\s*"
-    required_keywords = ['queue_to_writers', 'queue_to_readers']
-    super().__init__(pattern, required_keywords, kwargs)
-    self.queue_to_readers = kwargs['queue_to_readers']
-    self.queue_to_writers = kwargs['queue_to_writers']
-  #
-  def generate_response(self, parsed_request_body):
-    if parsed_request_body is None:  return (False, None)
-    self.queue_to_writers.register_queue(parsed_request_body['queue'])
-    # self.queue_to_readers.register_queue(parsed_request_body['queue'])  - not needed, since the queues share a common singleton
-    return (True, None)
-
-# ----------------------------------------------------------------------------------------------
-# register a reader for a specified queue, 
-#   sending any messages in that queue to the reader's specified SAP.
-# 
-# design notes: 
-# -.  in practice, for the request to actually succeed, the queue must already be registered
-# ----------------------------------------------------------------------------------------------
-#
-class RegisterReaderForQueue(AbstractResponseGenerator):
-  #
-  def __init__(self, **kwargs):
-    parent = self.__class__.__bases__[0]
-    pattern = parent._p_reader() + "\s+" + parent._p_queue() + "\s+" + parent._p_SAP() + "\s*"
-    required_keywords = ['queue_to_readers', 'communicator_to_SAP']
-    super().__init__(pattern, required_keywords, kwargs)
-    self.queue_to_readers = kwargs['queue_to_readers']
-    self.reader_to_SAP = kwargs['communicator_to_SAP']
-  #
-  def generate_response(self, parsed_request_body):
-    if parsed_request_body is None:  return (False, None)
-    self.queue_to_readers.register(parsed_request_body['queue'], parsed_request_body['reader'])
-    self.reader_to_SAP.register(parsed_request_body['reader'], parsed_request_body['host'], parsed_request_body['port'])
-    #
-    # push any messages curerntly in this queue to the queue's readers
-    try:
-      exchanger = SAPMessageExchanger(**{'hostport': (parsed_request_body['host'], parsed_request_body['port'])})
-      while True:
-        message = self.queue_to_readers('queue').next_message()
-        if message is None: break
-        exchanger.put_line(message)
-        ack = exchanger.get_line()
-        if ack != 'OK': break
-      exchanger.close()
-    except:
-      pass
-    return (True, None)
-
-# ----------------------------------------------------------------------------------------------
-# register a writer for a specified queue
-# 
-# design notes: 
-# -.  in practice, for the request to actually succeed, the queue must already be registered
-# ----------------------------------------------------------------------------------------------
-#
-class RegisterWriterForQueue(AbstractResponseGenerator):
-  #
-  def __init__(self, **kwargs):
-    parent = self.__class__.__bases__[0]
-    pattern = parent._p_writer() + "\s+" + parent._p_queue() + "\s*"
-    required_keywords = ['queue_to_writers']
-    super().__init__(pattern, required_keywords, kwargs)
-    #
-    self.queue_to_writers = kwargs['queue_to_writers']
-  #
-  def generate_response(self, parsed_request_body):
-    if parsed_request_body is None:  return (False, None)
-    self.queue_to_writers.register(parsed_request_body['queue'], parsed_request_body['writer'])
-    return (True, None)
-
-# ----------------------------------------------------------------------
-# return the queues for which a given entity as registered as a reader
-# ----------------------------------------------------------------------
-#
-class QueuesForReader(AbstractResponseGenerator):
-  #
-  def __init__(self, **kwargs):
-    parent = self.__class__.__bases__[0]
-    pattern = parent._p_reader() + "\s*"
-    required_keywords = ['queue_to_readers']
-    super().__init__(pattern, required_keywords, kwargs)
-    #
-    self.queue_to_readers = kwargs['queue_to_readers']
-    #
-  def generate_response(self, parsed_request_body):
-    if parsed_request_body is None:  return (False, None)
-    queues = self.queue_to_readers.queues_for_reader(parsed_request_body['reader'])
-    return (True, functools.reduce(lambda s, n: s+n+" ", queues, ""))
-
-# ----------------------------------------------------------------------
-# return the queues for which a given entity as registered as a writer
-# ----------------------------------------------------------------------
-#
-class QueuesForWriter(AbstractResponseGenerator):
-  #
-  def __init__(self, **kwargs):
-    parent = self.__class__.__bases__[0]
-    pattern = parent._p_writer() + "\s*"
-    required_keywords = ['queue_to_writers']
-    super().__init__(pattern, required_keywords, kwargs)
-    #
-    self.queue_to_writers = kwargs['queue_to_writers']
-  #
-  def generate_response(self, parsed_request_body):
-    if parsed_request_body is None:  return (False, None)
-    queues = self.queue_to_writers.queues_for_writer(parsed_request_body['writer'])
-    return (True, functools.reduce(lambda s, n: s+n+" ", queues, ""))
-
-# ----------------------------------------------------------------------------------------------
-# append a message to a spedified queue,
-#   sending that message to the SAPs for all currently registered readers
-#
-# design notes: 
-# -.  in practice, for the request to actually succeed, the queue must already be registered,
-#     and the associated entity must be registered as a writer for the queue
-# ----------------------------------------------------------------------------------------------
-#
-class AppendMessageToQueue(AbstractResponseGenerator):
-  #
-  def __init__(self, **kwargs):
-    parent = self.__class__.__bases__[0]
-    pattern = parent._p_writer() + "\s+" + parent._p_queue() + "\s+" + parent._p_message()
-    required_keywords = ['queue_to_writers', 'queue_to_readers', 'communicator_to_SAP']
-    super().__init__(pattern, required_keywords, kwargs)
-    #
-    self.queue_to_readers = kwargs['queue_to_readers']
-    self.reader_to_SAP = kwargs['communicator_to_SAP']
-    self.queue_to_writers = kwargs['queue_to_writers']
-  #
-  def generate_response(self, parsed_request_body):
-    if parsed_request_body is None:  return (False, None)
-    queue, writer, message = parsed_request_body['queue'], parsed_request_body['writer'], parsed_request_body['message']
-    if not self.queue_to_writers.append_message(queue, writer, message):  return False
-    #
-    # push all unsent messages from this queue to the queue's readers
-    for reader in self.queue_to_readers.readers():
-      try:
-        exchanger = SAPMessageExchanger(**{'hostport': self.reader_to_SAP.SAP(reader)} )
-        while True:
-          message = self.queue_to_readers.next_message(queue, reader)
-          if message is None: break
-          exchanger.put_line(message)
-          ack = exchanger.get_line()
-          if ack != 'OK': break
-        exchanger.close()
-      except:
-        pass
-    return (True, None)
-
-# ----------------------------------------------------------------------
-# drop an entity's current as-reader registration for a given queue
-# ----------------------------------------------------------------------
-#
-class UnregisterReaderFromQueue(AbstractResponseGenerator):
-  #
-  def __init__(self, **kwargs):
-    parent = self.__class__.__bases__[0]
-    pattern = parent._p_reader() + "\s+" + parent._p_queue() + "\s*"
-    required_keywords = ['queue_to_readers']
-    super().__init__(pattern, required_keywords, kwargs)
-    #
-    self.queue_to_readers = kwargs['queue_to_readers']
-  #
-  def generate_response(self, parsed_request_body):
-    if parsed_request_body is None:  return (False, None)
-    self.queue_to_readers.unregister(parsed_request_body['queue'], parsed_request_body['reader'])
-    return (True, None)
-
-# ----------------------------------------------------------------------
-# drop an entity's current as-writer registration for a given queue
-# ----------------------------------------------------------------------
-#
-class UnregisterWriterFromQueue(AbstractResponseGenerator):
-  #
-  def __init__(self, **kwargs):
-    parent = self.__class__.__bases__[0]
-    pattern = parent._p_writer() + "\s+" + parent._p_queue() + "\s*"
-    required_keywords = ['queue_to_writers']
-    super().__init__(pattern, required_keywords, kwargs)
-    #
-    self.queue_to_writers = kwargs['queue_to_writers']
-  #
-  def generate_response(self, parsed_request_body):
-    if parsed_request_body is None:  return (False, None)
-    self.queue_to_writers.unregister(parsed_request_body['queue'], parsed_request_body['writer'])
-    return (True, None)
-
-# ------------------------------------------------------------------------------------------
-# drop an entity's current registration from all queues, deleting the entity's SAP
-#   (if one has been specified)
-# ------------------------------------------------------------------------------------------
-#
-class UnregisterEntity(AbstractResponseGenerator):
-  #
-  def __init__(self, **kwargs):
-    parent = self.__class__.__bases__[0]
-    pattern = parent._p_communicator() + "\s*"
-    required_keywords = ['queue_to_readers', 'communicator_to_SAP', 'queue_to_writers']
-    super().__init__(pattern, required_keywords, kwargs)
-    #
-    self.queue_to_readers = kwargs['queue_to_readers']
-    self.reader_to_SAP    = kwargs['communicator_to_SAP']
-    self.queue_to_writers = kwargs['queue_to_writers']
-  #
-  def generate_response(self, parsed_request_body):
-    if parsed_request_body is None:  return (False, None)
-    self.queue_to_readers.unregister_reader(parsed_request_body['communicator'])
-    self.queue_to_writers.unregister_writer(parsed_request_body['communicator'])
-    self.reader_to_SAP.unregister(parsed_request_body['communicator'])
-    return (True, None)
-
-# ----------------------------------------------------------------------
-# unregister the specified queue
-# ----------------------------------------------------------------------
-#
-class UnregisterQueue(AbstractResponseGenerator):
-  #
-  def __init__(self, **kwargs):
-    parent = self.__class__.__bases__[0]
-    pattern = parent._p_queue() + "\s*"
-    required_keywords = ['queue_to_writers']
-    super().__init__(pattern, required_keywords, kwargs)
-    self.queue_to_writers = kwargs['queue_to_writers']
-  #
-  def generate_response(self, parsed_request_body):
-    if parsed_request_body is None:  return (False, None)
-    self.queue_to_writers.unregister_queue(parsed_request_body['queue'])
-    return (True, None)
-
-
-# ************************************************************************************************************
-# define classes for exchanging messages with clients
-# ************************************************************************************************************
-
-# ----------------------------------------------------------------------
-# request dispatcher class -
-# -. accepts a request
-# -. parses the request
-# -. dispatches it to its respective handler
-# ----------------------------------------------------------------------
-#
-class RequestDispatcher(object):
-  #
-  # pattern for overall request
-  def p_request():  return "(?P<request_name>[A-Za-z]\w*)(\s+(?P<request_body>.*))?"
-  #
-  # ##### main methods ####
-  #
-  def __init__(self, queue_to_readers, queue_to_writers, reader_to_SAP):
-    #
-    # store required datasets in a dict for use by responders
-    self.required_datasets = dict( { 'queue_to_readers': queue_to_readers, 'queue_to_writers': queue_to_writers, 'communicator_to_SAP': reader_to_SAP } )
-    #
-    # initialize the table of responders by request type
-    self.request_to_responder = {
-        'register_q':           RegisterQueue(**self.required_datasets),
-        'set_reader_for_q':     RegisterReaderForQueue(**self.required_datasets),
-        'set_writer_for_q':     RegisterWriterForQueue(**self.required_datasets),
-        'qs_for_reader':        QueuesForReader(**self.required_datasets),
-        'qs_for_writer':        QueuesForWriter(**self.required_datasets),
-        'append_message_to_q':  AppendMessageToQueue(**self.required_datasets),
-        'unset_reader_from_q':  UnregisterReaderFromQueue(**self.required_datasets),
-        'unset_writer_from_q':  UnregisterWriterFromQueue(**self.required_datasets),
-        'unset_communicator':   UnregisterEntity(**self.required_datasets),
-        'unregister_q':         UnregisterQueue(**self.required_datasets)
-    }
-    # compile the pattern for separating requests into head and body portions
-    self.request_pattern = re.compile(self.__class__.p_request())
-  #
-  # field a client's request by 
-  # -. first checking for conformance to the basic  "request_type ...parameters..."  format, then
-  # -. dispatching the request to the appropriate handler, as determined from the above table
-  #  
-  def __call__(self, request):
-    #
-    # first, attempt to separate the request's type -- i.e., its head field -- from the specifics -- i.e., its body
-    match = self.request_pattern.match(request)
-    if match is None:  return ('unknown', False, 'syntax error (bad format)')
-    #
-    # then, try to locate the particular request in the table of known requests
-    match_dict = match.groupdict()
-    request_type = match_dict['request_name']
-    if request_type not in self.request_to_responder:  return (request_type, False, 'unknown request type')
-    #
-    # pass the body to whatever responder is indicated
-    return ( request_type, ) + self.request_to_responder[request_type]( match_dict['request_body'] )
-  #
-  # auxiliary methods
-  def me(self, methodname):  return "{}.{}".format(self.__class__.__name__, methodname)
-
-
-# ================================================================================================================
-# class that uses a message exchanger and a request dispatcher to respond to a request
-# assumptions:
-# -.  one request is required for one response
-# -.  the dispatcher is a function that
-#     -.  accepts two arguments:
-#         -.  a request:  a one-line-long string
-#         -.  a keywords object
-#     -,  carries out any side effects implied by the request
-#     -.  returns two values:
-#         -.  a status
-#         -.  a one-line response to the request:  a value of type (one-line string, None) - initially None
-# ================================================================================================================
-#
-class RequestHandler(object):
-  #
-  def __init__(self, dispatcher):  self.dispatcher = dispatcher
-  #
-  # read the one-line request from the socket, generate the one-line response, respond via the socket, return the response and status
-  #
-  def respond(self, sock):
-    request_type, status, response = 'unknown', False, None
-    try:
-      exchanger = OpenSocketMessageExchanger(sock)
-      try:
-        interim_status, request = exchanger.get_line( )
-        if interim_status:
-          request_type, interim_status, response_body = self.dispatcher( request )
-          response = ("OK" if interim_status else "error") + ('' if response_body is None else " "+response_body)
-          try:
-            status = exchanger.put_line( response+'\n' ) and interim_status
-          except Exception:
-            print("{}: write failure".format(self.me('respond')), file=sys.stderr)
-            status = False
-      except Exception:
-        print("{}: read failure".format(self.me('respond')), file=sys.stderr)
-      finally:
-        exchanger.close()
-    except Exception:
-      print("{}: connect failure".format(self.me('respond')), file=sys.stderr)
-    return ( request, request_type, status, response )
-  #
-  def me(self, methodname):    return "{}.{}".format(self.__class__.__name__, methodname)
-  def __repr__(self):          return "{}({!r})".format(self.__class__.__name__, self.dispatcher)
-  def __eq__(self, other):     return isinstance( other, self.__class__ ) and self.dispatcher == other.dispatcher
+# *************************************************************************************************************************
+# message service library module - support the processing of requests related to the organizing, capturing, 
+# and distributing of client messages
+# ------------------------------------------------------------------------------------------------------------------------
+#
+# organization
+# ------------
+#
+# The module is organized as a series of classes.  No free functions have been harmed in the construction
+# of this module.
+#
+# Inter-class dependencies are ordered bottom-up:  
+# i.e., if a class B depends on a class A, then A will appear before B in file order.
+#
+# All external module dependencies have been placed at the head of the file.  All of these dependencies
+# involve Python library modules.
+#
+# other
+# -----
+#
+# The code below assumes Python 3 or better.  It has been tested with Python 3.4.2 on Windows
+# (see messageServerTests.py).  The asyncio-based server, AsyncRequestServer, requires Python 3.7 or better.
+#
+# -- Phil Pfeiffer
+#    27 April 2015
+# *************************************************************************************************************************
+
+# =========================================================================================================================
+# dependencies on Python library modules
+# =========================================================================================================================
+
+import sys          # errors reported to sys.stderr
+import copy         # copy.copy used to copy mutable keyed datasets in support of incremental dataset deletion
+import socket       # message receipt and response supported using TCP connections
+import re           # regular expressions used to parse incoming requests
+import abc          # abc.ABCMeta used to declare a class as an abstract base class
+import functools    # functoools.reduce used to concatenate lists of strings into individual strings for message output
+import threading    # threading.RLock used to serialize access to datasets shared by concurrent request handlers
+import asyncio      # asyncio.start_server used to serve many concurrently connected clients from one thread
+import concurrent.futures   # ThreadPoolExecutor used to keep request dispatch off the asyncio event loop
+import collections  # collections.deque used to match pipelined responses to the requests that they answer
+import zlib         # zlib.crc32 used as a stable (process-independent) hash of queue names
+import subprocess   # subprocess.Popen used to start the processes that serve a sharded broker's queues
+import heapq        # heapq used to order timers by due time
+import random       # random.uniform used to add jitter to retry delays
+import time         # time.monotonic used to time timers
+import array        # array.array used to index messages held in contiguous storage
+import os           # os.listdir, os.makedirs, os.remove used to manage the files that hold queues on disk
+import shutil       # shutil.rmtree used to remove the directories of unregistered queues
+import mmap         # mmap.mmap used to read and write queue segments in place
+import struct       # struct.Struct used to encode record headers and index entries of queue segments
+import bisect       # bisect.bisect_right used to find messages in segments and in segment indexes
+import urllib.parse # urllib.parse.quote used to form directory names from queue names
+import pickle       # pickle used to write and read snapshots of registry state
+import datetime     # datetime.datetime.fromisoformat used to read the times to which readers seek
+
+
+# *************************************************************************************************************************
+# utility classes
+# *************************************************************************************************************************
+
+# =========================================================================================================================
+# metaclass for converting classes to singletons
+# =========================================================================================================================
+
+class Singleton(type):
+  _instances = {}
+  def __call__(cls, *args, **kwargs):
+    if cls not in cls._instances:      # instantiate shared class instance on first object instantiation
+      Singleton._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
+    else:   # reinvoke __init__ for the lone instance on subsequent instantiations.  remove clause if re-init not desired
+      Singleton._instances[cls].__init__(*args, **kwargs)
+    return Singleton._instances[cls]
+
+# =========================================================================================================================
+# metaclass for compiling map method aliases into classes
+#
+# a class's class_aliases, a list of alias maps in the form described below for kwargs['entity_aliases'], names the
+# aliases that every instance of the class supports.  when the class is created, each alias is bound to the class's
+# method for the name that it aliases, so that an aliased call costs the same as a direct one.
+# aliases are recompiled for each subclass, so that they follow the subclass's overrides, and a method that a class
+# defines under an alias's name takes precedence over the alias
+# =========================================================================================================================
+
+class MethodAliases(type):
+  def __init__(cls, name, bases, namespace):
+    super().__init__(name, bases, namespace)
+    for alias, original in MethodAliases.aliases(getattr(cls, 'class_aliases', [])):
+      if alias not in namespace and hasattr(cls, original):  setattr(cls, alias, getattr(cls, original))
+  #
+  # return the (alias, name aliased) pairs that a list of alias maps calls for.  malformed alias maps call for none
+  def aliases(alias_maps):
+    pairs = []
+    for alias_map in alias_maps:
+      try:
+        ((frum, from_alias), (to, to_alias)), map_pairs = alias_map, []
+        if from_alias == frum:  from_alias = None     # a name aliased to itself needs no alias
+        if to_alias == to:      to_alias = None
+        for (term, term_alias) in [ (frum, from_alias), (to, to_alias) ]:
+          if term_alias is not None:
+            map_pairs += [ ('register_'+term_alias, 'register_'+term), (term_alias+'s', term+'s'), ('unregister_'+term_alias, 'unregister_'+term) ]
+        if from_alias is not None or to_alias is not None:
+          (from_name, to_name) = (frum if from_alias is None else from_alias, to if to_alias is None else to_alias)
+          map_pairs += [ (from_name+'s_for_'+to_name, frum+'s_for_'+to), (to_name+'s_for_'+from_name, to+'s_for_'+frum) ]
+        pairs += map_pairs
+      except (TypeError, ValueError):
+        pass
+    return pairs
+
+# =========================================================================================================================
+# class that calls functions after given delays, from one thread of its own
+#
+# design notes:
+# -.  pending calls are kept in a heap, ordered by due time;  the thread sleeps until the earliest is due, or until
+#     an earlier call is added
+# -.  calls are made one at a time, so that a slow call delays the calls that follow it
+# -.  calls added before start(), or left pending at stop(), are not made
+# =========================================================================================================================
+
+class TimerHeap(object):
+  def __init__(self):
+    self.timers, self.count, self.condition, self.thread, self.stopping = [], 0, threading.Condition(), None, False
+  #
+  # start the timer thread, returning the heap
+  def start(self):
+    with self.condition:  self.stopping = False
+    self.thread = threading.Thread(name=self.__class__.__name__, target=self.run, daemon=True)
+    self.thread.start()
+    return self
+  #
+  # stop the timer thread, dropping any pending calls
+  def stop(self):
+    with self.condition:
+      self.stopping, self.timers = True, []
+      self.condition.notify()
+    if self.thread is not None:  self.thread.join()
+    self.thread = None
+  #
+  # call function(*args) once delay seconds have passed
+  def call_later(self, delay, function, *args):
+    with self.condition:
+      heapq.heappush(self.timers, (time.monotonic() + delay, self.count, function, args))
+      self.count += 1                         # breaks ties between calls that are due at the same time, in order of addition
+      self.condition.notify()
+  #
+  # return the number of pending calls
+  def pending(self):
+    with self.condition:  return len(self.timers)
+  #
+  # body of the timer thread
+  def run(self):
+    while True:
+      with self.condition:
+        while not self.stopping and (not self.timers or self.timers[0][0] > time.monotonic()):
+          self.condition.wait(None if not self.timers else self.timers[0][0] - time.monotonic())
+        if self.stopping:  return
+        due, count, function, args = heapq.heappop(self.timers)
+      try:
+        function(*args)
+      except Exception as e:
+        print("{}: call to {} failed ({})".format(self.me('run'), function, e), file=sys.stderr)
+  #
+  # auxiliary methods
+  def me(self, methodname):  return "{}.{}".format(self.__class__.__name__, methodname)
+  def __repr__(self):        return "{}()".format(self.__class__.__name__)
+
+# ===========================================================================================================================
+# mixin class for supporting aliaising of map methods in a class that
+# -.  maps elements in a first 'from' domain to elements in a second 'to' domain
+# -.  whose methods follow the following naming conventions:
+#
+#     -. register( fromelt, toelt )  -    add element ( fromelt, { toelt } )      to a map
+#     -. register_from( fromelt ) -       add element ( fromelt, { } )            to a map
+#     -. register_to( toelt ) -           add element ( toelt, { } }              to the map's inverse  (where supported)
+#     -. froms( ) -                       return set of all elements in map's domain
+#     -. tos_for_from( fromelt ) -        return set of all elements toelt such that map( from ) = toelt
+#     -. tos( ) -                         return set of all elements in map's codomain
+#     -. tos_for_from( fromelt ) -        return set of all elements toelt such that map( from ) = toelt
+#     -. unregister( fromelt, toelt )  -  remove element  ( fromelt, { toelt } ) from a map   [not aliased]
+#     -. unregister_from( fromelt ) -     remove all elements from the map whose domain element is fromelt
+#     -. unregister_to( toelt ) -         remove all elements from the map whose codomain element is toelt
+#
+#  parameters:
+# -. kwargs['entity_aliases'] -
+#       a list of values of the form  (( from, ( from_alias | None )), ( to, ( to_alias | None )))
+#       each of which specifies how add_aliases supports aliasing of map name procedures, with
+#    -.  instances of 'from' mapped to 'from_alias' (if present) or themselves (if None)
+#    -.  instances of 'to'   ampped to 'to_alias;   (if present) or themselves (if None)
+#
+#  effect:  supports parallel set of methods, with
+#    -.  from in method names replaced with from_alias
+#    -.  to   in method names replaced with to_alias
+#
+#  example:
+#    assume entity_aliases: [(( 'lodging', 'motel' ), ( 'locale', 'state' ))]
+#    assumed names with aliases would then be as follows:
+#
+#     -. register()  -                    (no alias)
+#     -. register_lodging( ) -            register_motel()
+#     -. register_locale( ) -             register_state()
+#     -. lodgings( ) -                    motels()
+#     -. locales_for_lodging( ) -         states_for_motel()
+#     -. locales( ) -                     states()
+#     -. lodgings_for_locale( ) -         motels_for_state()
+#     -. unregister( )  -                 (no alias)
+#     -. unregister_lodging( ) -          unregister_motel()
+#     -. unregister_locale( ) -           unregister_state()
+#
+#   With a map of [(( 'lodging', 'motel' ), ( 'locale', None ))], the following aliases would be supported:
+#
+#     -. register()  -                    (no alias)
+#     -. register_lodging( ) -            register_motel()
+#     -. register_locale( ) -             (no alias)
+#     -. lodgings( ) -                    motels()
+#     -. locales_for_lodging( ) -         locales_for_motel()
+#     -. locales( ) -                     (no alias)
+#     -. lodgings_for_locale( ) -         motels_for_locale()
+#     -. unregister( )  -                 (no alias)
+#     -. unregister_lodging( ) -          unregister_motel()
+#     -. unregister_locale( ) -           (no alias)
+#
+#  design note:  aliases that a class always supports belong in its class_aliases, which MethodAliases compiles into the
+#                class.  add_aliases binds the aliases that only some instances support to those instances, as bound methods.
+#                either way, an aliased call is an ordinary attribute lookup
+# =========================================================================================================================
+
+class AddMapMethodAliases(object, metaclass=MethodAliases):
+  class_aliases = []
+  aliases_keyvalue = None
+  #
+  # add_aliases:  bind the aliases that the class lacks to this instance
+  def add_aliases(self, **kwargs):
+    if 'entity_aliases' in kwargs:
+      self.aliases_keyvalue = kwargs['entity_aliases']
+      for alias, original in MethodAliases.aliases(self.aliases_keyvalue):
+        if hasattr(self, original) and getattr(self.__class__, alias, None) is not getattr(self.__class__, original, None):
+          setattr(self, alias, getattr(self, original))
+  #
+  # auxiliary methods
+  #
+  def alias_keywords(self):
+    return {} if self.aliases_keyvalue is None else { 'entity_aliases' : self.aliases_keyvalue }
+
+
+# ============================================================================================================
+# collection class for supporting
+# -.  1<->N associations between domain, codmain objects
+# *.  allows for
+# -.  registering and updating (domain, codomain) bindings
+# -.  removing a particular (domain, codomain) binding from the collection
+# -.  removing a domain element from collection and all associated (domain element, codomain element)
+# -.  removing a codomain element from collection  and all associated (domain element, codomain element)
+# -.  aliasing the names of the methods, using Alias
+# *.  serializes access to the forward and reverse maps, so that a map may be shared by concurrent request handlers.
+#     the retrieval methods return copies of the maps' sets, which callers may then traverse without locking
+# ============================================================================================================
+#
+class InvertibleMap(AddMapMethodAliases):
+  #
+  # __init__:  initialize the two-way mapping.
+  #
+  def __init__(self, **kwargs):
+    #
+    # pre-populate maps if explicitly requested to do so
+    self.forward_map, self.reverse_map, self.lock = {}, {}, threading.RLock()
+    if 'forward_map' in kwargs:
+      for (domain_element, codomain_element_set) in kwargs['forward_map'].items():
+        for codomain_element in codomain_element_set:
+          self.register(domain_element, codomain_element)
+    #
+    # support easier-to-read method names for names containing 'domain', 'codomain'
+    super().__init__()
+    self.add_aliases(**kwargs)
+  #
+  # register domain_element <-> codomain_element element binding
+  def register(self, domain_element, codomain_element):
+    with self.lock:
+      if domain_element not in self.forward_map: self.forward_map[domain_element] = set([])
+      self.forward_map[domain_element] |= {codomain_element}
+      if codomain_element not in self.reverse_map: self.reverse_map[codomain_element] = set([])
+      self.reverse_map[codomain_element] |= {domain_element}
+  #
+  # break all bindings for domain_element
+  def unregister_domain_element(self, domain_element):
+    with self.lock:
+      if domain_element not in self.forward_map: return
+      for codomain_element in self.forward_map[domain_element]:
+        self.reverse_map[codomain_element] -= { domain_element }
+        if self.reverse_map[codomain_element] == set(): del self.reverse_map[codomain_element]
+      del self.forward_map[domain_element]
+  #
+  # break all bindings for codomain_element
+  def unregister_codomain_element(self, codomain_element):
+    with self.lock:
+      if codomain_element not in self.reverse_map: return
+      for domain_element in self.reverse_map[codomain_element]:
+        self.forward_map[domain_element] -= { codomain_element }
+        if self.forward_map[domain_element] == set(): del self.forward_map[domain_element]
+      del self.reverse_map[codomain_element]
+  #
+  # break a specific domain_element <-> codomain_element element binding
+  def unregister(self, domain_element, codomain_element):
+    with self.lock:
+      if domain_element in self.forward_map:
+        self.forward_map[domain_element] -= { codomain_element }
+      if codomain_element in self.reverse_map:
+        self.reverse_map[codomain_element] -= { domain_element }
+  #
+  # retrieve all domain elements
+  def domain_elements(self):
+    with self.lock:  return set(self.forward_map.keys())
+  #
+  # retrieve all codomain elements bound to domain_element
+  def codomain_elements_for_domain_element(self, domain_element):
+    with self.lock:  return set(self.forward_map.get(domain_element, set([])))
+  #
+  # retrieve all codomain elements
+  def codomain_elements(self):
+    with self.lock:  return set(self.reverse_map.keys())
+  #
+  # retrieve all domain elements bound to codomain_element
+  def domain_elements_for_codomain_element(self, codomain_element):
+    with self.lock:  return set(self.reverse_map.get(codomain_element, set([])))
+  #
+  # auxiliary methods
+  # the forward map suffices here, because the backward map inverts the forward
+  #
+  def me(self, methodname):    return "{}.{}".format(self.__class__.__name__, methodname)
+  def __repr__(self):
+    return "{}(**{!r})".format( self.__class__.__name__, self.state_by_keyword())
+  def __eq__(self, other):   return isinstance( other, self.__class__ ) and self.state_by_keyword() == other.state_by_keyword()
+  def state_by_keyword(self):
+    keywords = { 'forward_map': self.forward_map }
+    keywords.update( self.alias_keywords() )
+    return keywords
+
+
+# ************************************************************************************************************
+# classes for binding message collections to their defining properties: i.e.,
+# -.  their associated  buffers
+# -.  the names of the entities that use them
+# ************************************************************************************************************
+
+# ============================================================================================================
+# classes for buffering groups of messages by name
+# ============================================================================================================
+
+# --------------------------------------------------------------------------------------
+# class that corresponds to a message buffer - i.e., a list of messages
+#
+# messages are addressed by their absolute positions in the stream, starting from 0.
+# once a prefix of the stream is no longer needed, trim() drops it, leaving base_offset as
+# the position of the first message still held
+# --------------------------------------------------------------------------------------
+#
+class MessageBuffer(object):
+  __slots__ = ('message_list', 'base_offset')
+  #
+  # __init__:  initialize the buffer.
+  #
+  # kwargs parameters (all optional):
+  # *.  'buffer' - if present, the message list will be prepopulated with the values in this list
+  # *.  'base_offset' - the position of the message list's first message (default: 0)
+  #
+  def __init__(self, **kwargs):
+    # pre-populate buffer if explicitly requested to do so
+    self.message_list = kwargs.get('buffer', [])
+    self.base_offset = kwargs.get('base_offset', 0)
+  #
+  # add next message to stream
+  def append_message(self, message):  self.message_list += [message]
+  #
+  # add next messages to stream, in order
+  def append_messages(self, messages):  self.message_list += messages
+  #
+  # return message at position k in stream, or None if position k is trimmed or not yet filled
+  def retrieve_message(self, k):
+    k -= self.base_offset
+    return None if k not in range(len(self.message_list)) else self.message_list[k]
+  #
+  # return position of first message held in stream, and position that next message will take
+  def first_position(self):  return self.base_offset
+  def end_position(self):    return self.base_offset + len(self.message_list)
+  #
+  # drop the messages that precede position k
+  def trim(self, k):
+    dropped = min(k, self.end_position()) - self.base_offset
+    if dropped > 0:
+      del self.message_list[:dropped]
+      self.base_offset += dropped
+  #
+  # release the storage that holds the buffer's messages, once the buffer is unregistered
+  def discard(self):  self.message_list = []
+  #
+  # make the messages appended so far durable:  a buffer held in memory has nothing to do, in one step or in three
+  # (see SegmentedMessageBuffer.begin_sync)
+  def sync(self):  pass
+  def begin_sync(self):  return []
+  def flush(self, flushes):  pass
+  def end_sync(self, flushes, flushed):  pass
+  #
+  # record an entry of the buffer's time index, and return those recorded:  a buffer held in memory records none,
+  # since its time index lasts as long as it does (see SegmentedMessageBuffer.record_stamp)
+  def record_stamp(self, timestamp, position):  pass
+  def stamps(self):  return []
+  #
+  # auxiliary methods
+  def __repr__(self):          return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
+  def __eq__(self, other):     return isinstance( other, self.__class__ ) and self.state_by_keyword() == other.state_by_keyword()
+  def state_by_keyword(self):
+    keywords = { 'buffer': self.message_list }
+    if self.base_offset != 0:  keywords.update( { 'base_offset': self.base_offset } )
+    return keywords
+
+
+# --------------------------------------------------------------------------------------
+# class that corresponds to a message buffer whose messages are held in compact form:
+# i.e., as UTF-8 payloads, packed into fixed-size chunks of bytes, and indexed by arrays of
+# payload positions and lengths, rather than as a list of string objects
+#
+# design notes:
+# -.  the class may stand in for MessageBuffer:  it has the same methods, addresses messages by the same
+#     absolute positions, and trims the same way.  retrieve_message returns a (new) string;
+#     retrieve_view returns a memoryview of the payload, without copying it
+# -.  chunks are allocated at full size and never resized, so memoryviews remain valid as messages are appended.
+#     a message that doesn't fit in what remains of a chunk starts the next chunk;  a message that is larger
+#     than a chunk gets a chunk of its own size
+# -.  trimming drops chunks whose messages are all trimmed.  the index arrays are compacted once trimmed
+#     entries make up half of them
+# --------------------------------------------------------------------------------------
+#
+class CompactMessageBuffer(object):
+  #
+  # __init__:  initialize the buffer.
+  #
+  # kwargs parameters (all optional):
+  # *.  'buffer' - if present, the buffer will be prepopulated with the messages in this list
+  # *.  'base_offset' - the position of the first of these messages (default: 0)
+  # *.  'chunk_size' - the number of bytes in each chunk (default: 1 MiB)
+  #
+  def __init__(self, **kwargs):
+    self.chunk_size, self.base_offset = kwargs.get('chunk_size', 1 << 20), kwargs.get('base_offset', 0)
+    self.chunks = {}                                              # chunk number -> chunk
+    self.starts, self.lengths = array.array('Q'), array.array('L')   # byte position and length of each message's payload
+    self.skipped = 0                                              # index entries that belong to trimmed messages
+    self.fill = 0                                                 # byte position for the next message's payload
+    for message in kwargs.get('buffer', []):  self.append_message(message)
+  #
+  # add next message to stream
+  def append_message(self, message):
+    payload = message.encode('utf-8')
+    chunk, offset = divmod(self.fill, self.chunk_size)
+    if offset > 0 and offset + len(payload) > self.chunk_size:  chunk, offset = chunk + 1, 0
+    if offset == 0:  self.chunks[chunk] = bytearray(max(self.chunk_size, len(payload)))
+    self.chunks[chunk][offset:offset+len(payload)] = payload
+    start = chunk * self.chunk_size + offset
+    self.starts.append(start)
+    self.lengths.append(len(payload))
+    self.fill = start + len(payload)
+    if len(payload) > self.chunk_size:  self.fill = -(-self.fill // self.chunk_size) * self.chunk_size   # skip the rest of an outsize chunk
+  #
+  # add next messages to stream, in order
+  def append_messages(self, messages):
+    for message in messages:  self.append_message(message)
+  #
+  # return the payload of the message at position k in stream as a memoryview, or None if position k is trimmed or not yet filled
+  def retrieve_view(self, k):
+    k -= self.base_offset
+    if k not in range(len(self.starts) - self.skipped):  return None
+    chunk, offset = divmod(self.starts[self.skipped + k], self.chunk_size)
+    return memoryview(self.chunks[chunk])[offset:offset+self.lengths[self.skipped + k]]
+  #
+  # return message at position k in stream, or None if position k is trimmed or not yet filled
+  def retrieve_message(self, k):
+    view = self.retrieve_view(k)
+    return None if view is None else str(view, 'utf-8')
+  #
+  # return position of first message held in stream, and position that next message will take
+  def first_position(self):  return self.base_offset
+  def end_position(self):    return self.base_offset + len(self.starts) - self.skipped
+  #
+  # drop the messages that precede position k
+  def trim(self, k):
+    dropped = min(k, self.end_position()) - self.base_offset
+    if dropped <= 0:  return
+    self.skipped, self.base_offset = self.skipped + dropped, self.base_offset + dropped
+    first_chunk = (self.starts[self.skipped] if self.skipped < len(self.starts) else self.fill) // self.chunk_size
+    for chunk in [ chunk for chunk in self.chunks if chunk < first_chunk ]:  del self.chunks[chunk]
+    if self.skipped * 2 >= len(self.starts):
+      del self.starts[:self.skipped]
+      del self.lengths[:self.skipped]
+      self.skipped = 0
+  #
+  # release the storage that holds the buffer's messages, once the buffer is unregistered
+  def discard(self):  self.chunks = {}
+  #
+  # make the messages appended so far durable:  a buffer held in memory has nothing to do, in one step or in three
+  # (see SegmentedMessageBuffer.begin_sync)
+  def sync(self):  pass
+  def begin_sync(self):  return []
+  def flush(self, flushes):  pass
+  def end_sync(self, flushes, flushed):  pass
+  #
+  # record an entry of the buffer's time index, and return those recorded:  a buffer held in memory records none,
+  # since its time index lasts as long as it does (see SegmentedMessageBuffer.record_stamp)
+  def record_stamp(self, timestamp, position):  pass
+  def stamps(self):  return []
+  #
+  # auxiliary methods
+  def __repr__(self):          return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
+  def __eq__(self, other):     return isinstance( other, self.__class__ ) and self.state_by_keyword() == other.state_by_keyword()
+  def state_by_keyword(self):
+    keywords = { 'buffer': [ self.retrieve_message(k) for k in range(self.first_position(), self.end_position()) ] }
+    if self.base_offset != 0:        keywords.update( { 'base_offset': self.base_offset } )
+    if self.chunk_size != 1 << 20:   keywords.update( { 'chunk_size': self.chunk_size } )
+    return keywords
+
+
+# --------------------------------------------------------------------------------------
+# class that corresponds to a message buffer whose messages are held on disk, in an append-only log
+#
+# design notes:
+# -.  each buffer keeps its messages in its own directory, as a series of segments.  a segment is a file of
+#     fixed size, named for the position of its first message (its base), that holds messages as records:
+#     a 4-byte header, which holds the payload's length plus 1, followed by the payload.  a header of 0 marks
+#     the unused end of a segment.  a message that is larger than a segment gets a segment of its own size
+# -.  each segment has a sparse index:  a file of (relative position, byte position) pairs, with one entry per
+#     'index_interval' bytes of records.  finding a message is a binary search for its segment, a binary search
+#     of that segment's index, a short scan of record headers, and a slice of the segment's memory map
+# -.  reopening a buffer - e.g., on restart - opens its last segment, scanning records that follow that segment's
+#     last index entry.  other segments are opened when first read.  the buffer's lock guards its open segments, so
+#     that threads that first read a segment at once open it once, between them
+# -.  trim drops segments whose messages are all trimmed.  positions trimmed within a segment are not recorded
+#     on disk:  on reopening, the buffer starts with its first segment
+# -.  appended messages reach disk when the operating system writes them back, or when sync() flushes them.
+#     a segment's index entries are written ahead of its records, so on reopening, trailing entries that point
+#     at records that never reached disk are dropped
+# -.  each segment also has a file of (stamp, position) pairs:  the entries of the buffer's time index (see TimeIndex)
+#     that were added while the segment was being appended to.  the time index is rebuilt from them on reopening,
+#     and they are dropped with their segment
+# --------------------------------------------------------------------------------------
+#
+class SegmentedMessageBuffer(object):
+  #
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  # one segment of the log, with its index
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  #
+  class Segment(object):
+    header = struct.Struct('!I')     # payload length + 1
+    entry  = struct.Struct('!IQ')    # position relative to the segment's base, byte position in the segment
+    stamp  = struct.Struct('!dQ')    # time index entry:  stamp, position in the buffer
+    #
+    def __init__(self, path, base, size, interval):
+      self.base, self.interval = base, interval
+      self.log_name, self.index_name, self.times_name = [ os.path.join(path, '{:020d}.{}'.format(base, kind)) for kind in ('log', 'index', 'times') ]
+      if os.path.exists(self.log_name):  self.file = open(self.log_name, 'r+b')
+      else:
+        self.file = open(self.log_name, 'w+b')
+        self.file.truncate(size)
+      self.map = mmap.mmap(self.file.fileno(), 0)
+      #
+      # load the index, ignoring any partially written last entry
+      self.offsets, self.positions = array.array('L'), array.array('Q')
+      if os.path.exists(self.index_name):
+        with open(self.index_name, 'rb') as index:  entries = index.read()
+        for offset, position in self.entry.iter_unpack(entries[:len(entries) - len(entries) % self.entry.size]):
+          self.offsets.append(offset)
+          self.positions.append(position)
+      while self.positions and (self.positions[-1] >= len(self.map) or self.header.unpack_from(self.map, self.positions[-1])[0] == 0):
+        self.offsets.pop()
+        self.positions.pop()
+      self.index = open(self.index_name, 'ab')
+      self.times = open(self.times_name, 'ab')
+      #
+      # find the end of the records, scanning from the last indexed record
+      self.count, self.fill = (self.offsets[-1], self.positions[-1]) if self.offsets else (0, 0)
+      self.indexed = self.fill
+      self.cursor = (0, 0)               # position and byte position of the record last read, from which sequential reads resume
+      while self.next_record(self.fill) is not None:  self.count, self.fill = self.count + 1, self.next_record(self.fill)
+      self.synced = self.fill              # byte position through which records are known to be on disk
+    #
+    # return the byte position of the record that follows the record at byte position k, or None if there is no record at k
+    def next_record(self, k):
+      if k + self.header.size > len(self.map):  return None
+      length = self.header.unpack_from(self.map, k)[0]
+      return None if length == 0 else k + self.header.size + length - 1
+    #
+    # add payload to segment, returning False if it doesn't fit
+    def append(self, payload):
+      end = self.fill + self.header.size + len(payload)
+      if end > len(self.map):  return False
+      if self.fill - self.indexed >= self.interval:
+        self.index.write(self.entry.pack(self.count, self.fill))
+        self.index.flush()
+        self.offsets.append(self.count)
+        self.positions.append(self.fill)
+        self.indexed = self.fill
+      self.map[self.fill+self.header.size:end] = payload
+      self.header.pack_into(self.map, self.fill, len(payload) + 1)
+      self.count, self.fill = self.count + 1, end
+      return True
+    #
+    # return the payload of the k-th record in the segment
+    def read(self, k):
+      i = bisect.bisect_right(self.offsets, k)
+      offset, position = (self.offsets[i-1], self.positions[i-1]) if i > 0 else (0, 0)
+      if offset < self.cursor[0] <= k:  offset, position = self.cursor
+      for _ in range(k - offset):  position = self.next_record(position)
+      self.cursor = (k, position)
+      length = self.header.unpack_from(self.map, position)[0] - 1
+      return self.map[position+self.header.size:position+self.header.size+length]
+    #
+    # flush the records written since the last sync to disk
+    def sync(self):
+      if self.fill == self.synced:  return
+      self.flush(self.synced, self.fill)
+      self.synced = self.fill
+    #
+    # flush the records between byte positions synced and fill to disk.  a new segment's first flush also flushes the file's size
+    def flush(self, synced, fill):
+      start = synced - synced % mmap.ALLOCATIONGRANULARITY
+      self.map.flush(start, fill - start)
+      if synced == 0:  os.fsync(self.file.fileno())
+    #
+    # record a time index entry, ahead of the record that it stamps, as index entries are
+    def record_stamp(self, timestamp, position):
+      self.times.write(self.stamp.pack(timestamp, position))
+      self.times.flush()
+    #
+    # return the time index entries recorded in the segment with the given base, ignoring any partially written last entry.
+    # the segment need not be open
+    def stamps(path, base):
+      name = os.path.join(path, '{:020d}.times'.format(base))
+      if not os.path.exists(name):  return []
+      with open(name, 'rb') as times:  entries = times.read()
+      stamp = SegmentedMessageBuffer.Segment.stamp
+      return list(stamp.iter_unpack(entries[:len(entries) - len(entries) % stamp.size]))
+    #
+    def close(self):
+      self.map.close()
+      self.file.close()
+      self.index.close()
+      self.times.close()
+    #
+    def remove(self):
+      self.close()
+      os.remove(self.log_name)
+      os.remove(self.index_name)
+      os.remove(self.times_name)
+  #
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  # __init__:  open the buffer, creating its directory if need be
+  #
+  # kwargs parameters:
+  # *.  'directory' - the directory that holds the directories of buffers (required)
+  # *.  'name' - the name of the buffer, from which the name of its directory is formed (required)
+  # *.  'segment_size' - the number of bytes in each segment (default: 16 MiB)
+  # *.  'index_interval' - the number of bytes of records between a segment's index entries (default: 1 KiB)
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  #
+  def __init__(self, **kwargs):
+    self.directory, self.name = kwargs['directory'], kwargs['name']
+    self.segment_size, self.index_interval = kwargs.get('segment_size', 1 << 24), kwargs.get('index_interval', 1 << 10)
+    self.path = os.path.join(self.directory, urllib.parse.quote(self.name, safe=''))
+    os.makedirs(self.path, exist_ok=True)
+    self.bases = sorted( int(filename[:-len('.log')]) for filename in os.listdir(self.path) if filename.endswith('.log') ) or [0]
+    self.segments = {}                                  # base -> segment, for the segments opened so far
+    self.lock = threading.Lock()                        # guards self.segments
+    self.active = self.segment(self.bases[-1])
+    self.unsynced = set()                               # bases of the segments appended to since the last sync
+    self.syncing, self.retired, self.discarded = 0, [], False     # syncs begun but not ended, and what they hold up (see begin_sync)
+    self.base_offset = self.bases[0]
+  #
+  # return the segment with the given base, opening it if need be.  a segment already open is found without the lock
+  def segment(self, base, size=None):
+    segment = self.segments.get(base)
+    if segment is not None:  return segment
+    with self.lock:
+      if base not in self.segments:  self.segments[base] = self.Segment(self.path, base, size or self.segment_size, self.index_interval)
+      return self.segments[base]
+  #
+  # add next message to stream, starting a new segment if the message doesn't fit in the current one
+  def append_message(self, message):
+    payload = message.encode('utf-8')
+    if not self.active.append(payload):
+      base = self.end_position()
+      self.bases.append(base)
+      self.active = self.segment(base, max(self.segment_size, self.Segment.header.size + len(payload)))
+      self.active.append(payload)
+    self.unsynced.add(self.active.base)
+  #
+  # add next messages to stream, in order
+  def append_messages(self, messages):
+    for message in messages:  self.append_message(message)
+  #
+  # return message at position k in stream, or None if position k is trimmed or not yet filled
+  def retrieve_message(self, k):
+    if k not in range(self.first_position(), self.end_position()):  return None
+    base = self.bases[bisect.bisect_right(self.bases, k) - 1]
+    return str(self.segment(base).read(k - base), 'utf-8')
+  #
+  # return position of first message held in stream, and position that next message will take
+  def first_position(self):  return self.base_offset
+  def end_position(self):    return self.active.base + self.active.count
+  #
+  # drop the messages that precede position k, removing the segments that hold only such messages
+  def trim(self, k):
+    k = min(k, self.end_position())
+    if k <= self.base_offset:  return
+    self.base_offset = k
+    while len(self.bases) > 1 and self.bases[1] <= k:
+      base = self.bases.pop(0)
+      segment = self.segment(base)
+      with self.lock:  del self.segments[base]
+      if self.syncing:  self.retired.append(segment)
+      else:             segment.remove()
+  #
+  # make the messages appended so far durable, flushing the segments appended to since the last sync
+  def sync(self):
+    flushes, flushed = self.begin_sync(), False
+    try:
+      self.flush(flushes)
+      flushed = True
+    finally:
+      self.end_sync(flushes, flushed)
+  #
+  # sync, in three steps, so that a caller that serializes access to the buffer - e.g., MessageBufferCollection - need
+  # serialize only the first and the last, leaving the buffer free for appends and reads while it waits on the disk:
+  # -.  begin_sync - return the flushes that would make the messages appended so far durable:  (segment, from, to) byte ranges
+  # -.  flush      - make the flushes.  appends write only past the flushes' ranges, and segments that are trimmed or
+  #                  discarded meanwhile are held open until the last sync in progress ends
+  # -.  end_sync   - record the flushes' ranges as synced, or, if they weren't flushed, as still to be synced
+  def begin_sync(self):
+    flushes = []
+    for base in sorted(self.unsynced):
+      if base in self.segments and self.segments[base].synced < self.segments[base].fill:
+        flushes.append( (self.segments[base], self.segments[base].synced, self.segments[base].fill) )
+    self.unsynced, self.syncing = set(), self.syncing + 1
+    return flushes
+  def flush(self, flushes):
+    for segment, synced, fill in flushes:  segment.flush(synced, fill)
+  def end_sync(self, flushes, flushed):
+    for segment, synced, fill in flushes:
+      if flushed:  segment.synced = max(segment.synced, fill)
+      else:        self.unsynced.add(segment.base)
+    self.syncing -= 1
+    if self.syncing == 0:
+      for segment in self.retired:  segment.remove()
+      self.retired = []
+      if self.discarded:  self.discard()
+  #
+  # record an entry of the buffer's time index - for the message at position, which is about to be appended - with the
+  # segment being appended to, and return the entries recorded for the messages that the buffer holds, for rebuilding
+  # the index.  entries for messages that never reached disk are dropped
+  def record_stamp(self, timestamp, position):  self.active.record_stamp(timestamp, position)
+  def stamps(self):
+    end = self.end_position()
+    return [ (stamp, position) for base in self.bases for (stamp, position) in self.Segment.stamps(self.path, base) if position < end ]
+  #
+  # close the buffer's files, leaving its messages on disk
+  def close(self):
+    with self.lock:
+      segments, self.segments = self.segments, {}
+    for segment in segments.values():  segment.close()
+  #
+  # remove the buffer's files, once the buffer is unregistered - or, if a sync is in progress, once it ends
+  def discard(self):
+    self.discarded = True
+    if self.syncing:  return
+    self.close()
+    shutil.rmtree(self.path, ignore_errors=True)
+  #
+  # auxiliary methods
+  def __repr__(self):          return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
+  def __eq__(self, other):     return isinstance( other, self.__class__ ) and self.state_by_keyword() == other.state_by_keyword()
+  def state_by_keyword(self):
+    keywords = { 'directory': self.directory, 'name': self.name }
+    if self.segment_size != 1 << 24:      keywords.update( { 'segment_size': self.segment_size } )
+    if self.index_interval != 1 << 10:    keywords.update( { 'index_interval': self.index_interval } )
+    return keywords
+
+
+# --------------------------------------------------------------------------------------
+# class that corresponds to a time index for a message buffer - i.e., a sparse map from append times to positions
+#
+# design notes:
+# -.  each message is stamped as it is appended.  stamps never decrease, even if the clock is set back
+# -.  the index holds one (stamp, position) entry per 'resolution' seconds of stamps:  an entry is added only for
+#     a message whose stamp is at least 'resolution' past the last entry's.  the messages between two entries
+#     therefore bear stamps within 'resolution' of the first entry's
+# -.  position() finds, by binary search, the first message that may bear a stamp at or after a given time.
+#     it errs early, by less than 'resolution', rather than skip a message.  the stamps of messages before the first
+#     entry's aren't known - e.g., those of messages appended before a restart, by a buffer that doesn't record its
+#     entries - so a time before the first entry's maps to position 0:  i.e., to the first message held
+# -.  an index may start with entries recorded earlier, and may record the entries that it adds (see
+#     SegmentedMessageBuffer.record_stamp), so that it outlasts a restart
+# --------------------------------------------------------------------------------------
+#
+class TimeIndex(object):
+  #
+  # kwargs parameters (all optional):
+  # *.  'resolution' - the least number of seconds between the index's entries (default: 0.1)
+  # *.  'entries'    - (stamp, position) pairs with which to start the index:  e.g., those that a buffer recorded
+  # *.  'recorder'   - if present, a function that's called as recorder(stamp, position) for each entry added
+  #
+  def __init__(self, **kwargs):
+    self.resolution, self.recorder = kwargs.get('resolution', 0.1), kwargs.get('recorder', None)
+    self.stamps, self.positions = array.array('d'), array.array('Q')
+    for stamp, position in kwargs.get('entries', []):
+      self.stamps.append(stamp)
+      self.positions.append(position)
+    self.latest = self.stamps[-1] if self.stamps else None       # the latest stamp given
+  #
+  # stamp the message at position with timestamp, or with the latest stamp, if that's later, returning the stamp
+  def add(self, position, timestamp):
+    if self.latest is not None:  timestamp = max(timestamp, self.latest)
+    self.latest = timestamp
+    if not self.stamps or timestamp >= self.stamps[-1] + self.resolution:
+      if self.recorder is not None:  self.recorder(timestamp, position)
+      self.stamps.append(timestamp)
+      self.positions.append(position)
+    return timestamp
+  #
+  # return the position of the first message that may be stamped at or after timestamp, or None if no message is.
+  # for a time before the first entry's, that's position 0:  i.e., the first message held
+  def position(self, timestamp):
+    k = bisect.bisect_right(self.stamps, timestamp) - 1
+    if k < 0:  return 0
+    if timestamp < self.stamps[k] + self.resolution:  return self.positions[k]
+    return self.positions[k+1] if k+1 < len(self.stamps) else None
+  #
+  # drop the entries for the messages that precede position k
+  def trim(self, k):
+    i = bisect.bisect_right(self.positions, k) - 1
+    if i > 0:
+      del self.stamps[:i]
+      del self.positions[:i]
+    if self.positions and self.positions[0] < k:  self.positions[0] = k
+  #
+  # auxiliary methods
+  def __repr__(self):          return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
+  def state_by_keyword(self):  return { 'resolution': self.resolution }
+
+
+# --------------------------------------------------------------------------------------
+# collection class for MessageBuffer objects
+# *.  allows for registering, looking up, unregistering message buffers by name
+# *.  assures
+# -.  uniqueness of names in collection
+# -.  consistency of state on attempted re-registration
+# *.  serializes access to the collection and its buffers through an RLock, self.lock, which the classes that
+#     share the collection also use to make their own compound updates atomic
+# --------------------------------------------------------------------------------------
+#
+class MessageBufferCollection(metaclass=Singleton):
+  #
+  # __init__:  initialize the collection
+  #
+  # kwargs parameters (all optional):
+  # *.  'buffers' - if present, the collection of buffers will be pre-populated with the buffer objects in this list:
+  #       e.g.,  MessageBufferCollection(**{'buffers': {'foo': MessageBuffer(**{'buffer': []})}})
+  #              pre-populates the collection with one, empty buffer called 'foo'
+  # *.  'buffer_factory' - if present, the class used to create newly registered buffers:  e.g., CompactMessageBuffer.
+  #       otherwise, MessageBuffer, unless an earlier initialization specified a factory.  the factory is called with
+  #       the keyword 'name', the buffer's name, which SegmentedMessageBuffer uses and the in-memory buffers ignore:  e.g.,
+  #         functools.partial(SegmentedMessageBuffer, directory='data')
+  #
+  # design notes:
+  # -.  each buffer has a TimeIndex, which stamps the buffer's messages as they're appended.  the index is made when
+  #     it's first needed, from the entries that the buffer recorded, if any, and records the entries it adds with the
+  #     buffer:  a buffer held on disk keeps them with its segments, so that its index outlasts a restart
+  # -.  each buffer has a condition on self.lock, its arrival condition, that's notified as messages are appended
+  #     to the buffer and when the buffer is unregistered, so that readers may wait for messages without polling
+  #
+  def __init__(self, **kwargs):
+    # pre-populate map if explicitly requested to do so
+    if 'buffers' in kwargs:
+      self.buffer_collection = kwargs['buffers']
+      self.time_indexes = {}
+      self.arrivals = {}
+    else:
+      # instantiate buffer collection if nothing defined as of yet
+      if not hasattr(self, 'buffer_collection'):  self.buffer_collection = {}
+      if not hasattr(self, 'time_indexes'):  self.time_indexes = {}
+      if not hasattr(self, 'arrivals'):  self.arrivals = {}
+    if 'buffer_factory' in kwargs:  self.buffer_factory = kwargs['buffer_factory']
+    else:
+      if not hasattr(self, 'buffer_factory'):  self.buffer_factory = MessageBuffer
+    if not hasattr(self, 'lock'):  self.lock = threading.RLock()
+  #
+  # check if (named) buffer registered
+  def is_registered(self, buffer_name):
+    with self.lock:  return buffer_name in self.buffer_collection
+  #
+  # instantiate and register (named) buffer
+  def register(self, buffer_name):
+    with self.lock:
+      if buffer_name not in self.buffer_collection:  self.buffer_collection[buffer_name] = self.buffer_factory(**{'name': buffer_name})
+      else:  print("{}: advisory - buffer {} already registered".format(self.me('register'), buffer_name), file=sys.stderr)
+  #
+  # return buffer names
+  def buffers(self):
+    with self.lock:  return set(self.buffer_collection.keys())
+  #
+  # unregister specified buffer
+  def unregister(self, buffer_name):
+    with self.lock:
+      if buffer_name in self.buffer_collection:
+        self.buffer_collection.pop(buffer_name).discard()
+        self.time_indexes.pop(buffer_name, None)
+        if buffer_name in self.arrivals:  self.arrivals.pop(buffer_name).notify_all()
+      else: print("{}: advisory - buffer {} not currently registered".format(self.me('unregister'), buffer_name), file=sys.stderr)
+  #
+  # add message to specified buffer, stamping it with the current time
+  def append_message(self, buffer_name, message):
+    with self.lock:
+      if buffer_name in self.buffer_collection:
+        buffer = self.buffer_collection[buffer_name]
+        self.time_index(buffer_name).add(buffer.end_position(), time.time())
+        buffer.append_message(message)
+        if buffer_name in self.arrivals:  self.arrivals[buffer_name].notify_all()
+      else:  print("{}: advisory - buffer {} not currently registered".format(self.me('append_message'), buffer_name), file=sys.stderr)
+  #
+  # add one message to each of several buffers, stamping it with the current time.  buffers held as lists share the message itself
+  def append_to_buffers(self, buffer_names, message):
+    with self.lock:
+      timestamp = time.time()
+      for buffer_name in buffer_names:
+        if buffer_name in self.buffer_collection:
+          buffer = self.buffer_collection[buffer_name]
+          self.time_index(buffer_name).add(buffer.end_position(), timestamp)
+          buffer.append_message(message)
+          if buffer_name in self.arrivals:  self.arrivals[buffer_name].notify_all()
+        else:  print("{}: advisory - buffer {} not currently registered".format(self.me('append_to_buffers'), buffer_name), file=sys.stderr)
+  #
+  # add messages to specified buffer, in order, with one stamp - the current time - for all of them
+  def append_messages(self, buffer_name, messages):
+    with self.lock:
+      if buffer_name in self.buffer_collection:
+        buffer = self.buffer_collection[buffer_name]
+        self.time_index(buffer_name).add(buffer.end_position(), time.time())
+        buffer.append_messages(messages)
+        if buffer_name in self.arrivals:  self.arrivals[buffer_name].notify_all()
+      else:  print("{}: advisory - buffer {} not currently registered".format(self.me('append_messages'), buffer_name), file=sys.stderr)
+  #
+  # return specified message from specified buffer
+  def retrieve_message(self, buffer_name, k):
+    with self.lock:
+      if buffer_name in self.buffer_collection:  return self.buffer_collection[buffer_name].retrieve_message(k)
+      else:  print("{}: advisory - buffer {} not currently registered".format(self.me('retrieve_messages'), buffer_name), file=sys.stderr)
+  #
+  # return position of first message held in specified buffer
+  def first_position(self, buffer_name):
+    with self.lock:
+      if buffer_name in self.buffer_collection:  return self.buffer_collection[buffer_name].first_position()
+      else:  print("{}: advisory - buffer {} not currently registered".format(self.me('first_position'), buffer_name), file=sys.stderr)
+  #
+  # return position that next message appended to specified buffer will take
+  def end_position(self, buffer_name):
+    with self.lock:
+      if buffer_name in self.buffer_collection:  return self.buffer_collection[buffer_name].end_position()
+      else:  print("{}: advisory - buffer {} not currently registered".format(self.me('end_position'), buffer_name), file=sys.stderr)
+  #
+  # drop the messages that precede position k in specified buffer
+  def trim(self, buffer_name, k):
+    with self.lock:
+      if buffer_name in self.buffer_collection:
+        self.buffer_collection[buffer_name].trim(k)
+        if buffer_name in self.time_indexes:  self.time_indexes[buffer_name].trim(k)
+  #
+  # return the position of the first message in specified buffer that may be stamped at or after timestamp:
+  # if no message is, the position that the next message will take
+  def position_for_time(self, buffer_name, timestamp):
+    with self.lock:
+      if buffer_name in self.buffer_collection:
+        buffer = self.buffer_collection[buffer_name]
+        position = self.time_index(buffer_name).position(timestamp)
+        return buffer.end_position() if position is None else min(max(position, buffer.first_position()), buffer.end_position())
+      else:  print("{}: advisory - buffer {} not currently registered".format(self.me('position_for_time'), buffer_name), file=sys.stderr)
+  #
+  # return the time index of specified (registered) buffer, making it from the entries that the buffer recorded if need be
+  def time_index(self, buffer_name):
+    if buffer_name not in self.time_indexes:
+      buffer = self.buffer_collection[buffer_name]
+      self.time_indexes[buffer_name] = TimeIndex(**{'entries': buffer.stamps(), 'recorder': buffer.record_stamp})
+    return self.time_indexes[buffer_name]
+  #
+  # make the messages appended so far to specified buffer durable.  the lock is held while the buffer's flushes are
+  # taken and recorded, but not while they're made, so that a sync holds up no other use of the collection
+  def sync(self, buffer_name):
+    with self.lock:
+      if buffer_name not in self.buffer_collection:  return
+      buffer = self.buffer_collection[buffer_name]
+      flushes, flushed = buffer.begin_sync(), False
+    try:
+      buffer.flush(flushes)
+      flushed = True
+    finally:
+      with self.lock:  buffer.end_sync(flushes, flushed)
+  #
+  # wait, for up to timeout seconds, for a message to be appended to specified buffer, or for the buffer to be unregistered.
+  # the caller must hold self.lock, which the wait releases;  returns False if the wait timed out
+  def await_arrival(self, buffer_name, timeout):
+    if buffer_name not in self.buffer_collection:  return True
+    if buffer_name not in self.arrivals:  self.arrivals[buffer_name] = threading.Condition(self.lock)
+    return self.arrivals[buffer_name].wait(timeout)
+  #
+  # auxiliary methods
+  def me(self, methodname):    return "{}.{}".format(self.__class__.__name__, methodname)
+  def __repr__(self):          return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
+  def __eq__(self, other):     return isinstance( other, self.__class__ )     # keywords check not needed due to singleton status
+  def state_by_keyword(self):
+    return { 'buffers': self.buffer_collection }
+
+
+# --------------------------------------------------------------------------------------
+# class that makes appends to the buffers of a MessageBufferCollection durable before they are acknowledged
+#
+# design notes:
+# -.  a writer calls commit() once its message is appended, and waits for commit() to return before acknowledging it.
+#     the mode decides how:
+#     -.  'none'    - commit() returns at once, leaving messages to reach disk when the operating system writes them back
+#     -.  'message' - commit() syncs the message's buffer itself:  one sync per append
+#     -.  'batch'   - group commit:  commit() adds the message's buffer to the batch now forming, and waits for a
+#                     committing thread to sync it.  the thread closes a batch 'delay' seconds after its first commit,
+#                     or sooner, once its messages come to 'max_bytes', then syncs each of the batch's buffers once
+#                     and releases all of the batch's writers together.  syncs are made outside the collection's lock
+#                     (see MessageBufferCollection.sync), so appends that arrive during a sync reach their buffers and
+#                     form the next batch:  even with no delay, batches grow as syncs slow down
+# -.  a batch whose sync fails is remembered only until all of its writers have seen that it failed
+# -.  without its thread - i.e., before start() - a committer in 'batch' mode syncs as in 'message' mode
+# --------------------------------------------------------------------------------------
+#
+class GroupCommitter(object):
+  #
+  # kwargs parameters (all optional):
+  # *.  'mode'      - 'none', 'message', or 'batch', as described above (default: 'none')
+  # *.  'delay'     - in 'batch' mode, the most seconds that a batch stays open once the committing thread is free (default: 0)
+  # *.  'max_bytes' - in 'batch' mode, the size of the messages at which a batch is closed early (default: 1 MiB)
+  #
+  def __init__(self, buffer_collection, **kwargs):
+    self.buffer_collection = buffer_collection
+    self.mode, self.delay, self.max_bytes = kwargs.get('mode', 'none'), kwargs.get('delay', 0), kwargs.get('max_bytes', 1 << 20)
+    self.condition, self.thread, self.stopping = threading.Condition(), None, False
+    self.batch, self.committed = 0, 0       # number of the batch now forming, and the number of batches made durable
+    self.buffers, self.size = set(), 0      # buffers and size of the messages in the batch now forming
+    self.writers = 0                        # number of writers waiting on the batch now forming
+    self.failed = {}                        # batch whose sync failed -> number of its writers yet to see that it did
+    self.syncs = 0                          # number of syncs made, for reporting
+  #
+  # start the committing thread, in 'batch' mode, returning the committer
+  def start(self):
+    if self.mode == 'batch' and self.thread is None:
+      self.stopping = False
+      self.thread = threading.Thread(name=self.__class__.__name__, target=self.run, daemon=True)
+      self.thread.start()
+    return self
+  #
+  # stop the committing thread once it has committed the batch now forming
+  def stop(self):
+    with self.condition:
+      self.stopping = True
+      self.condition.notify_all()
+    if self.thread is not None:  self.thread.join()
+    self.thread = None
+  #
+  # make the message of size bytes just appended to buffer durable, returning False if it couldn't be made so
+  def commit(self, buffer_name, size=0):  return self.commit_all([ buffer_name ], size)
+  #
+  # make the message of size bytes just appended to each of several buffers durable, with one wait for all of them,
+  # returning False if it couldn't be made so in any one of them
+  def commit_all(self, buffer_names, size=0):
+    if self.mode == 'none':  return True
+    if self.mode == 'message' or self.thread is None:
+      with self.condition:  self.syncs += len(buffer_names)
+      return all([ self.sync(buffer_name) for buffer_name in buffer_names ])
+    with self.condition:
+      if not self.buffers or self.size + size * len(buffer_names) >= self.max_bytes:  self.condition.notify_all()
+      self.buffers.update(buffer_names)
+      self.size, self.writers = self.size + size * len(buffer_names), self.writers + 1
+      batch = self.batch
+      while self.committed <= batch:  self.condition.wait()
+      if batch not in self.failed:  return True
+      self.failed[batch] -= 1
+      if self.failed[batch] == 0:  del self.failed[batch]
+      return False
+  #
+  # body of the committing thread:  close each batch once it is due, and sync its buffers
+  def run(self):
+    while True:
+      with self.condition:
+        while not self.buffers and not self.stopping:  self.condition.wait()
+        if not self.buffers:  return
+        due = time.monotonic() + self.delay
+        while self.size < self.max_bytes and not self.stopping and time.monotonic() < due:  self.condition.wait(due - time.monotonic())
+        buffers, batch, writers = self.buffers, self.batch, self.writers
+        self.buffers, self.size, self.writers, self.batch = set(), 0, 0, self.batch + 1
+      synced = all([ self.sync(buffer_name) for buffer_name in sorted(buffers) ])
+      with self.condition:
+        if not synced:  self.failed[batch] = writers
+        self.committed, self.syncs = batch + 1, self.syncs + 1
+        self.condition.notify_all()
+  #
+  # sync a buffer, returning False if the sync failed
+  def sync(self, buffer_name):
+    try:
+      self.buffer_collection.sync(buffer_name)
+      return True
+    except (OSError, ValueError) as e:
+      print("{}: can't sync buffer {} ({})".format(self.me('sync'), buffer_name, e), file=sys.stderr)
+      return False
+  #
+  # auxiliary methods
+  def me(self, methodname):    return "{}.{}".format(self.__class__.__name__, methodname)
+  def __repr__(self):          return "{}({!r}, **{!r})".format(self.__class__.__name__, self.buffer_collection, self.state_by_keyword())
+  def state_by_keyword(self):  return { 'mode': self.mode, 'delay': self.delay, 'max_bytes': self.max_bytes }
+
+
+# ============================================================================================================
+#  classes for associating named message buffers with named users - i.e., readers and writers -
+#  along with positional information for the readers
+# ============================================================================================================
+
+# -----------------------------------------------------------------------------------------
+# class for associating named buffers from a message buffer collection with named users
+# ----------------------------------------------------------------------------------------
+
+class MessageBufferToUsers(AddMapMethodAliases):
+  #
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  #  supporting class for managing the mapping of buffer names to user names
+  #
+  class MessageBufferNameToUsers(InvertibleMap):
+    class_aliases = [(('domain_element', 'buffer'), ('codomain_element', 'user'))]
+    #
+    # initialize the map itself
+    #
+    # kwargs parameter (optional):
+    # *.  'buffer_to_users' - if present, the map will be pre-populated with the key => value set pairings in this list:  e.g.,
+    #                         if 'buffer_to_users' = {'stuff': {'joan', 'joe'}}}, 
+    #                         then the initial map will have 'stuff' -> {'joan', 'joe'} as its one (key, value set) pair
+    #
+    def __init__(self, **kwargs):
+      if 'buffer_to_users' in kwargs:
+        buffer_to_users = kwargs['buffer_to_users']
+        forward_map = buffer_to_users.get('forward_map',{})
+        del kwargs['buffer_to_users']
+        kwargs.update({'forward_map': forward_map})
+      kwargs.update({'entity_aliases': [(('domain_element', 'buffer'), ('codomain_element', 'user'))]})
+      super().__init__(**kwargs)
+  #
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  #
+  # initialize content for MessageBufferToUsers instances  -
+  #    i.e., a named message buffer collection, along with a map from named message buffers to named buffer users
+  #
+  # kwargs parameters (all optional):
+  #
+  # *.  'buffers'          - if present, the collection of buffers will be pre-populated with the buffer objects in this list:
+  #                          e.g.,  MessageBufferToUsers(**{'buffers': {'foo': MessageBuffer(**{'buffer': []})}}) 
+  #                                 pre-populates the collection with one, empty buffer called 'foo'
+  # *.  'buffer_to_users'  - if present, use this value to pre-populate the map from buffers to users, as described above, under MessageBufferNameToUsers
+  # *.  'entity_aliases'   - if present, a pair of values that are to alias the terms for the domain elements and codomain elements, respectively,
+  #                          in the MessageBufferCollection and MessageBufferNameToUsers method names
+  #
+  def __init__(self, **kwargs):
+    #
+    # initialize the buffers argument, if requested to do so
+    self.buffer_collection = MessageBufferCollection(**kwargs)
+    #
+    # craft aliases for this class's methods - again, if requested to do so
+    super().__init__()
+    self.buffer_alias, self.user_alias, self.entity_aliases = None, None, None
+    if 'entity_aliases' in kwargs:
+      self.entity_aliases = kwargs['entity_aliases']
+      try:
+        (self.buffer_alias, self.user_alias) = self.entity_aliases
+        self.add_aliases(**{'entity_aliases': [(('buffer', self.buffer_alias), ('user', self.user_alias))]})
+      except:
+        pass
+    #
+    # finally, initialize the map.  'buffer_to_users' will be checked in the constructor for MessageBufferNameToUsers
+    self.buffer_to_users = MessageBufferToUsers.MessageBufferNameToUsers(**kwargs)
+  #
+  # register (i.e., create) a named buffer
+  def register_buffer(self, buffer_name):
+    with self.buffer_collection.lock:
+      if not self.buffer_collection.is_registered(buffer_name):
+        self.buffer_collection.register(buffer_name)
+        return
+    print("{}: advisory - {} {} already registered".format(self.me('register'), 'buffer' if self.buffer_alias is None else self.buffer_alias, buffer_name), file=sys.stderr)
+  #
+  # return names of all buffers
+  def buffers(self):  return self.buffer_collection.buffers()
+  #
+  # register a user for a buffer.  require prior buffer registration.
+  def register(self, buffer_name, user_name):
+    with self.buffer_collection.lock:
+      if self.buffer_collection.is_registered(buffer_name):
+        self.buffer_to_users.register(buffer_name, user_name)
+        return True
+    print("{}: advisory - {} {} not yet registered".format(self.me('register'), 'buffer' if self.buffer_alias is None else self.buffer_alias, buffer_name), file=sys.stderr)
+    return False
+  #
+  # return names of all buffers for a given user
+  def buffers_for_user(self, user_name):  return self.buffer_to_users.buffers_for_user(user_name)
+  #
+  # return names of all users for all buffers
+  def users(self):  return self.buffer_to_users.users()
+  #
+  # return names of all users for a given buffer
+  def users_for_buffer(self, buffer_name):  return self.buffer_to_users.users_for_buffer(buffer_name)
+  #
+  # unregister a user for a buffer
+  def unregister(self, buffer_name, user_name):
+    self.buffer_to_users.unregister(buffer_name, user_name)
+  #
+  # unregister a buffer and all (buffer, user) bindings for that buffer
+  def unregister_buffer(self, buffer_name):
+    with self.buffer_collection.lock:
+      if self.buffer_collection.is_registered(buffer_name):
+        users_for_buffer = copy.copy(self.users_for_buffer(buffer_name))
+        for user in users_for_buffer:  self.unregister(buffer_name, user)
+        self.buffer_collection.unregister(buffer_name)
+        return
+    print("{}: advisory - {} {} already unregistered".format(self.me('unregister_buffer'), 'buffer' if self.buffer_alias is None else self.buffer_alias, buffer_name), file=sys.stderr)
+  #
+  # unregister user from all message buffers
+  def unregister_user(self, user_name):
+    self.buffer_to_users.unregister_user(user_name)
+  #
+  # auxiliary methods
+  def me(self, methodname):  return "{}.{}".format(self.__class__.__name__, methodname)
+  def __repr__(self):        return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
+  def __eq__(self, other):   return isinstance( other, self.__class__ )     # keywords check not needed due to singleton status
+  def state_by_keyword(self):
+    keywords = self.buffer_collection.state_by_keyword()
+    keywords.update( { 'buffer_to_users': self.buffer_to_users.state_by_keyword() } )
+    if self.entity_aliases is not None: keywords.update( { 'entity_aliases':  self.entity_aliases } )
+    return keywords
+
+
+# -----------------------------------------------------------------------------------------------------------------
+# class for associating queues -- 
+#    -- i.e., **append-only** message buffers from a message buffer collection 
+# -- with users who may update those queues.
+#
+# terms of association:  
+# -.  a writer may be associated with any number of queues
+# -.  a queue may be associated with any number of writers
+# -.  a given writer may be associated with at most one instance of a given queue
+#
+# design notes:
+# -.  MessageQueueToReaders and MessageQueueToWriters use a common set of queue names:  i.e., if a given queue is 
+#     registered under the name 'foo' in the former, it will be registered as 'foo' under the latter.
+# -.  as is typical for python, method hiding is a convention.  in particular, note the comments that
+#     MessageQueueToReaders.retrieve_position() and MessageQueueToReaders.retrieve_message() are meant to support testing 
+#     rather than "production" usage
+# -----------------------------------------------------------------------------------------------------------------
+
+class MessageQueueToWriters(MessageBufferToUsers):
+  class_aliases = [(('buffer', 'queue'), ('user', 'writer'))]
+  #
+  # initialize the class's (queues, map from queues to writers) pair
+  #
+  # kwargs parameters (all optional):
+  # *.  'buffers' - if present, the collection of queues will be pre-populated with the buffer objects in this list:
+  #       e.g.,  MessageQueueToWriters(**{'buffers': {'foo': MessageBuffer(**{'buffer': []})}})
+  #              pre-populates the collection with one, empty buffer called 'foo'
+  # *.  'buffers_to_users' - if present, use this value to pre-populate the map from queues to writers
+  #
+  def __init__(self, **kwargs):
+    #
+    # initialize the buffers argument, if requested to do so
+    kwargs.update( { 'entity_aliases': ('queue', 'writer') } )
+    super().__init__(**kwargs)
+  #
+  # retrieve message k from queue -- strictly for testing purposes
+  def retrieve_message(self, queue_name, k):
+    return self.buffer_collection.retrieve_message(queue_name, k)
+  #
+  # add message from writer to queue, requiring registration as precondition for writing
+  def append_message(self, queue_name, writer_name, message):
+    with self.buffer_collection.lock:
+      if queue_name in self.buffer_collection.buffers():
+        if writer_name in self.writers_for_queue(queue_name):
+          self.buffer_collection.append_message(queue_name, message)
+          return True
+        else:
+          print("{}: queue {} not currently registered to {}".format(self.me('append_message'), queue_name, writer_name), file=sys.stderr)
+          return False
+      else:
+        print("{}: queue {} not currently registered".format(self.me('retrieve_messages'), queue_name), file=sys.stderr)
+        return False
+  #
+  # add message from writer to each of several queues, as one append, requiring registration for all of them as precondition for writing:
+  # the message is added to every queue, or to none
+  def append_message_to_queues(self, queue_names, writer_name, message):
+    with self.buffer_collection.lock:
+      for queue_name in queue_names:
+        if queue_name not in self.buffer_collection.buffers():
+          print("{}: queue {} not currently registered".format(self.me('append_message_to_queues'), queue_name), file=sys.stderr)
+          return False
+        if writer_name not in self.writers_for_queue(queue_name):
+          print("{}: queue {} not currently registered to {}".format(self.me('append_message_to_queues'), queue_name, writer_name), file=sys.stderr)
+          return False
+      self.buffer_collection.append_to_buffers(queue_names, message)
+      return True
+  #
+  # add messages from writer to queue, in order, as one append, requiring registration as precondition for writing
+  def append_messages(self, queue_name, writer_name, messages):
+    with self.buffer_collection.lock:
+      if queue_name in self.buffer_collection.buffers():
+        if writer_name in self.writers_for_queue(queue_name):
+          self.buffer_collection.append_messages(queue_name, messages)
+          return True
+        else:
+          print("{}: queue {} not currently registered to {}".format(self.me('append_messages'), queue_name, writer_name), file=sys.stderr)
+          return False
+      else:
+        print("{}: queue {} not currently registered".format(self.me('append_messages'), queue_name), file=sys.stderr)
+        return False
+
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# class for associating queues -- 
+#    -- i.e., read-from-the-end buffers from a message buffer collection 
+# -- with users who may access those queues. 
+#
+# terms of association:  
+# -.  a reader may be associated with any number of queues
+# -.  a queue may be associated with any number of reader
+# -.  a given reader may be associated with at most one instance of a given queue
+#
+# design notes:
+# -.  for this class, the name "queue" was chosen for simplicity.  what is referred to here as "queues" are actually streams, 
+#     in that each reader-queue association is further associated with an implicit "current message" parameter, 
+#     -.  initially set to 0, then
+#     -.  bumped up as messages are retrieved from the underlying buffer
+# -.  MessageQueueToReaders and MessageQueueToWriters use a common set of queue names:  i.e., if a given queue is 
+#     registered under the name 'foo' in the former, it will be registered as 'foo' under the latter.
+# -.  as is typical for python, method hiding is a convention.  in particular, note the comments that
+#     MessageQueueToReaders.retrieve_position() and MessageQueueToReaders.retrieve_message() are meant to support testing 
+#     rather than "production" usage
+# ------------------------------------------------------------------------------------------------------------------------------
+
+class MessageQueueToReaders(MessageBufferToUsers):
+  class_aliases = [(('buffer', 'queue'), ('user', 'reader'))]
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  #
+  # initialize the class's (queues, map from queues to readers) pair
+  #
+  # kwargs parameters (all optional):
+  # *.  'queues' - if present, the collection of queues will be pre-populated with the buffer objects in this list:
+  #       e.g.,  MessageQueueToReaders(**{'queues': {'foo': MessageBuffer(**{'buffer': []})}})
+  #              pre-populates the collection with one, empty buffer called 'foo'
+  # *.  'queue_to_readers' - if present, use this value to pre-populate the map from queues to readers, as described above, under MessageQueueNameToWriters
+  # *.  'queue_to_readers_to_positinos' -
+  #        if present, use this value to pre-populate the map from queues to readers to their positions
+  #        otherwise, initialize all reader positions to 0
+  #
+  # design note:  once every reader of a queue has moved past a message, the message is trimmed from the queue.
+  #               readers that register later start, by default, from the queue's first untrimmed message.
+  #               since finding the slowest reader takes a pass over the queue's readers, a queue is checked once
+  #               per as many reader advances as it has readers, keeping the cost per advance constant
+  #
+  def __init__(self, **kwargs):
+    #
+    # initialize the buffers argument, if requested to do so
+    kwargs.update( { 'entity_aliases': ('queue', 'reader') } )
+    super().__init__(**kwargs)
+    #
+    # pre-populate map of queue positions by reader
+    if 'queue_to_readers_to_positions' in kwargs:  self.queue_to_readers_to_positions = kwargs['queue_to_readers_to_positions']
+    else:
+      self.queue_to_readers_to_positions = {}
+      for queue in self.queues():
+        self.queue_to_readers_to_positions[queue] = {}
+        for reader in self.readers_for_queue(queue):
+          self.queue_to_readers_to_positions[queue][reader] = 0
+    self.advances = {}          # queue -> reader advances since the queue was last checked for messages to trim
+  #
+  # register a reader for a queue.  require prior queue registration.
+  # a new reader starts at position, if given, though not outside the messages that queue holds, and otherwise at the first of them.
+  # reader positions are guarded by the (shared) buffer collection's lock
+  def register(self, queue_name, reader_name, position=None):
+    with self.buffer_collection.lock:
+      if super().register(queue_name, reader_name):
+        if queue_name not in self.queue_to_readers_to_positions:  self.queue_to_readers_to_positions[queue_name] = {}
+        if reader_name not in self.queue_to_readers_to_positions[queue_name]:
+          first, end = self.buffer_collection.first_position(queue_name), self.buffer_collection.end_position(queue_name)
+          self.queue_to_readers_to_positions[queue_name][reader_name] = first if position is None else max(first, min(position, end))
+        return True
+      else:
+        return False
+  #
+  # return next message from queue to reader, requiring registration as precondition for reading
+  def next_message(self, queue_name, reader_name):
+    with self.buffer_collection.lock:
+      if queue_name in self.queues():
+        if reader_name in self.readers_for_queue(queue_name):
+          next = self.queue_to_readers_to_positions[queue_name][reader_name]
+          message = self.buffer_collection.retrieve_message(queue_name, next)
+          if message is not None:
+            self.queue_to_readers_to_positions[queue_name][reader_name] = next+1
+            self.trim(queue_name)
+          return message
+        else:  print("{}: queue {} not currently registered to {}".format(self.me('next_message'), queue_name, reader_name), file=sys.stderr)
+      else:  print("{}: queue {} not currently registered".format(self.me('next_message'), queue_name), file=sys.stderr)
+  #
+  # return (position, messages), where messages are the messages, up to limit in number, that reader has yet to receive from queue,
+  # starting at reader's current position.  the position is left as is:  the caller advances it as the messages are acknowledged
+  def unread_messages(self, queue_name, reader_name, limit=None):
+    with self.buffer_collection.lock:
+      position = self.queue_to_readers_to_positions.get(queue_name, {}).get(reader_name, None)
+      if position is None:  return (None, [])
+      messages = []
+      while limit is None or len(messages) < limit:
+        message = self.buffer_collection.retrieve_message(queue_name, position + len(messages))
+        if message is None:  break
+        messages.append(message)
+      return (position, messages)
+  #
+  # take up to limit of the messages that reader has yet to receive from queue, moving reader's position past them, and
+  # return (position, messages), where position is the position of the first of them, or None if reader isn't registered
+  # for queue.  if there are no such messages, wait for up to timeout seconds for one to be appended
+  def take_messages(self, queue_name, reader_name, limit, timeout=0):
+    with self.buffer_collection.lock:
+      deadline = time.monotonic() + timeout
+      while True:
+        position = self.reader_position(queue_name, reader_name)
+        if position is None or not self.buffer_collection.is_registered(queue_name):  break
+        if self.buffer_collection.end_position(queue_name) > position:  break
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not self.buffer_collection.await_arrival(queue_name, remaining):  break
+      position, messages = self.unread_messages(queue_name, reader_name, limit)
+      if messages:  self.advance_position(queue_name, reader_name, position + len(messages))
+      return (position, messages)
+  #
+  # return reader's position in queue, or None if reader isn't registered for queue
+  def reader_position(self, queue_name, reader_name):
+    with self.buffer_collection.lock:  return self.queue_to_readers_to_positions.get(queue_name, {}).get(reader_name, None)
+  #
+  # move reader's position in queue forward to position.  positions never move backward this way
+  def advance_position(self, queue_name, reader_name, position):
+    with self.buffer_collection.lock:
+      positions = self.queue_to_readers_to_positions.get(queue_name, {})
+      if reader_name in positions and positions[reader_name] < position:
+        positions[reader_name] = position
+        self.trim(queue_name)
+  #
+  # move reader's position in queue to position, forward or back, though not outside the messages that queue holds,
+  # returning the new position, or None if reader isn't registered for queue
+  def seek_position(self, queue_name, reader_name, position):
+    with self.buffer_collection.lock:
+      positions = self.queue_to_readers_to_positions.get(queue_name, {})
+      if reader_name not in positions or not self.buffer_collection.is_registered(queue_name):  return None
+      positions[reader_name] = max(self.buffer_collection.first_position(queue_name), min(position, self.buffer_collection.end_position(queue_name)))
+      self.trim(queue_name)
+      return positions[reader_name]
+  #
+  # return the position in queue that start names, or None if queue isn't registered.  start is one of
+  # -.  'earliest' - the position of the first message that queue holds
+  # -.  'latest'   - the position that the next message appended to queue will take
+  # -.  an offset  - i.e., an absolute position, as a string of digits or an int
+  def position_for_start(self, queue_name, start):
+    with self.buffer_collection.lock:
+      if not self.buffer_collection.is_registered(queue_name):  return None
+      if start == 'earliest':  return self.buffer_collection.first_position(queue_name)
+      if start == 'latest':    return self.buffer_collection.end_position(queue_name)
+      return int(start)
+  #
+  # return the position of the first message in queue that may have been appended at or after timestamp
+  def position_for_time(self, queue_name, timestamp):  return self.buffer_collection.position_for_time(queue_name, timestamp)
+  #
+  # return the number of messages in queue that reader has yet to receive
+  def backlog(self, queue_name, reader_name):
+    with self.buffer_collection.lock:
+      position = self.queue_to_readers_to_positions.get(queue_name, {}).get(reader_name, None)
+      if position is None or not self.buffer_collection.is_registered(queue_name):  return 0
+      return self.buffer_collection.end_position(queue_name) - position
+  #
+  # cut reader's backlog in queue to at most limit messages by skipping its oldest unread messages, returning how many were skipped
+  def trim_backlog(self, queue_name, reader_name, limit):
+    with self.buffer_collection.lock:
+      skipped = max(0, self.backlog(queue_name, reader_name) - limit)
+      if skipped > 0:
+        self.queue_to_readers_to_positions[queue_name][reader_name] += skipped
+        self.trim(queue_name)
+      return skipped
+  #
+  # note that a reader of queue has advanced, dropping the messages that all of the queue's readers have received once a check is due
+  def trim(self, queue_name, force=False):
+    with self.buffer_collection.lock:
+      positions = self.queue_to_readers_to_positions.get(queue_name, {})
+      if not positions or not self.buffer_collection.is_registered(queue_name):  return
+      self.advances[queue_name] = self.advances.get(queue_name, 0) + 1
+      if self.advances[queue_name] < len(positions) and not force:  return
+      self.advances[queue_name] = 0
+      self.buffer_collection.trim(queue_name, min(positions.values()))
+  #
+  # retrieve current stream position for queue reader  -- strictly for testing purposes
+  def retrieve_position(self, queue_name, reader_name):
+    with self.buffer_collection.lock:
+      if queue_name in self.queues():
+        if reader_name in self.readers_for_queue(queue_name):
+          return self.queue_to_readers_to_positions[queue_name][reader_name]
+        else:  print("{}: queue {} not currently registered to {}".format(self.me('next_message'), queue_name, reader_name), file=sys.stderr)
+      else:  print("{}: queue {} not currently registered".format(self.me('next_message'), queue_name), file=sys.stderr)
+  #
+  # retrieve message k from queue -- strictly for testing purposes
+  def retrieve_message(self, queue_name, k):
+    return self.buffer_collection.retrieve_message(queue_name, k)
+  #
+  # unregister a reader for a queue
+  def unregister(self, queue_name, reader_name):
+    with self.buffer_collection.lock:
+      super().unregister(queue_name, reader_name)
+      if reader_name in self.queue_to_readers_to_positions.get(queue_name, {}):
+        del self.queue_to_readers_to_positions[queue_name][reader_name]
+        self.trim(queue_name, force=True)
+  #
+  # unregister a queue and all (queue, reader) bindings for that queue
+  def unregister_queue(self, queue_name):
+    with self.buffer_collection.lock:
+      self.unregister_buffer(queue_name)
+      self.queue_to_readers_to_positions.pop(queue_name, None)
+      self.advances.pop(queue_name, None)
+  #
+  # unregister reader from all message queues
+  def unregister_reader(self, reader_name):
+    with self.buffer_collection.lock:
+      self.unregister_user(reader_name)
+      for queue_name in self.queues():
+        if reader_name in self.queue_to_readers_to_positions.get(queue_name, {}):
+          del self.queue_to_readers_to_positions[queue_name][reader_name]
+          self.trim(queue_name, force=True)
+  #
+  # auxiliary methods
+  def me(self, methodname):  return "{}.{}".format(self.__class__.__name__, methodname)
+  def __repr__(self):        return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
+  def __eq__(self, other):   return isinstance( other, self.__class__ )     # keywords check not needed due to singleton status
+  def state_by_keyword(self):
+    keywords = super().state_by_keyword()
+    keywords.update( { 'queue_to_readers_to_positions': self.queue_to_readers_to_positions } )
+    return keywords
+
+
+# ===========================================================================================================================
+# class that track associations between communicators and their service access points (SAPs) - i.e., (host/ port) pairs
+#
+# terms of association:  
+# -.  a communicator may be associated with at most one SAP
+#
+# design notes:
+# -.  no restrictions have been placed on associations between SAPs and communicators.  
+#     while each SAP may, in practice, be associated with at most one communicator, the use of SAPs to demultiplex
+#     messages to multiple communicators is feasible and should therefore be allowed.
+# -.  while the class uses the term "communicators", at present only readers need register:
+#     asynchronous updates of message queue status are only being sent to readers
+# -.  access to the bindings is serialized, so that they may be shared by concurrent request handlers
+# ===========================================================================================================================
+#
+class CommunicatorToSAP(metaclass=Singleton):
+  #
+  # initialize binding mappings, limiting sources to one per stream
+  def __init__(self, **kwargs):
+    if 'communicator_to_SAP' in kwargs:  self.communicator_to_SAP = kwargs['communicator_to_SAP']
+    else:
+      if not hasattr(self, 'communicator_to_SAP'): self.communicator_to_SAP = {}
+    if not hasattr(self, 'lock'):  self.lock = threading.RLock()
+  #
+  def register(self, communicator, host, port):
+    with self.lock:  self.communicator_to_SAP[communicator] = (host, port)
+  #
+  def unregister(self, communicator):
+    with self.lock:
+      if communicator in self.communicator_to_SAP:  del self.communicator_to_SAP[communicator]
+  #
+  def SAP(self, communicator):
+    with self.lock:  return self.communicator_to_SAP.get(communicator, None)
+  #
+  # retrieve all communicators
+  def communicators(self):
+    with self.lock:  return set(self.communicator_to_SAP.keys())
+  #
+  # auxiliary methods
+  def __repr__(self):          return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
+  def __eq__(self, other):     return isinstance( other, self.__class__ ) and self.state_by_keyword() == other.state_by_keyword()
+  def state_by_keyword(self):
+    return { 'communicator_to_SAP': self.communicator_to_SAP }
+
+
+# ************************************************************************************************************
+# classes for exchanging one-line messages with other processes
+# design:
+# -.  messages will be exchanged via file system readline/writeline APIs
+#     (this can be supported since sockets can be configured to work like files)
+# ************************************************************************************************************
+#
+# ============================================================================================================
+# class that supports line-by-line-based communication with other entities via two half-duplex files:
+# -.  one for receiving messages  (infile)
+# -.  one for sending messages    (outfile)
+# ============================================================================================================
+#
+class MessageExchanger(object):
+  __slots__ = ('infile', 'outfile')
+  #
+  # specify infile for sending, outfile for receiving messages, 
+  # allowing for optional one-time initialization of the two file parameters
+  def __init__(self, **kwargs):
+    self.infile, self.outfile = kwargs.get('infile', None), kwargs.get('outfile', None)
+  #
+  # read line from a co-communicator, returning (status, line) pair.
+  # allow for overriding of __init__-time file specification with kwargs' 'infile' keyword
+  def get_line(self, **kwargs):
+    infile = self.resolve_infile( 'get_line', **kwargs )
+    try:
+      next_line = infile.readline()
+      return ( True, next_line )
+    except Exception:
+      print("{}: read failure".format(self.me('get_line')), file=sys.stderr)
+      return ( False, None )
+  #
+  # send line to a co-communicator, returning status of write.
+  # allow for overriding of __init__-time file specification with kwargs' 'outfile' keyword
+  def put_line(self, line, **kwargs):
+    outfile = self.resolve_outfile( 'put_line', **kwargs )
+    try:
+      outfile.write( line )
+      outfile.flush( )            # essential for assuring immediate receipt of message
+      return True
+    except Exception:
+      print("{}: write failure (output: {})".format(self.me('put_line'), line), file=sys.stderr)
+      return False
+  #
+  # send a group of lines to a co-communicator with one flush, returning status of write.
+  # allow for overriding of __init__-time file specification with kwargs' 'outfile' keyword
+  def put_lines(self, lines, **kwargs):
+    outfile = self.resolve_outfile( 'put_lines', **kwargs )
+    try:
+      outfile.write( ''.join(lines) )
+      outfile.flush( )
+      return True
+    except Exception:
+      print("{}: write failure (output: {} lines)".format(self.me('put_lines'), len(lines)), file=sys.stderr)
+      return False
+  #
+  # auxiliary methods
+  def resolve_infile(self, methodname, **kwargs):
+    assert 'infile' in kwargs or hasattr(self, 'infile'), "{}: infile not defined".format(self.me(methodname))
+    return kwargs['infile'] if 'infile' in kwargs else self.infile
+  def resolve_outfile(self, methodname, **kwargs):
+    assert 'outfile' in kwargs or hasattr(self, 'outfile'), "{}: outfile not defined".format(self.me(methodname))
+    return kwargs['outfile'] if 'outfile' in kwargs else self.outfile
+  #
+  def me(self, methodname):    return "{}.{}".format(self.__class__.__name__, methodname)
+  def __repr__(self):          return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
+  def __eq__(self, other):     return isinstance( other, self.__class__ ) and self.state_by_keyword() == other.state_by_keyword()
+  def state_by_keyword(self):
+    keywords = {}
+    if hasattr(self, 'infile'):  keywords.update( { 'infile': self.infile } )
+    if hasattr(self, 'outfile'): keywords.update( { 'outfile': self.outfile } )
+    return keywords
+
+
+# ============================================================================================================
+# class that uses an open socket as a message exchanger.
+# key addition to message exchanger functionality:  
+#    use of the socket API to derive an object that allows for file-like treatment of sockets:
+#    in particular, the use of readline and writelines with open sockets.
+# ============================================================================================================
+#
+class OpenSocketMessageExchanger(MessageExchanger):
+  __slots__ = ('sock',)
+  def __init__(self, sock, **kwargs):
+    self.sock = sock
+    #
+    # pre-populate state if explicitly requested to do so
+    self.infile  = kwargs.get('infile', sock.makefile(mode='r'))
+    if not 'infile' in kwargs: kwargs['infile'] = self.infile
+    self.outfile  = kwargs.get('outfile', sock.makefile(mode='w'))
+    if not 'outfile' in kwargs: kwargs['outfile'] = self.outfile
+    super().__init__( **kwargs )
+  def close(self):
+    self.infile.close()
+    self.outfile.close()
+  #
+  # auxiliary methods
+  def __repr__(self):          return "{}({}, **{!r})".format(self.__class__.__name__, self.sock, self.state_by_keyword())
+  def __eq__(self, other):     return isinstance( other, self.__class__ ) and self.state_by_keyword() == other.state_by_keyword()
+  def state_by_keyword(self):
+    keywords = super().state_by_keyword()
+    keywords.update( self.local_state_by_keyword() )
+    return keywords
+  def local_state_by_keyword(self):
+    keywords = {}
+    if hasattr(self, 'infile'):  keywords.update( { 'infile': self.infile } )
+    if hasattr(self, 'outfile'): keywords.update( { 'outfile': self.outfile } )
+    return keywords
+
+
+# ===========================================================================================================================
+# class that uses a service access point (SAP) - i.e.., a (host, port) pair - to generate a socket message exchanger
+# ===========================================================================================================================
+#
+class SAPMessageExchanger(OpenSocketMessageExchanger):
+  __slots__ = ('hostport',)
+  def __init__(self, **kwargs):
+    try:
+      self.sock = kwargs.get('sock', socket.socket(socket.AF_INET, socket.SOCK_STREAM))
+      if 'timeout' in kwargs:  self.sock.settimeout(kwargs['timeout'])
+      self.hostport = kwargs.get('hostport', ('', 80))
+      self.sock.connect(self.hostport)
+      super().__init__(self.sock, **kwargs)
+    except Exception:
+      print("{}: can't connect to {}{}port {}".format(self.me('__init__'), self.hostport[0], '' if self.hostport[0] == '' else ', ', self.hostport[1]), file=sys.stderr)
+  #
+  def close(self):  self.sock.close()
+  #
+  # auxiliary methods
+  def __repr__(self):          return "{}({}, **{!r})".format(self.__class__.__name__, self.hostport, self.state_by_keyword())
+  def __eq__(self, other):     return isinstance( other, self.__class__ ) and (self.hostport, self.state_by_keyword()) == (other.hostport, other.state_by_keyword())
+  def state_by_keyword(self):
+    keywords = super().state_by_keyword()
+    if hasattr(self, 'sock'): keywords.update( { 'sock': self.sock } )
+    return keywords
+
+
+# ============================================================================================================
+# class that assembles newline-terminated lines from a byte stream that arrives in arbitrary chunks
+#
+# design notes:
+# -.  a line is refused once more than 'max_line' bytes of it have arrived without its newline:  lines() raises ValueError,
+#     so that a client that never ends its line can't fill the server's memory.  servers answer with an error and close
+#     the connection, since the stream's next line can't be found
+#
+# parameters:
+# -.  max_line - the most bytes of a line held while its newline is awaited (default: 1 MiB)
+# ============================================================================================================
+#
+class LineAssembler(object):
+  __slots__ = ('pending', 'max_line')
+  #
+  def __init__(self, max_line=1<<20):  self.pending, self.max_line = bytearray(), max_line
+  #
+  # add the next chunk from the stream
+  def add(self, data):  self.pending += data
+  #
+  # remove and return all complete lines received so far, newlines included.  a line ended by CR LF - e.g., by telnet - is
+  # returned ended by LF alone, as a file opened in text mode would return it
+  def lines(self):
+    end = self.pending.rfind(b'\n')
+    if end < 0:
+      if len(self.pending) > self.max_line:  raise ValueError('line too long')
+      return []
+    complete = bytes(self.pending[:end+1]).replace(b'\r\n', b'\n')
+    del self.pending[:end+1]
+    return [ line+'\n' for line in complete[:-1].decode('utf-8').split('\n') ]
+  #
+  # remove and return whatever partial line remains - e.g., once the stream has ended
+  def remainder(self):
+    partial = bytes(self.pending).decode('utf-8')
+    del self.pending[:]
+    return partial
+  #
+  # auxiliary methods
+  def __repr__(self):          return "{}()".format(self.__class__.__name__)
+
+
+# ============================================================================================================
+# class that groups the lines of a stream into requests:  most requests are one line long, but a batched
+# request's first line is followed by as many lines as its count (see RequestDispatcher.continuation_lines)
+# ============================================================================================================
+#
+class RequestAssembler(object):
+  __slots__ = ('partial', 'awaited')
+  #
+  def __init__(self):  self.partial, self.awaited = [], 0
+  #
+  # add the next lines from the stream, newlines included, returning the requests that they complete
+  def requests(self, lines):
+    complete = []
+    for line in lines:
+      if self.awaited > 0:
+        self.partial.append(line)
+        self.awaited -= 1
+      else:
+        self.partial, self.awaited = [ line ], RequestDispatcher.continuation_lines(line)
+      if self.awaited == 0:
+        complete.append(''.join(self.partial))
+        self.partial = []
+    return complete
+  #
+  # auxiliary methods
+  def __repr__(self):          return "{}()".format(self.__class__.__name__)
+
+
+# ============================================================================================================
+# class that frames requests and responses in binary, and recovers them from the bytes of a stream.
+# frames, unlike lines, may carry fields that hold newlines
+#
+# design notes:
+# -.  a frame is a header, packed as '!BBHI' - the magic byte, a code, a field count, and the length of the body - followed by
+#     the body:  the fields, each a 4-byte length followed by that many bytes of UTF-8
+# -.  a request's code is its opcode (see RequestDispatcher.opcodes), and its fields are the request's tokens:  e.g., a writer,
+#     a queue, and a message.  a response's code is 1 for OK and 0 for error, and its fields are the response's body, if any -
+#     or, for fetch_from_q, the number of messages fetched, followed by the messages
+# -.  a connection whose first byte is the magic byte - which can't start a request line - carries frames throughout
+# -.  a stream's bytes are read into one buffer, reused from read to read, and frames are parsed in place with struct.unpack_from.
+#     the buffer grows only as bytes arrive - never ahead of them, to the length that a header declares - and is compacted
+#     only when it runs out of room
+# -.  a header that declares a body longer than 'max_frame_size' bytes, or more than 'max_fields' fields, isn't waited on:
+#     frames() raises ValueError, as it does for bytes that aren't a frame, and servers answer with an error frame and close
+#     the connection
+#
+# parameters:
+# -.  size - the buffer's initial size, in bytes (default: 65536)
+# -.  max_frame_size - the longest body accepted, in bytes (default: 16 MiB)
+# -.  max_fields - the most fields accepted in a frame (default: 16384)
+# ============================================================================================================
+#
+class FrameAssembler(object):
+  __slots__ = ('buffer', 'start', 'end', 'max_frame_size', 'max_fields')
+  #
+  magic = 0xB1
+  header = struct.Struct('!BBHI')
+  field_length = struct.Struct('!I')
+  #
+  # encode a frame with the given code and fields
+  def frame(code, fields):
+    encoded = [ field.encode('utf-8') for field in fields ]
+    body = b''.join([ FrameAssembler.field_length.pack(len(field)) + field for field in encoded ])
+    return FrameAssembler.header.pack(FrameAssembler.magic, code, len(encoded), len(body)) + body
+  #
+  def __init__(self, size=65536, max_frame_size=1<<24, max_fields=16384):
+    self.buffer, self.start, self.end = bytearray(size), 0, 0
+    self.max_frame_size, self.max_fields = max_frame_size, max_fields
+  #
+  # make room for at least size more bytes at the end of the buffer:  move unparsed bytes to its front, then grow it, as need be
+  def reserve(self, size):
+    if len(self.buffer) - self.end >= size:  return
+    self.buffer[:self.end - self.start] = self.buffer[self.start:self.end]
+    self.start, self.end = 0, self.end - self.start
+    if len(self.buffer) - self.end < size:  self.buffer.extend(bytes(max(size, len(self.buffer))))
+  #
+  # read the next chunk from a socket into the buffer, returning the number of bytes read:  0 once the stream has ended
+  def receive(self, sock, size=4096):
+    self.reserve(size)
+    with memoryview(self.buffer) as view:
+      with view[self.end:] as free:  count = sock.recv_into(free)
+    self.end += count
+    return count
+  #
+  # add the next chunk from the stream - e.g., one that asyncio has read
+  def add(self, data):
+    self.reserve(len(data))
+    self.buffer[self.end:self.end + len(data)] = data
+    self.end += len(data)
+  #
+  # remove and return all complete frames received so far, as ( code, fields ) pairs.  raise ValueError for bytes that aren't a frame
+  def frames(self):
+    complete = []
+    while self.end - self.start >= self.header.size:
+      magic, code, count, length = self.header.unpack_from(self.buffer, self.start)
+      if magic != self.magic:  raise ValueError('not a frame')
+      if length > self.max_frame_size:  raise ValueError('frame too large')
+      if count > self.max_fields:  raise ValueError('too many fields')
+      body_start, body_end = self.start + self.header.size, self.start + self.header.size + length
+      if body_end > self.end:  break                     # the rest of the frame, still arriving
+      fields, offset = [], body_start
+      for k in range(count):
+        if offset + self.field_length.size > body_end:  raise ValueError('field overruns frame')
+        (size,) = self.field_length.unpack_from(self.buffer, offset)
+        offset += self.field_length.size
+        if offset + size > body_end:  raise ValueError('field overruns frame')
+        fields.append(self.buffer[offset:offset + size].decode('utf-8'))
+        offset += size
+      if offset != body_end:  raise ValueError('frame length mismatch')
+      complete.append( (code, fields) )
+      self.start = body_end
+    if self.start == self.end:  self.start, self.end = 0, 0
+    return complete
+  #
+  # auxiliary methods
+  def __repr__(self):          return "{}({!r})".format(self.__class__.__name__, len(self.buffer))
+
+
+# ============================================================================================================
+# class that uses an open socket as a message exchanger for pipelined requests.
+# key differences from OpenSocketMessageExchanger:
+# -.  get_lines returns every complete line that has arrived, blocking only until at least one line is available
+# -.  put_lines sends a group of lines with one write
+# -.  both work directly with the socket, rather than with files made from it
+# ============================================================================================================
+#
+class PipelinedSocketMessageExchanger(MessageExchanger):
+  __slots__ = ('sock', 'receive_size', 'assembler', 'ready')
+  def __init__(self, sock, **kwargs):
+    self.sock, self.receive_size, self.assembler, self.ready = sock, kwargs.get('receive_size', 65536), LineAssembler(), []
+    super().__init__( **kwargs )
+  #
+  # read all available lines, returning a (status, lines) pair.  lines is empty once the co-communicator closes its end.
+  # socket timeouts are passed to the caller, which decides whether they mark the end of the exchange, as are the
+  # ValueErrors of over-long lines (see LineAssembler), which the caller may answer
+  def get_lines(self):
+    if self.ready:
+      lines, self.ready = self.ready, []
+      return ( True, lines )
+    try:
+      while True:
+        lines = self.assembler.lines()
+        if lines:  return ( True, lines )
+        data = self.sock.recv(self.receive_size)
+        if not data:
+          partial = self.assembler.remainder()
+          return ( True, [] if partial == '' else [ partial ] )
+        self.assembler.add(data)
+    except (socket.timeout, ValueError):
+      raise
+    except Exception:
+      print("{}: read failure".format(self.me('get_lines')), file=sys.stderr)
+      return ( False, None )
+  #
+  # read one line, returning a (status, line) pair, as MessageExchanger.get_line does.  line is '' once the co-communicator closes its end
+  def get_line(self):
+    status, lines = self.get_lines()
+    if not status:  return ( False, None )
+    if not lines:   return ( True, '' )
+    self.ready = lines[1:]
+    return ( True, lines[0] )
+  #
+  # send a group of lines with one write, returning status of write
+  def put_lines(self, lines):
+    try:
+      self.sock.sendall( ''.join(lines).encode('utf-8') )
+      return True
+    except Exception:
+      print("{}: write failure (output: {} lines)".format(self.me('put_lines'), len(lines)), file=sys.stderr)
+      return False
+  def put_line(self, line):  return self.put_lines([ line ])
+  #
+  def close(self):  pass            # the socket belongs to the caller
+  #
+  # auxiliary methods
+  def __repr__(self):          return "{}({}, **{!r})".format(self.__class__.__name__, self.sock, self.state_by_keyword())
+
+
+# ***************************************************************************************************************************
+# classes for delivering queued messages to readers
+# ***************************************************************************************************************************
+#
+# ============================================================================================================
+# class that keeps one open connection per reader SAP, for carrying messages to readers and their acknowledgements back
+#
+# design notes:
+# -.  connections are opened on first use and kept open across deliveries, queues, and readers:
+#     readers that share a SAP share its connection
+# -.  a connection that fails is closed, to be reopened on its next use.  since a reader may have closed a kept-open
+#     connection between deliveries, an exchange over a reused connection that fails is retried once over a fresh one.
+#     a message whose acknowledgement was lost this way may reach its reader twice
+# -.  each connection carries one exchange at a time:  callers hold its lock for the span of their exchanges
+# -.  lines are sent in windows, each with one write, and acknowledged cumulatively:  the reply  OK n  acknowledges
+#     the first n lines sent over the connection, so that one reply may cover a whole window.  a bare  OK
+#     acknowledges one more line, so that readers may also acknowledge line by line
+# ============================================================================================================
+#
+class SAPConnectionPool(object):
+  #
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  #  supporting class for one pooled connection
+  #
+  class SAPConnection(object):
+    def __init__(self, address, timeout):
+      self.address, self.timeout, self.lock = address, timeout, threading.Lock()
+      self.sock, self.exchanger, self.sent, self.acknowledged = None, None, 0, 0
+    #
+    # send a window of lines, returning how many of them, from the first, the co-communicator acknowledged
+    def send(self, lines):
+      while True:
+        fresh = self.sock is None
+        if fresh:
+          self.sock = socket.create_connection(self.address, self.timeout)
+          self.exchanger = OpenSocketMessageExchanger(self.sock)
+        acknowledged = self.send_window(lines)
+        if acknowledged == len(lines):  return acknowledged
+        self.close()
+        if fresh or acknowledged > 0:  return acknowledged
+    #
+    # send lines with one write, then collect acknowledgements until all are acknowledged or the replies stop
+    def send_window(self, lines):
+      start = self.sent
+      if not self.exchanger.put_lines(lines):  return 0
+      self.sent += len(lines)
+      while self.acknowledged < self.sent:
+        status, reply = self.exchanger.get_line()
+        fields = reply.split() if status else []
+        if fields == ['OK']:  self.acknowledged += 1
+        elif len(fields) == 2 and fields[0] == 'OK' and fields[1].isdigit():  self.acknowledged = max(self.acknowledged, min(int(fields[1]), self.sent))
+        else:  break
+      return self.acknowledged - start
+    #
+    def close(self):
+      if self.exchanger is not None:
+        try:  self.exchanger.close()
+        except OSError:  pass
+      if self.sock is not None:  self.sock.close()
+      self.sock, self.exchanger, self.sent, self.acknowledged = None, None, 0, 0
+    #
+    def __repr__(self):  return "{}({!r}, {!r})".format(self.__class__.__name__, self.address, self.timeout)
+  #
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  #
+  # kwargs parameters (all optional):
+  # *.  'timeout' - seconds to wait on a SAP for a connection or a reply (default: 10)
+  #
+  def __init__(self, **kwargs):
+    self.timeout, self.lock, self.connections = kwargs.get('timeout', 10), threading.Lock(), {}
+  #
+  # return the pooled connection for a (host, port) address, which is opened on its first exchange
+  def connection(self, address):
+    with self.lock:
+      if address not in self.connections:  self.connections[address] = SAPConnectionPool.SAPConnection(address, self.timeout)
+      return self.connections[address]
+  #
+  # return the addresses of the pooled connections
+  def addresses(self):
+    with self.lock:  return set(self.connections.keys())
+  #
+  # close all pooled connections
+  def close(self):
+    with self.lock:  connections, self.connections = list(self.connections.values()), {}
+    for connection in connections:
+      with connection.lock:  connection.close()
+  #
+  # auxiliary methods
+  def __repr__(self):          return "{}(**{!r})".format(self.__class__.__name__, self.state_by_keyword())
+  def state_by_keyword(self):  return { 'timeout': self.timeout }
+
+
+# ============================================================================================================
+# class that pushes unread messages to readers' SAPs, apart from the requests that queued them
+#
+# design notes:
+# -.  appends are acknowledged as soon as their messages are buffered.  the responders only notify the deliverer,
+#     whose worker threads then drain each reader's positions independently of the request that caused the notice
+# -.  each reader is served by at most one worker at a time, so that a reader receives each queue's messages in order.
+#     notices for a reader that is being served are folded into one more pass
+# -.  messages travel over the connections in a SAPConnectionPool, which stay open from one delivery to the next
+# -.  a reader's messages are sent in windows of up to 'window' messages, and its position advances, in bulk,
+#     by however many of each window it acknowledges.  a shortfall ends the pass, leaving the remaining messages
+#     for the next notice
+# -.  without workers, notices are served inline, on the notifying thread
+# -.  backpressure:  each reader's unread messages in a queue - its backlog - form its outbound buffer.
+#     -.  a reader whose backlog passes 'high_water' is marked as lagging
+#     -.  when a reader's backlog reaches 'lag_limit', admit() applies the 'overflow' policy to further appends:
+#         'reject' refuses them, while 'drop' skips the reader's oldest unread messages to keep its backlog within bounds.
+#         an append calls admit() and appends within one hold of the buffer collection's lock, so appends can't
+#         together pass the limit, and readers are skipped forward only for an append that goes ahead.  positions
+#         that 'drop' moves are recorded in the journal by record_trims(), once that lock is released:  the journal's
+#         lock is taken before the collection's, never after
+# -.  retries:  a reader whose pass fails is paused - i.e., notices for it wait - until a retry, which a TimerHeap
+#     makes after an exponentially growing, jittered delay.  after 'max_attempts' failures in a row, the messages
+#     that the reader failed to receive are moved to its queue's dead letters, where they may be inspected and replayed.
+#     a reader that registers again is tried at once.  retries are made only once the deliverer is started
+# -.  given a RegistryLog ('journal'), the deliverer records each move of a reader's position in it
+# -.  readers without a SAP aren't sent messages:  they fetch their own (see FetchFromQueue)
+# ============================================================================================================
+#
+class MessageDeliverer(object):
+  #
+  # kwargs parameters (all optional):
+  # *.  'workers' - the number of delivery threads that start() creates (default: 0, for inline delivery)
+  # *.  'timeout' - seconds to wait on a reader's SAP for a connection or an acknowledgement (default: 10)
+  # *.  'pool'    - the SAPConnectionPool for reaching readers (default: a pool of its own, with the above timeout)
+  # *.  'window'  - the most messages to send a reader before awaiting its acknowledgement (default: 256)
+  # *.  'high_water' - the backlog past which a reader is marked as lagging (default: None, for no limit)
+  # *.  'lag_limit'  - the backlog at which a queue's appends are subject to the overflow policy (default: None, for no limit)
+  # *.  'overflow'   - 'reject' or 'drop', as described above (default: 'reject')
+  # *.  'retry_delay'     - seconds before the first retry of a failing reader;  each later retry doubles the delay (default: 0.5)
+  # *.  'max_retry_delay' - the most seconds between retries (default: 30)
+  # *.  'max_attempts'    - failures in a row after which a reader's unreceived messages become dead letters (default: 5)
+  # *.  'journal' - the RegistryLog that records reader positions (default: None, for no record)
+  #
+  def __init__(self, queue_to_readers, reader_to_SAP, **kwargs):
+    self.queue_to_readers, self.reader_to_SAP = queue_to_readers, reader_to_SAP
+    self.workers, self.timeout, self.window = kwargs.get('workers', 0), kwargs.get('timeout', 10), kwargs.get('window', 256)
+    self.pool = kwargs['pool'] if 'pool' in kwargs else SAPConnectionPool(timeout=self.timeout)
+    self.condition, self.threads, self.stopping = threading.Condition(), [], False
+    self.ready   = collections.deque()     # readers awaiting a worker, in order of notice
+    self.pending = {}                      # reader -> queues that may hold messages that the reader has yet to receive
+    self.active  = set()                   # readers now being served
+    self.high_water, self.lag_limit, self.overflow = kwargs.get('high_water', None), kwargs.get('lag_limit', None), kwargs.get('overflow', 'reject')
+    self.lagging = set()                            # readers past the high-water mark
+    self.dropped = {}                               # reader -> number of messages skipped under the 'drop' policy
+    self.trimmed = []                               # (queue, reader) pairs skipped forward, yet to be recorded in the journal
+    self.retry_delay, self.max_retry_delay, self.max_attempts = kwargs.get('retry_delay', 0.5), kwargs.get('max_retry_delay', 30), kwargs.get('max_attempts', 5)
+    self.timers = TimerHeap()
+    self.failures = {}                              # reader -> number of its passes in a row that have failed
+    self.deferred = {}                              # reader -> queues with notices that await the reader's retry
+    self.dead_letters = {}                          # queue -> MessageBuffer of (reader, message) pairs that could not be delivered
+    self.replays = {}                               # reader -> list of (queue, message) pairs from dead letters, to be sent before anything else
+    self.journal = kwargs.get('journal', None)
+  #
+  # start the delivery threads, returning the deliverer
+  def start(self):
+    self.stopping = False
+    self.timers.start()
+    for k in range(self.workers):
+      thread = threading.Thread(name='{}-{}'.format(self.__class__.__name__, k), target=self.work, daemon=True)
+      thread.start()
+      self.threads.append(thread)
+    return self
+  #
+  # stop the delivery threads once outstanding notices are served
+  def stop(self):
+    with self.condition:
+      self.stopping = True
+      self.condition.notify_all()
+    for thread in self.threads:  thread.join()
+    self.threads = []
+    self.timers.stop()
+    self.pool.close()
+  #
+  # note that queue has new messages for its readers.  only the queue's own subscribers are touched,
+  # via the queue-to-readers index, so the cost of a notice grows with the queue's readers, not with all readers
+  def notify(self, queue_name):  self.notify_queues([ queue_name ])
+  #
+  # note that several queues have new messages for their readers, with one notice per reader:
+  # a reader of more than one of the queues is served once, for all of them
+  def notify_queues(self, queue_names):
+    readers_to_queues = {}
+    for queue_name in queue_names:
+      for reader_name in self.queue_to_readers.readers_for_queue(queue_name):
+        if self.high_water is not None and self.queue_to_readers.backlog(queue_name, reader_name) > self.high_water:
+          with self.condition:  self.lagging.add(reader_name)
+        with self.condition:
+          if reader_name in self.failures:
+            self.defer(queue_name, reader_name)
+            continue
+        if reader_name not in readers_to_queues:  readers_to_queues[reader_name] = set()
+        readers_to_queues[reader_name].add(queue_name)
+    for reader_name, reader_queue_names in readers_to_queues.items():  self.enqueue(reader_queue_names, reader_name)
+  #
+  # decide whether queue may take count more messages, applying the overflow policy to readers whose backlog would pass the lag limit.
+  # the caller holds the buffer collection's lock across admit() and its append, then calls record_trims()
+  def admit(self, queue_name, count=1):
+    if self.lag_limit is None:  return True
+    for reader_name in self.queue_to_readers.readers_for_queue(queue_name):
+      if self.queue_to_readers.backlog(queue_name, reader_name) + count > self.lag_limit:
+        if self.overflow == 'reject':  return False
+        skipped = self.queue_to_readers.trim_backlog(queue_name, reader_name, max(0, self.lag_limit - count))
+        with self.condition:
+          self.dropped[reader_name] = self.dropped.get(reader_name, 0) + skipped
+          if self.journal is not None:  self.trimmed.append((queue_name, reader_name))
+    return True
+  #
+  # record in the journal, if any, the positions that admit() has skipped forward.  called without the buffer collection's lock
+  def record_trims(self):
+    with self.condition:  trimmed, self.trimmed = self.trimmed, []
+    for queue_name, reader_name in trimmed:
+      position = self.queue_to_readers.reader_position(queue_name, reader_name)
+      if position is not None:  self.journal.record_position(queue_name, reader_name, position)
+  #
+  # check whether delivery to reader is paused:  i.e., whether its last pass failed
+  def is_paused(self, reader_name):
+    with self.condition:  return reader_name in self.failures
+  #
+  # return the readers that are now lagging
+  def lagging_readers(self):
+    with self.condition:  return set(self.lagging)
+  #
+  # note that queue may hold messages that reader has yet to receive.  this resumes delivery to a paused reader
+  def schedule(self, queue_name, reader_name):
+    if self.journal is not None and self.journal.defer(self.schedule, queue_name, reader_name):  return     # until the request is logged
+    with self.condition:  self.failures.pop(reader_name, None)
+    self.enqueue({ queue_name }, reader_name)
+  #
+  # have reader served for a set of queues, by a delivery thread or, without them, inline
+  def enqueue(self, queue_names, reader_name):
+    if self.reader_to_SAP.SAP(reader_name) is None:  return
+    if not self.threads:
+      self.deliver(reader_name, queue_names)
+      return
+    with self.condition:
+      if reader_name not in self.pending:
+        self.pending[reader_name] = set()
+        if reader_name not in self.active:
+          self.ready.append(reader_name)
+          self.condition.notify()
+      self.pending[reader_name].update(queue_names)
+  #
+  # body of a delivery thread:  serve readers, one at a time, until stopped
+  def work(self):
+    while True:
+      with self.condition:
+        while not self.ready and not self.stopping:  self.condition.wait()
+        if not self.ready:  return
+        reader_name = self.ready.popleft()
+        queue_names = self.pending.pop(reader_name)
+        self.active.add(reader_name)
+      try:
+        self.deliver(reader_name, queue_names)
+      except Exception as e:
+        print("{}: delivery to {} failed ({})".format(self.me('work'), reader_name, e), file=sys.stderr)
+      finally:
+        with self.condition:
+          self.active.discard(reader_name)
+          if reader_name in self.pending:
+            self.ready.append(reader_name)
+            self.condition.notify()
+  #
+  # hold a notice for a paused reader until its retry, arranging for the retry if need be.  requires self.condition
+  def defer(self, queue_name, reader_name):
+    if reader_name not in self.deferred:
+      self.deferred[reader_name] = set()
+      delay = min(self.max_retry_delay, self.retry_delay * 2 ** (self.failures[reader_name] - 1))
+      self.timers.call_later(random.uniform(delay / 2, delay), self.retry, reader_name)
+    self.deferred[reader_name].add(queue_name)
+  #
+  # retry a paused reader on the queues whose notices it missed
+  def retry(self, reader_name):
+    with self.condition:  queue_names = self.deferred.pop(reader_name, set())
+    if queue_names:  self.enqueue(queue_names, reader_name)
+  #
+  # send reader its dead letters from replays, then its unread messages from queue_names, over the pooled connection to its SAP,
+  # a window at a time, advancing its position in each queue as each window is acknowledged
+  def deliver(self, reader_name, queue_names):
+    SAP = self.reader_to_SAP.SAP(reader_name)
+    if SAP is None:  return
+    connection, drained, sent = self.pool.connection(self.address(SAP)), False, False
+    with self.condition:  replays = self.replays.pop(reader_name, [])
+    with connection.lock:
+      try:
+        while replays:
+          window, sent = replays[:self.window], True
+          acknowledged = connection.send([ message + '\n' for queue_name, message in window ])
+          replays = replays[acknowledged:]
+          if acknowledged < len(window):  return
+        for queue_name in sorted(queue_names):
+          while True:
+            position, messages = self.queue_to_readers.unread_messages(queue_name, reader_name, self.window)
+            if not messages:  break
+            acknowledged, sent = connection.send([ message + '\n' for message in messages ]), True
+            if acknowledged > 0:  self.advance(queue_name, reader_name, position + acknowledged)
+            if acknowledged < len(messages):  return
+        drained = True
+      except OSError as e:
+        connection.close()
+        print("{}: can't deliver to {} at {} ({})".format(self.me('deliver'), reader_name, SAP, e), file=sys.stderr)
+      finally:
+        self.settle(reader_name, queue_names, replays, drained, sent)
+  #
+  # account for the outcome of a pass:  clear a reader that was served, and pause one that failed, moving
+  # its unreceived messages to dead letters once it has failed too often
+  def settle(self, reader_name, queue_names, replays, drained, sent):
+    with self.condition:
+      if replays:  self.replays[reader_name] = replays + self.replays.get(reader_name, [])
+      if drained:
+        if sent:  self.failures.pop(reader_name, None)
+        self.lagging.discard(reader_name)
+        return
+      self.failures[reader_name] = self.failures.get(reader_name, 0) + 1
+      if self.failures[reader_name] < self.max_attempts:
+        for queue_name in queue_names:  self.defer(queue_name, reader_name)
+        return
+      replays = self.replays.pop(reader_name, [])
+    print("{}: moving {}'s undelivered messages to dead letters after {} failures".format(self.me('settle'), reader_name, self.max_attempts), file=sys.stderr)
+    for queue_name, message in replays:  self.bury(queue_name, reader_name, [ message ])
+    for queue_name in queue_names:
+      position, messages = self.queue_to_readers.unread_messages(queue_name, reader_name)
+      if messages:
+        self.bury(queue_name, reader_name, messages)
+        self.advance(queue_name, reader_name, position + len(messages))
+  #
+  # move reader's position in queue forward to position, recording the move in the journal, if any
+  def advance(self, queue_name, reader_name, position):
+    self.queue_to_readers.advance_position(queue_name, reader_name, position)
+    if self.journal is not None:  self.journal.record_position(queue_name, reader_name, position)
+  #
+  # move reader's position in queue to position, forward or back, recording the move in the journal, if any,
+  # and have reader served from there, returning the new position, or None if reader isn't registered for queue.
+  # note that messages already sent from the old position may still be acknowledged, moving the position past them
+  def reposition(self, queue_name, reader_name, position):
+    position = self.queue_to_readers.seek_position(queue_name, reader_name, position)
+    if position is None:  return None
+    if self.journal is not None:  self.journal.record_seek(queue_name, reader_name, position)
+    self.schedule(queue_name, reader_name)
+    return position
+  #
+  # add reader's messages to queue's dead letters
+  def bury(self, queue_name, reader_name, messages):
+    with self.condition:
+      if queue_name not in self.dead_letters:  self.dead_letters[queue_name] = MessageBuffer(**{'buffer': []})
+      for message in messages:  self.dead_letters[queue_name].append_message( (reader_name, message) )
+  #
+  # return queue's dead letters, as a list of (reader, message) pairs
+  def dead_letters_for_queue(self, queue_name):
+    with self.condition:
+      buffer = self.dead_letters.get(queue_name, None)
+      return [] if buffer is None else [ buffer.retrieve_message(k) for k in range(buffer.first_position(), buffer.end_position()) ]
+  #
+  # resend queue's dead letters to their readers, ahead of their unread messages, returning the number of dead letters resent
+  def replay_dead_letters(self, queue_name):
+    with self.condition:
+      buffer = self.dead_letters.pop(queue_name, None)
+      letters = [] if buffer is None else [ buffer.retrieve_message(k) for k in range(buffer.first_position(), buffer.end_position()) ]
+      for reader_name, message in letters:  self.replays.setdefault(reader_name, []).append( (queue_name, message) )
+    for reader_name in sorted({ reader_name for reader_name, message in letters }):  self.schedule(queue_name, reader_name)
+    return len(letters)
+  #
+  # auxiliary methods
+  def address(self, SAP):      return ( SAP[0] or 'localhost', int(SAP[1]) )
+  def me(self, methodname):    return "{}.{}".format(self.__class__.__name__, methodname)
+  def __repr__(self):          return "{}({!r}, {!r}, **{!r})".format(self.__class__.__name__, self.queue_to_readers, self.reader_to_SAP, self.state_by_keyword())
+  def state_by_keyword(self):
+    return { 'workers': self.workers, 'timeout': self.timeout, 'window': self.window,
+             'high_water': self.high_water, 'lag_limit': self.lag_limit, 'overflow': self.overflow,
+             'retry_delay': self.retry_delay, 'max_retry_delay': self.max_retry_delay, 'max_attempts': self.max_attempts }
+
+
+# ***************************************************************************************************************************
+# define classes for parsing bodies of client requests and generating bodies for responses to these requests
+# all requests as welll as all generated responses are limited to one text line
+#
+# Response generator classes can be partioned into three groups
+# -.  side-effect free generators:
+#       QueuesForReader, QueuesForWriter
+# -.  generators whose only effects are on local data structures
+#       RegisterQueue, RegisterWriterForQueue,
+#       UnregisterReaderForQueue, UnregisterWriterForQueue, UnregisterEntity, UnregisterQueue
+# -.  generators that also issue messages to clients
+#       RegisterReaderForQueue, which also has all backlogged messages sent to the new reader
+#       AppendMessageToQueue, which also has the message sent to all registered queue readers
+#     both hand their messages to a MessageDeliverer (kwargs['deliverer']), which delivers inline if none is given
+#
+# requests are parsed without regular expressions where they can be:  a generator that declares layouts - the kinds of
+# the tokens its requests hold - splits request bodies that follow a layout at single spaces, checks the tokens with
+# str methods, and passes them to its respond method as positional arguments.  bodies that follow no layout - e.g.,
+# those with runs of whitespace, or with errors - are matched against the generator's pattern, as before
+# ***************************************************************************************************************************
+
+# ============================================================================================================
+# abstract class for common functionality for individual response generators
+# ============================================================================================================
+
+class AbstractResponseGenerator(metaclass=abc.ABCMeta):
+  #
+  # patterns for request tokens
+  #
+  def _p_queue():        return "(?P<queue>[A-Za-z_]\w*)"
+  def _p_queues():       return "(?P<queues>[A-Za-z_]\w*(,[A-Za-z_]\w*)*)"
+  def _p_reader():       return "(?P<reader>[A-Za-z_]\w*)"
+  def _p_writer():       return "(?P<writer>[A-Za-z_]\w*)"
+  def _p_message():      return "(?P<message>.*)"
+  def _p_communicator(): return "(?P<communicator>[A-Za-z_]\w*)"
+  def _p_SAP():          return "(?P<host>[A-Za-z_\.]*)\s+(?P<port>\d{1,5})"
+  def _p_time():         return "(?P<time>[0-9][0-9T:.+-]*)"
+  def _p_start():        return "(?P<start>earliest|latest|\d+)"
+  #
+  # layouts of request bodies that parse() recognizes, as tuples of token kinds, in order (default: none, for the pattern alone).
+  # the kinds are name, names (a comma-separated list of names), count, start, and - last, if at all - message, for the rest of the line
+  layouts = ()
+  #
+  # checks for tokens of each kind.  parse() applies them to ASCII tokens only, for which str.isidentifier and str.isdigit
+  # accept what the patterns accept.  tokens that aren't ASCII are left to the patterns, whose \w and \d differ from them there
+  def _is_names(token):  return all(map(str.isidentifier, token.split(',')))
+  def _is_start(token):  return token == 'earliest' or token == 'latest' or token.isdigit()
+  token_checks = { 'name': str.isidentifier, 'names': _is_names, 'count': str.isdigit, 'start': _is_start }
+  #
+  # initialize the pattern that the current instance of a response generator uses a pattern to parse requests.
+  # also, check that the parameters that the current response generator requires are present in the keywords dict. 
+  def __init__(self, pattern, required_keywords, kwargs):
+    self.require_keywords(required_keywords, kwargs, '__init__')
+    self.pattern, self.required_keywords, self.kwargs = re.compile("^" + pattern + "$"), required_keywords, kwargs
+    #
+    # for each layout, its number of tokens, the checks for all but a trailing message, and whether it ends with a message
+    self.layout_checks = [ ( len(layout), tuple([ self.token_checks[kind] for kind in layout if kind != 'message' ]), layout[-1] == 'message' )
+                           for layout in self.layouts ]
+  #
+  # respond to a request by
+  # -.  calling the derived class's respond method with the request's tokens, if the request follows one of its layouts
+  # -.  otherwise, checking to see if it matches the expected request pattern
+  # -.  calling the derived class's generate_response method if so, with the results of the parse
+  def __call__(self, request_body):
+    arguments = self.parse(request_body)
+    if arguments is not None:  return self.respond(*arguments)
+    match = self.pattern.match(request_body)
+    if match is None:  return (False, 'error (syntax error)')
+    return self.generate_response(match.groupdict())
+  #
+  # split a request body that follows one of the generator's layouts into its tokens, or return None if it follows none of them.
+  # the tokens are those that the pattern would yield:  a body that the pattern would read differently follows no layout
+  def parse(self, request_body):
+    if not request_body:  return None
+    if request_body[-1] == '\n':  request_body = request_body[:-1]
+    for (size, checks, ends_with_message) in self.layout_checks:
+      if ends_with_message:
+        tokens = request_body.split(' ', size - 1)
+        if len(tokens) != size or '\n' in tokens[-1] or tokens[-1][:1].isspace():  continue
+        if not request_body[:len(request_body) - len(tokens[-1])].isascii():  continue
+      else:
+        if not request_body.isascii():  return None
+        tokens = request_body.split(' ')
+        if len(tokens) != size:  continue
+      for (check, token) in zip(checks, tokens):
+        if not check(token):  break
+      else:
+        return tokens
+    return None
+  #
+  # check whether a request's tokens, given as fields of their own, follow one of the generator's layouts.
+  # a trailing message is taken as it is, newlines and leading whitespace included
+  def follows_layout(self, fields):
+    for (size, checks, ends_with_message) in self.layout_checks:
+      if len(fields) != size:  continue
+      for (check, field) in zip(checks, fields):
+        if not (field.isascii() and check(field)):  break
+      else:
+        return True
+    return False
+  #
+  # respond to a request whose tokens arrived as fields of their own - e.g., in a frame (see FrameAssembler) - returning its status
+  # and the fields of its response.  fields that follow a layout go to respond as they are.  others are joined into a body for
+  # the pattern, so long as that body's tokens would be the fields:  i.e., so long as only the last field holds spaces, and none holds newlines
+  def respond_to_fields(self, fields):
+    if self.follows_layout(fields):
+      status, response_body = self.respond(*fields)
+    elif all([ len(field.split()) == 1 for field in fields[:-1] ]) and '\n' not in ''.join(fields[-1:]):
+      status, response_body = self(' '.join(fields))
+    else:
+      status, response_body = (False, 'error (syntax error)')
+    return (status, [] if response_body is None else [ response_body ])
+  #
+  # auxiliary methods
+  #
+  # check that the keyword parameters that the concrete class requires are in actual_keywords
+  def require_keywords(self, required_keywords, actual_keywords, methodname):
+    missing_keys = set(required_keywords) - set(actual_keywords.keys())
+    if len(missing_keys) == 0:  return
+    missing_keycount  = "{} keyword{}".format(len(missing_keys), '' if len(missing_keys) == 1 else 's')
+    missing_keynames  = functools.reduce(lambda s, n: s + ", " + n, missing_keys, "")[2:]
+    raise Exception("?? {}: kwargs missing {}: {}".format(self.me(methodname), missing_keycount, missing_keynames))
+  #
+  def me(self, methodname):  return "{}.{}".format(self.__class__.__name__, methodname)
+  def __repr__(self):        return "{}({!r}, {!r}, {!r})".format(self.__class__.__name__,  self.pattern, self.required_keywords, self.kwargs)
+  def __eq__(self, other):   return isinstance( other, self.__class__ ) and ( self.pattern, self.required_keywords, self.kwargs ) ==  ( other.pattern, other.required_keywords, other.kwargs )
+
+
+# ===================================================================================================================================
+# request-specific response generators
+# 
+# each class below is responsible for recognizing and responding to one particular type of request.
+#
+# design notes:
+# -.  each response generator has two methods:
+#     -.  one __init__ that establishes the context for parsing requests
+#     -.  a response_generator method that 
+#         -.  generates a response
+#         -.  realizes any additional effects associated with the request
+# -.  the format for each class's associated request is specified by the pattern parameter passed to its base class's __init__ method,
+#     AbstractResponseGenerator.__init__.
+# -.  the implementation assumes that the queue readers (kwargs['queue_to_readers']) and queue writers (kwargs['queue_to_writers'])
+#     classes associate entities with queues in a common, underlying message buffer
+# ===================================================================================================================================
+
+# ----------------------------------------------------------------------
+# register a queue under the specified name
+# ----------------------------------------------------------------------
+#
+class RegisterQueue(AbstractResponseGenerator):
+  #
+  layouts = ( ('name',), )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_queue() + "\s*"
+    required_keywords = ['queue_to_writers', 'queue_to_readers']
+    super().__init__(pattern, required_keywords, kwargs)
+    self.queue_to_readers = kwargs['queue_to_readers']
+    self.queue_to_writers = kwargs['queue_to_writers']
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['queue'])
+  #
+  def respond(self, queue):
+    self.queue_to_writers.register_queue(queue)
+    # self.queue_to_readers.register_queue(queue)  - not needed, since the queues share a common singleton
+    return (True, None)
+
+# ----------------------------------------------------------------------------------------------
+# register a reader for a specified queue, 
+#   sending any messages in that queue to the reader's specified SAP.
+# 
+# design notes: 
+# -.  in practice, for the request to actually succeed, the queue must already be registered
+# -.  the SAP may be omitted, for a reader that fetches its messages (see FetchFromQueue).  a reader that
+#     registers without one keeps any SAP that it registered before
+# -.  the request may end with a starting position - earliest, latest, or an offset - from which the reader
+#     is to be sent messages.  if it does, the response reports the position;  otherwise, a new reader starts
+#     with the queue's earliest message, and a registered reader keeps its position
+# ----------------------------------------------------------------------------------------------
+#
+class RegisterReaderForQueue(AbstractResponseGenerator):
+  #
+  # requests with a SAP or a start are left to the pattern
+  layouts = ( ('name', 'name'), )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_reader() + "\s+" + parent._p_queue() + "(\s+" + parent._p_SAP() + ")?(\s+" + parent._p_start() + ")?\s*"
+    required_keywords = ['queue_to_readers', 'communicator_to_SAP']
+    super().__init__(pattern, required_keywords, kwargs)
+    self.queue_to_readers = kwargs['queue_to_readers']
+    self.reader_to_SAP = kwargs['communicator_to_SAP']
+    self.deliverer = kwargs['deliverer'] if 'deliverer' in kwargs else MessageDeliverer(self.queue_to_readers, self.reader_to_SAP)
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['reader'], parsed_request_body['queue'], parsed_request_body['host'], parsed_request_body['port'], parsed_request_body['start'])
+  #
+  def respond(self, reader, queue, host=None, port=None, start=None):
+    position = None if start is None else self.queue_to_readers.position_for_start(queue, start)
+    registered = self.queue_to_readers.register(queue, reader, position)
+    if port is not None:  self.reader_to_SAP.register(reader, host, port)
+    #
+    # have any messages currently in this queue sent to the new reader, from its starting position.
+    # repositioning also records the position, lest a later recovery resolve 'latest' differently
+    if registered and start is not None:  return (True, str(self.deliverer.reposition(queue, reader, position)))
+    if registered:  self.deliverer.schedule(queue, reader)
+    return (True, None)
+
+# ----------------------------------------------------------------------------------------------
+# register a writer for a specified queue
+# 
+# design notes: 
+# -.  in practice, for the request to actually succeed, the queue must already be registered
+# ----------------------------------------------------------------------------------------------
+#
+class RegisterWriterForQueue(AbstractResponseGenerator):
+  #
+  layouts = ( ('name', 'name'), )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_writer() + "\s+" + parent._p_queue() + "\s*"
+    required_keywords = ['queue_to_writers']
+    super().__init__(pattern, required_keywords, kwargs)
+    #
+    self.queue_to_writers = kwargs['queue_to_writers']
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['writer'], parsed_request_body['queue'])
+  #
+  def respond(self, writer, queue):
+    self.queue_to_writers.register(queue, writer)
+    return (True, None)
+
+# ----------------------------------------------------------------------
+# return the queues for which a given entity as registered as a reader
+# ----------------------------------------------------------------------
+#
+class QueuesForReader(AbstractResponseGenerator):
+  #
+  layouts = ( ('name',), )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_reader() + "\s*"
+    required_keywords = ['queue_to_readers']
+    super().__init__(pattern, required_keywords, kwargs)
+    #
+    self.queue_to_readers = kwargs['queue_to_readers']
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['reader'])
+  #
+  def respond(self, reader):
+    queues = self.queue_to_readers.queues_for_reader(reader)
+    return (True, functools.reduce(lambda s, n: s+n+" ", queues, ""))
+
+# ----------------------------------------------------------------------
+# return the queues for which a given entity as registered as a writer
+# ----------------------------------------------------------------------
+#
+class QueuesForWriter(AbstractResponseGenerator):
+  #
+  layouts = ( ('name',), )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_writer() + "\s*"
+    required_keywords = ['queue_to_writers']
+    super().__init__(pattern, required_keywords, kwargs)
+    #
+    self.queue_to_writers = kwargs['queue_to_writers']
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['writer'])
+  #
+  def respond(self, writer):
+    queues = self.queue_to_writers.queues_for_writer(writer)
+    return (True, functools.reduce(lambda s, n: s+n+" ", queues, ""))
+
+# ----------------------------------------------------------------------------------------------
+# append a message to a spedified queue,
+#   sending that message to the SAPs for all currently registered readers
+#
+# design notes: 
+# -.  in practice, for the request to actually succeed, the queue must already be registered,
+#     and the associated entity must be registered as a writer for the queue
+# ----------------------------------------------------------------------------------------------
+#
+class AppendMessageToQueue(AbstractResponseGenerator):
+  #
+  layouts = ( ('name', 'name', 'message'), )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_writer() + "\s+" + parent._p_queue() + "\s+" + parent._p_message()
+    required_keywords = ['queue_to_writers', 'queue_to_readers', 'communicator_to_SAP']
+    super().__init__(pattern, required_keywords, kwargs)
+    #
+    self.queue_to_readers = kwargs['queue_to_readers']
+    self.reader_to_SAP = kwargs['communicator_to_SAP']
+    self.queue_to_writers = kwargs['queue_to_writers']
+    self.deliverer = kwargs['deliverer'] if 'deliverer' in kwargs else MessageDeliverer(self.queue_to_readers, self.reader_to_SAP)
+    self.committer = kwargs.get('committer', None)
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['writer'], parsed_request_body['queue'], parsed_request_body['message'])
+  #
+  def respond(self, writer, queue, message):
+    try:
+      with self.queue_to_writers.buffer_collection.lock:
+        if writer in self.queue_to_writers.writers_for_queue(queue) and not self.deliverer.admit(queue):  return (False, 'backpressure')
+        if not self.queue_to_writers.append_message(queue, writer, message):  return (False, None)
+    finally:
+      self.deliverer.record_trims()
+    if self.committer is not None and not self.committer.commit(queue, len(message)):  return (False, 'not durable')
+    #
+    # the message is buffered - and durable, if need be - so the append can be acknowledged:
+    # leave sending it to the queue's readers to the deliverer
+    self.deliverer.notify(queue)
+    return (True, None)
+
+# ----------------------------------------------------------------------------------------------
+# append a message to several queues, named in a comma-separated list, as one append,
+#   sending that message to the SAPs for all of those queues' registered readers
+#
+# design notes:
+# -.  the writer must be registered for every queue, and every queue must have room under the lag limit:
+#     otherwise, the message is appended to none of them
+# -.  the message is parsed and stored once:  queues held as lists share it.  it's made durable with one commit,
+#     and handed to the deliverer with one notice, which serves a reader of several of the queues once, for all of them
+# ----------------------------------------------------------------------------------------------
+#
+class AppendMessageToQueues(AbstractResponseGenerator):
+  #
+  layouts = ( ('name', 'names', 'message'), )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_writer() + "\s+" + parent._p_queues() + "\s+" + parent._p_message()
+    required_keywords = ['queue_to_writers', 'queue_to_readers', 'communicator_to_SAP']
+    super().__init__(pattern, required_keywords, kwargs)
+    #
+    self.queue_to_readers = kwargs['queue_to_readers']
+    self.reader_to_SAP = kwargs['communicator_to_SAP']
+    self.queue_to_writers = kwargs['queue_to_writers']
+    self.deliverer = kwargs['deliverer'] if 'deliverer' in kwargs else MessageDeliverer(self.queue_to_readers, self.reader_to_SAP)
+    self.committer = kwargs.get('committer', None)
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['writer'], parsed_request_body['queues'], parsed_request_body['message'])
+  #
+  def respond(self, writer, queues, message):
+    queues = list(dict.fromkeys(queues.split(',')))      # in order, without repeats
+    try:
+      with self.queue_to_writers.buffer_collection.lock:
+        authorized = all([ writer in self.queue_to_writers.writers_for_queue(queue) for queue in queues ])
+        if authorized and not all([ self.deliverer.admit(queue) for queue in queues ]):  return (False, 'backpressure')
+        if not self.queue_to_writers.append_message_to_queues(queues, writer, message):  return (False, None)
+    finally:
+      self.deliverer.record_trims()
+    if self.committer is not None and not self.committer.commit_all(queues, len(message)):  return (False, 'not durable')
+    self.deliverer.notify_queues(queues)
+    return (True, None)
+
+# ----------------------------------------------------------------------------------------------
+# append a batch of messages to a specified queue, as one append,
+#   sending them to the SAPs for all currently registered readers
+#
+# design notes:
+# -.  the request's first line ends with the number of messages, n, which follow on the request's next n lines:  e.g.,
+#       w1 q_bert 2\nfirst message\nsecond message
+# -.  a count that isn't a number from 0 to RequestDispatcher.max_batch is answered with 'bad count' at once:  the lines
+#     that follow aren't awaited as part of the request
+# -.  the batch is checked against the writer's registration and the lag limit, appended, made durable,
+#     and handed to the deliverer once, rather than once per message
+# ----------------------------------------------------------------------------------------------
+#
+class AppendBatchToQueue(AbstractResponseGenerator):
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_writer() + "\s+" + parent._p_queue() + "\s+(?P<count>\S+)[ \t]*(\n(?P<messages>(?s:.*)))?"
+    required_keywords = ['queue_to_writers', 'queue_to_readers', 'communicator_to_SAP']
+    super().__init__(pattern, required_keywords, kwargs)
+    #
+    self.queue_to_readers = kwargs['queue_to_readers']
+    self.reader_to_SAP = kwargs['communicator_to_SAP']
+    self.queue_to_writers = kwargs['queue_to_writers']
+    self.deliverer = kwargs['deliverer'] if 'deliverer' in kwargs else MessageDeliverer(self.queue_to_readers, self.reader_to_SAP)
+    self.committer = kwargs.get('committer', None)
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    messages = [] if parsed_request_body['messages'] is None else parsed_request_body['messages'].split('\n')
+    if messages and messages[-1] == '':  messages.pop()          # the newline that ends the last message
+    return self.respond(parsed_request_body['writer'], parsed_request_body['queue'], parsed_request_body['count'], messages)
+  #
+  # in a frame, the batch's messages follow its count as fields of their own, and so may hold newlines
+  def respond_to_fields(self, fields):
+    checks = ( str.isidentifier, str.isidentifier )
+    if len(fields) < 3 or not all([ field.isascii() and check(field) for (check, field) in zip(checks, fields) ]):  return (False, [ 'error (syntax error)' ])
+    status, response_body = self.respond(fields[0], fields[1], fields[2], fields[3:])
+    return (status, [] if response_body is None else [ response_body ])
+  #
+  def respond(self, writer, queue, count, messages):
+    if RequestDispatcher.batch_count(count) != len(messages):  return (False, 'bad count')
+    if not messages:  return (True, None)
+    try:
+      with self.queue_to_writers.buffer_collection.lock:
+        if writer in self.queue_to_writers.writers_for_queue(queue) and not self.deliverer.admit(queue, len(messages)):  return (False, 'backpressure')
+        if not self.queue_to_writers.append_messages(queue, writer, messages):  return (False, None)
+    finally:
+      self.deliverer.record_trims()
+    if self.committer is not None and not self.committer.commit(queue, sum([ len(message) for message in messages ])):  return (False, 'not durable')
+    self.deliverer.notify(queue)
+    return (True, None)
+
+# ----------------------------------------------------------------------
+# drop an entity's current as-reader registration for a given queue
+# ----------------------------------------------------------------------
+#
+class UnregisterReaderFromQueue(AbstractResponseGenerator):
+  #
+  layouts = ( ('name', 'name'), )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_reader() + "\s+" + parent._p_queue() + "\s*"
+    required_keywords = ['queue_to_readers']
+    super().__init__(pattern, required_keywords, kwargs)
+    #
+    self.queue_to_readers = kwargs['queue_to_readers']
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['reader'], parsed_request_body['queue'])
+  #
+  def respond(self, reader, queue):
+    self.queue_to_readers.unregister(queue, reader)
+    return (True, None)
+
+# ----------------------------------------------------------------------
+# drop an entity's current as-writer registration for a given queue
+# ----------------------------------------------------------------------
+#
+class UnregisterWriterFromQueue(AbstractResponseGenerator):
+  #
+  layouts = ( ('name', 'name'), )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_writer() + "\s+" + parent._p_queue() + "\s*"
+    required_keywords = ['queue_to_writers']
+    super().__init__(pattern, required_keywords, kwargs)
+    #
+    self.queue_to_writers = kwargs['queue_to_writers']
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['writer'], parsed_request_body['queue'])
+  #
+  def respond(self, writer, queue):
+    self.queue_to_writers.unregister(queue, writer)
+    return (True, None)
+
+# ------------------------------------------------------------------------------------------
+# drop an entity's current registration from all queues, deleting the entity's SAP
+#   (if one has been specified)
+# ------------------------------------------------------------------------------------------
+#
+class UnregisterEntity(AbstractResponseGenerator):
+  #
+  layouts = ( ('name',), )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_communicator() + "\s*"
+    required_keywords = ['queue_to_readers', 'communicator_to_SAP', 'queue_to_writers']
+    super().__init__(pattern, required_keywords, kwargs)
+    #
+    self.queue_to_readers = kwargs['queue_to_readers']
+    self.reader_to_SAP    = kwargs['communicator_to_SAP']
+    self.queue_to_writers = kwargs['queue_to_writers']
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['communicator'])
+  #
+  def respond(self, communicator):
+    self.queue_to_readers.unregister_reader(communicator)
+    self.queue_to_writers.unregister_writer(communicator)
+    self.reader_to_SAP.unregister(communicator)
+    return (True, None)
+
+# ----------------------------------------------------------------------
+# unregister the specified queue
+# ----------------------------------------------------------------------
+#
+class UnregisterQueue(AbstractResponseGenerator):
+  #
+  layouts = ( ('name',), )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_queue() + "\s*"
+    required_keywords = ['queue_to_writers']
+    super().__init__(pattern, required_keywords, kwargs)
+    self.queue_to_writers = kwargs['queue_to_writers']
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['queue'])
+  #
+  def respond(self, queue):
+    self.queue_to_writers.unregister_queue(queue)
+    return (True, None)
+
+# ----------------------------------------------------------------------
+# report the number of dead letters for a queue - i.e., messages that
+#   could not be delivered - followed by the readers they were meant for
+# ----------------------------------------------------------------------
+#
+class DeadLettersForQueue(AbstractResponseGenerator):
+  #
+  layouts = ( ('name',), )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_queue() + "\s*"
+    required_keywords = ['deliverer']
+    super().__init__(pattern, required_keywords, kwargs)
+    self.deliverer = kwargs['deliverer']
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['queue'])
+  #
+  def respond(self, queue):
+    letters = self.deliverer.dead_letters_for_queue(queue)
+    readers = sorted({ reader for reader, message in letters })
+    return (True, functools.reduce(lambda s, n: s + " " + n, readers, str(len(letters))))
+
+# ----------------------------------------------------------------------
+# resend a queue's dead letters to the readers they were meant for,
+#   reporting the number resent
+# ----------------------------------------------------------------------
+#
+class ReplayDeadLettersForQueue(AbstractResponseGenerator):
+  #
+  layouts = ( ('name',), )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_queue() + "\s*"
+    required_keywords = ['deliverer']
+    super().__init__(pattern, required_keywords, kwargs)
+    self.deliverer = kwargs['deliverer']
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['queue'])
+  #
+  def respond(self, queue):
+    return (True, str(self.deliverer.replay_dead_letters(queue)))
+
+
+# ----------------------------------------------------------------------
+# move a reader's position in a queue to the first message appended at or
+#   after a given time, reporting the new position.  the time is either
+#   -.  a number of seconds since the epoch:  e.g., 1792312920.5
+#   -.  a local date and time, in ISO 8601 form:  e.g., 2026-10-18T10:42
+#   -.  a local time of day, today, in ISO 8601 form:  e.g., 10:42
+# ----------------------------------------------------------------------
+#
+class SeekReaderToTime(AbstractResponseGenerator):
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_reader() + "\s+" + parent._p_queue() + "\s+" + parent._p_time() + "\s*"
+    required_keywords = ['queue_to_readers', 'deliverer']
+    super().__init__(pattern, required_keywords, kwargs)
+    self.queue_to_readers = kwargs['queue_to_readers']
+    self.deliverer = kwargs['deliverer']
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    timestamp = self.timestamp(parsed_request_body['time'])
+    if timestamp is None:  return (False, 'bad time')
+    queue, reader = parsed_request_body['queue'], parsed_request_body['reader']
+    position = self.queue_to_readers.position_for_time(queue, timestamp)
+    position = None if position is None else self.deliverer.reposition(queue, reader, position)
+    return (False, None) if position is None else (True, str(position))
+  #
+  # convert a time, in one of the forms above, to seconds since the epoch, or None if it's in none of them
+  def timestamp(self, text):
+    try:
+      return float(text)
+    except ValueError:
+      pass
+    try:
+      if 'T' in text or text.count('-') == 2:  return datetime.datetime.fromisoformat(text).timestamp()
+      return datetime.datetime.combine(datetime.date.today(), datetime.time.fromisoformat(text)).timestamp()
+    except ValueError:
+      return None
+
+
+# ----------------------------------------------------------------------
+# move a reader's position in a queue to a given position - earliest,
+#   latest, or an offset - reporting the new position
+# ----------------------------------------------------------------------
+#
+class SeekReader(AbstractResponseGenerator):
+  #
+  layouts = ( ('name', 'name', 'start'), )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_reader() + "\s+" + parent._p_queue() + "\s+" + parent._p_start() + "\s*"
+    required_keywords = ['queue_to_readers', 'deliverer']
+    super().__init__(pattern, required_keywords, kwargs)
+    self.queue_to_readers = kwargs['queue_to_readers']
+    self.deliverer = kwargs['deliverer']
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['reader'], parsed_request_body['queue'], parsed_request_body['start'])
+  #
+  def respond(self, reader, queue, start):
+    position = self.queue_to_readers.position_for_start(queue, start)
+    position = None if position is None else self.deliverer.reposition(queue, reader, position)
+    return (False, None) if position is None else (True, str(position))
+
+# ----------------------------------------------------------------------
+# report a reader's position in a queue
+# ----------------------------------------------------------------------
+#
+class PositionOfReader(AbstractResponseGenerator):
+  #
+  layouts = ( ('name', 'name'), )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_reader() + "\s+" + parent._p_queue() + "\s*"
+    required_keywords = ['queue_to_readers']
+    super().__init__(pattern, required_keywords, kwargs)
+    self.queue_to_readers = kwargs['queue_to_readers']
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['reader'], parsed_request_body['queue'])
+  #
+  def respond(self, reader, queue):
+    position = self.queue_to_readers.reader_position(queue, reader)
+    return (False, None) if position is None else (True, str(position))
+
+# ----------------------------------------------------------------------------------------------
+# send a reader up to a given number of its unread messages from a queue, in the response itself,
+#   and move the reader's position past them
+#
+# design notes:
+# -.  the response is OK, followed by the number of messages, n, followed by n lines, one per message:  e.g.,
+#       OK 2\nfirst message\nsecond message
+# -.  the request may end with a wait, in milliseconds.  if the reader has no unread messages, the response waits,
+#     for up to that long, on the queue's arrival condition, and is sent as soon as a message is appended.
+#     waits are limited to max_wait seconds
+# -.  the reader must be registered for the queue, and is meant to be registered without a SAP, lest the deliverer
+#     also send it the messages that it fetches
+# ----------------------------------------------------------------------------------------------
+#
+class FetchFromQueue(AbstractResponseGenerator):
+  #
+  # the most seconds that a fetch waits
+  max_wait = 60
+  #
+  layouts = ( ('name', 'name', 'count'), ('name', 'name', 'count', 'count') )
+  #
+  def __init__(self, **kwargs):
+    parent = self.__class__.__bases__[0]
+    pattern = parent._p_reader() + "\s+" + parent._p_queue() + "\s+(?P<count>\d+)(\s+(?P<wait>\d+))?\s*"
+    required_keywords = ['queue_to_readers', 'deliverer']
+    super().__init__(pattern, required_keywords, kwargs)
+    self.queue_to_readers = kwargs['queue_to_readers']
+    self.deliverer = kwargs['deliverer']
+  #
+  def generate_response(self, parsed_request_body):
+    if parsed_request_body is None:  return (False, None)
+    return self.respond(parsed_request_body['reader'], parsed_request_body['queue'], parsed_request_body['count'], parsed_request_body['wait'])
+  #
+  def respond(self, reader, queue, count, wait=None):
+    status, response_fields = self.take(reader, queue, count, wait)
+    return (status, '\n'.join(response_fields) if status else None)
+  #
+  # in a frame, the messages are fields of their own, and so may hold newlines
+  def respond_to_fields(self, fields):
+    if self.follows_layout(fields):  return self.take(*fields)
+    return super().respond_to_fields(fields)
+  #
+  # take the messages, returning a status and the fields of the response:  the number of messages, followed by the messages
+  def take(self, reader, queue, count, wait=None):
+    timeout = 0 if wait is None else min(int(wait) / 1000, self.max_wait)
+    position, messages = self.queue_to_readers.take_messages(queue, reader, int(count), timeout)
+    if position is None:  return (False, [])
+    #
+    # the position has moved already:  have the deliverer record the move
+    if messages:  self.deliverer.advance(queue, reader, position + len(messages))
+    return (True, [ str(len(messages)) ] + messages)
+
+
+# ************************************************************************************************************
+# define classes for exchanging messages with clients
+# ************************************************************************************************************
+
+# ----------------------------------------------------------------------
+# request dispatcher class -
+# -. accepts a request
+# -. parses the request
+# -. dispatches it to its respective handler
+# ----------------------------------------------------------------------
+#
+class RequestDispatcher(object):
+  #
+  # pattern for overall request
+  def p_request():  return "(?P<request_name>[A-Za-z]\w*)(\s+(?P<request_body>(?s:.*)))?"
+  #
+  # requests that may wait - e.g., for messages to be appended - before they're answered
+  waiting = { 'fetch_from_q' }
+  #
+  # requests whose OK responses run on:  the number that follows OK is followed by that many lines
+  counted = { 'fetch_from_q' }
+  #
+  # requests that run on:  the number that ends the request's first line is followed by that many lines
+  batched = { 'append_batch_to_q' }
+  max_batch = 10000              # the most lines that may follow a batched request's first line
+  #
+  # request types by opcode, for requests that arrive as frames (see FrameAssembler).  new types go at the end
+  opcodes = ( 'register_q', 'set_reader_for_q', 'set_writer_for_q', 'qs_for_reader', 'qs_for_writer', 'append_message_to_q',
+              'append_batch_to_q', 'append_message_to_qs', 'unset_reader_from_q', 'unset_writer_from_q', 'unset_communicator',
+              'unregister_q', 'dead_letters_for_q', 'replay_dead_letters_for_q', 'seek_reader_to_time', 'seek_reader',
+              'position_of_reader', 'fetch_from_q' )
+  #
+  # the request, as a line - or, for a batched request, as lines - that a frame's opcode and fields stand for
+  def line_for_fields(opcode, fields):
+    request_type = RequestDispatcher.opcodes[opcode] if opcode < len(RequestDispatcher.opcodes) else 'unknown'
+    if request_type in RequestDispatcher.batched:  return ' '.join([ request_type ] + fields[:3]) + ''.join([ '\n' + field for field in fields[3:] ]) + '\n'
+    return ' '.join([ request_type ] + fields) + '\n'
+  #
+  # the number of lines that follow a request's first line:  none, if a batched request's count is out of range
+  def continuation_lines(request):
+    fields = request.split()
+    if len(fields) < 2 or fields[0] not in RequestDispatcher.batched:  return 0
+    return RequestDispatcher.batch_count(fields[-1]) or 0
+  #
+  # the number that a batched request's count stands for, or None if it isn't a number from 0 to max_batch
+  def batch_count(text):
+    if not text.isdecimal() or len(text) > len(str(RequestDispatcher.max_batch)):  return None
+    return int(text) if int(text) <= RequestDispatcher.max_batch else None
+  #
+  # ##### main methods ####
+  #
+  # kwargs parameters (all optional):
+  # *.  'deliverer' - the MessageDeliverer that sends queued messages to readers (default: one that delivers inline)
+  # *.  'journal'   - the RegistryLog that records requests that change the registry (default: None, for no record)
+  # *.  'committer' - the GroupCommitter that makes appends durable before they are acknowledged (default: None, for none)
+  #
+  def __init__(self, queue_to_readers, queue_to_writers, reader_to_SAP, **kwargs):
+    #
+    # store required datasets in a dict for use by responders
+    self.required_datasets = dict( { 'queue_to_readers': queue_to_readers, 'queue_to_writers': queue_to_writers, 'communicator_to_SAP': reader_to_SAP } )
+    self.required_datasets['deliverer'] = kwargs['deliverer'] if 'deliverer' in kwargs else MessageDeliverer(queue_to_readers, reader_to_SAP)
+    if 'committer' in kwargs:  self.required_datasets['committer'] = kwargs['committer']
+    self.journal = kwargs.get('journal', None)
+    #
+    # initialize the table of responders by request type
+    self.request_to_responder = {
+        'register_q':           RegisterQueue(**self.required_datasets),
+        'set_reader_for_q':     RegisterReaderForQueue(**self.required_datasets),
+        'set_writer_for_q':     RegisterWriterForQueue(**self.required_datasets),
+        'qs_for_reader':        QueuesForReader(**self.required_datasets),
+        'qs_for_writer':        QueuesForWriter(**self.required_datasets),
+        'append_message_to_q':  AppendMessageToQueue(**self.required_datasets),
+        'append_batch_to_q':    AppendBatchToQueue(**self.required_datasets),
+        'append_message_to_qs': AppendMessageToQueues(**self.required_datasets),
+        'unset_reader_from_q':  UnregisterReaderFromQueue(**self.required_datasets),
+        'unset_writer_from_q':  UnregisterWriterFromQueue(**self.required_datasets),
+        'unset_communicator':   UnregisterEntity(**self.required_datasets),
+        'unregister_q':         UnregisterQueue(**self.required_datasets),
+        'dead_letters_for_q':   DeadLettersForQueue(**self.required_datasets),
+        'replay_dead_letters_for_q':  ReplayDeadLettersForQueue(**self.required_datasets),
+        'seek_reader_to_time':  SeekReaderToTime(**self.required_datasets),
+        'seek_reader':          SeekReader(**self.required_datasets),
+        'position_of_reader':   PositionOfReader(**self.required_datasets),
+        'fetch_from_q':         FetchFromQueue(**self.required_datasets)
+    }
+    # compile the pattern for separating requests into head and body portions
+    self.request_pattern = re.compile(self.__class__.p_request())
+  #
+  # field a client's request by 
+  # -. first checking for conformance to the basic  "request_type ...parameters..."  format, then
+  # -. dispatching the request to the appropriate handler, as determined from the above table
+  #  
+  def __call__(self, request):
+    #
+    # first, separate the request's type -- i.e., its head field -- from the specifics -- i.e., its body.
+    # a known type, followed by one space, is split off as is;  otherwise, the request pattern separates the two,
+    # reading runs of whitespace as the pattern does, and reporting malformed requests
+    request_type, separator, request_body = request.partition(' ')
+    if not separator or request_type not in self.request_to_responder or request_body[:1].isspace():
+      match = self.request_pattern.match(request)
+      if match is None:  return ('unknown', False, 'syntax error (bad format)')
+      #
+      # then, try to locate the particular request in the table of known requests
+      match_dict = match.groupdict()
+      request_type, request_body = match_dict['request_name'], match_dict['request_body']
+      if request_type not in self.request_to_responder:  return (request_type, False, 'unknown request type')
+    #
+    # pass the body to whatever responder is indicated
+    return self.apply(request_type, request, self.request_to_responder[request_type], request_body)
+  #
+  # field a request that arrived as a frame:  its opcode gives its type, and its fields, its tokens, which go to the responder as they are.
+  # return the request's type, its status, and the fields of its response
+  def dispatch_fields(self, opcode, fields):
+    if opcode >= len(self.opcodes):  return ('unknown', False, [ 'unknown request type' ])
+    request_type = self.opcodes[opcode]
+    return self.apply(request_type, self.__class__.line_for_fields(opcode, fields), self.request_to_responder[request_type].respond_to_fields, fields)
+  #
+  # have a request answered by calling respond(argument), recording requests that change the registry once they succeed
+  def apply(self, request_type, request, respond, argument):
+    if self.journal is None or request_type not in self.journal.journaled:  return ( request_type, ) + respond( argument )
+    with self.journal.lock:
+      self.journal.hold()
+      response, deferred = (False, None), []
+      try:
+        response = respond( argument )
+      finally:
+        deferred = self.journal.release(request if response[0] else None)
+    for function, args in deferred:  function(*args)
+    return ( request_type, ) + response
+  #
+  # check whether a request may wait before it's answered, and so should be kept from holding up other requests
+  def may_wait(self, request):
+    fields = request.split(None, 1)
+    return len(fields) > 0 and fields[0] in self.waiting
+  #
+  # auxiliary methods
+  def me(self, methodname):  return "{}.{}".format(self.__class__.__name__, methodname)
+
+
+# ----------------------------------------------------------------------
+# registry log class - i.e., a write-ahead log of the requests that change the registry -
+#   queues, their readers and writers, readers' SAPs, and readers' positions - with snapshots
+#
+# design notes:
+# -.  the log lives in one directory, as a snapshot file and the log file that continues it.  the snapshot is a
+#     pickled dict of registry state;  each log record is a one-line request, as received, or a line
+#       @position reader queue position
+#     for a move of a reader's position, as reported by a MessageDeliverer, or a line
+#       @seek reader queue position
+#     for a move that may go back - e.g., to the position found for a time.  the record holds the position, rather than
+#     the request, since the position found for a time depends on the time index as it was:  e.g., the time index of
+#     a buffer held in memory isn't restored
+# -.  records made while a request is applied - e.g., the @seek for a reader that registers at 'latest' - are held,
+#     then written after the request, so that replaying the request, then the records, reproduces their effect
+# -.  records reach disk - are fsynced - before the requests that made them are acknowledged:  a request's record and
+#     the records held with it, with one fsync.  @position records, which no one awaits, are only flushed, and reach
+#     disk with the next fsync:  losing one replays messages already delivered, rather than losing a registry change.
+#     a snapshot is renamed into place, and its directory fsynced, so that the rename, too, outlasts a crash
+# -.  requests are logged once they succeed, before they are acknowledged.  the dispatcher holds the log's lock
+#     while it applies and logs a request, so that a snapshot never falls between the two.  deliveries that the request
+#     schedules are deferred until the lock is released:  an inline delivery waits on a reader, and a delivery that's
+#     acknowledged logs the reader's position, so neither may be made by, or wait on, the lock's holder
+# -.  once a log holds 'snapshot_interval' records, the registry's state is written to a new snapshot, and a new
+#     log, numbered one past the old one, is begun.  the snapshot names its log, so that recovery - loading the
+#     snapshot and replaying that log - takes time in proportion to the registry's size, rather than to its history
+# -.  recovery restores reader positions no further than the end of their queues.  with in-memory storage,
+#     queues restart empty, and readers restart at the start of their queues
+# ----------------------------------------------------------------------
+#
+class RegistryLog(object):
+  #
+  # requests that change the registry
+  journaled = { 'register_q', 'set_reader_for_q', 'set_writer_for_q', 'unset_reader_from_q', 'unset_writer_from_q', 'unset_communicator', 'unregister_q' }
+  #
+  # kwargs parameters (all optional):
+  # *.  'snapshot_interval' - the number of log records after which a snapshot is taken (default: 10000)
+  #
+  def __init__(self, directory, **kwargs):
+    self.directory, self.snapshot_interval = directory, kwargs.get('snapshot_interval', 10000)
+    os.makedirs(self.directory, exist_ok=True)
+    self.lock = threading.RLock()
+    self.datasets, self.file, self.generation, self.records = None, None, 0, 0
+    self.held = None                   # records held while a request is applied, or None
+    self.holder, self.deferred = None, []          # thread applying the request, and the calls it defers until release()
+  #
+  # restore the registry that dispatcher serves from the latest snapshot and its log, then start a new snapshot and log,
+  # returning the number of log records replayed
+  def recover(self, dispatcher):
+    with self.lock:
+      self.datasets = dispatcher.required_datasets
+      snapshot_name = os.path.join(self.directory, 'snapshot')
+      if os.path.exists(snapshot_name):
+        with open(snapshot_name, 'rb') as snapshot:  state = pickle.load(snapshot)
+        self.restore(state)
+        self.generation = state['generation']
+      replayed = 0
+      if os.path.exists(self.log_name(self.generation)):
+        with open(self.log_name(self.generation), 'r', encoding='utf-8') as log:
+          for line in log:
+            if not line.endswith('\n'):  break            # ignore a partially written last record
+            if line.startswith('@position '):
+              reader_name, queue_name, position = line.split()[1:]
+              self.restore_position(queue_name, reader_name, int(position))
+            elif line.startswith('@seek '):
+              reader_name, queue_name, position = line.split()[1:]
+              self.datasets['queue_to_readers'].seek_position(queue_name, reader_name, int(position))
+            else:
+              dispatcher(line.rstrip('\n'))
+            replayed += 1
+      self.snapshot()
+      return replayed
+  #
+  # hold the records made from here until release().  requires self.lock
+  def hold(self):  self.held, self.holder = [], threading.get_ident()
+  #
+  # append request, if any, to the log, followed by the records held since hold(), and return the calls deferred since then,
+  # for the caller to make once it releases self.lock
+  def release(self, request):
+    held, deferred, self.held, self.holder, self.deferred = self.held, self.deferred, None, None, []
+    lines = ([] if request is None else [ request ]) + held
+    if lines and self.file is not None:  self.write(lines, True)
+    return deferred
+  #
+  # defer function(*args) until release(), if called by the thread applying a request, returning True if it was deferred
+  def defer(self, function, *args):
+    if self.holder != threading.get_ident():  return False
+    self.deferred.append( (function, args) )
+    return True
+  #
+  # append a request to the log - and, if durable, to disk - taking a snapshot when one is due
+  def record(self, request, durable=True):
+    with self.lock:
+      if self.file is None:  return
+      if self.held is not None:
+        self.held.append(request)
+        return
+      self.write([ request ], durable)
+  #
+  # append lines to the log, making them durable if need be, and take a snapshot if one is due.  requires self.lock
+  def write(self, lines, durable):
+    for line in lines:  self.file.write(line.rstrip('\n') + '\n')
+    self.file.flush()
+    if durable:  os.fsync(self.file.fileno())
+    self.records += len(lines)
+    if self.records >= self.snapshot_interval:  self.snapshot()
+  #
+  # append a move of reader's position in queue to the log, without waiting for it to reach disk
+  def record_position(self, queue_name, reader_name, position):
+    if position is not None:  self.record('@position {} {} {}'.format(reader_name, queue_name, position), False)
+  #
+  # append a move of reader's position in queue, forward or back, to the log
+  def record_seek(self, queue_name, reader_name, position):
+    self.record('@seek {} {} {}'.format(reader_name, queue_name, position))
+  #
+  # write the registry's state to a new snapshot, continued by a new, empty log
+  def snapshot(self):
+    with self.lock:
+      queue_to_readers, queue_to_writers, reader_to_SAP = [ self.datasets[name] for name in ('queue_to_readers', 'queue_to_writers', 'communicator_to_SAP') ]
+      with queue_to_writers.buffer_collection.lock:
+        queues = sorted(queue_to_writers.queues())
+        state = { 'generation': self.generation + 1, 'queues': queues,
+                  'writers': { queue: sorted(queue_to_writers.writers_for_queue(queue)) for queue in queues },
+                  'readers': { queue: { reader: queue_to_readers.reader_position(queue, reader) for reader in queue_to_readers.readers_for_queue(queue) } for queue in queues } }
+      with reader_to_SAP.lock:  state['SAPs'] = dict(reader_to_SAP.communicator_to_SAP)
+      #
+      # write the snapshot in full before replacing the old one;  only then retire the old log
+      temporary_name = os.path.join(self.directory, 'snapshot.tmp')
+      with open(temporary_name, 'wb') as snapshot:
+        pickle.dump(state, snapshot, pickle.HIGHEST_PROTOCOL)
+        snapshot.flush()
+        os.fsync(snapshot.fileno())
+      if self.file is not None:  self.file.close()
+      self.generation, self.records = state['generation'], 0
+      self.file = open(self.log_name(self.generation), 'a', encoding='utf-8')
+      os.replace(temporary_name, os.path.join(self.directory, 'snapshot'))
+      self.sync_directory()
+      for filename in os.listdir(self.directory):
+        if filename.startswith('log.') and filename != os.path.basename(self.log_name(self.generation)):  os.remove(os.path.join(self.directory, filename))
+  #
+  # make the log directory's entries - e.g., the snapshot's, once renamed - durable.  only POSIX systems open, and need sync, directories
+  def sync_directory(self):
+    if os.name != 'posix':  return
+    descriptor = os.open(self.directory, os.O_RDONLY)
+    try:
+      os.fsync(descriptor)
+    finally:
+      os.close(descriptor)
+  #
+  # load registry state from a snapshot
+  def restore(self, state):
+    queue_to_readers, queue_to_writers, reader_to_SAP = [ self.datasets[name] for name in ('queue_to_readers', 'queue_to_writers', 'communicator_to_SAP') ]
+    for communicator, (host, port) in state['SAPs'].items():  reader_to_SAP.register(communicator, host, port)
+    for queue_name in state['queues']:
+      queue_to_writers.register_queue(queue_name)
+      for writer_name in state['writers'][queue_name]:  queue_to_writers.register(queue_name, writer_name)
+      for reader_name, position in state['readers'][queue_name].items():
+        queue_to_readers.register(queue_name, reader_name)
+        self.restore_position(queue_name, reader_name, position)
+        self.datasets['deliverer'].schedule(queue_name, reader_name)
+  #
+  # move reader's position in queue forward to position, though no further than the end of queue
+  def restore_position(self, queue_name, reader_name, position):
+    queue_to_readers = self.datasets['queue_to_readers']
+    with queue_to_readers.buffer_collection.lock:
+      if queue_to_readers.buffer_collection.is_registered(queue_name):
+        queue_to_readers.advance_position(queue_name, reader_name, min(position, queue_to_readers.buffer_collection.end_position(queue_name)))
+  #
+  # close the log
+  def close(self):
+    with self.lock:
+      if self.file is not None:  self.file.close()
+      self.file = None
+  #
+  # auxiliary methods
+  def log_name(self, generation):  return os.path.join(self.directory, 'log.{:020d}'.format(generation))
+  def me(self, methodname):        return "{}.{}".format(self.__class__.__name__, methodname)
+  def __repr__(self):              return "{}({!r}, **{!r})".format(self.__class__.__name__, self.directory, self.state_by_keyword())
+  def state_by_keyword(self):      return { 'snapshot_interval': self.snapshot_interval }
+
+
+# ================================================================================================================
+# class that uses a message exchanger and a request dispatcher to respond to a request
+# assumptions:
+# -.  one request is required for one response
+# -.  the dispatcher is a function that
+#     -.  accepts two arguments:
+#         -.  a request:  a one-line-long string
+#         -.  a keywords object
+#     -,  carries out any side effects implied by the request
+#     -.  returns two values:
+#         -.  a status
+#         -.  a one-line response to the request:  a value of type (one-line string, None) - initially None
+# ================================================================================================================
+#
+class RequestHandler(object):
+  #
+  def __init__(self, dispatcher):  self.dispatcher = dispatcher
+  #
+  # read the one-line request from the socket, generate the one-line response, respond via the socket, return the response and status
+  #
+  def respond(self, sock):
+    request, request_type, status, response = None, 'unknown', False, None
+    try:
+      if self.speaks_frames(sock):  return self.respond_to_frame(sock)
+    except Exception:
+      print("{}: read failure".format(self.me('respond')), file=sys.stderr)
+      return ( request, request_type, status, response )
+    try:
+      exchanger = OpenSocketMessageExchanger(sock)
+      try:
+        interim_status, request = exchanger.get_line( )
+        lines_to_come = RequestDispatcher.continuation_lines(request) if interim_status else 0
+        while interim_status and lines_to_come > 0:          # the rest of a batched request
+          interim_status, line = exchanger.get_line( )
+          request, lines_to_come = request + (line or ''), lines_to_come - 1
+        if interim_status:
+          request_type, interim_status, response = self.handle_request( request )
+          try:
+            status = exchanger.put_line( response+'\n' ) and interim_status
+          except Exception:
+            print("{}: write failure".format(self.me('respond')), file=sys.stderr)
+            status = False
+      except Exception:
+        print("{}: read failure".format(self.me('respond')), file=sys.stderr)
+      finally:
+        exchanger.close()
+    except Exception:
+      print("{}: connect failure".format(self.me('respond')), file=sys.stderr)
+    return ( request, request_type, status, response )
+  #
+  # serve a keep-alive session:  read newline-terminated requests from the socket and answer them in order until
+  # the client closes its end of the connection or idle_timeout seconds (if specified) pass without a request.
+  # a batched request is answered once all of its lines have arrived.
+  # requests are pipelined:  every request that has already arrived is dispatched, and the responses to all of them
+  # are sent with one write.  yield a ( request, request_type, status, response ) tuple, as respond() returns,
+  # for each request served
+  #
+  def converse(self, sock, idle_timeout=None):
+    if idle_timeout is not None:  sock.settimeout(idle_timeout)
+    try:
+      frames = self.speaks_frames(sock)
+    except socket.timeout:
+      return                                       # session idle for too long
+    except Exception:
+      print("{}: read failure".format(self.me('converse')), file=sys.stderr)
+      return
+    if frames:
+      yield from self.converse_in_frames(sock)
+      return
+    exchanger, assembler = PipelinedSocketMessageExchanger(sock), RequestAssembler()
+    try:
+      while True:
+        try:
+          status, lines = exchanger.get_lines()
+        except socket.timeout:
+          break                                    # session idle for too long
+        except ValueError as e:
+          print("{}: refusing lines ({})".format(self.me('converse'), e), file=sys.stderr)
+          exchanger.put_lines([ 'error {}\n'.format(e) ])    # an over-long line:  the stream's next line can't be found
+          break
+        if not status or lines == []:  break       # read failure, or client closed its end of the session
+        requests = assembler.requests(lines)
+        if requests == []:  continue               # a batched request, still arriving
+        results = self.handle_requests( requests )
+        status = exchanger.put_lines([ response+'\n' for (request, request_type, interim_status, response) in results ])
+        for (request, request_type, interim_status, response) in results:
+          yield ( request, request_type, status and interim_status, response )
+        if not status:  break
+    finally:
+      exchanger.close()
+  #
+  # check whether the client speaks in frames (see FrameAssembler), by peeking at the first byte that it sends
+  #
+  def speaks_frames(self, sock):
+    first = sock.recv(1, socket.MSG_PEEK)
+    return len(first) == 1 and first[0] == FrameAssembler.magic
+  #
+  # read one request frame from the socket, and answer it with one response frame, returning what respond() returns
+  #
+  def respond_to_frame(self, sock):
+    request, request_type, status, response = None, 'unknown', False, None
+    assembler, frames = FrameAssembler(), []
+    try:
+      while not frames and assembler.receive(sock) > 0:  frames = assembler.frames()
+      if frames:
+        ( request, request_type, status, response_fields ) = self.handle_frames(frames[:1])[0]
+        response = RequestHandler.response_for_fields(status, response_fields)
+        sock.sendall(FrameAssembler.frame(1 if status else 0, response_fields))
+    except ValueError as e:                        # a malformed or oversized frame
+      self.refuse_frames(sock, e)
+      response = RequestHandler.response_for_fields(False, [ str(e) ])
+    except Exception as e:
+      print("{}: frame exchange failure ({})".format(self.me('respond_to_frame'), type(e)), file=sys.stderr)
+      status = False
+    return ( request, request_type, status, response )
+  #
+  # serve a keep-alive session in frames, as converse() does in lines:  frames that have already arrived are answered
+  # in one pass, with one write
+  #
+  def converse_in_frames(self, sock):
+    assembler = FrameAssembler()
+    while True:
+      try:
+        if assembler.receive(sock) == 0:  break    # client closed its end of the session
+        frames = assembler.frames()
+      except socket.timeout:
+        break                                      # session idle for too long
+      except ValueError as e:
+        self.refuse_frames(sock, e)                # a malformed or oversized frame:  nothing after it can be trusted
+        break
+      except Exception as e:
+        print("{}: frame exchange failure ({})".format(self.me('converse_in_frames'), type(e)), file=sys.stderr)
+        break
+      if frames == []:  continue                   # a frame, still arriving
+      results = self.handle_frames( frames )
+      try:
+        sock.sendall(b''.join([ FrameAssembler.frame(1 if status else 0, response_fields) for (request, request_type, status, response_fields) in results ]))
+        sent = True
+      except Exception:
+        print("{}: write failure".format(self.me('converse_in_frames')), file=sys.stderr)
+        sent = False
+      for (request, request_type, status, response_fields) in results:
+        yield ( request, request_type, sent and status, RequestHandler.response_for_fields(status, response_fields) )
+      if not sent:  break
+  #
+  # answer a stream whose frames can't be read with an error frame that says why, before the session is closed
+  #
+  def refuse_frames(self, sock, error):
+    print("{}: refusing frames ({})".format(self.me('refuse_frames'), error), file=sys.stderr)
+    try:
+      sock.sendall(FrameAssembler.frame(0, [ str(error) ]))
+    except Exception:
+      pass
+  #
+  # dispatch a group of request frames in order, returning a ( request, request_type, status, response_fields ) tuple for each,
+  # where request is the line that the frame stands for
+  #
+  def handle_frames(self, frames):
+    return [ ( RequestDispatcher.line_for_fields(opcode, fields), ) + self.dispatcher.dispatch_fields(opcode, fields) for (opcode, fields) in frames ]
+  #
+  # the response, as a line, that a response frame's status and fields stand for - e.g., for reporting - and the reverse
+  #
+  def response_for_fields(status, response_fields):
+    return ' '.join([ "OK" if status else "error" ] + response_fields)
+  def fields_for_response(request_type, response):
+    status, separator, response_body = response.partition(' ')
+    if not separator:  return []
+    return response_body.split('\n') if status == "OK" and request_type in RequestDispatcher.counted else [ response_body ]
+  #
+  # dispatch a group of requests in order, returning a ( request, request_type, status, response ) tuple for each
+  #
+  def handle_requests(self, requests):
+    return [ ( request, ) + self.handle_request( request ) for request in requests ]
+  #
+  # dispatch one request, returning its type, its status, and the one-line response (less its newline) that reports that status
+  #
+  def handle_request(self, request):
+    request_type, status, response_body = self.dispatcher( request )
+    response = ("OK" if status else "error") + ('' if response_body is None else " "+response_body)
+    return ( request_type, status, response )
+  #
+  # check whether any of a group of requests may wait before it's answered - e.g., a fetch that awaits messages
+  #
+  def may_wait(self, requests):
+    return hasattr(self.dispatcher, 'may_wait') and any([ self.dispatcher.may_wait(request) for request in requests ])
+  #
+  def me(self, methodname):    return "{}.{}".format(self.__class__.__name__, methodname)
+  def __repr__(self):          return "{}({!r})".format(self.__class__.__name__, self.dispatcher)
+  def __eq__(self, other):     return isinstance( other, self.__class__ ) and self.dispatcher == other.dispatcher
+
+
+# ================================================================================================================
+# class that uses asyncio and a request handler to respond to requests from many concurrently connected clients
+#
+# design notes:
+# -.  each connection is served by its own coroutine, so a client that is slow to send its request or to read its
+#     response no longer holds up the clients behind it
+# -.  requests are still dispatched one at a time, on a single worker thread:  this
+#     -.  preserves the single-threaded access that the request datasets assume, and
+#     -.  keeps the dispatcher's blocking fan-out to reader SAPs off the event loop
+#     the exception is groups of requests that may wait - e.g., fetches that await messages - which are dispatched on
+#     a pool of 'waiters' threads, so that they hold up only their own connections.  the datasets serialize their own
+#     updates, so these threads may safely run alongside the dispatch thread
+# -.  with a session timeout, connections are kept alive:  each carries any number of newline-terminated requests,
+#     answered in order, and stays open until the client closes it or it sits idle for the session timeout.
+#     requests on such connections may be pipelined, as for RequestHandler.converse
+# -.  the server shuts itself down after timeout seconds with no new connections, as the serial server does
+#
+# kwargs parameters (all optional):
+# *.  'host'     - interface on which to accept connections (default: all interfaces)
+# *.  'port'     - port on which to accept connections (default: 8881)
+# *.  'timeout'  - idle timeout, in seconds (default: None, for no timeout)
+# *.  'backlog'  - the number of clients waiting for a connection that the server can bind at once (default: 100)
+# *.  'session_timeout' - if present, keep connections alive, closing them after this many idle seconds
+#                  (default: None, for one request per connection)
+# *.  'receive_size' - the most bytes to read from a kept-alive connection at once (default: 65536)
+# *.  'waiters'  - the number of threads for dispatching requests that may wait (default: 16)
+# *.  'reporter' - if present, a function that's called as reporter(address, request, request_type, status, response)
+#                  once each request is handled
+# ================================================================================================================
+#
+class AsyncRequestServer(object):
+  #
+  def __init__(self, handler, **kwargs):
+    self.handler = handler
+    self.host, self.port = kwargs.get('host', ''), kwargs.get('port', 8881)
+    self.timeout, self.backlog = kwargs.get('timeout', None), kwargs.get('backlog', 100)
+    self.session_timeout, self.receive_size = kwargs.get('session_timeout', None), kwargs.get('receive_size', 65536)
+    self.reporter, self.waiters = kwargs.get('reporter', None), kwargs.get('waiters', 16)
+    self.dispatch_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    self.wait_executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.waiters)
+  #
+  # serve one connection:  read each one-line request, dispatch it on the dispatch thread, write its one-line response.
+  # without a session timeout, the connection carries one request.  with one, requests are pipelined:  every request
+  # that has already arrived is dispatched in one pass, and the responses to all of them are sent with one write
+  async def serve_connection(self, reader, writer):
+    self.activity.set()
+    address = writer.get_extra_info('peername')
+    assembler, request_assembler = LineAssembler(), RequestAssembler()
+    try:
+      #
+      # the first byte tells whether the client speaks in frames or in lines
+      try:
+        first = await asyncio.wait_for(reader.read(1), self.session_timeout)
+      except asyncio.TimeoutError:
+        return                                     # session idle for too long
+      if not first:  return                        # client closed its end of the connection
+      if first[0] == FrameAssembler.magic:
+        await self.serve_frames(reader, writer, address, first)
+        return
+      if self.session_timeout is not None:  assembler.add(first)
+      while True:
+        if self.session_timeout is None:
+          lines = [ first if first == b'\n' else first + await reader.readline() ]
+          for k in range(RequestDispatcher.continuation_lines(lines[0].decode('utf-8'))):  lines.append(await reader.readline())
+          requests = [ b''.join(lines).replace(b'\r\n', b'\n').decode('utf-8') ] if lines[0] else []      # as LineAssembler does
+        else:
+          try:
+            data = await asyncio.wait_for(reader.read(self.receive_size), self.session_timeout)
+          except asyncio.TimeoutError:
+            break                                  # session idle for too long
+          if data:
+            assembler.add(data)
+            try:
+              requests = request_assembler.requests(assembler.lines())
+            except ValueError as e:
+              print("{}: refusing lines from {} ({})".format(self.me('serve_connection'), address, e), file=sys.stderr)
+              writer.write('error {}\n'.format(e).encode('utf-8'))
+              await writer.drain()
+              break                                # an over-long line:  the stream's next line can't be found
+            if not requests:  continue
+          else:
+            partial = assembler.remainder()
+            requests = request_assembler.requests([ partial ]) if partial else []
+        if not requests:  break                    # client closed its end of the connection
+        results = await self.answer(requests)
+        writer.write(''.join([ response+'\n' for (request, request_type, status, response) in results ]).encode('utf-8'))
+        await writer.drain()
+        if self.reporter is not None:
+          for (request, request_type, status, response) in results:  self.reporter(address, request, request_type, status, response)
+        if self.session_timeout is None or not data:  break
+        self.activity.set()
+    except Exception as e:
+      print("{}: failure serving {} ({})".format(self.me('serve_connection'), address, type(e)), file=sys.stderr)
+    finally:
+      writer.close()
+  #
+  # serve a connection whose client speaks in frames, as serve_connection does for lines, given the frame's first byte
+  async def serve_frames(self, reader, writer, address, first):
+    assembler = FrameAssembler()
+    assembler.add(first)
+    while True:
+      try:
+        frames = assembler.frames()
+      except ValueError as e:
+        print("{}: refusing frames from {} ({})".format(self.me('serve_frames'), address, e), file=sys.stderr)
+        writer.write(FrameAssembler.frame(0, [ str(e) ]))
+        await writer.drain()
+        break                                      # a malformed or oversized frame:  nothing after it can be trusted
+      if not frames:
+        try:
+          data = await asyncio.wait_for(reader.read(self.receive_size), self.session_timeout)
+        except asyncio.TimeoutError:
+          break                                    # session idle for too long
+        if not data:  break                        # client closed its end of the connection
+        assembler.add(data)
+        continue
+      if self.session_timeout is None:  frames = frames[:1]
+      results = await self.answer_frames(frames)
+      writer.write(b''.join([ FrameAssembler.frame(1 if status else 0, response_fields) for (request, request_type, status, response_fields) in results ]))
+      await writer.drain()
+      if self.reporter is not None:
+        for (request, request_type, status, response_fields) in results:
+          self.reporter(address, request, request_type, status, RequestHandler.response_for_fields(status, response_fields))
+      if self.session_timeout is None:  break
+      self.activity.set()
+  #
+  # answer a group of requests, returning a ( request, request_type, status, response ) tuple for each
+  async def answer(self, requests):
+    loop = asyncio.get_running_loop()
+    executor = self.wait_executor if self.handler.may_wait(requests) else self.dispatch_executor
+    return await loop.run_in_executor(executor, self.handler.handle_requests, requests)
+  #
+  # answer a group of request frames, returning a ( request, request_type, status, response_fields ) tuple for each
+  async def answer_frames(self, frames):
+    loop = asyncio.get_running_loop()
+    requests = [ RequestDispatcher.line_for_fields(opcode, fields) for (opcode, fields) in frames ]
+    executor = self.wait_executor if self.handler.may_wait(requests) else self.dispatch_executor
+    return await loop.run_in_executor(executor, self.handler.handle_frames, frames)
+  #
+  # accept connections until the server has been idle for timeout seconds
+  async def serve(self):
+    self.activity = asyncio.Event()
+    server = await asyncio.start_server(self.serve_connection, self.host or None, self.port, reuse_address=True, backlog=self.backlog)
+    try:
+      while True:
+        try:
+          await asyncio.wait_for(self.activity.wait(), self.timeout)
+          self.activity.clear()
+        except asyncio.TimeoutError:
+          break
+    finally:
+      server.close()
+      await server.wait_closed()
+  #
+  def run(self):
+    try:
+      asyncio.run(self.serve())
+    finally:
+      self.dispatch_executor.shutdown()
+      self.wait_executor.shutdown()
+  #
+  # auxiliary methods
+  def me(self, methodname):    return "{}.{}".format(self.__class__.__name__, methodname)
+  def __repr__(self):          return "{}({!r}, **{!r})".format(self.__class__.__name__, self.handler, self.state_by_keyword())
+  def state_by_keyword(self):
+    return { 'host': self.host, 'port': self.port, 'timeout': self.timeout, 'backlog': self.backlog, 'session_timeout': self.session_timeout }
+
+
+# ================================================================================================================
+# class that uses a bounded pool of worker threads and a request handler to respond to requests
+#
+# design notes:
+# -.  an acceptor thread hands each accepted connection to a worker, which serves it with RequestHandler.respond
+#     (or, with a session timeout, with RequestHandler.converse)
+# -.  at most workers + queue_depth connections may be in service or awaiting a worker at once.  a connection that
+#     arrives while the pool is saturated is answered immediately with "error busy" and closed
+# -.  the request datasets serialize their own updates, so requests from different workers may be dispatched at once.
+#     a request that waits - e.g., a fetch that awaits messages - holds its worker until it's answered
+# -.  the server shuts itself down after timeout seconds with no new connections, as the serial server does
+#
+# kwargs parameters (all optional):
+# *.  'host'        - interface on which to accept connections (default: all interfaces)
+# *.  'port'        - port on which to accept connections (default: 8881)
+# *.  'timeout'     - idle timeout, in seconds (default: None, for no timeout)
+# *.  'backlog'     - the number of clients waiting for a connection that the server can bind at once (default: 100)
+# *.  'workers'     - the number of worker threads (default: 8)
+# *.  'queue_depth' - the number of accepted connections that may wait for a worker (default: 32)
+# *.  'session_timeout' - if present, keep connections alive, closing them after this many idle seconds
+#                  (default: None, for one request per connection)
+# *.  'reporter'    - if present, a function that's called as reporter(address, request, request_type, status, response)
+#                  once each request is handled
+# ================================================================================================================
+#
+class ThreadPoolRequestServer(object):
+  #
+  def __init__(self, handler, **kwargs):
+    self.handler = handler
+    self.host, self.port = kwargs.get('host', ''), kwargs.get('port', 8881)
+    self.timeout, self.backlog = kwargs.get('timeout', None), kwargs.get('backlog', 100)
+    self.workers, self.queue_depth = kwargs.get('workers', 8), kwargs.get('queue_depth', 32)
+    self.session_timeout = kwargs.get('session_timeout', None)
+    self.reporter = kwargs.get('reporter', None)
+    self.slots = threading.BoundedSemaphore(self.workers + self.queue_depth)
+  #
+  # serve one connection on a worker thread, releasing its slot in the pool once done
+  def serve_connection(self, sock, address):
+    try:
+      if self.session_timeout is None:  results = [ self.handler.respond(sock) ]
+      else:                             results = self.handler.converse(sock, self.session_timeout)
+      for (request, request_type, status, response) in results:
+        if self.reporter is not None:  self.reporter(address, request, request_type, status, response)
+    except Exception as e:
+      print("{}: failure serving {} ({})".format(self.me('serve_connection'), address, type(e)), file=sys.stderr)
+    finally:
+      sock.close()
+      self.slots.release()
+  #
+  # turn away a connection that arrives while the pool is saturated
+  def refuse_connection(self, sock, address):
+    try:
+      sock.sendall(b'error busy\n')
+    except Exception:
+      print("{}: can't notify {} of refusal".format(self.me('refuse_connection'), address), file=sys.stderr)
+    finally:
+      sock.close()
+  #
+  # accept connections until the server has been idle for timeout seconds
+  def run(self):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.settimeout(self.timeout)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+    try:
+      sock.bind((self.host, self.port))
+      sock.listen(self.backlog)
+      while True:
+        try:
+          newSocket, address = sock.accept()
+        except socket.timeout:
+          break
+        if self.slots.acquire(blocking=False):  executor.submit(self.serve_connection, newSocket, address)
+        else:                                   self.refuse_connection(newSocket, address)
+    finally:
+      sock.close()
+      executor.shutdown()
+  #
+  # auxiliary methods
+  def me(self, methodname):    return "{}.{}".format(self.__class__.__name__, methodname)
+  def __repr__(self):          return "{}({!r}, **{!r})".format(self.__class__.__name__, self.handler, self.state_by_keyword())
+  def state_by_keyword(self):
+    return { 'host': self.host, 'port': self.port, 'timeout': self.timeout, 'backlog': self.backlog, 'workers': self.workers,
+             'queue_depth': self.queue_depth, 'session_timeout': self.session_timeout }
+
+
+# ************************************************************************************************************
+# classes for spreading queues across several server processes - i.e., shards
+#
+# design:
+# -.  each shard is a separate server process that owns the queues whose names hash to it
+# -.  a front router accepts client connections on the well-known port, forwarding each request to the shard that
+#     owns the queue that the request names.  requests that concern every queue - e.g., qs_for_reader - are scattered
+#     to all shards, and the shards' responses gathered into one
+# ************************************************************************************************************
+
+# ============================================================================================================
+# class that assigns queues to shards, and requests to the shards that must serve them
+# ============================================================================================================
+#
+class QueueShardMap(object):
+  #
+  # position, among the fields that follow the request type, of the queue that a request names
+  queue_field = { 'register_q': 0, 'set_reader_for_q': 1, 'set_writer_for_q': 1, 'append_message_to_q': 1, 'append_batch_to_q': 1,
+                  'unset_reader_from_q': 1, 'unset_writer_from_q': 1, 'unregister_q': 0,
+                  'dead_letters_for_q': 0, 'replay_dead_letters_for_q': 0, 'seek_reader_to_time': 1,
+                  'seek_reader': 1, 'position_of_reader': 1, 'fetch_from_q': 1, 'append_message_to_qs': 1 }
+  #
+  # requests that concern every queue, and so must be scattered to every shard
+  scattered = { 'qs_for_reader', 'qs_for_writer', 'unset_communicator' }
+  #
+  # requests whose queue field is a comma-separated list of queues, which may belong to several shards
+  listed = { 'append_message_to_qs' }
+  #
+  def __init__(self, shard_count):  self.shard_count = shard_count
+  #
+  # the shard that owns a queue.  crc32, unlike hash(), yields the same value in every process
+  def shard_for_queue(self, queue_name):  return zlib.crc32(queue_name.encode('utf-8')) % self.shard_count
+  #
+  # the shards to which a request must be sent.  shard 0 answers requests that name no queue, reporting their errors
+  def shards_for_request(self, request):
+    fields = request.split()
+    if not fields:  return [ 0 ]
+    if fields[0] in self.scattered:  return list(range(self.shard_count))
+    k = self.queue_field.get(fields[0], None)
+    if k is None or len(fields) < k+2:  return [ 0 ]
+    if fields[0] in self.listed:  return sorted(set([ self.shard_for_queue(queue_name) for queue_name in fields[k+1].split(',') ]))
+    return [ self.shard_for_queue(fields[k+1]) ]
+  #
+  # the ( shard, request ) pairs into which a request is split:  the request itself, for each shard that must serve it -
+  # or, for a request that lists its queues, a copy per shard that lists only that shard's queues
+  def requests_for_shards(self, request):
+    shards = self.shards_for_request(request)
+    request_type = (request.split(None, 1) or [ None ])[0]
+    if len(shards) == 1 or request_type not in self.listed:  return [ (k, request) for k in shards ]
+    k = self.queue_field[request_type]
+    fields = request.split(None, k+2)
+    queue_names = fields[k+1].split(',')
+    return [ (shard, ' '.join(fields[:k+1] + [ ','.join([ queue_name for queue_name in queue_names if self.shard_for_queue(queue_name) == shard ]) ] + fields[k+2:]))
+             for shard in shards ]
+  #
+  # check whether a request may wait before it's answered (see RequestDispatcher.waiting)
+  def may_wait(self, request):
+    fields = request.split(None, 1)
+    return len(fields) > 0 and fields[0] in RequestDispatcher.waiting
+  #
+  # combine the responses from several shards into one:  the first error, if any; otherwise OK, followed by all response bodies
+  def gather(self, responses):
+    for response in responses:
+      if not response.startswith('OK'):  return response
+    if all([ response == 'OK' for response in responses ]):  return 'OK'
+    return 'OK ' + ''.join([ response[3:] for response in responses ])
+  #
+  # auxiliary methods
+  def __repr__(self):          return "{}({!r})".format(self.__class__.__name__, self.shard_count)
+  def __eq__(self, other):     return isinstance( other, self.__class__ ) and self.shard_count == other.shard_count
+
+
+# ============================================================================================================
+# class that supports a persistent, pipelined asyncio connection to one shard.
+# requests are written as they're sent;  responses, which the shard returns in order, resolve the futures that
+# send() returned, in the order in which the requests were sent.  the OK responses to counted requests
+# (see RequestDispatcher.counted) run on for as many lines as their counts, which are included in their results
+# ============================================================================================================
+#
+class ShardConnection(object):
+  #
+  def __init__(self, host, port, **kwargs):
+    self.host, self.port = host, port
+    self.connect_attempts, self.connect_interval = kwargs.get('connect_attempts', 50), kwargs.get('connect_interval', 0.1)
+    self.writer, self.pending = None, collections.deque()
+  #
+  # connect to the shard, allowing time for a newly started shard to begin accepting connections
+  async def open(self):
+    for attempt in range(self.connect_attempts):
+      try:
+        reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        asyncio.ensure_future(self.receive(reader))
+        return True
+      except OSError:
+        await asyncio.sleep(self.connect_interval)
+    print("{}: can't connect to shard at {}, port {}".format(self.me('open'), self.host, self.port), file=sys.stderr)
+    return False
+  #
+  def is_open(self):  return self.writer is not None
+  #
+  # send a request, returning a future for its response
+  def send(self, request):
+    future = asyncio.get_running_loop().create_future()
+    if self.writer is None:
+      future.set_result('error shard unavailable\n')
+    else:
+      fields = request.split(None, 1)
+      self.pending.append( (future, len(fields) > 0 and fields[0] in RequestDispatcher.counted) )
+      self.writer.write((request if request.endswith('\n') else request+'\n').encode('utf-8'))
+    return future
+  #
+  async def drain(self):
+    if self.writer is not None:  await self.writer.drain()
+  #
+  # match responses to requests until the shard closes the connection, then fail any requests left unanswered
+  async def receive(self, reader):
+    try:
+      while True:
+        line = await reader.readline()
+        if not line:  break
+        future, counted = self.pending.popleft()
+        if counted and line.startswith(b'OK '):
+          for k in range(int(line.split()[1])):  line += await reader.readline()
+        future.set_result(line.decode('utf-8'))
+    except Exception as e:
+      print("{}: lost connection to shard at {}, port {} ({})".format(self.me('receive'), self.host, self.port, type(e)), file=sys.stderr)
+    finally:
+      self.writer = None
+      while self.pending:  self.pending.popleft()[0].set_result('error shard unavailable\n')
+  #
+  def close(self):
+    if self.writer is not None:  self.writer.close()
+  #
+  # auxiliary methods
+  def me(self, methodname):    return "{}.{}".format(self.__class__.__name__, methodname)
+  def __repr__(self):          return "{}({!r}, {!r})".format(self.__class__.__name__, self.host, self.port)
+
+
+# ================================================================================================================
+# class that routes client requests to the shards that own their queues
+#
+# design notes:
+# -.  the router serves clients as AsyncRequestServer does - including keep-alive sessions and pipelining - but
+#     answers requests by forwarding them over one persistent connection per shard
+# -.  requests are sent to the shards in the order in which they arrive, so each shard sees a client's requests in order.
+#     the exception is requests that may wait - e.g., fetches that await messages - each of which is sent over a
+#     connection of its own, lest it hold up the other clients' requests to its shard.  a client's requests are still
+#     served in order:  those that follow a waiting request are sent once it's answered
+#
+# parameters:
+# -.  shard_addresses - a list of (host, port) pairs, one per shard
+# -.  kwargs - as for AsyncRequestServer
+# ================================================================================================================
+#
+class ShardRouter(AsyncRequestServer):
+  #
+  def __init__(self, shard_addresses, **kwargs):
+    super().__init__(None, **kwargs)
+    self.shard_map = QueueShardMap(len(shard_addresses))
+    self.shards = [ ShardConnection(host, port) for (host, port) in shard_addresses ]
+    self.open_lock = None
+  #
+  # forward a group of requests, returning a ( request, request_type, status, response ) tuple for each.
+  # a request that may wait is forwarded once the requests before it are answered, and before the requests after it are sent
+  async def answer(self, requests):
+    results, run = [], []
+    for request in requests:
+      if not self.shard_map.may_wait(request):
+        run.append(request)
+        continue
+      results += await self.forward(run) + await self.forward([ request ], apart=True)
+      run = []
+    return results + await self.forward(run)
+  #
+  # forward a run of requests, pipelining them over the shards' connections - or, if apart, over connections of their own
+  async def forward(self, requests, apart=False):
+    plans = [ self.shard_map.requests_for_shards(request) for request in requests ]
+    used = sorted(set([ k for plan in plans for (k, shard_request) in plan ]))
+    for k in used:
+      if not self.shards[k].is_open() and not apart:  await self.open_shard(k)
+    futures = [ [ asyncio.ensure_future(self.send_apart(k, shard_request)) if apart else self.shards[k].send(shard_request) for (k, shard_request) in plan ]
+                for plan in plans ]
+    for k in used:  await self.shards[k].drain()
+    results = []
+    for (request, plan_futures) in zip(requests, futures):
+      responses = [ (await future).rstrip('\n') for future in plan_futures ]
+      response = responses[0] if len(responses) == 1 else self.shard_map.gather(responses)
+      fields = request.split(None, 1)
+      results.append( ( request, 'unknown' if not fields else fields[0], response.startswith('OK'), response ) )
+    return results
+  #
+  # answer a group of request frames by forwarding the requests that they stand for, as lines.  the shards are sent lines only,
+  # so frames whose fields hold newlines are refused
+  async def answer_frames(self, frames):
+    requests = [ RequestDispatcher.line_for_fields(opcode, fields) for (opcode, fields) in frames ]
+    routable = [ not any([ '\n' in field for field in fields ]) for (opcode, fields) in frames ]
+    answered = iter(await self.answer([ request for (request, fits) in zip(requests, routable) if fits ]))
+    results = []
+    for (request, fits) in zip(requests, routable):
+      if not fits:
+        results.append( ( request, request.split(None, 1)[0], False, [ 'newlines need an unsharded server' ] ) )
+        continue
+      ( request, request_type, status, response ) = next(answered)
+      results.append( ( request, request_type, status, RequestHandler.fields_for_response(request_type, response) ) )
+    return results
+  #
+  # send a request to shard k over a connection of its own, returning its response
+  async def send_apart(self, k, request):
+    shard = ShardConnection(self.shards[k].host, self.shards[k].port)
+    if not await shard.open():  return 'error shard unavailable\n'
+    try:
+      future = shard.send(request)
+      await shard.drain()
+      return await future
+    finally:
+      shard.close()
+  #
+  # connect to shard k, making sure that concurrent sessions don't connect to the same shard twice
+  async def open_shard(self, k):
+    if self.open_lock is None:  self.open_lock = asyncio.Lock()
+    async with self.open_lock:
+      if not self.shards[k].is_open():  await self.shards[k].open()
+  #
+  # auxiliary methods
+  def __repr__(self):          return "{}({!r}, **{!r})".format(self.__class__.__name__, [ (shard.host, shard.port) for shard in self.shards ], self.state_by_keyword())
+
+
+# ================================================================================================================
+# class that launches a sharded broker:  one server process per shard, plus a ShardRouter in the current process
+#
+# parameters:
+# -.  shard_command - a function that's called as shard_command(port) and returns the command line, as a list,
+#     that starts a shard server on that port:  e.g., the server's own command line, with a different port
+# -.  kwargs parameters (all optional):
+#     *.  'shards'          - the number of shards (default: 2)
+#     *.  'shard_host'      - the host on which the shards accept connections (default: localhost)
+#     *.  'shard_base_port' - the port for the first shard;  shard k uses shard_base_port + k (default: port + 1)
+#     *.  remaining keywords - as for ShardRouter
+# ================================================================================================================
+#
+class ShardedBroker(object):
+  #
+  def __init__(self, shard_command, **kwargs):
+    self.shard_command, self.router_kwargs = shard_command, kwargs
+    self.shard_count, self.shard_host = kwargs.get('shards', 2), kwargs.get('shard_host', 'localhost')
+    self.shard_base_port = kwargs.get('shard_base_port', kwargs.get('port', 8881) + 1)
+  #
+  # start the shards, route requests until the router shuts down, then stop the shards
+  def run(self):
+    ports = [ self.shard_base_port + k for k in range(self.shard_count) ]
+    processes = [ subprocess.Popen(self.shard_command(port)) for port in ports ]
+    try:
+      ShardRouter([ (self.shard_host, port) for port in ports ], **self.router_kwargs).run()
+    finally:
+      for process in processes:  process.terminate()
+      for process in processes:  process.wait()
+  #
+  # auxiliary methods
+  def __repr__(self):          return "{}({!r}, **{!r})".format(self.__class__.__name__, self.shard_command, self.router_kwargs)
@@ -1,150 +1,342 @@
-# *******************************************************************************************
-# message service program - field and respond to requests from message clients
-# ----------------------------------------------------------------------------
-#
-# *. operating instructions
-#    ----------------------
-#
-#    invoke as   
-#       python messageServerMain.py  (port  (timeout))
-#
-#    preconditions for program execution:
-#    *.  the presence of the Python 3 command interpreter, python, in a directory in the 
-#        command line's PATH variable  (note: tested with Python 3.4.2)
-#    *.  the presence of the program's supporting library, messageServerLibrary.py,
-#        in Python's import path, sys.path.  (By default, sys.path includes the current directory).
-#    *.  firewall access for localhost and a TCP port for communication with client
-#        programs  (default: 8881)
-#
-# *. command line parameters
-#    -----------------------
-#
-#    -.  argv[1] - port on current host for accepting requests (default: 8881)
-#    -.  argv[2] - idle timeout, in seconds (default: 30)
-#        the program will shut itself down after this many seconds if it receives no requests
-#
-# *. effect
-#    ------
-#
-#    respond to requests relating to organizing, capturing, and distributing
-#    messages from client programs.
-#
-#    all requests that this program services and responses that it generates are one-line-long,
-#    newline-terminated texts.  the supported requests and their formats are as follows:
-#
-#     register_q  q_name  -
-#        register q_name as an active message queue
-#     set_reader_for_q  q_reader q_name  host port -
-#        register q_reader as a reader of q_name: i.e.,
-#        -.  send any messages accumulated in q_name to q_reader at TCP connection (host, port) immediately
-#        -.  send messages to (host, port) as they're added to q_name
-#        q_name must have been previously registered
-#     set_writer_for_q  q_writer  q_name  -
-#        register q_writer as a writer of q_name
-#        q_name must have been previously registered
-#     qs_for_reader q_reader -
-#        return a list of queues for which q_reader has registered as a reader
-#     qs_for_writer q_writer -
-#        return a list of queues for which q_writer has registered as a writer
-#     append_message_to_q q_name q_writer message -
-#        append message to q_name.  q_writer must be registered as a writer for q_name
-#     unset_reader_for_q  q_reader q_name  -
-#        unregister q_reader as a reader of q_name
-#     unset_writer_for_q  q_writer q_name   -
-#        unregister q_writer as a reader of q_name
-#     unset_communicator  q_entity  -
-#        unregister q_entity as a user of all queues, removing q_entity's SAP
-#     unregister_q  q_name  -
-#        unregister q_name as an active message queue, removing all readers and writers
-#
-# *.  details
-#     -------
-#
-#    the message queues that this program establishes on behalf of its clients persist only as 
-#    long as this program operates.
-#
-#    all responses to client requests have a two-part form:
-#      status  (body)
-#    where 
-#      -.  status - leading field; either OK or error
-#      -.  body - if present, a characterization of the request's particulars:  i.e.,
-#          -.  a description of a request error
-#          -.  for qs_for_reader and qs_for_writer, the queues to which the user has subscribed
-#
-# *.  other
-#     -----
-#
-#     as of 4/27/15, this program has been tested ... somewhat.  testing has included
-#     -.  the testing of the supporting library against a test program, messageServerTests.py,
-#         that 
-#         -.  applies a series of unit tests to the library's classes, under the assumption that
-#         -.  the program is running on a Windows platform
-#         see the header for messageServerTests.py for details
-#     -.  the interactive testing of the main program with a companion client program,
-#         messageClientMain.py, up to but not including the testing of the logic for
-#         asynchronous message delivery and capture.
-#
-#     for an implementation of a companion client program, see messageClientMain.py
-#
-# -- Phil Pfeiffer
-#    27 April 2015
-# *******************************************************************************************
-
-# supporting codes for the message server
-#
-from messageServerLibrary import *
-
-# **************************************
-# process command line arguments
-# **************************************
-#
-import sys
-try:
-  well_known_port = int(sys.argv[1])
-  timeout = float(sys.argv[2])
-except:
-  well_known_port = 8881    # for accepting requests
-  timeout = 2500             # length that server sits idle, in seconds
-
-# ************************************************************
-# set up datasets, handler for serving client requests
-# ************************************************************
-#
-queue_to_readers, queue_to_writers, reader_to_SAP  = MessageQueueToReaders(), MessageQueueToWriters(), CommunicatorToSAP()
-handler = RequestHandler(RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP))
-
-# ************************************************************
-# set up network machinery for serving client requests
-# ************************************************************
-#
-# create a socket
-sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-#
-# allow reuse of local addresses, for fast restart upon server termination
-sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-#
-# set timeout to prevent indefinite python interpreter keyboard lockup
-sock.settimeout(timeout)
-#
-# associate socket with well-known port (8881) on current host ('')
-sock.bind(('', well_known_port))
-#
-# set the number of clients waiting for a connection that the server can bind at once
-sock.listen(5)
-print('accepting connections on port {} with a {}-second timeout'.format(well_known_port, timeout))
-
-# ************************************************************
-# loop for servicing requests
-# ************************************************************
-try:
-  while 1:
-    newSocket, address = sock.accept()
-    print("Connected from {}".format(address))
-    request_as_seen, request_type, status, response = handler.respond( newSocket )
-    print("Request <{}> handled: type = {}, status = {}, response = {}".format(request_as_seen.rstrip(), request_type, status, response))
-    newSocket.close()
-except Exception as e:
-  print('?? exception detected of type {}{}: exiting'.format(type(e), '' if 'value' not in dir(e) else ": "+e.value))
-finally:
-  sock.close()
-
+# *******************************************************************************************
+# message service program - field and respond to requests from message clients
+# ----------------------------------------------------------------------------
+#
+# *. operating instructions
+#    ----------------------
+#
+#    invoke as   
+#       python messageServerMain.py  (port  (timeout))  (options)
+#    where options are as described under command line parameters, below
+#
+#    preconditions for program execution:
+#    *.  the presence of the Python 3 command interpreter, python, in a directory in the 
+#        command line's PATH variable  (note: tested with Python 3.4.2)
+#    *.  the presence of the program's supporting library, messageServerLibrary.py,
+#        in Python's import path, sys.path.  (By default, sys.path includes the current directory).
+#    *.  firewall access for localhost and a TCP port for communication with client
+#        programs  (default: 8881)
+#
+# *. command line parameters
+#    -----------------------
+#
+#    -.  argv[1] - port on current host for accepting requests (default: 8881)
+#    -.  argv[2] - idle timeout, in seconds (default: 30)
+#        the program will shut itself down after this many seconds if it receives no requests
+#    -.  --host - the interface on which to accept requests (default: all interfaces)
+#    -.  --mode - how the program serves its clients (default: serial)
+#        -.  serial  - accept and serve one connection at a time
+#        -.  asyncio - serve all connected clients concurrently from an asyncio event loop, dispatching
+#                      their requests one at a time  (requires Python 3.7 or better)
+#        -.  threads - hand each accepted connection to a bounded pool of worker threads
+#    -.  --workers - in threads mode, the number of worker threads (default: 8)
+#    -.  --queue-depth - in threads mode, the number of accepted connections that may wait for a worker (default: 32).
+#        connections that arrive while all workers are busy and this many connections are waiting receive
+#        the response "error busy"
+#    -.  --keep-alive - session idle timeout, in seconds (default: none)
+#        if given, each connection may carry any number of requests, answered in order, and stays open
+#        until the client closes it or it sits idle for this many seconds.  note that in serial mode,
+#        other clients wait while a session is open
+#    -.  --shards - run as a sharded broker with this many shards (default: 0, for an unsharded server)
+#        each shard is a separate copy of this program, in asyncio mode, that owns the queues whose names hash to it.
+#        this program then routes each request to the shard that owns the request's queue, scattering requests
+#        that concern every queue (qs_for_reader, qs_for_writer, unset_communicator) to all shards.
+#        an append_message_to_qs request is split among the shards that own its queues:  if one of them fails,
+#        the message may still have been appended to the other shards' queues.
+#        the shards are given this program's storage, durability, delivery, and registry options:  shard k holds its
+#        queues' directories, in disk storage, under --data-dir/shard-k, and its registry log, if any, in --registry-dir/shard-k.
+#        this program holds no queues, and keeps no log, of its own
+#    -.  --shard-base-port - the port for the first shard;  shard k uses this port + k (default: port + 1)
+#    -.  --delivery-workers - the number of threads that send queued messages to readers (default: 4).
+#        appends are acknowledged once their messages are queued;  these threads then deliver them.
+#        0 delivers each message before its append is acknowledged
+#    -.  --delivery-window - the most messages to send a reader before awaiting its acknowledgement (default: 256)
+#    -.  --high-water - the number of unread messages past which a reader is marked as lagging (default: no limit).
+#        delivery to a lagging reader that can't be reached is paused until the reader registers again
+#    -.  --lag-limit - the number of unread messages at which a reader holds up its queue (default: no limit).
+#        what happens to further appends to the queue is set by
+#    -.  --overflow - reject: refuse the appends with the response "error backpressure" (default)
+#                     drop:   accept the appends, skipping the lagging reader's oldest unread messages
+#    -.  --retry-delay - seconds before a reader that can't be reached is tried again (default: 0.5).
+#        each further retry doubles the delay, up to 30 seconds
+#    -.  --max-attempts - failed tries in a row after which a reader's undelivered messages become dead letters (default: 5)
+#    -.  --storage - how queued messages are held (default: list)
+#        -.  list    - in memory, as a list of strings
+#        -.  compact - in memory, as UTF-8 payloads, packed into large chunks of bytes:  roughly half the memory, for small messages
+#        -.  disk    - on disk, in one directory per queue under --data-dir, as a log of fixed-size segment files.
+#                      a queue that is registered again after a restart resumes with the messages that it held
+#    -.  --data-dir - in disk storage, the directory that holds the queues' directories (default: messageServerData)
+#    -.  --segment-size - in disk storage, the size of each segment file, in bytes (default: 16777216)
+#    -.  --durability - in disk storage, when appends are made durable (default: none)
+#        -.  none    - whenever the operating system writes them to disk:  appends are acknowledged at once
+#        -.  batch   - group commit:  appends that arrive together are synced together, and each is acknowledged
+#                      once its batch is on disk
+#        -.  message - each append is synced on its own before it is acknowledged
+#        the response to an append that can't be made durable is "error not durable"
+#    -.  --commit-delay - in batch durability, the most seconds to hold a batch open for further appends (default: 0)
+#    -.  --commit-bytes - in batch durability, the size of the appends at which a batch is closed early (default: 1048576)
+#    -.  --registry-dir - the directory for a log of the requests that change the registry:  i.e., queues, their readers and
+#        writers, readers' SAPs, and readers' positions (default: none, for no log).  on startup, the registry is restored
+#        from the log.  together with disk storage, this lets queues and their readers survive a restart
+#    -.  --snapshot-interval - the number of log records after which the registry is written to a snapshot,
+#        and the log begun anew (default: 10000)
+#
+# *. effect
+#    ------
+#
+#    respond to requests relating to organizing, capturing, and distributing
+#    messages from client programs.
+#
+#    all requests that this program services and responses that it generates are one-line-long,
+#    newline-terminated texts, save for append_batch_to_q requests and the responses to fetch_from_q - or, for clients
+#    that speak in frames, binary frames (see details, below).  the supported requests and their formats are as follows:
+#
+#     register_q  q_name  -
+#        register q_name as an active message queue
+#     set_reader_for_q  q_reader q_name  [host port] [start] -
+#        register q_reader as a reader of q_name: i.e.,
+#        -.  send any messages accumulated in q_name to q_reader at TCP connection (host, port) immediately
+#        -.  send messages to (host, port) as they're added to q_name
+#        q_name must have been previously registered.  q_reader must acknowledge the messages it receives with the line
+#           OK n
+#        where n is the number of messages received so far over the current connection, or with the line  OK  for each message
+#        start, if given, is where q_reader's reading of q_name begins:  earliest (the oldest message q_name holds),
+#        latest (the next message appended), or an offset.  a new reader without a start begins at earliest;
+#        a reader registered again without a start keeps its position.
+#        a reader registered without host and port isn't sent messages:  it fetches them with fetch_from_q
+#     set_writer_for_q  q_writer  q_name  -
+#        register q_writer as a writer of q_name
+#        q_name must have been previously registered
+#     qs_for_reader q_reader -
+#        return a list of queues for which q_reader has registered as a reader
+#     qs_for_writer q_writer -
+#        return a list of queues for which q_writer has registered as a writer
+#     append_message_to_q q_name q_writer message -
+#        append message to q_name.  q_writer must be registered as a writer for q_name.
+#        the response is "error backpressure" if a reader of q_name has reached the lag limit (see --lag-limit),
+#        and "error not durable" if the message can't be made durable (see --durability)
+#     append_batch_to_q q_writer q_name count -
+#        append the messages on the next count lines to q_name, in order, as one append.  q_writer must be registered
+#        as a writer for q_name.  the response is as for append_message_to_q, and "error bad count" if fewer than
+#        count lines follow, or - at once, without waiting for lines - if count isn't a number from 0 to 10000.
+#        either all of the messages are appended, or none of them are
+#     append_message_to_qs q_writer q_name,q_name,... message -
+#        append message to each of the comma-separated q_names, as one append.  q_writer must be registered as
+#        a writer for all of them.  the response is as for append_message_to_q.  either message is appended to all
+#        of the q_names, or to none of them (but see --shards).  a reader of several of the q_names is sent message
+#        once per q_name, in one exchange
+#     unset_reader_for_q  q_reader q_name  -
+#        unregister q_reader as a reader of q_name
+#     unset_writer_for_q  q_writer q_name   -
+#        unregister q_writer as a reader of q_name
+#     unset_communicator  q_entity  -
+#        unregister q_entity as a user of all queues, removing q_entity's SAP
+#     unregister_q  q_name  -
+#        unregister q_name as an active message queue, removing all readers and writers
+#     dead_letters_for_q  q_name  -
+#        return the number of q_name's dead letters - messages that could not be delivered to their readers -
+#        followed by the readers they were meant for
+#     replay_dead_letters_for_q  q_name  -
+#        resend q_name's dead letters to their readers, returning the number resent
+#     seek_reader_to_time  q_reader q_name time  -
+#        move q_reader's position in q_name back or forward to the first message appended at or after time,
+#        returning the new position.  time is a number of seconds since the epoch (e.g., 1792312920),
+#        a local date and time (e.g., 2026-10-18T10:42), or a local time of day, today (e.g., 10:42).
+#        messages are stamped to within a tenth of a second, and the position errs early.  messages that all
+#        of q_name's readers have received are dropped, and so can't be sought
+#     seek_reader  q_reader q_name start  -
+#        move q_reader's position in q_name to start - earliest, latest, or an offset - returning the new position.
+#        offsets outside the messages that q_name holds are moved to the nearest of them
+#     position_of_reader  q_reader q_name  -
+#        return the offset of the next message that q_name will send to q_reader
+#     fetch_from_q  q_reader q_name max_count [wait_ms]  -
+#        return up to max_count of q_reader's unread messages from q_name, moving q_reader's position past them.
+#        if q_reader has no unread messages, wait up to wait_ms milliseconds for one to be appended
+#        (up to a minute).  waits hold up other clients in serial mode, so fetch with waits in asyncio or threads mode
+#
+# *.  details
+#     -------
+#
+#    the message queues that this program establishes on behalf of its clients persist only as 
+#    long as this program operates, unless --storage disk and --registry-dir are given.
+#
+#    all responses to client requests have a two-part form:
+#      status  (body)
+#    where 
+#      -.  status - leading field; either OK or error
+#      -.  body - if present, a characterization of the request's particulars:  i.e.,
+#          -.  a description of a request error
+#          -.  for qs_for_reader and qs_for_writer, the queues to which the user has subscribed
+#          -.  for set_reader_for_q with a start, seek_reader, and seek_reader_to_time, the reader's new position
+#          -.  for position_of_reader, the reader's position
+#          -.  for fetch_from_q, the number of messages fetched, n, followed by n more lines, one per message
+#
+#    a client whose first byte is 0xB1 speaks in frames for the rest of its connection.  frames carry the same requests
+#    and responses as lines, but their fields - e.g., messages - may hold newlines.  each frame is
+#      -.  a header of 8 bytes, in network byte order:  0xB1, a code (1 byte), a field count (2 bytes), and the body's length (4 bytes)
+#      -.  a body:  the fields, each a 4-byte length, followed by that many bytes of UTF-8
+#    a request's code is its opcode:  0 for register_q, then, in the order listed above, 1 for set_reader_for_q through
+#    17 for fetch_from_q.  its fields are the request's tokens:  e.g., q_writer, q_name, and message.  append_batch_to_q's
+#    messages follow its count as fields of their own.  a response's code is 1 for OK and 0 for error, and its fields are
+#    its body, if any:  for fetch_from_q, n, then the n messages.  messages with newlines should be fetched, in frames,
+#    since messages are sent to readers' hosts and ports as lines.  in a sharded broker (see --shards), the shards are
+#    sent lines, so requests whose fields hold newlines are refused
+#
+# *.  other
+#     -----
+#
+#     as of 4/27/15, this program has been tested ... somewhat.  testing has included
+#     -.  the testing of the supporting library against a test program, messageServerTests.py,
+#         that 
+#         -.  applies a series of unit tests to the library's classes, under the assumption that
+#         -.  the program is running on a Windows platform
+#         see the header for messageServerTests.py for details
+#     -.  the interactive testing of the main program with a companion client program,
+#         messageClientMain.py, up to but not including the testing of the logic for
+#         asynchronous message delivery and capture.
+#
+#     for an implementation of a companion client program, see messageClientMain.py
+#
+# -- Phil Pfeiffer
+#    27 April 2015
+# *******************************************************************************************
+
+# supporting codes for the message server
+#
+from messageServerLibrary import *
+
+# **************************************
+# process command line arguments
+# **************************************
+#
+import sys
+import os
+import argparse
+import functools
+parser = argparse.ArgumentParser(description='field and respond to requests from message clients')
+parser.add_argument('port', nargs='?', type=int, default=8881, help='port on current host for accepting requests')
+parser.add_argument('timeout', nargs='?', type=float, default=2500, help='idle timeout, in seconds')
+parser.add_argument('--host', default='', help='interface on which to accept requests')
+parser.add_argument('--mode', choices=['serial', 'asyncio', 'threads'], default='serial', help='how clients are served')
+parser.add_argument('--keep-alive', type=float, default=None, metavar='SECONDS', help='keep connections open for further requests, closing them after this many idle seconds')
+parser.add_argument('--workers', type=int, default=8, help='in threads mode, the number of worker threads')
+parser.add_argument('--queue-depth', type=int, default=32, help='in threads mode, the number of connections that may wait for a worker')
+parser.add_argument('--shards', type=int, default=0, help='run as a sharded broker with this many shards')
+parser.add_argument('--shard-base-port', type=int, default=None, help='port for the first shard')
+parser.add_argument('--delivery-workers', type=int, default=4, help='number of threads that send queued messages to readers')
+parser.add_argument('--delivery-window', type=int, default=256, help='most messages to send a reader before awaiting its acknowledgement')
+parser.add_argument('--high-water', type=int, default=None, help='unread messages past which a reader is marked as lagging')
+parser.add_argument('--lag-limit', type=int, default=None, help='unread messages at which a reader holds up its queue')
+parser.add_argument('--overflow', choices=['reject', 'drop'], default='reject', help='what to do with appends to a held-up queue')
+parser.add_argument('--retry-delay', type=float, default=0.5, help='seconds before a reader that can\'t be reached is tried again')
+parser.add_argument('--max-attempts', type=int, default=5, help='failed tries after which a reader\'s undelivered messages become dead letters')
+parser.add_argument('--storage', choices=['list', 'compact', 'disk'], default='list', help='how queued messages are held')
+parser.add_argument('--data-dir', default='messageServerData', help='in disk storage, the directory that holds the queues\' directories')
+parser.add_argument('--segment-size', type=int, default=1 << 24, help='in disk storage, the size of each segment file, in bytes')
+parser.add_argument('--durability', choices=['none', 'batch', 'message'], default='none', help='in disk storage, when appends are made durable')
+parser.add_argument('--commit-delay', type=float, default=0, help='in batch durability, the most seconds to hold a batch open')
+parser.add_argument('--commit-bytes', type=int, default=1 << 20, help='in batch durability, the size of the appends at which a batch is closed')
+parser.add_argument('--registry-dir', default=None, help='directory for a log of the requests that change the registry')
+parser.add_argument('--snapshot-interval', type=int, default=10000, help='log records after which the registry is snapshotted')
+options = parser.parse_args()
+well_known_port = options.port    # for accepting requests
+timeout = options.timeout          # length that server sits idle, in seconds
+report = lambda address, request, request_type, status, response: print("Request <{}> from {} handled: type = {}, status = {}, response = {}".format(request.rstrip(), address, request_type, status, response))
+
+# ************************************************************
+# sharded mode:  start the shards, each a copy of this program that holds the datasets for its queues,
+# then route clients' requests to them
+# ************************************************************
+#
+if options.shards > 0:
+  shard_base_port = options.shard_base_port or well_known_port + 1
+  #
+  # the command line for the shard on port:  shards keep the router's connections alive for as long as they stay up,
+  # and hold their queues as this program would have
+  def shard_command(port):
+    shard = 'shard-{}'.format(port - shard_base_port)
+    command = [ sys.executable, sys.argv[0], str(port), str(timeout), '--host', 'localhost', '--mode', 'asyncio', '--keep-alive', str(timeout) ]
+    for option in [ 'delivery_workers', 'delivery_window', 'high_water', 'lag_limit', 'overflow', 'retry_delay', 'max_attempts',
+                    'storage', 'segment_size', 'durability', 'commit_delay', 'commit_bytes', 'snapshot_interval' ]:
+      if getattr(options, option) is not None:  command += [ '--' + option.replace('_', '-'), str(getattr(options, option)) ]
+    if options.registry_dir is not None:  command += [ '--registry-dir', os.path.join(options.registry_dir, shard) ]
+    return command + [ '--data-dir', os.path.join(options.data_dir, shard) ]
+  #
+  print('accepting connections on port {} with a {}-second timeout ({} shards)'.format(well_known_port, timeout, options.shards))
+  try:
+    ShardedBroker(shard_command, shards=options.shards, shard_base_port=shard_base_port,
+                  host=options.host, port=well_known_port, timeout=timeout, session_timeout=options.keep_alive, reporter=report).run()
+  except Exception as e:
+    print('?? exception detected of type {}{}: exiting'.format(type(e), '' if not hasattr(e, 'value') else ": "+e.value))
+  sys.exit(0)
+
+# ************************************************************
+# set up datasets, handler for serving client requests
+# ************************************************************
+#
+buffer_collection = MessageBufferCollection(buffer_factory={ 'list': MessageBuffer, 'compact': CompactMessageBuffer,
+                                          'disk': functools.partial(SegmentedMessageBuffer, directory=options.data_dir, segment_size=options.segment_size) }[options.storage])
+queue_to_readers, queue_to_writers, reader_to_SAP  = MessageQueueToReaders(), MessageQueueToWriters(), CommunicatorToSAP()
+journal = None if options.registry_dir is None else RegistryLog(options.registry_dir, snapshot_interval=options.snapshot_interval)
+deliverer = MessageDeliverer(queue_to_readers, reader_to_SAP, workers=options.delivery_workers, window=options.delivery_window,
+                             high_water=options.high_water, lag_limit=options.lag_limit, overflow=options.overflow,
+                             retry_delay=options.retry_delay, max_attempts=options.max_attempts, journal=journal).start()
+committer = GroupCommitter(buffer_collection, mode=options.durability, delay=options.commit_delay, max_bytes=options.commit_bytes).start()
+dispatcher = RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP, deliverer=deliverer, journal=journal, committer=committer)
+if journal is not None:  print('restored the registry from {}, replaying {} log records'.format(options.registry_dir, journal.recover(dispatcher)))
+handler = RequestHandler(dispatcher)
+
+# ************************************************************
+# asyncio and threads modes:  serve clients concurrently
+# ************************************************************
+#
+if options.mode in ('asyncio', 'threads'):
+  print('accepting connections on port {} with a {}-second timeout ({})'.format(well_known_port, timeout, options.mode + ' mode'))
+  try:
+    if options.mode == 'asyncio':
+      AsyncRequestServer(handler, host=options.host, port=well_known_port, timeout=timeout, session_timeout=options.keep_alive, reporter=report).run()
+    else:
+      ThreadPoolRequestServer(handler, host=options.host, port=well_known_port, timeout=timeout, session_timeout=options.keep_alive, reporter=report,
+                              workers=options.workers, queue_depth=options.queue_depth).run()
+  except Exception as e:
+    print('?? exception detected of type {}{}: exiting'.format(type(e), '' if not hasattr(e, 'value') else ": "+e.value))
+  sys.exit(0)
+
+# ************************************************************
+# set up network machinery for serving client requests
+# ************************************************************
+#
+# create a socket
+sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+#
+# allow reuse of local addresses, for fast restart upon server termination
+sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+#
+# set timeout to prevent indefinite python interpreter keyboard lockup
+sock.settimeout(timeout)
+#
+# associate socket with well-known port (8881) on current host ('', by default)
+sock.bind((options.host, well_known_port))
+#
+# set the number of clients waiting for a connection that the server can bind at once
+sock.listen(5)
+print('accepting connections on port {} with a {}-second timeout'.format(well_known_port, timeout))
+
+# ************************************************************
+# loop for servicing requests
+# ************************************************************
+try:
+  while 1:
+    newSocket, address = sock.accept()
+    print("Connected from {}".format(address))
+    if options.keep_alive is None:
+      request_as_seen, request_type, status, response = handler.respond( newSocket )
+      print("Request <{}> handled: type = {}, status = {}, response = {}".format(request_as_seen.rstrip(), request_type, status, response))
+    else:
+      for request_as_seen, request_type, status, response in handler.converse( newSocket, options.keep_alive ):
+        print("Request <{}> handled: type = {}, status = {}, response = {}".format(request_as_seen.rstrip(), request_type, status, response))
+    newSocket.close()
+except Exception as e:
+  print('?? exception detected of type {}{}: exiting'.format(type(e), '' if not hasattr(e, 'value') else ": "+e.value))
+finally:
+  sock.close()
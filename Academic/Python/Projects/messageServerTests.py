@@ -1,1622 +1,3214 @@
-# *******************************************************************************************
-# message service library test program - test the classes in messageServerLibrary.py
-# ----------------------------------------------------------------------------------
-#
-# *. operating instructions
-#    ----------------------
-#
-#    invoke as   
-#       python messageServerTests.py  (port  (timeout))
-#
-#    preconditions for program execution:
-#    *.  the presence of the Python 3 command interpreter, python, in a directory in the 
-#        command line's PATH variable  (note: tested with Python 3.4.2)
-#    *.  the presence of the program's supporting library, messageServerLibrary.py,
-#        in Python's import path, sys.path.  (By default, sys.path includes the current directory).
-#    *.  firewall access for localhost and a TCP port for communication with client
-#        programs  (default: 8881)
-#    *.  a platform that supports a DOSshell-like command interpreter:  i.e.,
-#        -.  ability to execute platform commands using syntax like "cmd /c ...some command..."
-#        -.  support for a 'del foo.txt'  command that (e.g.) deletes foo.txt
-#    *.  ability to create, execute, and delete two files
-#        -.  c:\temp\testserver.txt
-#        -.  c:\temp\testclient.txt
-#
-# *. command line parameters
-#    -----------------------
-#
-#     none
-#
-# *. effect
-#    ------
-#
-#     use doctest to run unit tests against the programs messageServerLibrary.py.
-#     if testing succeeds, you should see advisory messages - nothing more.
-#
-# *. details
-#    -------
-#
-#     the message queues that this program establishes on behalf of its clients persist only as 
-#     long as this program operates.
-#
-#     all responses to client requests have a two-part form:
-#       status  (body)
-#     where 
-#      -.  status - leading field; either OK or error
-#      -.  body - if present, a characterization of the request's particulars:  i.e.,
-#          -.  a description of a request error
-#          -.  for qs_for_reader and qs_for_writer, the queues to which the user has subscribed
-#
-# *.  other
-#     -------
-#
-#     as of 4/27/15, this program has been successfully run to completion 
-#
-# -- Phil Pfeiffer
-#    27 April 2015
-# *******************************************************************************************
-
-# supporting codes for the message server
-#
-from messageServerLibrary import *
-
-# ###########################################################################################################
-# test codes for messaging service
-# ###########################################################################################################
-
-# ============================================================================================================
-# values for running unit tests
-# ============================================================================================================
-
-import doctest
-def doctest_it(f, verbosity=False):
-  doctest.run_docstring_examples(f, None, optionflags=doctest.ELLIPSIS|doctest.NORMALIZE_WHITESPACE, verbose=verbosity)
-
-run_tests_on_load = True
-
-# ************************************************************************************************************
-# utility classes
-# ************************************************************************************************************
-
-# ==================================================================================================================
-# test code for InvertibleMap class
-#
-# -- second set of tests also tests AddMapMethodAliases mixin
-# ==================================================================================================================
-
-# ---------------------------------------------------------------------------------------------
-# first set of tests:  test operation up to but not including __getattr__-supported aliasing
-# ---------------------------------------------------------------------------------------------
-#
-def invertible_map_test_no_aliasing(void):
-  """
-  >>> testMap = InvertibleMap()             # set up empty map - should return none
-  >>> repr(testMap)
-  "InvertibleMap(**{'forward_map': {}})"
-  >>> eval(repr(testMap)) == testMap        # basic memoization test
-  True
-  >>> testMap.register('a','x')             # register first element
-  >>> testMap
-  InvertibleMap(**{'forward_map': {'a': {'x'}}})
-  >>> eval(repr(testMap)) == testMap        # with-content memoization test
-  True
-  >>> testMap.codomain_elements_for_domain_element('a')    # check for correctness of ('a', {'x'}) binding
-  {'x'}
-  >>> testMap.domain_elements_for_codomain_element('a')
-  set()
-  >>> testMap.codomain_elements_for_domain_element('x')
-  set()
-  >>> testMap.domain_elements_for_codomain_element('x')
-  {'a'}
-  >>> testMap.register('a', 'y')                           # check for correctness of ('a', {'x', 'y'}) binding
-  >>> testMap.codomain_elements_for_domain_element('a') == {'x', 'y'}
-  True
-  >>> testMap.register('b', 'w')
-  >>> testMap.register('b', 'x')
-  >>> testMap.register('b', 'z')
-  >>> testMap.register('a', 'w')                           # should now have ('a', {'w', 'x', 'y'}) and ('b', {'w', 'x', 'z'})
-  >>> testMap.domain_elements() == {'a', 'b'}                            # check that domain element retrieval works
-  True
-  >>> testMap.codomain_elements() == {'w', 'x', 'y', 'z'}                # check that codomain element retrival works
-  True
-  >>> testMap.codomain_elements_for_domain_element('a') == {'w', 'x', 'y'}    # check forward mappings for 'a', 'b'
-  True
-  >>> testMap.codomain_elements_for_domain_element('b') == {'w', 'x', 'z'}
-  True
-  >>> testMap.domain_elements_for_codomain_element('w') == {'a', 'b'}    # check inverse mappings for 'w', 'x', 'y', 'z'
-  True
-  >>> testMap.domain_elements_for_codomain_element('x') == {'a', 'b'}
-  True
-  >>> testMap.domain_elements_for_codomain_element('y') == {'a'}
-  True
-  >>> testMap.domain_elements_for_codomain_element('z') == {'b'}
-  True
-  >>> testMap.unregister('a', 'w')                                       # check single binding unregistration
-  >>> testMap.codomain_elements_for_domain_element('a') == {'x', 'y'}
-  True
-  >>> testMap.codomain_elements_for_domain_element('b') == {'w', 'x', 'z'}
-  True
-  >>> testMap.unregister_codomain_element('x')                            # check codomain element unregistration
-  >>> testMap.codomain_elements_for_domain_element('a') == {'y'}
-  True
-  >>> testMap.codomain_elements_for_domain_element('b') == {'w', 'z'}
-  True
-  >>> testMap.unregister_domain_element('a')                              # check domain element unregistration
-  >>> testMap.codomain_elements_for_domain_element('a')
-  set()
-  >>> testMap.codomain_elements_for_domain_element('b') == {'w', 'z'}
-  True
-  """
-  pass
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('testing InvertibleMap - no alias test')
-    doctest_it(invertible_map_test_no_aliasing)
-
-
-# ---------------------------------------------------------------------------------------------
-# second set of tests:  rerun first set with 'foo' alias for domain, 'bar' alias for codomain
-# ---------------------------------------------------------------------------------------------
-#
-def invertible_map_test_with_aliasing(void):
-   """
-   >>> testMap = InvertibleMap(entity_aliases=[(('domain_element', 'foo'), ('codomain_element', 'bar'))])         # set up empty map - should return none
-   >>> testMap.foos() == set()             # check for empty map
-   True
-   >>> testMap.bars() == set()
-   True
-   >>> eval(repr(testMap)) == testMap        # basic memoization test
-   True
-   >>> testMap.register('a','x')             # register first element
-   >>> eval(repr(testMap)) == testMap        # string-check memoization test of map with content
-   True
-   >>> testMap.bars_for_foo('a')             # check for correctness of ('a', {'x'}) binding
-   {'x'}
-   >>> testMap.foos_for_bar('a')
-   set()
-   >>> testMap.bars_for_foo('x')
-   set()
-   >>> testMap.foos_for_bar('x')
-   {'a'}
-   >>> testMap.register('a', 'y')                           # check for correctness of ('a', {'x', 'y'}) binding
-   >>> testMap.bars_for_foo('a') == {'x', 'y'}
-   True
-   >>> testMap.register('b', 'w')
-   >>> testMap.register('b', 'x')
-   >>> testMap.register('b', 'z')
-   >>> testMap.register('a', 'w')                           # should now have ('a', {'w', 'x', 'y'}) and ('b', {'w', 'x', 'z'})
-   >>> testMap.foos() == {'a', 'b'}                         # check that domain element retrieval works
-   True
-   >>> testMap.bars() == {'w', 'x', 'y', 'z'}               # check that codomain element retrival works
-   True
-   >>> testMap.bars_for_foo('a') == {'w', 'x', 'y'}    # check forward mappings for 'a', 'b'
-   True
-   >>> testMap.bars_for_foo('b') == {'w', 'x', 'z'}
-   True
-   >>> testMap.foos_for_bar('w') == {'a', 'b'}         # check inverse mappings for 'w', 'x', 'y', 'z'
-   True
-   >>> testMap.foos_for_bar('x') == {'a', 'b'}
-   True
-   >>> testMap.foos_for_bar('y') == {'a'}
-   True
-   >>> testMap.foos_for_bar('z') == {'b'}
-   True
-   >>> testMap.unregister('a', 'w')                    # check single binding unregistration
-   >>> testMap.bars_for_foo('a') == {'x', 'y'}
-   True
-   >>> testMap.bars_for_foo('b') == {'w', 'x', 'z'}
-   True
-   >>> testMap.unregister_bar('x')                     # check codomain element unregistration
-   >>> testMap.bars_for_foo('a') == {'y'}
-   True
-   >>> testMap.bars_for_foo('b') == {'w', 'z'}
-   True
-   >>> testMap.unregister_foo('a')                     # check domain element unregistration
-   >>> testMap.bars_for_foo('a')
-   set()
-   >>> testMap.bars_for_foo('b') == {'w', 'z'}
-   True
-   """
-   pass
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing InvertibleMap - with aliasing')
-    doctest_it(invertible_map_test_with_aliasing)
-    print()
-
-
-# ************************************************************************************************************
-# test codes for classes for binding message collections to their defining properties: i.e.,
-# -.  their associated  buffers
-# -.  the names of the entities that use them
-# ************************************************************************************************************
-
-# ============================================================================================================
-# test code for MessageBuffer class
-# ============================================================================================================
-
-def message_buffer_test(void):
-   """
-   >>> buf = MessageBuffer()        # start with empty buffer
-   >>> buf
-   MessageBuffer(**{'buffer': []})
-   >>> eval(repr(buf)) == buf       # basic memoization test
-   True
-   >>> buf.append_message('foo')            # add a message
-   >>> buf
-   MessageBuffer(**{'buffer': ['foo']})
-   >>> eval(repr(buf)) == buf               # memoization test with content
-   True
-   >>> buf.retrieve_message(0)              # check for message that's there
-   'foo'
-   >>> buf.retrieve_message(1)              # check for message that's not there
-   >>> buf.append_message('bar')            # try appending a second message
-   >>> buf
-   MessageBuffer(**{'buffer': ['foo', 'bar']})
-   """
-   pass
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing MessageBuffer')
-    doctest_it(message_buffer_test)
-    print()
-
-# ============================================================================================================
-# test code for MessageBufferCollection class
-# ============================================================================================================
-
-def message_buffer_collection_test(void):
-   """
-   >>> buf = MessageBufferCollection(**{'buffers': {}})      # start with empty collection  (note: clear to remove possible residue from earlier tests)
-   >>> buf
-   MessageBufferCollection(**{'buffers': {}})
-   >>> eval(repr(buf)) == buf       # basic memoization test
-   True
-   >>> buf.is_registered('foo')     # confirm that 'foo' isn't registered
-   False
-   >>> buf.register('foo')          # add buffer 'foo'
-   >>> buf.is_registered('foo')     # confirm that 'foo' is now registered
-   True
-   >>> buf
-   MessageBufferCollection(**{'buffers': {'foo': MessageBuffer(**{'buffer': []})}})
-   >>> buf.append_message('foo','m1')     # add 1st message to buffer
-   >>> buf
-   MessageBufferCollection(**{'buffers': {'foo': MessageBuffer(**{'buffer': ['m1']})}})
-   >>> buf.append_message('foo','m2')     # add 2nd message to buffer
-   >>> buf
-   MessageBufferCollection(**{'buffers': {'foo': MessageBuffer(**{'buffer': ['m1', 'm2']})}})
-   >>> eval(repr(buf)) == buf             # non-trivial memoization test
-   True
-   >>> buf.retrieve_message('foo',0)      # retrieve messages from buffer
-   'm1'
-   >>> buf.retrieve_message('foo',1)      # retrieve messages from buffer
-   'm2'
-   >>> buf.retrieve_message('foo',2)      # retrieve messages from buffer
-   >>> buf.register('foo')                # attempt to reregister foo - check for message on stderr, which doctest won't catch
-   >>> buf.register('bar')                # add a second buffer
-   >>> buf.buffers() == { 'foo', 'bar' }  # confirm buffer name function correctness
-   True
-   >>> buf.retrieve_message('bar',0)      # retrieve message from empty buffer
-   >>> buf.unregister('foo')              # unregister 'foo', check result
-   >>> buf
-   MessageBufferCollection(**{'buffers': {'bar': MessageBuffer(**{'buffer': []})}})
-   """
-   pass
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing MessageBufferCollection')
-    doctest_it(message_buffer_collection_test)
-    print()
-
-# ======================================================================================================================
-# test code for MessageBufferToUsers -- class that associates buffers in a message buffer collection with a user
-# ======================================================================================================================
-
-# ......................................................................................................................
-# test code for MessageBufferToUsers class
-# -.  lacking:  tests for append_message()
-# -.  aliasing feature tested by subclasses
-#
-def message_buffer_to_users_test(void):
-   """
-   >>> buf = MessageBufferToUsers(**{'buffers': {}, 'buffer_to_users': {}})      # start with empty collection  (note: clear to remove possible residue from earlier tests)
-   >>> buf.buffers()
-   set()
-   >>> buf.users()
-   set()
-   >>> buf.buffers_for_user('w1')
-   set()
-   >>> buf.users_for_buffer('foo')
-   set()
-   >>> eval(repr(buf)) == buf        # basic memoization test
-   True
-   >>> buf.register('foo', 'w1')     # attempt to register a user for an unregistered buffer.  should fail, generating message to stderr
-   False
-   >>> buf.register_buffer('foo')    # add a buffer
-   >>> buf.register('foo', 'w1')     # register two users for this buffer.  should succeed
-   True
-   >>> buf.register('foo', 'w2')
-   True
-   >>> buf.register_buffer('bar')     # register another buffer with two users.
-   >>> buf.register_buffer('bar')     # reregistration should write to cerr, but otherwise have no effect
-   >>> buf.register('bar', 'w2')      # should succeed
-   True
-   >>> buf.register('bar', 'w3')
-   True
-   >>> buf.buffers() == {'foo', 'bar'}
-   True
-   >>> buf.users_for_buffer('foo') == {'w1', 'w2'}
-   True
-   >>> buf.users_for_buffer('bar') == {'w2', 'w3'}
-   True
-   >>> buf.users() == {'w1', 'w2', 'w3'}
-   True
-   >>> buf.buffers_for_user('w1') == {'foo'}
-   True
-   >>> buf.buffers_for_user('w2') == {'foo', 'bar'}
-   True
-   >>> buf.buffers_for_user('w3') == {'bar'}
-   True
-   >>> eval(repr(buf)) == buf        # more complex memoization test
-   True
-   >>> buf.unregister_user('w3')     # check unregistering one user
-   >>> buf.buffers() == {'foo', 'bar'}
-   True
-   >>> buf.users() == {'w1', 'w2'}
-   True
-   >>> buf.users_for_buffer('bar') == {'w2'}
-   True
-   >>> buf.buffers_for_user('w3') == set()
-   True
-   >>> buf.unregister_buffer('bar')     # check unregistering one buffer
-   >>> buf.buffers() == {'foo'}
-   True
-   >>> buf.users() == {'w1', 'w2'}
-   True
-   >>> buf.users_for_buffer('bar') == set()
-   True
-   >>> buf.buffers_for_user('w2') == { 'foo' }
-   True
-   >>> buf.unregister('foo', 'w1')     # check unregistering one buffer/user combo
-   >>> buf.buffers() == { 'foo' }
-   True
-   >>> buf.users() == {'w1', 'w2'}
-   True
-   >>> buf.users_for_buffer('foo') == { 'w2' }
-   True
-   >>> buf.buffers_for_user('w1') == set()
-   True
-   """
-   pass
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing MessageBufferToUsers')
-    doctest_it(message_buffer_to_users_test)
-    print()
-
-# =================================================================================================================================
-# test code for MessageQueueToWriters --
-#     class that associates buffers (a.k.a. queues) in a message buffer collection with an append-only user (i.e., writer)
-# ===============================================================================================================================
-
-# ......................................................................................................................
-# >>> lacking:  tests for append_message()
-#
-def message_queue_to_writers_test(void):
-   """
-   >>> buf = MessageQueueToWriters(**{'buffers': {}, 'buffers_to_users': {}})      # start with empty collection  (note: clear to remove possible residue from earlier tests)
-   >>> buf.queues()
-   set()
-   >>> buf.writers()
-   set()
-   >>> buf.queues_for_writer('w1')
-   set()
-   >>> buf.writers_for_queue('foo')
-   set()
-   >>> eval(repr(buf)) == buf        # basic memoization test
-   True
-   >>> buf.register('foo', 'w1')     # attempt to register a writer for an unregistered queue.  should fail, generating message to stderr
-   False
-   >>> buf.register_queue('foo')     # add a queue
-   >>> buf.register('foo', 'w1')     # register two writers for this queue.  should succeed
-   True
-   >>> buf.register('foo', 'w2')
-   True
-   >>> buf.register_queue('bar')     # register another queue with two writers.
-   >>> buf.register_queue('bar')     # reregistration should write to cerr, but otherwise have no effect
-   >>> buf.register('bar', 'w2')     # should succeed
-   True
-   >>> buf.register('bar', 'w3')
-   True
-   >>> buf.queues() == {'foo', 'bar'}
-   True
-   >>> buf.writers_for_queue('foo') == {'w1', 'w2'}
-   True
-   >>> buf.writers_for_queue('bar') == {'w2', 'w3'}
-   True
-   >>> buf.writers() == {'w1', 'w2', 'w3'}
-   True
-   >>> buf.queues_for_writer('w1') == {'foo'}
-   True
-   >>> buf.queues_for_writer('w2') == {'foo', 'bar'}
-   True
-   >>> buf.queues_for_writer('w3') == {'bar'}
-   True
-   >>> eval(repr(buf)) == buf        # more complex memoization test
-   True
-   >>> buf.unregister_writer('w3')     # check unregistering one writer
-   >>> buf.queues() == {'foo', 'bar'}
-   True
-   >>> buf.writers() == {'w1', 'w2'}
-   True
-   >>> buf.writers_for_queue('bar') == {'w2'}
-   True
-   >>> buf.queues_for_writer('w3') == set()
-   True
-   >>> buf.unregister_queue('bar')     # check unregistering one queue
-   >>> buf.queues() == {'foo'}
-   True
-   >>> buf.writers() == {'w1', 'w2'}
-   True
-   >>> buf.writers_for_queue('bar') == set()
-   True
-   >>> buf.queues_for_writer('w2') == { 'foo' }
-   True
-   >>> buf.unregister('foo', 'w1')     # check unregistering one queue/writer combo
-   >>> buf.queues() == { 'foo' }
-   True
-   >>> buf.writers() == {'w1', 'w2'}
-   True
-   >>> buf.writers_for_queue('foo') == { 'w2' }
-   True
-   >>> buf.queues_for_writer('w1') == set()
-   True
-   """
-   pass
-
-run_tests_on_load = True
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing MessageQueueToWriters')
-    doctest_it(message_queue_to_writers_test)
-    print()
-
-# =================================================================================================================================
-# test code for MessageQueueToReaders --
-#     class that associates buffers (a.k.a. queues) in a message buffer collection with a serial access user (i.e., reader)
-# note:  these are really streams, since they associate per-reader "current message" indices with each queue
-# ===============================================================================================================================
-
-# ......................................................................................................................
-# >>> lacking:  tests for next_message()
-#
-def message_queue_to_readers_test(void):
-   """
-   >>> buf = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})      # start with empty collection  (note: clear to remove possible residue from earlier tests)
-   >>> buf.queues()
-   set()
-   >>> buf.readers()
-   set()
-   >>> buf.queues_for_reader('w1')
-   set()
-   >>> buf.readers_for_queue('foo')
-   set()
-   >>> eval(repr(buf)) == buf        # basic memoization test
-   True
-   >>> buf.register('foo', 'w1')     # attempt to register a reader for an unregistered queue.  should fail, generating message to stderr
-   False
-   >>> buf.register_queue('foo')     # add a queue
-   >>> buf.register('foo', 'w1')     # register two readers for this queue.  should succeed
-   True
-   >>> buf.register('foo', 'w2')
-   True
-   >>> buf.register_queue('bar')     # register another queue with two readers.
-   >>> buf.register_queue('bar')     # reregistration should write to cerr, but otherwise have no effect
-   >>> buf.register('bar', 'w2')     # should succeed
-   True
-   >>> buf.register('bar', 'w3')
-   True
-   >>> buf.queues() == {'foo', 'bar'}
-   True
-   >>> buf.readers_for_queue('foo') == {'w1', 'w2'}
-   True
-   >>> buf.readers_for_queue('bar') == {'w2', 'w3'}
-   True
-   >>> buf.readers() == {'w1', 'w2', 'w3'}
-   True
-   >>> buf.queues_for_reader('w1') == {'foo'}
-   True
-   >>> buf.queues_for_reader('w2') == {'foo', 'bar'}
-   True
-   >>> buf.queues_for_reader('w3') == {'bar'}
-   True
-   >>> buf.unregister_reader('w3')     # check unregistering one reader
-   >>> buf.queues() == {'foo', 'bar'}
-   True
-   >>> buf.readers() == {'w1', 'w2'}
-   True
-   >>> buf.readers_for_queue('bar') == {'w2'}
-   True
-   >>> buf.queues_for_reader('w3') == set()
-   True
-   >>> eval(repr(buf)) == buf        # more complex memoization test
-   True
-   >>> buf.unregister_queue('bar')     # check unregistering one queue
-   >>> buf.queues() == {'foo'}
-   True
-   >>> buf.readers() == {'w1', 'w2'}
-   True
-   >>> buf.readers_for_queue('bar') == set()
-   True
-   >>> buf.queues_for_reader('w2') == { 'foo' }
-   True
-   >>> buf.unregister('foo', 'w1')     # check unregistering one queue/reader combo
-   >>> buf.queues() == { 'foo' }
-   True
-   >>> buf.readers() == {'w1', 'w2'}
-   True
-   >>> buf.readers_for_queue('foo') == { 'w2' }
-   True
-   >>> buf.queues_for_reader('w1') == set()
-   True
-   """
-   pass
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing MessageQueueToReaders')
-    doctest_it(message_queue_to_readers_test)
-    print()
-
-# =================================================================================================================================
-# test code for CommunicatorToSAP --
-#     class that associates named users with (host, port) pairs
-# ===============================================================================================================================
-
-def communicator_to_SAP_test(void):
-   """
-   >>> buf = CommunicatorToSAP(**{'communicator_to_SAP': {}})      # start with empty collection  (note: clear to remove possible residue from earlier tests)
-   >>> buf
-   CommunicatorToSAP(**{'communicator_to_SAP': {}})
-   >>> buf.communicators()
-   set()
-   >>> eval(repr(buf)) == buf     # basic repr test
-   True
-   >>> buf.register('foo', 'myhost', '1.1.1.1')
-   >>> buf
-   CommunicatorToSAP(**{'communicator_to_SAP': {'foo': ('myhost', '1.1.1.1')}})
-   >>> buf.SAP('foo') == ('myhost', '1.1.1.1')
-   True
-   >>> buf.register('bar', 'yourhost', '1.2.3.4')
-   >>> eval(repr(buf)) == buf    # more complex repr test
-   True
-   >>> buf.communicators() == {'foo', 'bar'}
-   True
-   >>> buf.unregister('foo')
-   >>> buf.communicators() == {'bar'}
-   True
-   >>> buf.SAP('foo')
-   >>> buf.SAP('bar') == ('yourhost', '1.2.3.4')
-   True
-   """
-   pass
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing CommunicatorToSAP')
-    doctest_it(communicator_to_SAP_test)
-    print()
-
-# ************************************************************************************************************
-# tests for classes for exchanging one-line messages with other processes
-# ************************************************************************************************************
-
-# =================================================================================================================================
-# test code for MessageExchanger --
-#     class that supports communication with other entities via two half-duplex files, one line at a time.
-#
-# preconditions for test execution:
-# *.  a platform that supports a DOSshell-like command interpreter:  i.e.,
-# -.  ability to execute platform commands using syntax like "cmd /c ...some command..."
-# -.  support for a 'type foo.txt' command that (e.g.) outputs foo.txt to stdout
-# -.  support for a 'del foo.txt'  command that (e.g.) deletes foo.txt
-# *.  ability to create, delete two files - c:\temp\testin.txt, c:\temp\testout.txt
-# ===============================================================================================================================
-
-import subprocess
-import functools
-
-def message_exchanger_test(void):
-  """
-  >>> source_py_syntax = 'C:/temp/testin.txt'       # the Python files API (open(), close(), etc.) seems to require / separators
-  >>> target_py_syntax = 'C:/temp/testout.txt'
-  >>> testin = open(source_py_syntax, mode="w")     # set up test
-  >>> testin_text  = []
-  >>> testin_text += ['testing 1-2-3\\n' ]
-  >>> testin_text += ['testing 4-5-6\\n' ]
-  >>> testin_text += ['testing 7-8-9-10\\n' ]
-  >>> testin.writelines( testin_text )
-  >>> testin.close()
-  >>> testin  = open(source_py_syntax, mode="r")
-  >>> testout = open(target_py_syntax, mode="w")
-  >>> buf = MessageExchanger(**{'infile': testin, 'outfile': testout})
-  >>> ( status, line ) = buf.get_line()
-  >>> ( status, line )
-  (True, 'testing 1-2-3\\n')
-  >>> buf.put_line( line )
-  True
-  >>> ( status, line ) = buf.get_line()
-  >>> ( status, line )
-  (True, 'testing 4-5-6\\n')
-  >>> buf.put_line( line )
-  True
-  >>> ( status, line ) = buf.get_line()
-  >>> ( status, line )
-  (True, 'testing 7-8-9-10\\n')
-  >>> buf.put_line( line )
-  True
-  >>> testin.close()
-  >>> testout.close()
-  >>> source_win_syntax = source_py_syntax.replace("/","\\\\")      # the windows API requires \ separators
-  >>> target_win_syntax = target_py_syntax.replace("/","\\\\")
-  >>> # type is a built-in and must be invoked via the shell
-  >>> subprocess.check_output(["cmd", "/c", "type", source_win_syntax], universal_newlines=True)  == '{}'.format(functools.reduce(lambda s, n: s+n, testin_text, ""))
-  True
-  >>> subprocess.call(["cmd", "/c", "del", source_win_syntax])   # del is a built-in and must be invoked via the shell
-  0
-
-  >>> subprocess.call(["cmd", "/c", "del", target_win_syntax])
-  0
-
-  """
-  pass
-
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing MessageExchanger')
-    doctest_it(message_exchanger_test)
-    print()
-
-# +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-# GenerateSubprocess:  supporting class for subprocess generation:
-#
-# class's
-# *. __init__ method generates a process by
-# -.  writing content to a specified file
-# -.  executing that file, using Python
-# *. terminate method
-# -.  stops the proces
-# -.  deletes the file
-#
-# preconditions for process execution:
-# *.  a platform that supports a DOSshell-like command interpreter:  i.e.,
-# -.  ability to execute platform commands using syntax like "cmd /c ...some command..."
-# -.  support for a 'del foo.txt'  command that (e.g.) deletes foo.txt
-# *.  presence of Python command interpreter, python, in directory in PATH variable
-#
-# Notes:
-# -.  host_file argument must use Python syntax - e.g., c:/temp/foo.py
-# +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-
-class GenerateSubprocess(object):
-  def __init__(self, host_file_name, host_file_code):
-    self.host_file_name = host_file_name
-    try:
-      host_file = open(host_file_name, mode="w")     # create file for program
-      host_file.writelines( host_file_code )
-      host_file.close()                              # program code now written
-      self.host_file_built = True
-      try:
-        self.proc = subprocess.Popen(["cmd", "/c", "python", self.windows_syntax(self.host_file_name)])   # start the program.  the windows API requires \ separators
-        self.subprocess_started = True
-      except Exception as e:
-        print('?? {}: can\'t start process {}'.format(self.__class__.__name__, self.windows_syntax(self.host_file_name)))
-        self.subprocess_started = False
-    except:
-      print('?? {}: can\'t open {} for writing'.format(self.__class__.__name__, self.windows_syntax(self.host_file_name)))
-      self.host_file_built = False
-  def terminate(self):
-    if self.host_file_built:
-      if self.subprocess_started:  self.proc.terminate()
-      subprocess.call(["cmd", "/c", "del", self.windows_syntax(self.host_file_name)])   # del, a built-in, must be invoked via the shell.  also, the windows API requires \ separators
-  #
-  # auxiliary routines
-  def windows_syntax(self,filename):  return filename.replace("/", "\\")
-
-
-# +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-# TestServer:  supporting class for testing client communications:
-#
-# class generate a process that
-# -.  binds to a specified port on the current host
-# -.  reads a "request" on that port
-# -.  displays incoming connection and message
-# -.  responds to request with initial "OK " + prefix
-# -.  displays response
-# -.  exits
-# Notes:
-# -.  host_file argument must use Python syntax - e.g., c:/temp/foo.py
-# +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-#
-class TestServer(object):
-  #
-  def __init__(self, server_code_file, well_known_port=8881, response_prefix = "***"):
-    self.proc_handle = GenerateSubprocess( server_code_file, self.build_server_code(well_known_port, response_prefix) )
-  def terminate(self):
-    self.proc_handle.terminate()
-  #
-  # auxiliary routines
-  #
-  # build the code, parameterized by well_known_port
-  def build_server_code( self, well_known_port, response_prefix ):
-    server_code  = [ ]
-    server_code += [ "import sys\n" ]
-    server_code += [ "import socket\n" ]
-    server_code += [ "sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)      # enable TCP connection\n" ]
-    server_code += [ "sock.settimeout(30)                                           # put 30 second timeout on the socket to prevent indefinite execution\n" ]
-    server_code += [ "sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)    # allow reuse of local addresses, for fast restart upon server termination\n" ]
-    server_code += [ "well_known_port = {}\n".format(well_known_port) ]
-    server_code += [ "try:\n" ]
-    server_code += [ "  sock.bind(('', well_known_port))\n" ]
-    server_code += [ "  sock.listen(1)    # set the number of clients waiting for a connection that the server can bind at once\n" ]
-    server_code += [ "  try:              # get one connection, exchange messages, and quit\n" ]
-    server_code += [ "    newSocket, address = sock.accept()\n" ]
-    server_code += [ "    print('Connected from {}'.format(address))\n" ]
-    server_code += [ "    newSocket.settimeout(10)                                  # put 10 second timeout on the socket to prevent indefinite execution\n" ]
-    server_code += [ "    try:            # use file interface for message exchange\n" ]
-    server_code += [ "      infile, outfile = newSocket.makefile(mode='r'), newSocket.makefile(mode='w')\n" ]
-    server_code += [ "      try:          # do the exchange\n" ]
-    server_code += [ "        input = infile.readline()                                # get input from client\n" ]
-    server_code += [ "        print('server: read {}'.format(input),file=sys.stderr)   # show it for diagnostic purposes\n" ]
-    server_code += [ "        try:          # do the exchange\n" ]
-    server_code += [ "          response = 'OK ' + {} + input + '\\{}'               # echo input to client with initial OK, prefix\n".format('"'+response_prefix+'"', 'n') ]
-    server_code += [ "          outfile.writelines(response)\n" ]
-    server_code += [ "          outfile.flush()\n" ]
-    server_code += [ "          print('server: wrote {}'.format(response),file=sys.stderr)    # show it for diagnostic purposes\n" ]
-    server_code += [ "        except Exception as e:\n" ]
-    server_code += [ "          print('?? server: couldn\\\'t write to client{} - exiting'.format('' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
-    server_code += [ "      except Exception as e:\n" ]
-    server_code += [ "        print('?? server: couldn\\\'t read from client{} - exiting'.format('' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
-    server_code += [ "      finally:\n" ]
-    server_code += [ "        infile.close()\n" ]
-    server_code += [ "        outfile.close()\n" ]
-    server_code += [ "    except Exception as e:\n" ]
-    server_code += [ "      print('?? server: couldn\\\'t access socket to client{} - exiting'.format('' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
-    server_code += [ "    finally:\n" ]
-    server_code += [ "      newSocket.close()\n" ]
-    server_code += [ "  except Exception as e:\n" ]
-    server_code += [ "    print('?? server: couldn\\\'t process connection{} - exiting'.format('' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
-    server_code += [ "  finally:\n" ]
-    server_code += [ "    sock.close()\n" ]
-    server_code += [ "except Exception as e:\n" ]
-    server_code += [ "  print('?? server: couldn\\\'t bind to {}:{}; exiting'.format(well_known_port, '' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
-    return server_code
-
-
-# =================================================================================================================================
-# test code for OpenSocketMessageExchanger --
-#     class that supports communication with other entities via two half-duplex files, one line at a time.
-#
-# preconditions for test execution:
-# *.  a platform that supports a DOSshell-like command interpreter:  i.e.,
-# -.  ability to execute platform commands using syntax like "cmd /c ...some command..."
-# -.  support for a 'del foo.txt'  command that (e.g.) deletes foo.txt
-# *.  presence of Python 3 command interpreter, python, in directory in PATH variable
-# *.  ability to create, delete one file - c:\temp\testserver.txt
-# *.  firewall access for localhost, port 8881
-# ===============================================================================================================================
-
-import subprocess
-import socket
-import sys
-
-# -----------------------------------------------------------------------------------------------------------------------------
-# test code for the exchanger proper
-# -----------------------------------------------------------------------------------------------------------------------------
-#
-def open_socket_message_exchanger_test(void):
-  """
-  Test the open socket message exchanger class by creating a server program on the fly, then trading messages with it
-  >>> server_py_syntax = 'C:/temp/testserver.py'             # the Python files API (open(), close(), etc.) seems to require / separators
-  >>> well_known_port = 8881                                 # server port for message exchange
-  >>> response_prefix = "***"                                # prefix for distinguishing client request from server response
-  >>> test_server = TestServer(server_py_syntax, well_known_port, response_prefix)
-  >>> # ... ... now that server is started, communicate with it
-  >>> sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-  >>> sock.settimeout(10)                                    # timeout in seconds
-  >>> sock.connect(('localhost', well_known_port))
-  >>> exchanger = OpenSocketMessageExchanger(sock)
-  >>> test_message = "etaoin shrdlu\\n"
-  >>> request_status = exchanger.put_line(test_message)
-  >>> request_status
-  True
-  >>> response = (False, None) if not request_status else exchanger.get_line()
-  >>> parsed_response = (False, None) if not (request_status and response[0]) else (response[1].split(" ")[0] == "OK", None if " " not in response[1] else (response[1].split(" ", maxsplit=1))[1])
-  >>> parsed_response[0] == request_status
-  True
-  >>> parsed_response[1] == response_prefix + test_message if parsed_response[0] else None
-  True
-  >>> exchanger.close()
-  >>> # ... ... done; terminate the dialogue
-  >>> test_server.terminate()
-  """
-  pass
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing OpenSocketMessageExchanger')
-    doctest_it(open_socket_message_exchanger_test)
-    print()
-
-# =================================================================================================================================
-# test code for (Service Access Point) SAPMessageExchanger --
-#     class that uses a (host, port) pair to generate a socket message exchanger
-#
-# preconditions for test execution:
-# *.  a platform that supports a DOSshell-like command interpreter:  i.e.,
-# -.  ability to execute platform commands using syntax like "cmd /c ...some command..."
-# -.  support for a 'del foo.txt'  command that (e.g.) deletes foo.txt
-# *.  presence of Python 3 command interpreter, python, in directory in PATH variable
-# *.  ability to create, delete one file - c:\temp\testserver.txt
-# *.  firewall access for localhost, port 8881
-# ===============================================================================================================================
-
-import subprocess
-import socket
-import sys
-
-def sap_message_exchanger_test(void):
-  """
-  Test the SAP message exchanger class by creating a server program on the fly, then trading messages with it
-  >>> server_py_syntax = 'C:/temp/testserver.py'             # the Python files API (open(), close(), etc.) seems to require / separators
-  >>> well_known_port = 8881                                 # server port for message exchange
-  >>> response_prefix = "***"                                # prefix for distinguishing client request from server response
-  >>> test_server = TestServer(server_py_syntax, well_known_port, response_prefix)
-  >>> # ... ... now that server is started, communicate with it
-  >>> exchanger = SAPMessageExchanger(**{ 'hostport' : ('localhost', well_known_port), 'timeout': 10 })
-  >>> test_message = "etaoin shrdlu\\n"
-  >>> request_status = exchanger.put_line(test_message)
-  >>> request_status
-  True
-  >>> response = (False, None) if not request_status else exchanger.get_line()
-  >>> parsed_response = (False, None) if not (request_status and response[0]) else (response[1].split(" ")[0] == "OK", None if " " not in response[1] else (response[1].split(" ", maxsplit=1))[1])
-  >>> parsed_response[0] == request_status
-  True
-  >>> parsed_response[1] == response_prefix + test_message if parsed_response[0] else None
-  True
-  >>> exchanger.close()
-  >>> # ... ... done; terminate the dialogue
-  >>> test_server.terminate()
-  """
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing SAPMessageExchanger')
-    doctest_it(sap_message_exchanger_test)
-    print()
-
-# ************************************************************************************************************
-# test classes for parsing and responding to the bodies of requests of known types
-# ************************************************************************************************************
-
-# -----------------------------------------------------------------------------------------------------------------------------
-# test for RegisterQueue -
-#    class that replies to a request whose body is of the from   queue
-# -----------------------------------------------------------------------------------------------------------------------------
-
-def register_queue_test(void):
-  """
-  Test the register queue class by getting it to register a queue
-  >>> #
-  >>> # ... ... specify datasets for capturing results of request ... ...
-  >>> # start with empty collection, to remove possible residue from earlier tests)
-  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> request_reactor = RegisterQueue(**{'queue_to_readers': queue_to_readers, 'queue_to_writers': queue_to_writers})
-  >>> #
-  >>> # ... ... initialize test datasets:  must register the queue in order to unregister ot
-  >>> queue = 'q_bert'
-  >>> queue_to_readers.queues() == set()    # ... ... confirm initialization ... ...
-  True
-  >>> queue_to_writers.queues() == set()
-  True
-  >>> #
-  >>> # ... ... register the queue ... ...
-  >>> request = queue + "  "
-  >>> request_reactor(request)
-  (True, None)
-  >>> #
-  >>> # ... ... confirm unregistration ... ...
-  >>> queue_to_readers.queues() == { queue }
-  True
-  >>> queue_to_writers.queues() == { queue }
-  True
-  """
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing RegisterQueue')
-    doctest_it(register_queue_test)
-    print()
-
-# -----------------------------------------------------------------------------------------------------------------------------
-# test for RegisterReaderForQueue -
-#    class that replies to a request whose body is of the from   reader .. queue .. SAP
-# -----------------------------------------------------------------------------------------------------------------------------
-
-def register_reader_for_queue_test(void):
-  """
-  Test the register queue to reader class by getting it to register a message
-  >>> #
-  >>> # ... ... specify datasets for capturing results of request ... ...
-  >>> # start with empty collection, to remove possible residue from earlier tests)
-  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
-  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> request_reactor = RegisterReaderForQueue(**{'communicator_to_SAP': reader_to_SAP, 'queue_to_readers': queue_to_readers})
-  >>> #
-  >>> # ... ... initialize test datasets:  must register the queue in order to register the reader
-  >>> reader, queue, host, port = 'reader_foo', 'q_bert', 'host_baz', '1234'
-  >>> queue_to_readers.register_queue(queue)
-  >>> queue_to_readers.queues() == { queue }    # ... ... confirm initialization ... ...
-  True
-  >>> queue_to_readers.queues_for_reader( reader ) == set()
-  True
-  >>> queue_to_readers.readers() == set()
-  True
-  >>> queue_to_readers.readers_for_queue( queue ) == set()
-  True
-  >>> reader_to_SAP.SAP(reader) == None
-  True
- >>> #
-  >>> # ... ... register the reader ... ...
-  >>> request = reader + "  " + queue + " " + host + " " + port
-  >>> request_reactor(request)
-  (True, None)
-  >>> #
-  >>> # ... ... confirm registration ... ...
-  >>> queue_to_readers.queues() == { queue }    # ... ... confirm initialization ... ...
-  True
-  >>> queue_to_readers.queues_for_reader( reader ) == { queue }
-  True
-  >>> queue_to_readers.readers() == { reader }
-  True
-  >>> queue_to_readers.readers_for_queue( queue ) == { reader }
-  True
-  >>> reader_to_SAP.SAP(reader) == (host, port)
-  True
-  """
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing RegisterReaderForQueue')
-    doctest_it(register_reader_for_queue_test)
-    print()
-
-# -----------------------------------------------------------------------------------------------------------------------------
-# test for RegisterWriterForQueue -
-#    class that replies to a request whose body is of the from   writer .. queue
-# -----------------------------------------------------------------------------------------------------------------------------
-
-def register_writer_for_queue_test(void):
-  """
-  Test the register queue to writer class by getting it to register a message
-  >>> #
-  >>> # ... ... specify datasets for capturing results of request ... ...
-  >>> # start with empty collection, to remove possible residue from earlier tests)
-  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> request_reactor = RegisterWriterForQueue(**{'queue_to_writers': queue_to_writers})
-  >>> #
-  >>> # ... ... initialize test datasets:  must register the queue in order to register the writer
-  >>> writer, queue = 'writer_foo', 'q_bert'
-  >>> queue_to_writers.register_queue(queue)
-  >>> queue_to_writers.queues() == { queue }    # ... ... confirm initialization ... ...
-  True
-  >>> queue_to_writers.queues_for_writer( writer ) == set()
-  True
-  >>> queue_to_writers.writers() == set()
-  True
-  >>> queue_to_writers.writers_for_queue( queue ) == set()
-  True
-  >>> #
-  >>> # ... ... register the writer ... ...
-  >>> request = writer + "  " + queue
-  >>> request_reactor(request)
-  (True, None)
-  >>> #
-  >>> # ... ... confirm registration ... ...
-  >>> queue_to_writers.queues() == { queue }    # ... ... confirm initialization ... ...
-  True
-  >>> queue_to_writers.queues_for_writer( writer ) == { queue }
-  True
-  >>> queue_to_writers.writers() == { writer }
-  True
-  >>> queue_to_writers.writers_for_queue( queue ) == { writer }
-  True
-  """
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing RegisterWriterForQueue')
-    doctest_it(register_writer_for_queue_test)
-    print()
-
-# -----------------------------------------------------------------------------------------------------------------------------
-# test for QueuesForReader -
-#    class that replies to a request whose body is of the from   reader
-# -----------------------------------------------------------------------------------------------------------------------------
-
-def queues_for_reader_test(void):
-  """
-  Test the queues for reader class by registering two readers, checking for registration
-  >>> #
-  >>> # ... ... specify datasets for capturing results of request ... ...
-  >>> # start with empty collection, to remove possible residue from earlier tests)
-  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> request_reactor = QueuesForReader(**{'queue_to_readers': queue_to_readers})
-  >>> reader, queue1, queue2 = 'reader_foo', 'q_bert', 'q_qq'
-  >>> #
-  >>> # ... ... initialize test datasets:  must register the queue in order to register the readers
-  >>> queue_to_readers.register_queue(queue1)
-  >>> queue_to_readers.register_queue(queue2)
-  >>> queue_to_readers.register(queue1, reader)
-  True
-  >>> queue_to_readers.register(queue2, reader)
-  True
-  >>> queue_to_readers.queues() == { queue1, queue2 }    # ... ... confirm initialization ... ...
-  True
-  >>> queue_to_readers.queues_for_reader( reader ) == { queue1, queue2 }
-  True
-  >>> queue_to_readers.readers() == { reader }
-  True
-  >>> queue_to_readers.readers_for_queue( queue1 ) == { reader }
-  True
-  >>> queue_to_readers.readers_for_queue( queue2 ) == { reader }
-  True
-  >>> #
-  >>> # ... ... obtain the queues for reader data ... ...
-  >>> request = reader + " "
-  >>> (status, response) = request_reactor(request)
-  >>> #
-  >>> # ... ... confirm data ... ...
-  >>> (status == True) and (response in ["{} {} ".format(queue1, queue2), "{} {} ".format(queue2, queue1)])
-  True
-  """
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing QueuesForReader')
-    doctest_it(queues_for_reader_test)
-    print()
-
-# -----------------------------------------------------------------------------------------------------------------------------
-# test for  -
-#    class that replies to a request whose body is of the from   writer
-# -----------------------------------------------------------------------------------------------------------------------------
-
-def queues_for_writer_test(void):
-  """
-  Test the queues for writer class by registering two writers, checking for registration
-  >>> #
-  >>> # ... ... specify datasets for capturing results of request ... ...
-  >>> # start with empty collection, to remove possible residue from earlier tests)
-  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> request_reactor = QueuesForWriter(**{'queue_to_writers': queue_to_writers})
-  >>> writer, queue1, queue2 = 'writer_foo', 'q_bert', 'q_qq'
-  >>> #
-  >>> # ... ... initialize test datasets:  must register the queue in order to register the writers
-  >>> queue_to_writers.register_queue(queue1)
-  >>> queue_to_writers.register_queue(queue2)
-  >>> queue_to_writers.register(queue1, writer)
-  True
-  >>> queue_to_writers.register(queue2, writer)
-  True
-  >>> queue_to_writers.queues() == { queue1, queue2 }    # ... ... confirm initialization ... ...
-  True
-  >>> queue_to_writers.queues_for_writer( writer ) == { queue1, queue2 }
-  True
-  >>> queue_to_writers.writers() == { writer }
-  True
-  >>> queue_to_writers.writers_for_queue( queue1 ) == { writer }
-  True
-  >>> queue_to_writers.writers_for_queue( queue2 ) == { writer }
-  True
-  >>> #
-  >>> # ... ... obtain the queues for writer data ... ...
-  >>> request = writer + " "
-  >>> (status, response) = request_reactor(request)
-  >>> #
-  >>> # ... ... confirm data ... ...
-  >>> (status == True) and (response in ["{} {} ".format(queue1, queue2), "{} {} ".format(queue2, queue1)])
-  True
-  """
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing QueuesForWriter')
-    doctest_it(queues_for_writer_test)
-    print()
-
-# -----------------------------------------------------------------------------------------------------------------------------
-# test for AppendMessageToQueue -
-#    class that replies to a request whose body is of the from   writer .. queue
-# -----------------------------------------------------------------------------------------------------------------------------
-
-def append_message_to_queue_test(void):
-  """
-  Test the append message to queue class by registering a queue and a writer for the queue, appending a message, and checking queue content
-  Missing - tests of auto-push to readers functionality
-  >>> #
-  >>> # ... ... specify datasets for capturing results of request ... ...
-  >>> # start with empty collection, to remove possible residue from earlier tests)
-  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
-  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> request_reactor = AppendMessageToQueue(**{'queue_to_writers': queue_to_writers, 'communicator_to_SAP': reader_to_SAP, 'queue_to_readers': queue_to_readers})
-  >>> #
-  >>> # ... ... initialize test datasets:  must register the queue and the writer to the queue in order to add a message
-  >>> writer, queue, message = 'writer_foo', 'q_bert', 'this is a message'
-  >>> queue_to_writers.register_queue(queue)
-  >>> queue_to_writers.register(queue, writer)
-  True
-  >>> queue_to_writers.queues() == { queue }    # ... ... confirm initialization ... ...
-  True
-  >>> queue_to_writers.queues_for_writer( writer ) == { queue }
-  True
-  >>> queue_to_writers.writers() == { writer }
-  True
-  >>> queue_to_writers.writers_for_queue( queue ) == { writer }
-  True
-  >>> #
-  >>> # ... ... append the message ... ...
-  >>> request = writer + "  " + queue + " " + message
-  >>> request_reactor(request)
-  (True, None)
-  >>> #
-  >>> # ... ... confirm append ... ...
-  >>> queue_to_writers.queues() == { queue }
-  True
-  >>> queue_to_writers.queues_for_writer( writer ) == { queue }
-  True
-  >>> queue_to_writers.writers() == { writer }
-  True
-  >>> queue_to_writers.writers_for_queue( queue ) == { writer }
-  True
-  >>> queue_to_writers.retrieve_message(queue, 0) == 'this is a message'
-  True
-  """
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing AppendMessageToQueue')
-    doctest_it(append_message_to_queue_test)
-    print()
-
-# -----------------------------------------------------------------------------------------------------------------------------
-# test for UnregisterReaderFromQueue -
-#    class that replies to a request whose body is of the from   reader .. queue
-# -----------------------------------------------------------------------------------------------------------------------------
-
-def unregister_reader_from_queue_test(void):
-  """
-  Test the unregister reader from queue class by getting it to unregister a reader
-  >>> #
-  >>> # ... ... specify datasets for capturing results of request ... ...
-  >>> # start with empty collection, to remove possible residue from earlier tests)
-  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> request_reactor = UnregisterReaderFromQueue(**{'queue_to_readers': queue_to_readers})
-  >>> #
-  >>> # ... ... initialize test datasets:  must register the queue and the reader to the queue in order to unregister the reader
-  >>> reader, queue = 'reader_foo', 'q_bert'
-  >>> queue_to_readers.register_queue(queue)
-  >>> queue_to_readers.register(queue, reader)
-  True
-  >>> queue_to_readers.queues() == { queue }    # ... ... confirm initialization ... ...
-  True
-  >>> queue_to_readers.queues_for_reader( reader ) == { queue }
-  True
-  >>> queue_to_readers.readers() == { reader }
-  True
-  >>> queue_to_readers.readers_for_queue( queue ) == { reader }
-  True
-  >>> #
-  >>> # ... ... unregister the reader ... ...
-  >>> request = reader + "  " + queue + " "
-  >>> request_reactor(request)
-  (True, None)
-  >>> #
-  >>> # ... ... confirm unregistration ... ...
-  >>> queue_to_readers.queues() == { queue }
-  True
-  >>> queue_to_readers.queues_for_reader( reader ) == set()
-  True
-  >>> queue_to_readers.readers() == { reader }
-  True
-  >>> queue_to_readers.readers_for_queue( queue ) == set()
-  True
-  """
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing UnregisterReaderFromQueue')
-    doctest_it(unregister_reader_from_queue_test)
-    print()
-
-# -----------------------------------------------------------------------------------------------------------------------------
-# test for UnregisterQueueFromWriter -
-#    class that replies to a request whose body is of the from   writer .. queue
-# -----------------------------------------------------------------------------------------------------------------------------
-
-def unregister_writer_from_queue_test(void):
-  """
-  Test the unregister writer from queue class by getting it to unregister a writer
-  >>> #
-  >>> # ... ... specify datasets for capturing results of request ... ...
-  >>> # start with empty collection, to remove possible residue from earlier tests)
-  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> request_reactor = UnregisterWriterFromQueue(**{'queue_to_writers': queue_to_writers})
-  >>> #
-  >>> # ... ... initialize test datasets:  must register the queue and the writer to the queue in order to unregister the writer
-  >>> writer, queue = 'writer_foo', 'q_bert'
-  >>> queue_to_writers.register_queue(queue)
-  >>> queue_to_writers.register(queue, writer)
-  True
-  >>> queue_to_writers.queues() == { queue }    # ... ... confirm initialization ... ...
-  True
-  >>> queue_to_writers.queues_for_writer( writer ) == { queue }
-  True
-  >>> queue_to_writers.writers() == { writer }
-  True
-  >>> queue_to_writers.writers_for_queue( queue ) == { writer }
-  True
-  >>> #
-  >>> # ... ... unregister the writer ... ...
-  >>> request = writer + "  " + queue + " "
-  >>> request_reactor(request)
-  (True, None)
-  >>> #
-  >>> # ... ... confirm unregistration ... ...
-  >>> queue_to_writers.queues() == { queue }
-  True
-  >>> queue_to_writers.queues_for_writer( writer ) == set()
-  True
-  >>> queue_to_writers.writers() == { writer }
-  True
-  >>> queue_to_writers.writers_for_queue( queue ) == set()
-  True
-  """
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing UnregisterWriterFromQueue')
-    doctest_it(unregister_writer_from_queue_test)
-    print()
-
-# -----------------------------------------------------------------------------------------------------------------------------
-# test for UnregisterEntity -
-#    class that replies to a request whose body is of the form   communicator
-# -----------------------------------------------------------------------------------------------------------------------------
-
-def unregister_entity_test(void):
-  """
-  Test the unregister entity class by getting it to unregister an entity from the reader and writer datasets
-  >>> #
-  >>> # ... ... specify datasets for capturing results of request ... ...
-  >>> # start with empty collection, to remove possible residue from earlier tests)
-  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
-  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> request_reactor = UnregisterEntity(**{'queue_to_readers': queue_to_readers, 'communicator_to_SAP': reader_to_SAP, 'queue_to_writers': queue_to_writers})
-  >>> #
-  >>> # ... ... initialize test datasets:  must register the queue and register the entity for queue in order to unregister the entity
-  >>> entity, queue, host, port = 'mr_foo', 'q_bert', 'host_bar', 'port_baz'
-  >>> # queue_to_readers.register_queue(queue) - don't need to register queue twice, since read and write queues are the same
-  >>> queue_to_writers.register_queue(queue)
-  >>> queue_to_readers.register(queue, entity)
-  True
-  >>> queue_to_writers.register(queue, entity)
-  True
-  >>> reader_to_SAP.register(entity, host, port)
-  >>> queue_to_writers.queues() == { queue }    # ... ... confirm initialization ... ...
-  True
-  >>> queue_to_readers.queues_for_reader( entity ) == { queue }
-  True
-  >>> queue_to_writers.queues_for_writer( entity ) == { queue }
-  True
-  >>> queue_to_readers.readers() == { entity }
-  True
-  >>> queue_to_readers.readers_for_queue( queue ) == { entity }
-  True
-  >>> queue_to_writers.writers_for_queue( queue ) == { entity }
-  True
-  >>> reader_to_SAP.SAP( entity ) == ( host, port )
-  True
-  >>> #
-  >>> # ... ... unregister the entity ... ...
-  >>> request = entity + " "
-  >>> request_reactor(request)
-  (True, None)
-  >>> #
-  >>> # ... ... confirm unregistration ... ...
-  >>> queue_to_writers.queues() == { queue }
-  True
-  >>> queue_to_readers.queues_for_reader( entity ) == set()
-  True
-  >>> queue_to_writers.queues_for_writer( entity ) == set()
-  True
-  >>> queue_to_writers.writers() == set()
-  True
-  >>> queue_to_readers.readers_for_queue( queue ) == set()
-  True
-  >>> queue_to_writers.writers_for_queue( queue ) == set()
-  True
-  >>> reader_to_SAP.SAP( entity ) == None
-  True
-  """
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing UnregisterEntity')
-    doctest_it(unregister_entity_test)
-    print()
-
-# -----------------------------------------------------------------------------------------------------------------------------
-# test for UnregisterQueue -
-#    class that replies to a request whose body is of the from   queue
-# -----------------------------------------------------------------------------------------------------------------------------
-
-def unregister_queue_test(void):
-  """
-  Test the unregister queue class by getting it to unregister a queue from the read and write queue datasets
-  >>> #
-  >>> # ... ... specify datasets for capturing results of request ... ...
-  >>> # start with empty collection, to remove possible residue from earlier tests)
-  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> request_reactor = UnregisterQueue(**{'queue_to_readers': queue_to_readers, 'queue_to_writers': queue_to_writers})
-  >>> #
-  >>> # ... ... initialize test datasets:  must register the queue in order to unregister ot
-  >>> queue = 'q_bert'
-  >>> #queue_to_readers.register_queue(queue) - only need register once, since the queues are in a shared structure
-  >>> queue_to_writers.register_queue(queue)
-  >>> queue_to_readers.queues() == { queue }    # ... ... confirm initialization ... ...
-  True
-  >>> queue_to_writers.queues() == { queue }
-  True
-  >>> #
-  >>> # ... ... unregister the queue ... ...
-  >>> request = queue + "  "
-  >>> request_reactor(request)
-  (True, None)
-  >>> #
-  >>> # ... ... confirm unregistration ... ...
-  >>> queue_to_readers.queues() == set()
-  True
-  >>> queue_to_writers.queues() == set()
-  True
-  """
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing UnregisterQueue')
-    doctest_it(unregister_queue_test)
-    print()
-
-# ************************************************************************************************************
-# test classes for managing interactions with other processes via message exchange
-# preconditions for test execution:
-# *.  a platform that supports a DOSshell-like command interpreter:  i.e.,
-# -.  ability to execute platform commands using syntax like "cmd /c ...some command..."
-# -.  support for a 'del foo.txt'  command that (e.g.) deletes foo.txt
-# *.  presence of Python 3 command interpreter, python, in directory in PATH variable
-# *.  ability to create, delete one file - c:\temp\testserver.txt
-# *.  firewall access for localhost, port 8881
-# ************************************************************************************************************
-
-# +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-# TestClient:  supporting class for testing communications with external client:
-#
-# class generate a process that
-# -.  writes a request to a specified (host, port)
-# -.  displays incoming connection and message
-# -.  responds to message with initial "OK " + prefix
-# -.  displays response
-# -.  exits
-
-# -.  connects to a server on specified port
-# -.  sends specified message
-# -.  checks for specified response
-# -.  exits
-# Notes:
-# -.  host_file argument must use Python syntax - e.g., c:/temp/foo.py
-# +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-
-class TestClient(object):
-  #
-  def __init__(self, client_code_file, host='localhost', well_known_port=8881, request=""):
-    self.proc_handle = GenerateSubprocess( client_code_file, self.build_client_code(host, well_known_port, request) )
-  def terminate(self):
-    self.proc_handle.terminate()
-  #
-  # auxiliary routines
-  #
-  # build the code, parameterized by well_known_port
-  def build_client_code( self, host, well_known_port, request ):
-    client_code  = [ ]
-    client_code += [ "import sys\n" ]
-    client_code += [ "import socket\n" ]
-    client_code += [ "sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)      # enable TCP connection\n" ]
-    client_code += [ "sock.settimeout(20)                                           # put 20 second timeout on the socket to prevent indefinite execution\n" ]
-    client_code += [ "sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)    # allow reuse of local addresses, for fast restart upon client termination\n" ]
-    client_code += [ "host, well_known_port, request = {!r}, {!r}, {!r}\n".format(host, well_known_port, request) ]
-    client_code += [ "try:\n" ]
-    client_code += [ "  sock.connect((host, well_known_port))\n" ]
-    client_code += [ "  try:            # use file interface for message exchange\n" ]
-    client_code += [ "    infile, outfile = sock.makefile(mode='r'), sock.makefile(mode='w')\n" ]
-    client_code += [ "    try:          # do the request/response\n" ]
-    client_code += [ "      outfile.writelines(request)\n" ]
-    client_code += [ "      outfile.flush()\n" ]
-    client_code += [ "      print('client: wrote {}'.format(request),file=sys.stderr)    # show it for diagnostic purposes\n" ]
-    client_code += [ "      try:\n" ]
-    client_code += [ "        response = infile.readline()                                # get response from server\n" ]
-    client_code += [ "        print('client: read {}'.format(response),file=sys.stderr)   # show it for diagnostic purposes\n" ]
-    client_code += [ "      except Exception as e:\n" ]
-    client_code += [ "        print('?? client: couldn\\\'t read from server{} - exiting'.format('' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
-    client_code += [ "    except Exception as e:\n" ]
-    client_code += [ "      print('?? client: couldn\\\'t write to server{} - exiting'.format('' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
-    client_code += [ "    finally:\n" ]
-    client_code += [ "      infile.close()\n" ]
-    client_code += [ "      outfile.close()\n" ]
-    client_code += [ "  except Exception as e:\n" ]
-    client_code += [ "    print('?? client: couldn\\\'t access socket to server{} - exiting'.format('' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
-    client_code += [ "  finally:\n" ]
-    client_code += [ "    sock.close()\n" ]
-    client_code += [ "except Exception as e:\n" ]
-    client_code += [ "  print('?? client: couldn\\\'t connect to ({},{}):{}; exiting'.format(host, well_known_port, '' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
-    return client_code
-
-# ============================================================================================================
-# tests for RequestHandler -
-#    class that represents an entity that uses a message exchanger to reply to a request
-# ============================================================================================================
-
-import subprocess
-import socket
-import sys
-
-# -------------------------------------------------------------------------------------------------------------
-# first tests: use dummy dispatcher to check basic responses
-# -------------------------------------------------------------------------------------------------------------
-
-def respond_to_request_dummy_dispatcher_test(void):
-  """
-  Test RequestHandler by creating a client program on the fly, then trading messages with it
-  >>> #
-  >>> # ... ... dispatcher checks for 'request' before space, leaves what follows after ... ...
-  >>> dispatcher = lambda request, **kwargs: (request.split(' ')[0], request.split(' ')[0] == 'request', '' if ' ' not in request else request.split(' ',maxsplit=1)[1])
-  >>> responder = RequestHandler( dispatcher )
-  >>> #
-  >>> # ... ... set up for simple server communications ... ...
-  >>> sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)      # enable TCP connection
-  >>> sock.settimeout(30)                                           # put 30 second timeout on the socket to prevent indefinite execution
-  >>> sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)    # allow reuse of local addresses, for fast restart upon server termination
-  >>> well_known_port = 8881
-  >>> #
-  >>> # ... ... initiate the lightweight test server ... ...
-  >>> sock.bind(('', well_known_port))
-  >>> sock.listen(1)    # set the number of clients waiting for a connection that the server can bind at once
-  >>> #
-  >>> # ... ... set up a lightweight test client ... ...
-  >>> client_py_syntax = 'C:/temp/testclient.py'             # the Python files API (open(), close(), etc.) seems to require / separators
-  >>> request = "request response parameters\\n"             # request with parameters
-  >>> test_client = TestClient(client_py_syntax, 'localhost', well_known_port, request)
-  >>> #
-  >>> # ... ... respond to message from client ... ...
-  >>> newSocket, address = sock.accept()
-  >>> print('Connected from {}'.format(address), file=sys.stderr)
-  >>> newSocket.settimeout(30)
-  >>> request_as_seen, request_type, status, response = responder.respond( sock=newSocket )
-  >>> request_as_seen == request
-  True
-  >>> request_type == request.split(' ')[0]
-  True
-  >>> status == True
-  True
-  >>> response == ("OK" if status else "error") + ('' if ' ' not in request else ' ' + dispatcher(request)[2])
-  True
-  >>> #
-  >>> # ... ... done; terminate the test ... ...
-  >>> newSocket.close()
-  >>> sock.close()
-  >>> test_client.terminate()
-  """
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing RequestHandler - dummy request dispatcher')
-    doctest_it(respond_to_request_dummy_dispatcher_test)
-    print()
-
-# -------------------------------------------------------------------------------------------------------------
-# remaining tests: use RequestDispatcher as dispatcher
-# -------------------------------------------------------------------------------------------------------------
-
-def respond_to_request_register_q_test(void):
-  """
-  Test RequestHandler by creating a client program on the fly, then trading messages with it
-  >>> #
-  >>> # ... ... dispatcher checks for 'request' before space, leaves what follows after ... ...
-  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
-  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
-  >>> responder = RequestHandler( RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP) )
-  >>> #
-  >>> # ... ... confirm initial conditions ... ...
-  >>> request_type, new_q = 'register_q', 'q_bert'
-  >>> queue_to_readers.queues() == set()
-  True
-  >>> queue_to_writers.queues() == set()
-  True
-  >>> #
-  >>> # ... ... set up for simple server communications ... ...
-  >>> sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)      # enable TCP connection
-  >>> sock.settimeout(30)                                           # put 30 second timeout on the socket to prevent indefinite execution
-  >>> sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)    # allow reuse of local addresses, for fast restart upon server termination
-  >>> well_known_port = 8881
-  >>> #
-  >>> # ... ... initiate the lightweight test server ... ...
-  >>> sock.bind(('', well_known_port))
-  >>> sock.listen(1)    # set the number of clients waiting for a connection that the server can bind at once
-  >>> #
-  >>> # ... ... set up a lightweight test client ... ...
-  >>> client_py_syntax = 'C:/temp/testclient.py'             # the Python files API (open(), close(), etc.) seems to require / separators
-  >>> request = "{} {}\\n".format(request_type, new_q)
-  >>> test_client = TestClient(client_py_syntax, 'localhost', well_known_port, request)
-  >>> #
-  >>> # ... ... respond to message from client ... ...
-  >>> newSocket, address = sock.accept()
-  >>> print('Connected from {}'.format(address), file=sys.stderr)
-  >>> newSocket.settimeout(30)
-  >>> request_as_seen, parsed_request_type, status, response = responder.respond( sock=newSocket )
-  >>> request_as_seen == request
-  True
-  >>> parsed_request_type == request_type
-  True
-  >>> status
-  True
-  >>> response
-  'OK'
-  >>> #
-  >>> # ... ... check for registration ... ...
-  >>> queue_to_readers.queues() == { new_q }
-  True
-  >>> queue_to_writers.queues() == { new_q }
-  True
-  >>> #
-  >>> # ... ... done; terminate the test ... ...
-  >>> newSocket.close()
-  >>> sock.close()
-  >>> test_client.terminate()
-  """
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** testing RequestHandler - RequestDispatcher as dispatcher')
-    doctest_it(respond_to_request_register_q_test)
-    print()
-
-
-# ***********************************************
-#  Tests Complete 
-# ***********************************************
-
-if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
-  if run_tests_on_load:
-    print('*** tests concluded')
-    print()
+# *******************************************************************************************
+# message service library test program - test the classes in messageServerLibrary.py
+# ----------------------------------------------------------------------------------
+#
+# *. operating instructions
+#    ----------------------
+#
+#    invoke as   
+#       python messageServerTests.py  (port  (timeout))
+#
+#    preconditions for program execution:
+#    *.  the presence of the Python 3 command interpreter, python, in a directory in the 
+#        command line's PATH variable  (note: tested with Python 3.4.2)
+#    *.  the presence of the program's supporting library, messageServerLibrary.py,
+#        in Python's import path, sys.path.  (By default, sys.path includes the current directory).
+#    *.  firewall access for localhost and a TCP port for communication with client
+#        programs  (default: 8881)
+#    *.  a platform that supports a DOSshell-like command interpreter:  i.e.,
+#        -.  ability to execute platform commands using syntax like "cmd /c ...some command..."
+#        -.  support for a 'del foo.txt'  command that (e.g.) deletes foo.txt
+#    *.  ability to create, execute, and delete two files
+#        -.  c:\temp\testserver.txt
+#        -.  c:\temp\testclient.txt
+#
+# *. command line parameters
+#    -----------------------
+#
+#     none
+#
+# *. effect
+#    ------
+#
+#     use doctest to run unit tests against the programs messageServerLibrary.py.
+#     if testing succeeds, you should see advisory messages - nothing more.
+#
+# *. details
+#    -------
+#
+#     the message queues that this program establishes on behalf of its clients persist only as 
+#     long as this program operates.
+#
+#     all responses to client requests have a two-part form:
+#       status  (body)
+#     where 
+#      -.  status - leading field; either OK or error
+#      -.  body - if present, a characterization of the request's particulars:  i.e.,
+#          -.  a description of a request error
+#          -.  for qs_for_reader and qs_for_writer, the queues to which the user has subscribed
+#
+# *.  other
+#     -------
+#
+#     as of 4/27/15, this program has been successfully run to completion 
+#
+# -- Phil Pfeiffer
+#    27 April 2015
+# *******************************************************************************************
+
+# supporting codes for the message server
+#
+from messageServerLibrary import *
+
+# ###########################################################################################################
+# test codes for messaging service
+# ###########################################################################################################
+
+# ============================================================================================================
+# values for running unit tests
+# ============================================================================================================
+
+import doctest
+def doctest_it(f, verbosity=False):
+  doctest.run_docstring_examples(f, None, optionflags=doctest.ELLIPSIS|doctest.NORMALIZE_WHITESPACE, verbose=verbosity)
+
+run_tests_on_load = True
+
+# ************************************************************************************************************
+# utility classes
+# ************************************************************************************************************
+
+# ==================================================================================================================
+# test code for InvertibleMap class
+#
+# -- second set of tests also tests AddMapMethodAliases mixin
+# ==================================================================================================================
+
+# ---------------------------------------------------------------------------------------------
+# first set of tests:  test operation up to but not including aliasing
+# ---------------------------------------------------------------------------------------------
+#
+def invertible_map_test_no_aliasing(void):
+  """
+  >>> testMap = InvertibleMap()             # set up empty map - should return none
+  >>> repr(testMap)
+  "InvertibleMap(**{'forward_map': {}})"
+  >>> eval(repr(testMap)) == testMap        # basic memoization test
+  True
+  >>> testMap.register('a','x')             # register first element
+  >>> testMap
+  InvertibleMap(**{'forward_map': {'a': {'x'}}})
+  >>> eval(repr(testMap)) == testMap        # with-content memoization test
+  True
+  >>> testMap.codomain_elements_for_domain_element('a')    # check for correctness of ('a', {'x'}) binding
+  {'x'}
+  >>> testMap.domain_elements_for_codomain_element('a')
+  set()
+  >>> testMap.codomain_elements_for_domain_element('x')
+  set()
+  >>> testMap.domain_elements_for_codomain_element('x')
+  {'a'}
+  >>> testMap.register('a', 'y')                           # check for correctness of ('a', {'x', 'y'}) binding
+  >>> testMap.codomain_elements_for_domain_element('a') == {'x', 'y'}
+  True
+  >>> testMap.register('b', 'w')
+  >>> testMap.register('b', 'x')
+  >>> testMap.register('b', 'z')
+  >>> testMap.register('a', 'w')                           # should now have ('a', {'w', 'x', 'y'}) and ('b', {'w', 'x', 'z'})
+  >>> testMap.domain_elements() == {'a', 'b'}                            # check that domain element retrieval works
+  True
+  >>> testMap.codomain_elements() == {'w', 'x', 'y', 'z'}                # check that codomain element retrival works
+  True
+  >>> testMap.codomain_elements_for_domain_element('a') == {'w', 'x', 'y'}    # check forward mappings for 'a', 'b'
+  True
+  >>> testMap.codomain_elements_for_domain_element('b') == {'w', 'x', 'z'}
+  True
+  >>> testMap.domain_elements_for_codomain_element('w') == {'a', 'b'}    # check inverse mappings for 'w', 'x', 'y', 'z'
+  True
+  >>> testMap.domain_elements_for_codomain_element('x') == {'a', 'b'}
+  True
+  >>> testMap.domain_elements_for_codomain_element('y') == {'a'}
+  True
+  >>> testMap.domain_elements_for_codomain_element('z') == {'b'}
+  True
+  >>> testMap.unregister('a', 'w')                                       # check single binding unregistration
+  >>> testMap.codomain_elements_for_domain_element('a') == {'x', 'y'}
+  True
+  >>> testMap.codomain_elements_for_domain_element('b') == {'w', 'x', 'z'}
+  True
+  >>> testMap.unregister_codomain_element('x')                            # check codomain element unregistration
+  >>> testMap.codomain_elements_for_domain_element('a') == {'y'}
+  True
+  >>> testMap.codomain_elements_for_domain_element('b') == {'w', 'z'}
+  True
+  >>> testMap.unregister_domain_element('a')                              # check domain element unregistration
+  >>> testMap.codomain_elements_for_domain_element('a')
+  set()
+  >>> testMap.codomain_elements_for_domain_element('b') == {'w', 'z'}
+  True
+  """
+  pass
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('testing InvertibleMap - no alias test')
+    doctest_it(invertible_map_test_no_aliasing)
+
+
+# ---------------------------------------------------------------------------------------------
+# second set of tests:  rerun first set with 'foo' alias for domain, 'bar' alias for codomain
+# ---------------------------------------------------------------------------------------------
+#
+def invertible_map_test_with_aliasing(void):
+   """
+   >>> testMap = InvertibleMap(entity_aliases=[(('domain_element', 'foo'), ('codomain_element', 'bar'))])         # set up empty map - should return none
+   >>> testMap.foos() == set()             # check for empty map
+   True
+   >>> testMap.bars() == set()
+   True
+   >>> eval(repr(testMap)) == testMap        # basic memoization test
+   True
+   >>> testMap.register('a','x')             # register first element
+   >>> eval(repr(testMap)) == testMap        # string-check memoization test of map with content
+   True
+   >>> testMap.bars_for_foo('a')             # check for correctness of ('a', {'x'}) binding
+   {'x'}
+   >>> testMap.foos_for_bar('a')
+   set()
+   >>> testMap.bars_for_foo('x')
+   set()
+   >>> testMap.foos_for_bar('x')
+   {'a'}
+   >>> testMap.register('a', 'y')                           # check for correctness of ('a', {'x', 'y'}) binding
+   >>> testMap.bars_for_foo('a') == {'x', 'y'}
+   True
+   >>> testMap.register('b', 'w')
+   >>> testMap.register('b', 'x')
+   >>> testMap.register('b', 'z')
+   >>> testMap.register('a', 'w')                           # should now have ('a', {'w', 'x', 'y'}) and ('b', {'w', 'x', 'z'})
+   >>> testMap.foos() == {'a', 'b'}                         # check that domain element retrieval works
+   True
+   >>> testMap.bars() == {'w', 'x', 'y', 'z'}               # check that codomain element retrival works
+   True
+   >>> testMap.bars_for_foo('a') == {'w', 'x', 'y'}    # check forward mappings for 'a', 'b'
+   True
+   >>> testMap.bars_for_foo('b') == {'w', 'x', 'z'}
+   True
+   >>> testMap.foos_for_bar('w') == {'a', 'b'}         # check inverse mappings for 'w', 'x', 'y', 'z'
+   True
+   >>> testMap.foos_for_bar('x') == {'a', 'b'}
+   True
+   >>> testMap.foos_for_bar('y') == {'a'}
+   True
+   >>> testMap.foos_for_bar('z') == {'b'}
+   True
+   >>> testMap.unregister('a', 'w')                    # check single binding unregistration
+   >>> testMap.bars_for_foo('a') == {'x', 'y'}
+   True
+   >>> testMap.bars_for_foo('b') == {'w', 'x', 'z'}
+   True
+   >>> testMap.unregister_bar('x')                     # check codomain element unregistration
+   >>> testMap.bars_for_foo('a') == {'y'}
+   True
+   >>> testMap.bars_for_foo('b') == {'w', 'z'}
+   True
+   >>> testMap.unregister_foo('a')                     # check domain element unregistration
+   >>> testMap.bars_for_foo('a')
+   set()
+   >>> testMap.bars_for_foo('b') == {'w', 'z'}
+   True
+   """
+   pass
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing InvertibleMap - with aliasing')
+    doctest_it(invertible_map_test_with_aliasing)
+    print()
+
+
+# ---------------------------------------------------------------------------------------------
+# third set of tests:  aliases compiled into a class, via class_aliases, rather than added per instance
+# ---------------------------------------------------------------------------------------------
+#
+def invertible_map_test_with_class_aliasing(void):
+   """
+   >>> class FooBarMap(InvertibleMap):
+   ...   class_aliases = [(('domain_element', 'foo'), ('codomain_element', 'bar'))]
+   ...   def foos(self):  return {'overridden'}           # a method defined under an alias's name takes precedence
+   >>> FooBarMap.bars_for_foo is InvertibleMap.codomain_elements_for_domain_element        # aliases are the class's own methods
+   True
+   >>> testMap = FooBarMap()
+   >>> testMap.register('a','x')
+   >>> testMap.bars_for_foo('a'), testMap.bars(), testMap.foos()
+   ({'x'}, {'x'}, {'overridden'})
+   >>> class QuxMap(FooBarMap):                            # aliases follow a subclass's overrides
+   ...   def codomain_elements(self):  return {'qux'}
+   >>> QuxMap().bars()
+   {'qux'}
+   >>> 'bars_for_foo' in vars(testMap)                     # nothing is added per instance
+   False
+   >>> sorted(vars(InvertibleMap(entity_aliases=[(('domain_element', 'foo'), (None, None))])))          # malformed alias maps add nothing
+   ['aliases_keyvalue', 'forward_map', 'lock', 'reverse_map']
+   """
+   pass
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing InvertibleMap - with class aliasing')
+    doctest_it(invertible_map_test_with_class_aliasing)
+    print()
+
+
+# ==================================================================================================================
+# test code for TimerHeap class
+# ==================================================================================================================
+
+def timer_heap_test(void):
+  """
+  Test TimerHeap by adding calls out of order, then confirming they are made in order of due time
+  >>> calls = []
+  >>> timers = TimerHeap()
+  >>> timers.call_later(0.3, calls.append, 'third')
+  >>> timers.call_later(0.1, calls.append, 'first')
+  >>> timers.call_later(0.2, calls.append, 'second')
+  >>> timers.pending(), calls                               # nothing is called before the heap is started
+  (3, [])
+  >>> timers = timers.start()
+  >>> time.sleep(0.6)
+  >>> timers.pending(), calls
+  (0, ['first', 'second', 'third'])
+  >>> timers.call_later(10, calls.append, 'never')
+  >>> timers.stop()                                          # pending calls are dropped
+  >>> timers.pending(), calls
+  (0, ['first', 'second', 'third'])
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing TimerHeap')
+    doctest_it(timer_heap_test)
+    print()
+
+
+# ************************************************************************************************************
+# test codes for classes for binding message collections to their defining properties: i.e.,
+# -.  their associated  buffers
+# -.  the names of the entities that use them
+# ************************************************************************************************************
+
+# ============================================================================================================
+# test code for MessageBuffer class
+# ============================================================================================================
+
+def message_buffer_test(void):
+   """
+   >>> buf = MessageBuffer()        # start with empty buffer
+   >>> buf
+   MessageBuffer(**{'buffer': []})
+   >>> eval(repr(buf)) == buf       # basic memoization test
+   True
+   >>> buf.append_message('foo')            # add a message
+   >>> buf
+   MessageBuffer(**{'buffer': ['foo']})
+   >>> eval(repr(buf)) == buf               # memoization test with content
+   True
+   >>> buf.retrieve_message(0)              # check for message that's there
+   'foo'
+   >>> buf.retrieve_message(1)              # check for message that's not there
+   >>> buf.append_message('bar')            # try appending a second message
+   >>> buf
+   MessageBuffer(**{'buffer': ['foo', 'bar']})
+   """
+   pass
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing MessageBuffer')
+    doctest_it(message_buffer_test)
+    print()
+
+# ============================================================================================================
+# test code for MessageBuffer class - trimming
+# ============================================================================================================
+
+def message_buffer_trim_test(void):
+   """
+   >>> buf = MessageBuffer(**{'buffer': []})
+   >>> for message in ['foo', 'bar', 'baz']:  buf.append_message(message)
+   >>> buf.first_position(), buf.end_position()
+   (0, 3)
+   >>> buf.trim(2)                          # drop the first two messages
+   >>> buf
+   MessageBuffer(**{'buffer': ['baz'], 'base_offset': 2})
+   >>> eval(repr(buf)) == buf               # memoization test with an offset
+   True
+   >>> buf.retrieve_message(0)              # trimmed messages are gone ...
+   >>> buf.retrieve_message(2)              # ... while positions of the others are unchanged
+   'baz'
+   >>> buf.append_message('qux')
+   >>> buf.retrieve_message(3)
+   'qux'
+   >>> buf.trim(1)                          # trimming never moves backwards ...
+   >>> buf.trim(10)                         # ... or past the end of the stream
+   >>> buf.first_position(), buf.end_position(), buf
+   (4, 4, MessageBuffer(**{'buffer': [], 'base_offset': 4}))
+   """
+   pass
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing MessageBuffer - trimming')
+    doctest_it(message_buffer_trim_test)
+    print()
+
+# ============================================================================================================
+# test code for CompactMessageBuffer class
+# ============================================================================================================
+
+def compact_message_buffer_test(void):
+   """
+   >>> buf = CompactMessageBuffer(**{'chunk_size': 8})      # small chunks, to exercise chunk boundaries
+   >>> for message in ['foo', 'bar', 'baz', 'a message longer than a chunk', 'résumé']:  buf.append_message(message)
+   >>> buf
+   CompactMessageBuffer(**{'buffer': ['foo', 'bar', 'baz', 'a message longer than a chunk', 'résumé'], 'chunk_size': 8})
+   >>> eval(repr(buf)) == buf               # basic memoization test
+   True
+   >>> buf == MessageBuffer(**{'buffer': ['foo', 'bar', 'baz', 'a message longer than a chunk', 'résumé']})
+   False
+   >>> buf.retrieve_message(4), buf.retrieve_message(5)
+   ('résumé', None)
+   >>> view = buf.retrieve_view(1)          # payloads may be viewed without copying them ...
+   >>> bytes(view)
+   b'bar'
+   >>> buf.append_message('qux')            # ... and views stay valid as the buffer grows
+   >>> bytes(view), buf.retrieve_message(5)
+   (b'bar', 'qux')
+   >>> sorted(buf.chunks)
+   [0, 1, 2, 6, 7]
+   >>> buf.trim(3)                          # trimming drops chunks whose messages are all trimmed
+   >>> sorted(buf.chunks), buf.first_position(), buf.end_position()
+   ([2, 6, 7], 3, 6)
+   >>> buf.retrieve_message(2), buf.retrieve_message(3)
+   (None, 'a message longer than a chunk')
+   >>> buf.trim(10)
+   >>> buf
+   CompactMessageBuffer(**{'buffer': [], 'base_offset': 6, 'chunk_size': 8})
+   >>> bufs = MessageBufferCollection(**{'buffers': {}, 'buffer_factory': CompactMessageBuffer})   # select the class per collection
+   >>> bufs.register('foo')
+   >>> bufs.append_message('foo', 'bar')
+   >>> bufs.retrieve_message('foo', 0), type(bufs.buffer_collection['foo']).__name__
+   ('bar', 'CompactMessageBuffer')
+   >>> bufs = MessageBufferCollection(**{'buffers': {}, 'buffer_factory': MessageBuffer})          # restore the default
+   """
+   pass
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing CompactMessageBuffer')
+    doctest_it(compact_message_buffer_test)
+    print()
+
+# ============================================================================================================
+# test code for SegmentedMessageBuffer class
+# ============================================================================================================
+
+def segmented_message_buffer_test(void):
+   """
+   >>> import tempfile, os, functools
+   >>> directory = tempfile.mkdtemp()
+   >>> buf = SegmentedMessageBuffer(**{'directory': directory, 'name': 'foo/bar', 'segment_size': 32, 'index_interval': 8})
+   >>> buf
+   SegmentedMessageBuffer(**{'directory': ..., 'name': 'foo/bar', 'segment_size': 32, 'index_interval': 8})
+   >>> for message in ['foo', 'bar', 'baz', 'a message longer than a segment', 'résumé', '', 'qux']:  buf.append_message(message)
+   >>> os.listdir(directory)                # one directory per buffer ...
+   ['foo%2Fbar']
+   >>> buf.bases                            # ... holding segments, named for their first messages' positions
+   [0, 3, 4]
+   >>> [ buf.retrieve_message(k) for k in range(buf.first_position(), buf.end_position() + 1) ]
+   ['foo', 'bar', 'baz', 'a message longer than a segment', 'résumé', '', 'qux', None]
+   >>> buf.close()
+   >>> buf = SegmentedMessageBuffer(**{'directory': directory, 'name': 'foo/bar', 'segment_size': 32, 'index_interval': 8})
+   >>> sorted(buf.segments)                 # reopening opens only the last segment ...
+   [4]
+   >>> buf.first_position(), buf.end_position(), buf.retrieve_message(1), sorted(buf.segments)     # ... and others as they're read
+   (0, 7, 'bar', [0, 4])
+   >>> opened, barrier = [], threading.Barrier(8)          # ... once, by however many threads first read them at once
+   >>> def open_segment():
+   ...   barrier.wait()
+   ...   opened.append(buf.segment(3))
+   >>> threads = [ threading.Thread(target=open_segment) for k in range(8) ]
+   >>> for thread in threads:  thread.start()
+   >>> for thread in threads:  thread.join()
+   >>> len(opened), len(set(map(id, opened))), opened[0] is buf.segments[3]
+   (8, 1, True)
+   >>> buf.trim(4)                          # trimming removes segments whose messages are all trimmed
+   >>> sorted(os.listdir(buf.path))
+   ['00000000000000000004.index', '00000000000000000004.log', '00000000000000000004.times']
+   >>> buf.retrieve_message(3), buf.retrieve_message(4)
+   (None, 'résumé')
+   >>> bufs = MessageBufferCollection(**{'buffers': {}, 'buffer_factory': functools.partial(SegmentedMessageBuffer, directory=directory)})
+   >>> bufs.register('baz')
+   >>> bufs.append_message('baz', 'qux')
+   >>> bufs.retrieve_message('baz', 0), sorted(os.listdir(directory))
+   ('qux', ['baz', 'foo%2Fbar'])
+   >>> bufs.unregister('baz')               # unregistering a buffer removes its directory
+   >>> sorted(os.listdir(directory))
+   ['foo%2Fbar']
+   >>> buf.discard()
+   >>> os.listdir(directory)
+   []
+   >>> bufs = MessageBufferCollection(**{'buffers': {}, 'buffer_factory': MessageBuffer})          # restore the default
+   """
+   pass
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing SegmentedMessageBuffer')
+    doctest_it(segmented_message_buffer_test)
+    print()
+
+# ============================================================================================================
+# test code for TimeIndex class
+# ============================================================================================================
+
+def time_index_test(void):
+   """
+   >>> index = TimeIndex(**{'resolution': 1.0})
+   >>> [ index.add(position, stamp) for position, stamp in enumerate([100.0, 100.5, 101.2, 101.3, 99.0, 105.0]) ]
+   [100.0, 100.5, 101.2, 101.3, 101.3, 105.0]
+   >>> list(index.stamps), list(index.positions)        # stamps never decrease;  entries are at least a second apart
+   ([100.0, 101.2, 105.0], [0, 2, 5])
+   >>> [ index.position(stamp) for stamp in [50, 100.7, 101.2, 102.5, 105, 106] ]    # errs early, by less than a second
+   [0, 0, 2, 5, 5, None]
+   >>> index.trim(3)
+   >>> list(index.stamps), list(index.positions)
+   ([101.2, 105.0], [3, 5])
+   >>> #
+   >>> # ... ... buffer collections stamp the messages appended to their buffers ... ...
+   >>> bufs = MessageBufferCollection(**{'buffers': {}})
+   >>> bufs.register('foo')
+   >>> bufs.append_message('foo', 'bar')
+   >>> middle = time.time() + 0.1
+   >>> time.sleep(0.2)
+   >>> for message in ['baz', 'qux']:  bufs.append_message('foo', message)
+   >>> bufs.position_for_time('foo', 0), bufs.position_for_time('foo', middle), bufs.position_for_time('foo', time.time() + 1)
+   (0, 1, 3)
+   >>> #
+   >>> # ... ... a time before a buffer's first stamp maps to its first message, even if the buffer's messages bear no stamps ... ...
+   >>> bufs = MessageBufferCollection(**{'buffers': {'foo': MessageBuffer(**{'buffer': ['bar', 'baz'], 'base_offset': 5})}})
+   >>> bufs.append_message('foo', 'qux')
+   >>> bufs.position_for_time('foo', 0), bufs.position_for_time('foo', time.time() + 1)
+   (5, 8)
+   >>> #
+   >>> # ... ... a buffer held on disk records its stamps with its segments, so that its time index outlasts a restart ... ...
+   >>> import tempfile, functools
+   >>> factory = functools.partial(SegmentedMessageBuffer, directory=tempfile.mkdtemp(), segment_size=32)
+   >>> bufs = MessageBufferCollection(**{'buffers': {}, 'buffer_factory': factory})
+   >>> bufs.register('foo')
+   >>> for message in ['bar', 'baz']:  bufs.append_message('foo', message)
+   >>> middle = time.time() + 0.1
+   >>> time.sleep(0.2)
+   >>> for message in ['qux', 'quux', 'quuux']:  bufs.append_message('foo', message)
+   >>> bufs.buffer_collection['foo'].bases, len(bufs.time_indexes['foo'].stamps)
+   ([0, 4], 2)
+   >>> bufs.buffer_collection['foo'].close()
+   >>> bufs = MessageBufferCollection(**{'buffers': {}, 'buffer_factory': factory})
+   >>> bufs.register('foo')
+   >>> bufs.position_for_time('foo', 0), bufs.position_for_time('foo', middle), bufs.position_for_time('foo', time.time() + 1)
+   (0, 2, 5)
+   >>> bufs.append_message('foo', 'corge')
+   >>> bufs.position_for_time('foo', middle), list(bufs.time_indexes['foo'].positions)
+   (2, [0, 2])
+   >>> bufs.trim('foo', 4); bufs.position_for_time('foo', 0), bufs.position_for_time('foo', middle)
+   (4, 4)
+   >>> bufs.unregister('foo')
+   >>> bufs = MessageBufferCollection(**{'buffers': {}, 'buffer_factory': MessageBuffer})          # restore the default
+   """
+   pass
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing TimeIndex')
+    doctest_it(time_index_test)
+    print()
+
+# ============================================================================================================
+# test code for MessageBufferCollection class
+# ============================================================================================================
+
+def message_buffer_collection_test(void):
+   """
+   >>> buf = MessageBufferCollection(**{'buffers': {}})      # start with empty collection  (note: clear to remove possible residue from earlier tests)
+   >>> buf
+   MessageBufferCollection(**{'buffers': {}})
+   >>> eval(repr(buf)) == buf       # basic memoization test
+   True
+   >>> buf.is_registered('foo')     # confirm that 'foo' isn't registered
+   False
+   >>> buf.register('foo')          # add buffer 'foo'
+   >>> buf.is_registered('foo')     # confirm that 'foo' is now registered
+   True
+   >>> buf
+   MessageBufferCollection(**{'buffers': {'foo': MessageBuffer(**{'buffer': []})}})
+   >>> buf.append_message('foo','m1')     # add 1st message to buffer
+   >>> buf
+   MessageBufferCollection(**{'buffers': {'foo': MessageBuffer(**{'buffer': ['m1']})}})
+   >>> buf.append_message('foo','m2')     # add 2nd message to buffer
+   >>> buf
+   MessageBufferCollection(**{'buffers': {'foo': MessageBuffer(**{'buffer': ['m1', 'm2']})}})
+   >>> eval(repr(buf)) == buf             # non-trivial memoization test
+   True
+   >>> buf.retrieve_message('foo',0)      # retrieve messages from buffer
+   'm1'
+   >>> buf.retrieve_message('foo',1)      # retrieve messages from buffer
+   'm2'
+   >>> buf.retrieve_message('foo',2)      # retrieve messages from buffer
+   >>> buf.register('foo')                # attempt to reregister foo - check for message on stderr, which doctest won't catch
+   >>> buf.register('bar')                # add a second buffer
+   >>> buf.buffers() == { 'foo', 'bar' }  # confirm buffer name function correctness
+   True
+   >>> buf.retrieve_message('bar',0)      # retrieve message from empty buffer
+   >>> buf.unregister('foo')              # unregister 'foo', check result
+   >>> buf
+   MessageBufferCollection(**{'buffers': {'bar': MessageBuffer(**{'buffer': []})}})
+   """
+   pass
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing MessageBufferCollection')
+    doctest_it(message_buffer_collection_test)
+    print()
+
+# ============================================================================================================
+# test code for GroupCommitter class
+# ============================================================================================================
+
+def group_committer_test(void):
+   """
+   >>> import tempfile, functools
+   >>> bufs = MessageBufferCollection(**{'buffers': {}, 'buffer_factory': functools.partial(SegmentedMessageBuffer, directory=tempfile.mkdtemp())})
+   >>> bufs.register('foo')
+   >>> segment = bufs.buffer_collection['foo'].active
+   >>> bufs.append_message('foo', 'bar')
+   >>> segment.synced, segment.fill                 # appended, but not yet known to be on disk ...
+   (0, 7)
+   >>> GroupCommitter(bufs).commit('foo')          # ... and not made so in 'none' mode
+   True
+   >>> segment.synced
+   0
+   >>> committer = GroupCommitter(bufs, mode='message')
+   >>> committer.commit('foo'), segment.synced, committer.syncs
+   (True, 7, 1)
+   >>> #
+   >>> # ... ... in 'batch' mode, concurrent commits share a sync:  here, a batch stays open until its messages reach max_bytes ... ...
+   >>> committer = GroupCommitter(bufs, mode='batch', delay=60, max_bytes=32).start()
+   >>> def append(k):
+   ...   bufs.append_message('foo', 'baz{}'.format(k))
+   ...   results.append(committer.commit('foo', 4))
+   >>> results, threads = [], [ threading.Thread(target=append, args=(k,)) for k in range(8) ]
+   >>> for thread in threads:  thread.start()
+   >>> for thread in threads:  thread.join()
+   >>> results, committer.syncs, segment.synced == segment.fill
+   ([True, True, True, True, True, True, True, True], 1, True)
+   >>> committer.max_bytes = 8                      # ... and closes early once they do, well before its delay ends
+   >>> start = time.monotonic()
+   >>> threads = [ threading.Thread(target=append, args=(k,)) for k in range(2) ]
+   >>> for thread in threads:  thread.start()
+   >>> for thread in threads:  thread.join()
+   >>> committer.syncs, time.monotonic() - start < 30
+   (2, True)
+   >>> #
+   >>> # ... ... a batch whose sync fails fails its writers, and is forgotten once they've seen that it did ... ...
+   >>> foo = bufs.buffer_collection['foo']
+   >>> def failing_flush(flushes):  raise OSError('disk failure')
+   >>> foo.flush = failing_flush
+   >>> committer.max_bytes = 12
+   >>> results, threads = [], [ threading.Thread(target=append, args=(k,)) for k in range(3) ]
+   >>> for thread in threads:  thread.start()
+   >>> for thread in threads:  thread.join()
+   >>> results, committer.failed
+   ([False, False, False], {})
+   >>> del foo.flush
+   >>> committer.commit('foo', 12), segment.synced == segment.fill    # the failed flushes are retried with the next sync
+   (True, True)
+   >>> committer.stop()
+   >>> #
+   >>> # ... ... a sync holds the collection's lock only while it takes and records its flushes, not while it makes them ... ...
+   >>> bufs.register('slow')
+   >>> slow = bufs.buffer_collection['slow']
+   >>> flushing, release, released = threading.Event(), threading.Event(), []
+   >>> def slow_flush(flushes):                     # a flush that waits to be released - or, if the lock were held, times out
+   ...   flushing.set()
+   ...   released.append(release.wait(10))
+   ...   SegmentedMessageBuffer.flush(slow, flushes)
+   >>> slow.flush = slow_flush
+   >>> bufs.append_message('slow', 'x')
+   >>> thread = threading.Thread(target=bufs.sync, args=('slow',))
+   >>> thread.start(); flushing.wait(10)
+   True
+   >>> bufs.append_message('foo', 'y'); bufs.retrieve_message('foo', 0)
+   'bar'
+   >>> bufs.unregister('slow')                      # ... and a buffer discarded mid-sync is removed once the sync ends
+   >>> os.path.exists(slow.path)
+   True
+   >>> release.set(); thread.join()
+   >>> released, os.path.exists(slow.path), slow.active.synced
+   ([True], False, 5)
+   >>> bufs.unregister('foo')
+   >>> bufs = MessageBufferCollection(**{'buffers': {}, 'buffer_factory': MessageBuffer})          # restore the default
+   """
+   pass
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing GroupCommitter')
+    doctest_it(group_committer_test)
+    print()
+
+# ======================================================================================================================
+# test code for MessageBufferToUsers -- class that associates buffers in a message buffer collection with a user
+# ======================================================================================================================
+
+# ......................................................................................................................
+# test code for MessageBufferToUsers class
+# -.  lacking:  tests for append_message()
+# -.  aliasing feature tested by subclasses
+#
+def message_buffer_to_users_test(void):
+   """
+   >>> buf = MessageBufferToUsers(**{'buffers': {}, 'buffer_to_users': {}})      # start with empty collection  (note: clear to remove possible residue from earlier tests)
+   >>> buf.buffers()
+   set()
+   >>> buf.users()
+   set()
+   >>> buf.buffers_for_user('w1')
+   set()
+   >>> buf.users_for_buffer('foo')
+   set()
+   >>> eval(repr(buf)) == buf        # basic memoization test
+   True
+   >>> buf.register('foo', 'w1')     # attempt to register a user for an unregistered buffer.  should fail, generating message to stderr
+   False
+   >>> buf.register_buffer('foo')    # add a buffer
+   >>> buf.register('foo', 'w1')     # register two users for this buffer.  should succeed
+   True
+   >>> buf.register('foo', 'w2')
+   True
+   >>> buf.register_buffer('bar')     # register another buffer with two users.
+   >>> buf.register_buffer('bar')     # reregistration should write to cerr, but otherwise have no effect
+   >>> buf.register('bar', 'w2')      # should succeed
+   True
+   >>> buf.register('bar', 'w3')
+   True
+   >>> buf.buffers() == {'foo', 'bar'}
+   True
+   >>> buf.users_for_buffer('foo') == {'w1', 'w2'}
+   True
+   >>> buf.users_for_buffer('bar') == {'w2', 'w3'}
+   True
+   >>> buf.users() == {'w1', 'w2', 'w3'}
+   True
+   >>> buf.buffers_for_user('w1') == {'foo'}
+   True
+   >>> buf.buffers_for_user('w2') == {'foo', 'bar'}
+   True
+   >>> buf.buffers_for_user('w3') == {'bar'}
+   True
+   >>> eval(repr(buf)) == buf        # more complex memoization test
+   True
+   >>> buf.unregister_user('w3')     # check unregistering one user
+   >>> buf.buffers() == {'foo', 'bar'}
+   True
+   >>> buf.users() == {'w1', 'w2'}
+   True
+   >>> buf.users_for_buffer('bar') == {'w2'}
+   True
+   >>> buf.buffers_for_user('w3') == set()
+   True
+   >>> buf.unregister_buffer('bar')     # check unregistering one buffer
+   >>> buf.buffers() == {'foo'}
+   True
+   >>> buf.users() == {'w1', 'w2'}
+   True
+   >>> buf.users_for_buffer('bar') == set()
+   True
+   >>> buf.buffers_for_user('w2') == { 'foo' }
+   True
+   >>> buf.unregister('foo', 'w1')     # check unregistering one buffer/user combo
+   >>> buf.buffers() == { 'foo' }
+   True
+   >>> buf.users() == {'w1', 'w2'}
+   True
+   >>> buf.users_for_buffer('foo') == { 'w2' }
+   True
+   >>> buf.buffers_for_user('w1') == set()
+   True
+   """
+   pass
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing MessageBufferToUsers')
+    doctest_it(message_buffer_to_users_test)
+    print()
+
+# =================================================================================================================================
+# test code for MessageQueueToWriters --
+#     class that associates buffers (a.k.a. queues) in a message buffer collection with an append-only user (i.e., writer)
+# ===============================================================================================================================
+
+# ......................................................................................................................
+# >>> lacking:  tests for append_message()
+#
+def message_queue_to_writers_test(void):
+   """
+   >>> buf = MessageQueueToWriters(**{'buffers': {}, 'buffers_to_users': {}})      # start with empty collection  (note: clear to remove possible residue from earlier tests)
+   >>> buf.queues()
+   set()
+   >>> buf.writers()
+   set()
+   >>> buf.queues_for_writer('w1')
+   set()
+   >>> buf.writers_for_queue('foo')
+   set()
+   >>> eval(repr(buf)) == buf        # basic memoization test
+   True
+   >>> buf.register('foo', 'w1')     # attempt to register a writer for an unregistered queue.  should fail, generating message to stderr
+   False
+   >>> buf.register_queue('foo')     # add a queue
+   >>> buf.register('foo', 'w1')     # register two writers for this queue.  should succeed
+   True
+   >>> buf.register('foo', 'w2')
+   True
+   >>> buf.register_queue('bar')     # register another queue with two writers.
+   >>> buf.register_queue('bar')     # reregistration should write to cerr, but otherwise have no effect
+   >>> buf.register('bar', 'w2')     # should succeed
+   True
+   >>> buf.register('bar', 'w3')
+   True
+   >>> buf.queues() == {'foo', 'bar'}
+   True
+   >>> buf.writers_for_queue('foo') == {'w1', 'w2'}
+   True
+   >>> buf.writers_for_queue('bar') == {'w2', 'w3'}
+   True
+   >>> buf.writers() == {'w1', 'w2', 'w3'}
+   True
+   >>> buf.queues_for_writer('w1') == {'foo'}
+   True
+   >>> buf.queues_for_writer('w2') == {'foo', 'bar'}
+   True
+   >>> buf.queues_for_writer('w3') == {'bar'}
+   True
+   >>> eval(repr(buf)) == buf        # more complex memoization test
+   True
+   >>> buf.unregister_writer('w3')     # check unregistering one writer
+   >>> buf.queues() == {'foo', 'bar'}
+   True
+   >>> buf.writers() == {'w1', 'w2'}
+   True
+   >>> buf.writers_for_queue('bar') == {'w2'}
+   True
+   >>> buf.queues_for_writer('w3') == set()
+   True
+   >>> buf.unregister_queue('bar')     # check unregistering one queue
+   >>> buf.queues() == {'foo'}
+   True
+   >>> buf.writers() == {'w1', 'w2'}
+   True
+   >>> buf.writers_for_queue('bar') == set()
+   True
+   >>> buf.queues_for_writer('w2') == { 'foo' }
+   True
+   >>> buf.unregister('foo', 'w1')     # check unregistering one queue/writer combo
+   >>> buf.queues() == { 'foo' }
+   True
+   >>> buf.writers() == {'w1', 'w2'}
+   True
+   >>> buf.writers_for_queue('foo') == { 'w2' }
+   True
+   >>> buf.queues_for_writer('w1') == set()
+   True
+   """
+   pass
+
+run_tests_on_load = True
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing MessageQueueToWriters')
+    doctest_it(message_queue_to_writers_test)
+    print()
+
+# =================================================================================================================================
+# test code for MessageQueueToReaders --
+#     class that associates buffers (a.k.a. queues) in a message buffer collection with a serial access user (i.e., reader)
+# note:  these are really streams, since they associate per-reader "current message" indices with each queue
+# ===============================================================================================================================
+
+# ......................................................................................................................
+# >>> lacking:  tests for next_message()
+#
+def message_queue_to_readers_test(void):
+   """
+   >>> buf = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})      # start with empty collection  (note: clear to remove possible residue from earlier tests)
+   >>> buf.queues()
+   set()
+   >>> buf.readers()
+   set()
+   >>> buf.queues_for_reader('w1')
+   set()
+   >>> buf.readers_for_queue('foo')
+   set()
+   >>> eval(repr(buf)) == buf        # basic memoization test
+   True
+   >>> buf.register('foo', 'w1')     # attempt to register a reader for an unregistered queue.  should fail, generating message to stderr
+   False
+   >>> buf.register_queue('foo')     # add a queue
+   >>> buf.register('foo', 'w1')     # register two readers for this queue.  should succeed
+   True
+   >>> buf.register('foo', 'w2')
+   True
+   >>> buf.register_queue('bar')     # register another queue with two readers.
+   >>> buf.register_queue('bar')     # reregistration should write to cerr, but otherwise have no effect
+   >>> buf.register('bar', 'w2')     # should succeed
+   True
+   >>> buf.register('bar', 'w3')
+   True
+   >>> buf.queues() == {'foo', 'bar'}
+   True
+   >>> buf.readers_for_queue('foo') == {'w1', 'w2'}
+   True
+   >>> buf.readers_for_queue('bar') == {'w2', 'w3'}
+   True
+   >>> buf.readers() == {'w1', 'w2', 'w3'}
+   True
+   >>> buf.queues_for_reader('w1') == {'foo'}
+   True
+   >>> buf.queues_for_reader('w2') == {'foo', 'bar'}
+   True
+   >>> buf.queues_for_reader('w3') == {'bar'}
+   True
+   >>> buf.unregister_reader('w3')     # check unregistering one reader
+   >>> buf.queues() == {'foo', 'bar'}
+   True
+   >>> buf.readers() == {'w1', 'w2'}
+   True
+   >>> buf.readers_for_queue('bar') == {'w2'}
+   True
+   >>> buf.queues_for_reader('w3') == set()
+   True
+   >>> eval(repr(buf)) == buf        # more complex memoization test
+   True
+   >>> buf.unregister_queue('bar')     # check unregistering one queue
+   >>> buf.queues() == {'foo'}
+   True
+   >>> buf.readers() == {'w1', 'w2'}
+   True
+   >>> buf.readers_for_queue('bar') == set()
+   True
+   >>> buf.queues_for_reader('w2') == { 'foo' }
+   True
+   >>> buf.unregister('foo', 'w1')     # check unregistering one queue/reader combo
+   >>> buf.queues() == { 'foo' }
+   True
+   >>> buf.readers() == {'w1', 'w2'}
+   True
+   >>> buf.readers_for_queue('foo') == { 'w2' }
+   True
+   >>> buf.queues_for_reader('w1') == set()
+   True
+   """
+   pass
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing MessageQueueToReaders')
+    doctest_it(message_queue_to_readers_test)
+    print()
+
+# ============================================================================================================
+# test code for MessageQueueToReaders class - trimming messages that all readers have received
+# ============================================================================================================
+
+def message_queue_to_readers_trim_test(void):
+   """
+   >>> readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+   >>> writers = MessageQueueToWriters()
+   >>> writers.register_queue('foo')
+   >>> writers.register('foo', 'w1')
+   True
+   >>> readers.register('foo', 'r1'), readers.register('foo', 'r2')
+   (True, True)
+   >>> for k in range(4):  r = writers.append_message('foo', 'w1', 'm{}'.format(k))
+   >>> [ readers.next_message('foo', 'r1') for k in range(3) ], [ readers.next_message('foo', 'r2') for k in range(3) ]
+   (['m0', 'm1', 'm2'], ['m0', 'm1', 'm2'])
+   >>> readers.buffer_collection.first_position('foo')      # m0 - m2 have been received by both readers, and so are trimmed
+   3
+   >>> readers.retrieve_message('foo', 2), readers.retrieve_message('foo', 3)
+   (None, 'm3')
+   >>> readers.register('foo', 'r3')                        # a new reader starts at the first message still held
+   True
+   >>> readers.retrieve_position('foo', 'r3')
+   3
+   >>> readers.next_message('foo', 'r2')
+   'm3'
+   >>> readers.unregister('foo', 'r3')                      # with r3 gone, r1 is the slowest reader
+   >>> readers.buffer_collection.first_position('foo'), readers.backlog('foo', 'r1')   # only r1's backlog remains
+   (3, 1)
+   """
+   pass
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing MessageQueueToReaders - trimming')
+    doctest_it(message_queue_to_readers_trim_test)
+    print()
+
+
+# =================================================================================================================================
+# test code for CommunicatorToSAP --
+#     class that associates named users with (host, port) pairs
+# ===============================================================================================================================
+
+def communicator_to_SAP_test(void):
+   """
+   >>> buf = CommunicatorToSAP(**{'communicator_to_SAP': {}})      # start with empty collection  (note: clear to remove possible residue from earlier tests)
+   >>> buf
+   CommunicatorToSAP(**{'communicator_to_SAP': {}})
+   >>> buf.communicators()
+   set()
+   >>> eval(repr(buf)) == buf     # basic repr test
+   True
+   >>> buf.register('foo', 'myhost', '1.1.1.1')
+   >>> buf
+   CommunicatorToSAP(**{'communicator_to_SAP': {'foo': ('myhost', '1.1.1.1')}})
+   >>> buf.SAP('foo') == ('myhost', '1.1.1.1')
+   True
+   >>> buf.register('bar', 'yourhost', '1.2.3.4')
+   >>> eval(repr(buf)) == buf    # more complex repr test
+   True
+   >>> buf.communicators() == {'foo', 'bar'}
+   True
+   >>> buf.unregister('foo')
+   >>> buf.communicators() == {'bar'}
+   True
+   >>> buf.SAP('foo')
+   >>> buf.SAP('bar') == ('yourhost', '1.2.3.4')
+   True
+   """
+   pass
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing CommunicatorToSAP')
+    doctest_it(communicator_to_SAP_test)
+    print()
+
+# ************************************************************************************************************
+# tests for classes for exchanging one-line messages with other processes
+# ************************************************************************************************************
+
+# =================================================================================================================================
+# test code for MessageExchanger --
+#     class that supports communication with other entities via two half-duplex files, one line at a time.
+#
+# preconditions for test execution:
+# *.  a platform that supports a DOSshell-like command interpreter:  i.e.,
+# -.  ability to execute platform commands using syntax like "cmd /c ...some command..."
+# -.  support for a 'type foo.txt' command that (e.g.) outputs foo.txt to stdout
+# -.  support for a 'del foo.txt'  command that (e.g.) deletes foo.txt
+# *.  ability to create, delete two files - c:\temp\testin.txt, c:\temp\testout.txt
+# ===============================================================================================================================
+
+import subprocess
+import functools
+
+def message_exchanger_test(void):
+  """
+  >>> source_py_syntax = 'C:/temp/testin.txt'       # the Python files API (open(), close(), etc.) seems to require / separators
+  >>> target_py_syntax = 'C:/temp/testout.txt'
+  >>> testin = open(source_py_syntax, mode="w")     # set up test
+  >>> testin_text  = []
+  >>> testin_text += ['testing 1-2-3\\n' ]
+  >>> testin_text += ['testing 4-5-6\\n' ]
+  >>> testin_text += ['testing 7-8-9-10\\n' ]
+  >>> testin.writelines( testin_text )
+  >>> testin.close()
+  >>> testin  = open(source_py_syntax, mode="r")
+  >>> testout = open(target_py_syntax, mode="w")
+  >>> buf = MessageExchanger(**{'infile': testin, 'outfile': testout})
+  >>> ( status, line ) = buf.get_line()
+  >>> ( status, line )
+  (True, 'testing 1-2-3\\n')
+  >>> buf.put_line( line )
+  True
+  >>> ( status, line ) = buf.get_line()
+  >>> ( status, line )
+  (True, 'testing 4-5-6\\n')
+  >>> buf.put_line( line )
+  True
+  >>> ( status, line ) = buf.get_line()
+  >>> ( status, line )
+  (True, 'testing 7-8-9-10\\n')
+  >>> buf.put_line( line )
+  True
+  >>> testin.close()
+  >>> testout.close()
+  >>> source_win_syntax = source_py_syntax.replace("/","\\\\")      # the windows API requires \ separators
+  >>> target_win_syntax = target_py_syntax.replace("/","\\\\")
+  >>> # type is a built-in and must be invoked via the shell
+  >>> subprocess.check_output(["cmd", "/c", "type", source_win_syntax], universal_newlines=True)  == '{}'.format(functools.reduce(lambda s, n: s+n, testin_text, ""))
+  True
+  >>> subprocess.call(["cmd", "/c", "del", source_win_syntax])   # del is a built-in and must be invoked via the shell
+  0
+
+  >>> subprocess.call(["cmd", "/c", "del", target_win_syntax])
+  0
+
+  """
+  pass
+
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing MessageExchanger')
+    doctest_it(message_exchanger_test)
+    print()
+
+# +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+# GenerateSubprocess:  supporting class for subprocess generation:
+#
+# class's
+# *. __init__ method generates a process by
+# -.  writing content to a specified file
+# -.  executing that file, using Python
+# *. terminate method
+# -.  stops the proces
+# -.  deletes the file
+#
+# preconditions for process execution:
+# *.  a platform that supports a DOSshell-like command interpreter:  i.e.,
+# -.  ability to execute platform commands using syntax like "cmd /c ...some command..."
+# -.  support for a 'del foo.txt'  command that (e.g.) deletes foo.txt
+# *.  presence of Python command interpreter, python, in directory in PATH variable
+#
+# Notes:
+# -.  host_file argument must use Python syntax - e.g., c:/temp/foo.py
+# +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+
+class GenerateSubprocess(object):
+  def __init__(self, host_file_name, host_file_code):
+    self.host_file_name = host_file_name
+    try:
+      host_file = open(host_file_name, mode="w")     # create file for program
+      host_file.writelines( host_file_code )
+      host_file.close()                              # program code now written
+      self.host_file_built = True
+      try:
+        self.proc = subprocess.Popen(["cmd", "/c", "python", self.windows_syntax(self.host_file_name)])   # start the program.  the windows API requires \ separators
+        self.subprocess_started = True
+      except Exception as e:
+        print('?? {}: can\'t start process {}'.format(self.__class__.__name__, self.windows_syntax(self.host_file_name)))
+        self.subprocess_started = False
+    except:
+      print('?? {}: can\'t open {} for writing'.format(self.__class__.__name__, self.windows_syntax(self.host_file_name)))
+      self.host_file_built = False
+  def terminate(self):
+    if self.host_file_built:
+      if self.subprocess_started:  self.proc.terminate()
+      subprocess.call(["cmd", "/c", "del", self.windows_syntax(self.host_file_name)])   # del, a built-in, must be invoked via the shell.  also, the windows API requires \ separators
+  #
+  # auxiliary routines
+  def windows_syntax(self,filename):  return filename.replace("/", "\\")
+
+
+# +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+# TestServer:  supporting class for testing client communications:
+#
+# class generate a process that
+# -.  binds to a specified port on the current host
+# -.  reads a "request" on that port
+# -.  displays incoming connection and message
+# -.  responds to request with initial "OK " + prefix
+# -.  displays response
+# -.  exits
+# Notes:
+# -.  host_file argument must use Python syntax - e.g., c:/temp/foo.py
+# +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+#
+class TestServer(object):
+  #
+  def __init__(self, server_code_file, well_known_port=8881, response_prefix = "***"):
+    self.proc_handle = GenerateSubprocess( server_code_file, self.build_server_code(well_known_port, response_prefix) )
+  def terminate(self):
+    self.proc_handle.terminate()
+  #
+  # auxiliary routines
+  #
+  # build the code, parameterized by well_known_port
+  def build_server_code( self, well_known_port, response_prefix ):
+    server_code  = [ ]
+    server_code += [ "import sys\n" ]
+    server_code += [ "import socket\n" ]
+    server_code += [ "sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)      # enable TCP connection\n" ]
+    server_code += [ "sock.settimeout(30)                                           # put 30 second timeout on the socket to prevent indefinite execution\n" ]
+    server_code += [ "sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)    # allow reuse of local addresses, for fast restart upon server termination\n" ]
+    server_code += [ "well_known_port = {}\n".format(well_known_port) ]
+    server_code += [ "try:\n" ]
+    server_code += [ "  sock.bind(('', well_known_port))\n" ]
+    server_code += [ "  sock.listen(1)    # set the number of clients waiting for a connection that the server can bind at once\n" ]
+    server_code += [ "  try:              # get one connection, exchange messages, and quit\n" ]
+    server_code += [ "    newSocket, address = sock.accept()\n" ]
+    server_code += [ "    print('Connected from {}'.format(address))\n" ]
+    server_code += [ "    newSocket.settimeout(10)                                  # put 10 second timeout on the socket to prevent indefinite execution\n" ]
+    server_code += [ "    try:            # use file interface for message exchange\n" ]
+    server_code += [ "      infile, outfile = newSocket.makefile(mode='r'), newSocket.makefile(mode='w')\n" ]
+    server_code += [ "      try:          # do the exchange\n" ]
+    server_code += [ "        input = infile.readline()                                # get input from client\n" ]
+    server_code += [ "        print('server: read {}'.format(input),file=sys.stderr)   # show it for diagnostic purposes\n" ]
+    server_code += [ "        try:          # do the exchange\n" ]
+    server_code += [ "          response = 'OK ' + {} + input + '\\{}'               # echo input to client with initial OK, prefix\n".format('"'+response_prefix+'"', 'n') ]
+    server_code += [ "          outfile.writelines(response)\n" ]
+    server_code += [ "          outfile.flush()\n" ]
+    server_code += [ "          print('server: wrote {}'.format(response),file=sys.stderr)    # show it for diagnostic purposes\n" ]
+    server_code += [ "        except Exception as e:\n" ]
+    server_code += [ "          print('?? server: couldn\\\'t write to client{} - exiting'.format('' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
+    server_code += [ "      except Exception as e:\n" ]
+    server_code += [ "        print('?? server: couldn\\\'t read from client{} - exiting'.format('' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
+    server_code += [ "      finally:\n" ]
+    server_code += [ "        infile.close()\n" ]
+    server_code += [ "        outfile.close()\n" ]
+    server_code += [ "    except Exception as e:\n" ]
+    server_code += [ "      print('?? server: couldn\\\'t access socket to client{} - exiting'.format('' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
+    server_code += [ "    finally:\n" ]
+    server_code += [ "      newSocket.close()\n" ]
+    server_code += [ "  except Exception as e:\n" ]
+    server_code += [ "    print('?? server: couldn\\\'t process connection{} - exiting'.format('' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
+    server_code += [ "  finally:\n" ]
+    server_code += [ "    sock.close()\n" ]
+    server_code += [ "except Exception as e:\n" ]
+    server_code += [ "  print('?? server: couldn\\\'t bind to {}:{}; exiting'.format(well_known_port, '' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
+    return server_code
+
+
+# =================================================================================================================================
+# test code for OpenSocketMessageExchanger --
+#     class that supports communication with other entities via two half-duplex files, one line at a time.
+#
+# preconditions for test execution:
+# *.  a platform that supports a DOSshell-like command interpreter:  i.e.,
+# -.  ability to execute platform commands using syntax like "cmd /c ...some command..."
+# -.  support for a 'del foo.txt'  command that (e.g.) deletes foo.txt
+# *.  presence of Python 3 command interpreter, python, in directory in PATH variable
+# *.  ability to create, delete one file - c:\temp\testserver.txt
+# *.  firewall access for localhost, port 8881
+# ===============================================================================================================================
+
+import subprocess
+import socket
+import sys
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test code for the exchanger proper
+# -----------------------------------------------------------------------------------------------------------------------------
+#
+def open_socket_message_exchanger_test(void):
+  """
+  Test the open socket message exchanger class by creating a server program on the fly, then trading messages with it
+  >>> server_py_syntax = 'C:/temp/testserver.py'             # the Python files API (open(), close(), etc.) seems to require / separators
+  >>> well_known_port = 8881                                 # server port for message exchange
+  >>> response_prefix = "***"                                # prefix for distinguishing client request from server response
+  >>> test_server = TestServer(server_py_syntax, well_known_port, response_prefix)
+  >>> # ... ... now that server is started, communicate with it
+  >>> sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+  >>> sock.settimeout(10)                                    # timeout in seconds
+  >>> sock.connect(('localhost', well_known_port))
+  >>> exchanger = OpenSocketMessageExchanger(sock)
+  >>> test_message = "etaoin shrdlu\\n"
+  >>> request_status = exchanger.put_line(test_message)
+  >>> request_status
+  True
+  >>> response = (False, None) if not request_status else exchanger.get_line()
+  >>> parsed_response = (False, None) if not (request_status and response[0]) else (response[1].split(" ")[0] == "OK", None if " " not in response[1] else (response[1].split(" ", maxsplit=1))[1])
+  >>> parsed_response[0] == request_status
+  True
+  >>> parsed_response[1] == response_prefix + test_message if parsed_response[0] else None
+  True
+  >>> exchanger.close()
+  >>> # ... ... done; terminate the dialogue
+  >>> test_server.terminate()
+  """
+  pass
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing OpenSocketMessageExchanger')
+    doctest_it(open_socket_message_exchanger_test)
+    print()
+
+# =================================================================================================================================
+# test code for (Service Access Point) SAPMessageExchanger --
+#     class that uses a (host, port) pair to generate a socket message exchanger
+#
+# preconditions for test execution:
+# *.  a platform that supports a DOSshell-like command interpreter:  i.e.,
+# -.  ability to execute platform commands using syntax like "cmd /c ...some command..."
+# -.  support for a 'del foo.txt'  command that (e.g.) deletes foo.txt
+# *.  presence of Python 3 command interpreter, python, in directory in PATH variable
+# *.  ability to create, delete one file - c:\temp\testserver.txt
+# *.  firewall access for localhost, port 8881
+# ===============================================================================================================================
+
+import subprocess
+import socket
+import sys
+import time
+
+def sap_message_exchanger_test(void):
+  """
+  Test the SAP message exchanger class by creating a server program on the fly, then trading messages with it
+  >>> server_py_syntax = 'C:/temp/testserver.py'             # the Python files API (open(), close(), etc.) seems to require / separators
+  >>> well_known_port = 8881                                 # server port for message exchange
+  >>> response_prefix = "***"                                # prefix for distinguishing client request from server response
+  >>> test_server = TestServer(server_py_syntax, well_known_port, response_prefix)
+  >>> # ... ... now that server is started, communicate with it
+  >>> exchanger = SAPMessageExchanger(**{ 'hostport' : ('localhost', well_known_port), 'timeout': 10 })
+  >>> test_message = "etaoin shrdlu\\n"
+  >>> request_status = exchanger.put_line(test_message)
+  >>> request_status
+  True
+  >>> response = (False, None) if not request_status else exchanger.get_line()
+  >>> parsed_response = (False, None) if not (request_status and response[0]) else (response[1].split(" ")[0] == "OK", None if " " not in response[1] else (response[1].split(" ", maxsplit=1))[1])
+  >>> parsed_response[0] == request_status
+  True
+  >>> parsed_response[1] == response_prefix + test_message if parsed_response[0] else None
+  True
+  >>> exchanger.close()
+  >>> # ... ... done; terminate the dialogue
+  >>> test_server.terminate()
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing SAPMessageExchanger')
+    doctest_it(sap_message_exchanger_test)
+    print()
+
+# =================================================================================================================================
+# test code for LineAssembler and PipelinedSocketMessageExchanger --
+#     classes that support pipelined exchanges of lines over an open socket
+# ===============================================================================================================================
+
+def pipelined_socket_message_exchanger_test(void):
+  """
+  Test the pipelined exchanger by sending lines in arbitrary chunks over one end of a connected socket pair
+  >>> assembler = LineAssembler()
+  >>> assembler.add(b'first\\nsec')
+  >>> assembler.lines()
+  ['first\\n']
+  >>> assembler.lines()
+  []
+  >>> assembler.add(b'ond\\nthird\\nfou')
+  >>> assembler.lines()
+  ['second\\n', 'third\\n']
+  >>> assembler.remainder()
+  'fou'
+  >>> assembler.add(b'CR LF lines\\r\\nsplit before LF\\r')     # lines ended by CR LF, as telnet sends them, are ended by LF alone
+  >>> assembler.lines()
+  ['CR LF lines\\n']
+  >>> assembler.add(b'\\nCR alone\\rstays\\n')
+  >>> assembler.lines()
+  ['split before LF\\n', 'CR alone\\rstays\\n']
+  >>> assembler = LineAssembler(max_line=8)                   # a line longer than max_line is refused, once the lines before it are returned
+  >>> assembler.add(b'short\\nmuch too long'); assembler.lines()
+  ['short\\n']
+  >>> assembler.lines()
+  Traceback (most recent call last):
+  ...
+  ValueError: line too long
+  >>> #
+  >>> # ... ... every line already sent should be returned by one get_lines call ... ...
+  >>> client_sock, server_sock = socket.socketpair()
+  >>> exchanger = PipelinedSocketMessageExchanger(server_sock)
+  >>> client_sock.sendall(b'one\\ntwo\\nthree\\n')
+  >>> time.sleep(0.1)
+  >>> exchanger.get_lines()
+  (True, ['one\\n', 'two\\n', 'three\\n'])
+  >>> exchanger.put_lines(['OK 1\\n', 'OK 2\\n', 'OK 3\\n'])
+  True
+  >>> client_sock.recv(100)
+  b'OK 1\\nOK 2\\nOK 3\\n'
+  >>> #
+  >>> # ... ... get_line serves lines from the same batch one at a time; '' marks the end of the exchange ... ...
+  >>> client_sock.sendall(b'four\\nfive\\nsix')
+  >>> client_sock.shutdown(socket.SHUT_WR)
+  >>> exchanger.get_line()
+  (True, 'four\\n')
+  >>> exchanger.get_line()
+  (True, 'five\\n')
+  >>> exchanger.get_line()
+  (True, 'six')
+  >>> exchanger.get_line()
+  (True, '')
+  >>> client_sock.close()
+  >>> server_sock.close()
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing PipelinedSocketMessageExchanger')
+    doctest_it(pipelined_socket_message_exchanger_test)
+    print()
+
+# ************************************************************************************************************
+# test class for delivering queued messages to readers
+# ************************************************************************************************************
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for SAPConnectionPool -
+#    class that keeps delivery connections to reader SAPs open, reopening them as needed
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def sap_connection_pool_test(void):
+  """
+  Test SAPConnectionPool by delivering to two readers that share a SAP, which hangs up after every three messages
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> deliverer = MessageDeliverer(queue_to_readers, reader_to_SAP, timeout=2)
+  >>> append = AppendMessageToQueue(**{'queue_to_writers': queue_to_writers, 'queue_to_readers': queue_to_readers, 'communicator_to_SAP': reader_to_SAP, 'deliverer': deliverer})
+  >>> #
+  >>> # ... ... a SAP that counts its connections and acknowledges three messages per connection ... ...
+  >>> listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+  >>> listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+  >>> listener.bind(('localhost', 8889)); listener.listen(5); listener.settimeout(2)
+  >>> received, connections = [], []
+  >>> def read_messages():
+  ...   while True:
+  ...     try:  sock, address = listener.accept()
+  ...     except OSError:  return
+  ...     connections.append(address)
+  ...     sock_file = sock.makefile(mode='rw')
+  ...     for k in range(3):
+  ...       line = sock_file.readline()
+  ...       if line == '':  break
+  ...       received.append(line)
+  ...       n = sock_file.write('OK\\n'); sock_file.flush()
+  ...     sock_file.close(); sock.close()
+  >>> reader_thread = threading.Thread(target=read_messages)
+  >>> reader_thread.start()
+  >>> for queue, reader in [ ('q_bert', 'r1'), ('q_ernie', 'r2') ]:
+  ...   queue_to_writers.register_queue(queue)
+  ...   r = queue_to_writers.register(queue, 'w1')
+  ...   r = queue_to_readers.register(queue, reader)
+  ...   reader_to_SAP.register(reader, 'localhost', '8889')
+  >>> #
+  >>> # ... ... both readers' messages share one connection, until the SAP hangs up ... ...
+  >>> for k, queue in enumerate(['q_bert', 'q_ernie', 'q_bert']):  r = append('w1 {} m{}'.format(queue, k))
+  >>> len(connections), received
+  (1, ['m0\\n', 'm1\\n', 'm2\\n'])
+  >>> deliverer.pool.addresses() == { ('localhost', 8889) }
+  True
+  >>> #
+  >>> # ... ... after which the next delivery reconnects ... ...
+  >>> r = append('w1 q_ernie m3')
+  >>> len(connections), received[3:]
+  (2, ['m3\\n'])
+  >>> queue_to_readers.retrieve_position('q_bert', 'r1'), queue_to_readers.retrieve_position('q_ernie', 'r2')
+  (2, 2)
+  >>> deliverer.stop()
+  >>> deliverer.pool.addresses()
+  set()
+  >>> reader_thread.join(10)
+  >>> listener.close()
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing SAPConnectionPool')
+    doctest_it(sap_connection_pool_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for MessageDeliverer -
+#    class that sends readers their unread messages from worker threads, apart from the appends that queued them
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def message_deliverer_test(void):
+  """
+  Test MessageDeliverer by appending to a queue with two readers:  one that acknowledges each message, and one that is not listening
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> deliverer = MessageDeliverer(queue_to_readers, reader_to_SAP, workers=2, timeout=2).start()
+  >>> append = AppendMessageToQueue(**{'queue_to_writers': queue_to_writers, 'queue_to_readers': queue_to_readers, 'communicator_to_SAP': reader_to_SAP, 'deliverer': deliverer})
+  >>> #
+  >>> # ... ... a reader that records and acknowledges whatever it is sent, until it sits idle ... ...
+  >>> listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+  >>> listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+  >>> listener.bind(('localhost', 8888)); listener.listen(5); listener.settimeout(2)
+  >>> received = []
+  >>> def read_messages():
+  ...   while True:
+  ...     try:  sock, address = listener.accept()
+  ...     except OSError:  return
+  ...     in_file, out_file = sock.makefile(mode='r'), sock.makefile(mode='w')
+  ...     for line in in_file:
+  ...       received.append(line)
+  ...       n = out_file.write('OK\\n'); out_file.flush()
+  ...     in_file.close(); out_file.close(); sock.close()
+  >>> reader_thread = threading.Thread(target=read_messages)
+  >>> reader_thread.start()
+  >>> #
+  >>> # ... ... appends are acknowledged at once; the deliverer sends the messages in order ... ...
+  >>> queue_to_writers.register_queue('q_bert')
+  >>> queue_to_writers.register('q_bert', 'w1')
+  True
+  >>> queue_to_readers.register('q_bert', 'r1')
+  True
+  >>> reader_to_SAP.register('r1', 'localhost', '8888')
+  >>> queue_to_readers.register('q_bert', 'r2')              # ... ... along with a reader that is not listening
+  True
+  >>> reader_to_SAP.register('r2', 'localhost', '8894')
+  >>> [ append('w1 q_bert m{}'.format(k)) for k in range(5) ] == [ (True, None) ] * 5
+  True
+  >>> deliverer.stop()                                         # returns once outstanding notices are served
+  >>> received
+  ['m0\\n', 'm1\\n', 'm2\\n', 'm3\\n', 'm4\\n']
+  >>> queue_to_readers.retrieve_position('q_bert', 'r1')
+  5
+  >>> reader_thread.join(10)
+  >>> listener.close()
+  >>> #
+  >>> # ... ... a reader that cannot be reached keeps its position, so its messages remain unread ... ...
+  >>> queue_to_readers.retrieve_position('q_bert', 'r2')
+  0
+  >>> queue_to_readers.unread_messages('q_bert', 'r2', 2)
+  (0, ['m0', 'm1'])
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing MessageDeliverer')
+    doctest_it(message_deliverer_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for MessageDeliverer's windowed delivery -
+#    readers are sent windows of messages with one write, which they may acknowledge with one cumulative reply
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def message_deliverer_window_test(void):
+  """
+  Test windowed delivery by catching up a reader that is 1000 messages behind, then a reader that acknowledges only part of a window
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> deliverer = MessageDeliverer(queue_to_readers, reader_to_SAP, timeout=2, window=100)
+  >>> dispatcher = RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP, deliverer=deliverer)
+  >>> #
+  >>> # ... ... a reader that acknowledges everything it has read, up to some limit, with one reply per read ... ...
+  >>> def read_messages(port, limit, received):
+  ...   listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+  ...   listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+  ...   listener.bind(('localhost', port)); listener.listen(5)
+  ...   sock, address = listener.accept()
+  ...   partial = b''
+  ...   while len(received) < limit:
+  ...     data = sock.recv(65536)
+  ...     if not data:  break
+  ...     lines = (partial + data).split(b'\\n')
+  ...     partial = lines.pop()
+  ...     received.extend(lines)
+  ...     sock.sendall('OK {}\\n'.format(min(len(received), limit)).encode('utf-8'))
+  ...   sock.close(); listener.close()
+  >>> received = []
+  >>> reader_thread = threading.Thread(target=read_messages, args=(8890, 1000, received))
+  >>> reader_thread.start()
+  >>> time.sleep(0.5)                                        # give the reader time to bind its port
+  >>> #
+  >>> # ... ... catch up:  a reader that registers after 1000 appends receives them all, a window at a time.
+  >>> # ... ... (a second reader, which can't yet be reached, keeps the 1000 messages from being trimmed)
+  >>> for request in [ 'register_q q_bert', 'set_writer_for_q w1 q_bert', 'set_reader_for_q r2 q_bert localhost 8891' ] + [ 'append_message_to_q w1 q_bert m{}'.format(k) for k in range(1000) ]:
+  ...   r = dispatcher(request)
+  >>> dispatcher('set_reader_for_q r1 q_bert localhost 8890')
+  ('set_reader_for_q', True, None)
+  >>> received == [ 'm{}'.format(k).encode('utf-8') for k in range(1000) ]
+  True
+  >>> queue_to_readers.retrieve_position('q_bert', 'r1')
+  1000
+  >>> connection = deliverer.pool.connection(('localhost', 8890))
+  >>> connection.sent, connection.acknowledged
+  (1000, 1000)
+  >>> reader_thread.join(10)
+  >>> #
+  >>> # ... ... the second reader, once reachable, acknowledges only 150 messages of the 1000, and so advances by only that many ... ...
+  >>> received = []
+  >>> reader_thread = threading.Thread(target=read_messages, args=(8891, 150, received))
+  >>> reader_thread.start()
+  >>> time.sleep(0.5)
+  >>> dispatcher('set_reader_for_q r2 q_bert localhost 8891')
+  ('set_reader_for_q', True, None)
+  >>> reader_thread.join(10)
+  >>> queue_to_readers.retrieve_position('q_bert', 'r2')
+  150
+  >>> deliverer.stop()
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing MessageDeliverer - windowed delivery')
+    doctest_it(message_deliverer_window_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for MessageDeliverer's backpressure -
+#    readers that fall behind are marked as lagging, and appends to their queues are refused or make room by dropping
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def message_deliverer_backpressure_test(void):
+  """
+  Test backpressure by appending to a queue whose one reader can't be reached, first under the reject policy, then under the drop policy
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> deliverer = MessageDeliverer(queue_to_readers, reader_to_SAP, timeout=2, high_water=2, lag_limit=4)
+  >>> handler = RequestHandler( RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP, deliverer=deliverer) )
+  >>> for request in [ 'register_q q_bert', 'set_writer_for_q w1 q_bert', 'set_reader_for_q r1 q_bert localhost 8892' ]:
+  ...   r = handler.handle_request(request)
+  >>> #
+  >>> # ... ... past the high-water mark, the unreachable reader is lagging, and no longer tried on each append ... ...
+  >>> [ handler.handle_request('append_message_to_q w1 q_bert m{}'.format(k))[2] for k in range(5) ]
+  ['OK', 'OK', 'OK', 'OK', 'error backpressure']
+  >>> deliverer.lagging_readers(), deliverer.is_paused('r1'), queue_to_readers.backlog('q_bert', 'r1')
+  ({'r1'}, True, 4)
+  >>> #
+  >>> # ... ... under the drop policy, appends make room by skipping the lagging reader's oldest messages ... ...
+  >>> deliverer.overflow = 'drop'
+  >>> [ handler.handle_request('append_message_to_q w1 q_bert m{}'.format(k))[2] for k in range(5, 7) ]
+  ['OK', 'OK']
+  >>> queue_to_readers.backlog('q_bert', 'r1'), deliverer.dropped
+  (4, {'r1': 2})
+  >>> #
+  >>> # ... ... an append that isn't made - here, from a writer not registered for the queue - skips no one ... ...
+  >>> handler.handle_request('append_message_to_q w2 q_bert m7')[1:], queue_to_readers.backlog('q_bert', 'r1'), deliverer.dropped
+  ((False, 'error'), 4, {'r1': 2})
+  >>> #
+  >>> # ... ... appends made at once are admitted one at a time, so together they don't pass the lag limit ... ...
+  >>> deliverer.overflow = 'reject'
+  >>> for request in [ 'register_q q_ernie', 'set_writer_for_q w1 q_ernie', 'set_reader_for_q r2 q_ernie' ]:
+  ...   r = handler.handle_request(request)
+  >>> responses = []
+  >>> appenders = [ threading.Thread(target=lambda k=k: responses.append(handler.handle_request('append_message_to_q w1 q_ernie m{}'.format(k))[2])) for k in range(16) ]
+  >>> for appender in appenders:  appender.start()
+  >>> for appender in appenders:  appender.join(10)
+  >>> responses.count('OK'), queue_to_readers.backlog('q_ernie', 'r2')
+  (4, 4)
+  >>> #
+  >>> # ... ... once the reader registers again and is reached, it is caught up and no longer lagging - unlike r2, which fetches ... ...
+  >>> listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+  >>> listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+  >>> listener.bind(('localhost', 8892)); listener.listen(5)
+  >>> received = []
+  >>> def read_messages():
+  ...   sock, address = listener.accept()
+  ...   in_file, out_file = sock.makefile(mode='r'), sock.makefile(mode='w')
+  ...   for line in in_file:
+  ...     received.append(line)
+  ...     n = out_file.write('OK\\n'); out_file.flush()
+  ...   in_file.close(); out_file.close(); sock.close()
+  >>> reader_thread = threading.Thread(target=read_messages)
+  >>> reader_thread.start()
+  >>> handler.handle_request('set_reader_for_q r1 q_bert localhost 8892')
+  ('set_reader_for_q', True, 'OK')
+  >>> received
+  ['m2\\n', 'm3\\n', 'm5\\n', 'm6\\n']
+  >>> deliverer.lagging_readers(), queue_to_readers.backlog('q_bert', 'r1')
+  ({'r2'}, 0)
+  >>> deliverer.stop()
+  >>> reader_thread.join(10)
+  >>> listener.close()
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing MessageDeliverer - backpressure')
+    doctest_it(message_deliverer_backpressure_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for MessageDeliverer's retries and dead letters -
+#    readers that can't be reached are retried with growing delays, then have their messages moved to dead letters
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def message_deliverer_retry_test(void):
+  """
+  Test retries by appending to a queue whose one reader can't be reached, then replaying its dead letters once it can be
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> deliverer = MessageDeliverer(queue_to_readers, reader_to_SAP, workers=1, timeout=2, retry_delay=0.1, max_attempts=3).start()
+  >>> handler = RequestHandler( RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP, deliverer=deliverer) )
+  >>> for request in [ 'register_q q_bert', 'set_writer_for_q w1 q_bert', 'set_reader_for_q r1 q_bert localhost 8893' ]:
+  ...   r = handler.handle_request(request)
+  >>> #
+  >>> # ... ... the first append fails;  the reader is paused, and retried after 0.05-0.1, then 0.1-0.2 seconds ... ...
+  >>> handler.handle_request('append_message_to_q w1 q_bert m0')[2]
+  'OK'
+  >>> time.sleep(0.1)
+  >>> deliverer.is_paused('r1')
+  True
+  >>> [ handler.handle_request('append_message_to_q w1 q_bert m{}'.format(k))[2] for k in range(1, 3) ]
+  ['OK', 'OK']
+  >>> time.sleep(1)
+  >>> #
+  >>> # ... ... after three failures, the reader's messages are dead letters, and no longer pending for it ... ...
+  >>> deliverer.dead_letters_for_queue('q_bert')
+  [('r1', 'm0'), ('r1', 'm1'), ('r1', 'm2')]
+  >>> handler.handle_request('dead_letters_for_q q_bert')
+  ('dead_letters_for_q', True, 'OK 3 r1')
+  >>> queue_to_readers.backlog('q_bert', 'r1')
+  0
+  >>> #
+  >>> # ... ... once the reader listens, replaying the dead letters sends them, ahead of newer messages ... ...
+  >>> listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+  >>> listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+  >>> listener.bind(('localhost', 8893)); listener.listen(5)
+  >>> received = []
+  >>> def read_messages():
+  ...   sock, address = listener.accept()
+  ...   in_file, out_file = sock.makefile(mode='r'), sock.makefile(mode='w')
+  ...   for line in in_file:
+  ...     received.append(line)
+  ...     n = out_file.write('OK\\n'); out_file.flush()
+  ...   in_file.close(); out_file.close(); sock.close()
+  >>> reader_thread = threading.Thread(target=read_messages)
+  >>> reader_thread.start()
+  >>> handler.handle_request('append_message_to_q w1 q_bert m3')[2]
+  'OK'
+  >>> handler.handle_request('replay_dead_letters_for_q q_bert')
+  ('replay_dead_letters_for_q', True, 'OK 3')
+  >>> deliverer.stop()
+  >>> reader_thread.join(10)
+  >>> received
+  ['m0\\n', 'm1\\n', 'm2\\n', 'm3\\n']
+  >>> deliverer.dead_letters_for_queue('q_bert'), deliverer.is_paused('r1')
+  ([], False)
+  >>> listener.close()
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing MessageDeliverer - retries and dead letters')
+    doctest_it(message_deliverer_retry_test)
+    print()
+
+# ************************************************************************************************************
+# test classes for parsing and responding to the bodies of requests of known types
+# ************************************************************************************************************
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for AbstractResponseGenerator.parse and RequestDispatcher's fast path -
+#    parsing requests that follow their responders' layouts without the responders' patterns
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def request_parser_test(void):
+  """
+  Test the parsing of requests without patterns by splitting bodies that follow their layouts, checking that bodies that follow
+  none of them are left to the patterns, and checking that the dispatcher reads requests as its pattern would
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}, 'queue_to_readers_to_positions': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> dispatcher = RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP)
+  >>> append, fetch = dispatcher.request_to_responder['append_message_to_q'], dispatcher.request_to_responder['fetch_from_q']
+  >>> append.parse('w1 q_bert a message,  with spaces\\n'), append.parse('w1 q_bert \\n')
+  (['w1', 'q_bert', 'a message,  with spaces'], ['w1', 'q_bert', ''])
+  >>> fetch.parse('r1 q_bert 10\\n'), fetch.parse('r1 q_bert 10 500')
+  (['r1', 'q_bert', '10'], ['r1', 'q_bert', '10', '500'])
+  >>> dispatcher.request_to_responder['append_message_to_qs'].parse('w1 q_a,q_b m')
+  ['w1', 'q_a,q_b', 'm']
+  >>> #
+  >>> # ... ... bodies with runs of whitespace, names that aren't plain ASCII, and malformed bodies follow no layout ... ...
+  >>> [ append.parse(body) for body in [ 'w1  q_bert m', 'w1 q_bert  m', 'w1 q_bért m', '1w q_bert m', 'w1 q_bert', 'w1 q_bert m\\nm', '', None ] ]
+  [None, None, None, None, None, None, None, None]
+  >>> [ fetch.parse(body) for body in [ 'r1 q_bert ten', 'r1 q_bert 10 ', 'r1 q_bert 10\\t500', 'r1 q_bert 10 500 0' ] ]
+  [None, None, None, None]
+  >>> dispatcher.request_to_responder['append_batch_to_q'].parse('w1 q_bert 0')     # no layouts:  the pattern alone
+  >>> #
+  >>> # ... ... whichever way a request is parsed, it's read the same way ... ...
+  >>> [ dispatcher(request) for request in [ 'register_q q_bert\\n', 'register_q  q_bért\\n', 'set_writer_for_q w1 q_bert\\n', 'set_reader_for_q r1\\tq_bert\\n' ] ]
+  [('register_q', True, None), ('register_q', True, None), ('set_writer_for_q', True, None), ('set_reader_for_q', True, None)]
+  >>> [ dispatcher(request) for request in [ 'append_message_to_q w1 q_bert  m0\\n', 'append_message_to_q w1 q_bert m1\\n', 'append_message_to_q\\tw1 q_bert m2' ] ]
+  [('append_message_to_q', True, None), ('append_message_to_q', True, None), ('append_message_to_q', True, None)]
+  >>> [ queue_to_writers.retrieve_message('q_bert', k) for k in range(3) ], sorted(queue_to_writers.queues())
+  (['m0', 'm1', 'm2'], ['q_bert', 'q_bért'])
+  >>> dispatcher('fetch_from_q r1 q_bert 2\\n'), dispatcher('fetch_from_q  r1 q_bert 2 0\\n')
+  (('fetch_from_q', True, '2\\nm0\\nm1'), ('fetch_from_q', True, '1\\nm2'))
+  >>> dispatcher('fetch_from_q r1 q_bert two\\n'), dispatcher('fetch_from_qs r1 q_bert 2\\n'), dispatcher('  fetch_from_q r1 q_bert 2\\n')
+  (('fetch_from_q', False, 'error (syntax error)'), ('fetch_from_qs', False, 'unknown request type'), ('unknown', False, 'syntax error (bad format)'))
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing AbstractResponseGenerator.parse and RequestDispatcher')
+    doctest_it(request_parser_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for RegisterQueue -
+#    class that replies to a request whose body is of the from   queue
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def register_queue_test(void):
+  """
+  Test the register queue class by getting it to register a queue
+  >>> #
+  >>> # ... ... specify datasets for capturing results of request ... ...
+  >>> # start with empty collection, to remove possible residue from earlier tests)
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> request_reactor = RegisterQueue(**{'queue_to_readers': queue_to_readers, 'queue_to_writers': queue_to_writers})
+  >>> #
+  >>> # ... ... initialize test datasets:  must register the queue in order to unregister ot
+  >>> queue = 'q_bert'
+  >>> queue_to_readers.queues() == set()    # ... ... confirm initialization ... ...
+  True
+  >>> queue_to_writers.queues() == set()
+  True
+  >>> #
+  >>> # ... ... register the queue ... ...
+  >>> request = queue + "  "
+  >>> request_reactor(request)
+  (True, None)
+  >>> #
+  >>> # ... ... confirm unregistration ... ...
+  >>> queue_to_readers.queues() == { queue }
+  True
+  >>> queue_to_writers.queues() == { queue }
+  True
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing RegisterQueue')
+    doctest_it(register_queue_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for RegisterReaderForQueue -
+#    class that replies to a request whose body is of the from   reader .. queue .. SAP
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def register_reader_for_queue_test(void):
+  """
+  Test the register queue to reader class by getting it to register a message
+  >>> #
+  >>> # ... ... specify datasets for capturing results of request ... ...
+  >>> # start with empty collection, to remove possible residue from earlier tests)
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> request_reactor = RegisterReaderForQueue(**{'communicator_to_SAP': reader_to_SAP, 'queue_to_readers': queue_to_readers})
+  >>> #
+  >>> # ... ... initialize test datasets:  must register the queue in order to register the reader
+  >>> reader, queue, host, port = 'reader_foo', 'q_bert', 'host_baz', '1234'
+  >>> queue_to_readers.register_queue(queue)
+  >>> queue_to_readers.queues() == { queue }    # ... ... confirm initialization ... ...
+  True
+  >>> queue_to_readers.queues_for_reader( reader ) == set()
+  True
+  >>> queue_to_readers.readers() == set()
+  True
+  >>> queue_to_readers.readers_for_queue( queue ) == set()
+  True
+  >>> reader_to_SAP.SAP(reader) == None
+  True
+ >>> #
+  >>> # ... ... register the reader ... ...
+  >>> request = reader + "  " + queue + " " + host + " " + port
+  >>> request_reactor(request)
+  (True, None)
+  >>> #
+  >>> # ... ... confirm registration ... ...
+  >>> queue_to_readers.queues() == { queue }    # ... ... confirm initialization ... ...
+  True
+  >>> queue_to_readers.queues_for_reader( reader ) == { queue }
+  True
+  >>> queue_to_readers.readers() == { reader }
+  True
+  >>> queue_to_readers.readers_for_queue( queue ) == { reader }
+  True
+  >>> reader_to_SAP.SAP(reader) == (host, port)
+  True
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing RegisterReaderForQueue')
+    doctest_it(register_reader_for_queue_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for RegisterWriterForQueue -
+#    class that replies to a request whose body is of the from   writer .. queue
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def register_writer_for_queue_test(void):
+  """
+  Test the register queue to writer class by getting it to register a message
+  >>> #
+  >>> # ... ... specify datasets for capturing results of request ... ...
+  >>> # start with empty collection, to remove possible residue from earlier tests)
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> request_reactor = RegisterWriterForQueue(**{'queue_to_writers': queue_to_writers})
+  >>> #
+  >>> # ... ... initialize test datasets:  must register the queue in order to register the writer
+  >>> writer, queue = 'writer_foo', 'q_bert'
+  >>> queue_to_writers.register_queue(queue)
+  >>> queue_to_writers.queues() == { queue }    # ... ... confirm initialization ... ...
+  True
+  >>> queue_to_writers.queues_for_writer( writer ) == set()
+  True
+  >>> queue_to_writers.writers() == set()
+  True
+  >>> queue_to_writers.writers_for_queue( queue ) == set()
+  True
+  >>> #
+  >>> # ... ... register the writer ... ...
+  >>> request = writer + "  " + queue
+  >>> request_reactor(request)
+  (True, None)
+  >>> #
+  >>> # ... ... confirm registration ... ...
+  >>> queue_to_writers.queues() == { queue }    # ... ... confirm initialization ... ...
+  True
+  >>> queue_to_writers.queues_for_writer( writer ) == { queue }
+  True
+  >>> queue_to_writers.writers() == { writer }
+  True
+  >>> queue_to_writers.writers_for_queue( queue ) == { writer }
+  True
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing RegisterWriterForQueue')
+    doctest_it(register_writer_for_queue_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for QueuesForReader -
+#    class that replies to a request whose body is of the from   reader
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def queues_for_reader_test(void):
+  """
+  Test the queues for reader class by registering two readers, checking for registration
+  >>> #
+  >>> # ... ... specify datasets for capturing results of request ... ...
+  >>> # start with empty collection, to remove possible residue from earlier tests)
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> request_reactor = QueuesForReader(**{'queue_to_readers': queue_to_readers})
+  >>> reader, queue1, queue2 = 'reader_foo', 'q_bert', 'q_qq'
+  >>> #
+  >>> # ... ... initialize test datasets:  must register the queue in order to register the readers
+  >>> queue_to_readers.register_queue(queue1)
+  >>> queue_to_readers.register_queue(queue2)
+  >>> queue_to_readers.register(queue1, reader)
+  True
+  >>> queue_to_readers.register(queue2, reader)
+  True
+  >>> queue_to_readers.queues() == { queue1, queue2 }    # ... ... confirm initialization ... ...
+  True
+  >>> queue_to_readers.queues_for_reader( reader ) == { queue1, queue2 }
+  True
+  >>> queue_to_readers.readers() == { reader }
+  True
+  >>> queue_to_readers.readers_for_queue( queue1 ) == { reader }
+  True
+  >>> queue_to_readers.readers_for_queue( queue2 ) == { reader }
+  True
+  >>> #
+  >>> # ... ... obtain the queues for reader data ... ...
+  >>> request = reader + " "
+  >>> (status, response) = request_reactor(request)
+  >>> #
+  >>> # ... ... confirm data ... ...
+  >>> (status == True) and (response in ["{} {} ".format(queue1, queue2), "{} {} ".format(queue2, queue1)])
+  True
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing QueuesForReader')
+    doctest_it(queues_for_reader_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for  -
+#    class that replies to a request whose body is of the from   writer
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def queues_for_writer_test(void):
+  """
+  Test the queues for writer class by registering two writers, checking for registration
+  >>> #
+  >>> # ... ... specify datasets for capturing results of request ... ...
+  >>> # start with empty collection, to remove possible residue from earlier tests)
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> request_reactor = QueuesForWriter(**{'queue_to_writers': queue_to_writers})
+  >>> writer, queue1, queue2 = 'writer_foo', 'q_bert', 'q_qq'
+  >>> #
+  >>> # ... ... initialize test datasets:  must register the queue in order to register the writers
+  >>> queue_to_writers.register_queue(queue1)
+  >>> queue_to_writers.register_queue(queue2)
+  >>> queue_to_writers.register(queue1, writer)
+  True
+  >>> queue_to_writers.register(queue2, writer)
+  True
+  >>> queue_to_writers.queues() == { queue1, queue2 }    # ... ... confirm initialization ... ...
+  True
+  >>> queue_to_writers.queues_for_writer( writer ) == { queue1, queue2 }
+  True
+  >>> queue_to_writers.writers() == { writer }
+  True
+  >>> queue_to_writers.writers_for_queue( queue1 ) == { writer }
+  True
+  >>> queue_to_writers.writers_for_queue( queue2 ) == { writer }
+  True
+  >>> #
+  >>> # ... ... obtain the queues for writer data ... ...
+  >>> request = writer + " "
+  >>> (status, response) = request_reactor(request)
+  >>> #
+  >>> # ... ... confirm data ... ...
+  >>> (status == True) and (response in ["{} {} ".format(queue1, queue2), "{} {} ".format(queue2, queue1)])
+  True
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing QueuesForWriter')
+    doctest_it(queues_for_writer_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for AppendMessageToQueue -
+#    class that replies to a request whose body is of the from   writer .. queue
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def append_message_to_queue_test(void):
+  """
+  Test the append message to queue class by registering a queue and a writer for the queue, appending a message, and checking queue content
+  Missing - tests of auto-push to readers functionality
+  >>> #
+  >>> # ... ... specify datasets for capturing results of request ... ...
+  >>> # start with empty collection, to remove possible residue from earlier tests)
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> request_reactor = AppendMessageToQueue(**{'queue_to_writers': queue_to_writers, 'communicator_to_SAP': reader_to_SAP, 'queue_to_readers': queue_to_readers})
+  >>> #
+  >>> # ... ... initialize test datasets:  must register the queue and the writer to the queue in order to add a message
+  >>> writer, queue, message = 'writer_foo', 'q_bert', 'this is a message'
+  >>> queue_to_writers.register_queue(queue)
+  >>> queue_to_writers.register(queue, writer)
+  True
+  >>> queue_to_writers.queues() == { queue }    # ... ... confirm initialization ... ...
+  True
+  >>> queue_to_writers.queues_for_writer( writer ) == { queue }
+  True
+  >>> queue_to_writers.writers() == { writer }
+  True
+  >>> queue_to_writers.writers_for_queue( queue ) == { writer }
+  True
+  >>> #
+  >>> # ... ... append the message ... ...
+  >>> request = writer + "  " + queue + " " + message
+  >>> request_reactor(request)
+  (True, None)
+  >>> #
+  >>> # ... ... confirm append ... ...
+  >>> queue_to_writers.queues() == { queue }
+  True
+  >>> queue_to_writers.queues_for_writer( writer ) == { queue }
+  True
+  >>> queue_to_writers.writers() == { writer }
+  True
+  >>> queue_to_writers.writers_for_queue( queue ) == { writer }
+  True
+  >>> queue_to_writers.retrieve_message(queue, 0) == 'this is a message'
+  True
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing AppendMessageToQueue')
+    doctest_it(append_message_to_queue_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for AppendBatchToQueue -
+#    class that replies to a request whose body is of the form   writer queue count,   followed by count lines
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def append_batch_to_queue_test(void):
+  """
+  Test the append batch to queue class by appending batches that succeed, that are malformed, and that would overrun a reader
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}, 'queue_to_readers_to_positions': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> deliverer = MessageDeliverer(queue_to_readers, reader_to_SAP, lag_limit=4)
+  >>> request_reactor = AppendBatchToQueue(**{'queue_to_writers': queue_to_writers, 'communicator_to_SAP': reader_to_SAP, 'queue_to_readers': queue_to_readers,
+  ...                                         'deliverer': deliverer})
+  >>> queue_to_writers.register_queue('q_bert')
+  >>> queue_to_writers.register('q_bert', 'writer_foo')
+  True
+  >>> #
+  >>> # ... ... a batch's messages are appended in order, empty messages included ... ...
+  >>> request_reactor('writer_foo q_bert 3\\nfirst message\\n\\nthird message\\n')
+  (True, None)
+  >>> [ queue_to_writers.retrieve_message('q_bert', k) for k in range(3) ]
+  ['first message', '', 'third message']
+  >>> request_reactor('writer_foo q_bert 0'), request_reactor('writer_foo q_bert 2\\nonly one message\\n'), request_reactor('writer_bar q_bert 1\\nm\\n')
+  ((True, None), (False, 'bad count'), (False, None))
+  >>> request_reactor('writer_foo q_bert two\\nm\\nm\\n'), request_reactor('writer_foo q_bert -1'), request_reactor('writer_foo q_bert 10001')
+  ((False, 'bad count'), (False, 'bad count'), (False, 'bad count'))
+  >>> #
+  >>> # ... ... lines are awaited only for a count from 0 to max_batch:  a request with any other is complete at once ... ...
+  >>> [ RequestDispatcher.continuation_lines('append_batch_to_q w q {}\\n'.format(count)) for count in [ '3', '10000', '10001', '9' * 5000, '-1', 'two' ] ]
+  [3, 10000, 0, 0, 0, 0]
+  >>> RequestAssembler().requests([ 'append_batch_to_q w q 999999999\\n', 'm\\n' ])
+  ['append_batch_to_q w q 999999999\\n', 'm\\n']
+  >>> #
+  >>> # ... ... the lag limit applies to the batch as a whole:  a reader with two unread messages has room for two more ... ...
+  >>> queue_to_readers.register('q_bert', 'reader_foo', 1)
+  True
+  >>> request_reactor('writer_foo q_bert 3\\nm3\\nm4\\nm5\\n'), request_reactor('writer_foo q_bert 2\\nm3\\nm4\\n')
+  ((False, 'backpressure'), (True, None))
+  >>> queue_to_writers.buffer_collection.end_position('q_bert'), queue_to_readers.backlog('q_bert', 'reader_foo')
+  (5, 4)
+  >>> #
+  >>> # ... ... batches are assembled from the lines of a stream, however the lines arrive ... ...
+  >>> assembler = RequestAssembler()
+  >>> assembler.requests([ 'register_q q\\n', 'append_batch_to_q w q 2\\n', 'm0\\n' ])
+  ['register_q q\\n']
+  >>> assembler.requests([ 'm1\\n', 'append_batch_to_q w q 0\\n', 'qs_for_writer w\\n' ])
+  ['append_batch_to_q w q 2\\nm0\\nm1\\n', 'append_batch_to_q w q 0\\n', 'qs_for_writer w\\n']
+  >>> handler = RequestHandler( RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP) )
+  >>> client_sock, server_sock = socket.socketpair()
+  >>> client_sock.sendall(b'append_batch_to_q writer_foo q_bert 2\\nm5\\n')
+  >>> threading.Timer(0.2, lambda: (client_sock.sendall(b'm6\\nappend_message_to_q writer_foo q_bert m7\\n'), client_sock.shutdown(socket.SHUT_WR))).start()
+  >>> [ (request_type, response) for request, request_type, status, response in handler.converse( server_sock, 5 ) ]
+  [('append_batch_to_q', 'OK'), ('append_message_to_q', 'OK')]
+  >>> [ queue_to_writers.retrieve_message('q_bert', k) for k in range(5, 8) ]
+  ['m5', 'm6', 'm7']
+  >>> server_sock.close(); client_sock.close()
+  >>> #
+  >>> # ... ... a line that runs on past the longest allowed is answered with an error, and ends the session ... ...
+  >>> client_sock, server_sock = socket.socketpair()
+  >>> def send_endless_line():
+  ...   try:
+  ...     client_sock.sendall(b'register_q ' + b'q' * (1 << 21))
+  ...   except OSError:
+  ...     pass                                    # the server has closed its end
+  >>> sender = threading.Thread(target=send_endless_line); sender.start()
+  >>> list(handler.converse( server_sock, 5 ))
+  []
+  >>> server_sock.close(); sender.join(10)
+  >>> client_sock.recv(100)
+  b'error line too long\\n'
+  >>> client_sock.close()
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing AppendBatchToQueue')
+    doctest_it(append_batch_to_queue_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for AppendMessageToQueues -
+#    class that replies to a request whose body is of the form   writer queue,queue,... message
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def append_message_to_queues_test(void):
+  """
+  Test the append message to queues class by appending one message to several queues, checking that it's stored once,
+  added to all of the queues or to none of them, and sent to each reader in one pass
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}, 'queue_to_readers_to_positions': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> deliverer = MessageDeliverer(queue_to_readers, reader_to_SAP)
+  >>> passes = []
+  >>> deliverer.deliver = lambda reader_name, queue_names: passes.append( (reader_name, sorted(queue_names)) )
+  >>> request_reactor = AppendMessageToQueues(**{'queue_to_writers': queue_to_writers, 'communicator_to_SAP': reader_to_SAP, 'queue_to_readers': queue_to_readers,
+  ...                                            'deliverer': deliverer})
+  >>> for queue in [ 'q_a', 'q_b', 'q_c' ]:  queue_to_writers.register_queue(queue)
+  >>> queue_to_writers.register('q_a', 'writer_foo'), queue_to_writers.register('q_b', 'writer_foo')
+  (True, True)
+  >>> queue_to_readers.register('q_a', 'reader_foo'), queue_to_readers.register('q_b', 'reader_foo'), queue_to_readers.register('q_b', 'reader_bar')
+  (True, True, True)
+  >>> reader_to_SAP.register('reader_foo', 'localhost', '9990'); reader_to_SAP.register('reader_bar', 'localhost', '9991')
+  >>> #
+  >>> # ... ... the message is stored once, shared by both queues, and each reader is served once ... ...
+  >>> request_reactor('writer_foo q_a,q_b,q_a a message for two queues')
+  (True, None)
+  >>> queue_to_writers.retrieve_message('q_a', 0) is queue_to_writers.retrieve_message('q_b', 0)
+  True
+  >>> queue_to_writers.buffer_collection.end_position('q_a'), queue_to_writers.buffer_collection.end_position('q_b')
+  (1, 1)
+  >>> sorted(passes)
+  [('reader_bar', ['q_b']), ('reader_foo', ['q_a', 'q_b'])]
+  >>> #
+  >>> # ... ... a writer that isn't registered for every queue appends to none of them ... ...
+  >>> request_reactor('writer_foo q_a,q_c another message'), request_reactor('writer_foo q_a,q_unknown another message')
+  ((False, None), (False, None))
+  >>> queue_to_writers.buffer_collection.end_position('q_a'), queue_to_writers.buffer_collection.end_position('q_c')
+  (1, 0)
+  >>> request_reactor('writer_foo q_a,,q_b another message')
+  (False, 'error (syntax error)')
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing AppendMessageToQueues')
+    doctest_it(append_message_to_queues_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for UnregisterReaderFromQueue -
+#    class that replies to a request whose body is of the from   reader .. queue
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def unregister_reader_from_queue_test(void):
+  """
+  Test the unregister reader from queue class by getting it to unregister a reader
+  >>> #
+  >>> # ... ... specify datasets for capturing results of request ... ...
+  >>> # start with empty collection, to remove possible residue from earlier tests)
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> request_reactor = UnregisterReaderFromQueue(**{'queue_to_readers': queue_to_readers})
+  >>> #
+  >>> # ... ... initialize test datasets:  must register the queue and the reader to the queue in order to unregister the reader
+  >>> reader, queue = 'reader_foo', 'q_bert'
+  >>> queue_to_readers.register_queue(queue)
+  >>> queue_to_readers.register(queue, reader)
+  True
+  >>> queue_to_readers.queues() == { queue }    # ... ... confirm initialization ... ...
+  True
+  >>> queue_to_readers.queues_for_reader( reader ) == { queue }
+  True
+  >>> queue_to_readers.readers() == { reader }
+  True
+  >>> queue_to_readers.readers_for_queue( queue ) == { reader }
+  True
+  >>> #
+  >>> # ... ... unregister the reader ... ...
+  >>> request = reader + "  " + queue + " "
+  >>> request_reactor(request)
+  (True, None)
+  >>> #
+  >>> # ... ... confirm unregistration ... ...
+  >>> queue_to_readers.queues() == { queue }
+  True
+  >>> queue_to_readers.queues_for_reader( reader ) == set()
+  True
+  >>> queue_to_readers.readers() == { reader }
+  True
+  >>> queue_to_readers.readers_for_queue( queue ) == set()
+  True
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing UnregisterReaderFromQueue')
+    doctest_it(unregister_reader_from_queue_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for UnregisterQueueFromWriter -
+#    class that replies to a request whose body is of the from   writer .. queue
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def unregister_writer_from_queue_test(void):
+  """
+  Test the unregister writer from queue class by getting it to unregister a writer
+  >>> #
+  >>> # ... ... specify datasets for capturing results of request ... ...
+  >>> # start with empty collection, to remove possible residue from earlier tests)
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> request_reactor = UnregisterWriterFromQueue(**{'queue_to_writers': queue_to_writers})
+  >>> #
+  >>> # ... ... initialize test datasets:  must register the queue and the writer to the queue in order to unregister the writer
+  >>> writer, queue = 'writer_foo', 'q_bert'
+  >>> queue_to_writers.register_queue(queue)
+  >>> queue_to_writers.register(queue, writer)
+  True
+  >>> queue_to_writers.queues() == { queue }    # ... ... confirm initialization ... ...
+  True
+  >>> queue_to_writers.queues_for_writer( writer ) == { queue }
+  True
+  >>> queue_to_writers.writers() == { writer }
+  True
+  >>> queue_to_writers.writers_for_queue( queue ) == { writer }
+  True
+  >>> #
+  >>> # ... ... unregister the writer ... ...
+  >>> request = writer + "  " + queue + " "
+  >>> request_reactor(request)
+  (True, None)
+  >>> #
+  >>> # ... ... confirm unregistration ... ...
+  >>> queue_to_writers.queues() == { queue }
+  True
+  >>> queue_to_writers.queues_for_writer( writer ) == set()
+  True
+  >>> queue_to_writers.writers() == { writer }
+  True
+  >>> queue_to_writers.writers_for_queue( queue ) == set()
+  True
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing UnregisterWriterFromQueue')
+    doctest_it(unregister_writer_from_queue_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for UnregisterEntity -
+#    class that replies to a request whose body is of the form   communicator
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def unregister_entity_test(void):
+  """
+  Test the unregister entity class by getting it to unregister an entity from the reader and writer datasets
+  >>> #
+  >>> # ... ... specify datasets for capturing results of request ... ...
+  >>> # start with empty collection, to remove possible residue from earlier tests)
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> request_reactor = UnregisterEntity(**{'queue_to_readers': queue_to_readers, 'communicator_to_SAP': reader_to_SAP, 'queue_to_writers': queue_to_writers})
+  >>> #
+  >>> # ... ... initialize test datasets:  must register the queue and register the entity for queue in order to unregister the entity
+  >>> entity, queue, host, port = 'mr_foo', 'q_bert', 'host_bar', 'port_baz'
+  >>> # queue_to_readers.register_queue(queue) - don't need to register queue twice, since read and write queues are the same
+  >>> queue_to_writers.register_queue(queue)
+  >>> queue_to_readers.register(queue, entity)
+  True
+  >>> queue_to_writers.register(queue, entity)
+  True
+  >>> reader_to_SAP.register(entity, host, port)
+  >>> queue_to_writers.queues() == { queue }    # ... ... confirm initialization ... ...
+  True
+  >>> queue_to_readers.queues_for_reader( entity ) == { queue }
+  True
+  >>> queue_to_writers.queues_for_writer( entity ) == { queue }
+  True
+  >>> queue_to_readers.readers() == { entity }
+  True
+  >>> queue_to_readers.readers_for_queue( queue ) == { entity }
+  True
+  >>> queue_to_writers.writers_for_queue( queue ) == { entity }
+  True
+  >>> reader_to_SAP.SAP( entity ) == ( host, port )
+  True
+  >>> #
+  >>> # ... ... unregister the entity ... ...
+  >>> request = entity + " "
+  >>> request_reactor(request)
+  (True, None)
+  >>> #
+  >>> # ... ... confirm unregistration ... ...
+  >>> queue_to_writers.queues() == { queue }
+  True
+  >>> queue_to_readers.queues_for_reader( entity ) == set()
+  True
+  >>> queue_to_writers.queues_for_writer( entity ) == set()
+  True
+  >>> queue_to_writers.writers() == set()
+  True
+  >>> queue_to_readers.readers_for_queue( queue ) == set()
+  True
+  >>> queue_to_writers.writers_for_queue( queue ) == set()
+  True
+  >>> reader_to_SAP.SAP( entity ) == None
+  True
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing UnregisterEntity')
+    doctest_it(unregister_entity_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for UnregisterQueue -
+#    class that replies to a request whose body is of the from   queue
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def unregister_queue_test(void):
+  """
+  Test the unregister queue class by getting it to unregister a queue from the read and write queue datasets
+  >>> #
+  >>> # ... ... specify datasets for capturing results of request ... ...
+  >>> # start with empty collection, to remove possible residue from earlier tests)
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> request_reactor = UnregisterQueue(**{'queue_to_readers': queue_to_readers, 'queue_to_writers': queue_to_writers})
+  >>> #
+  >>> # ... ... initialize test datasets:  must register the queue in order to unregister ot
+  >>> queue = 'q_bert'
+  >>> #queue_to_readers.register_queue(queue) - only need register once, since the queues are in a shared structure
+  >>> queue_to_writers.register_queue(queue)
+  >>> queue_to_readers.queues() == { queue }    # ... ... confirm initialization ... ...
+  True
+  >>> queue_to_writers.queues() == { queue }
+  True
+  >>> #
+  >>> # ... ... unregister the queue ... ...
+  >>> request = queue + "  "
+  >>> request_reactor(request)
+  (True, None)
+  >>> #
+  >>> # ... ... confirm unregistration ... ...
+  >>> queue_to_readers.queues() == set()
+  True
+  >>> queue_to_writers.queues() == set()
+  True
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing UnregisterQueue')
+    doctest_it(unregister_queue_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for SeekReaderToTime -
+#    class that replies to a request whose body is of the form   reader queue time
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def seek_reader_to_time_test(void):
+  """
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}, 'queue_to_readers_to_positions': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> deliverer = MessageDeliverer(queue_to_readers, reader_to_SAP)
+  >>> request_reactor = SeekReaderToTime(**{'queue_to_readers': queue_to_readers, 'deliverer': deliverer})
+  >>> #
+  >>> # ... ... two readers, one of which keeps the queue's messages from being trimmed ... ...
+  >>> queue_to_writers.register_queue('q')
+  >>> queue_to_writers.register('q', 'w')
+  True
+  >>> for reader in ['r', 'laggard']:  queue_to_readers.register('q', reader)
+  True
+  True
+  >>> queue_to_writers.append_message('q', 'w', 'm0')
+  True
+  >>> middle = time.time() + 0.1
+  >>> time.sleep(0.2)
+  >>> for message in ['m1', 'm2']:  queue_to_writers.append_message('q', 'w', message)
+  True
+  True
+  >>> queue_to_readers.advance_position('q', 'r', 3)
+  >>> #
+  >>> # ... ... seek, in each of the forms of time ... ...
+  >>> request_reactor('r q {}'.format(middle)), queue_to_readers.reader_position('q', 'r')
+  ((True, '1'), 1)
+  >>> request_reactor('r q 1970-01-02T00:00'), request_reactor('r q 23:59:59.999999')
+  ((True, '0'), (True, '3'))
+  >>> request_reactor('r q 12:61'), request_reactor('nobody q 0'), request_reactor('r q')
+  ((False, 'bad time'), (False, None), (False, 'error (syntax error)'))
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing SeekReaderToTime')
+    doctest_it(seek_reader_to_time_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for SeekReader and PositionOfReader, along with RegisterReaderForQueue's starting positions -
+#    classes that reply to requests whose bodies are of the forms   reader queue start   and   reader queue
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def seek_reader_test(void):
+  """
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}, 'queue_to_readers_to_positions': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> datasets = {'queue_to_readers': queue_to_readers, 'queue_to_writers': queue_to_writers, 'communicator_to_SAP': reader_to_SAP,
+  ...             'deliverer': MessageDeliverer(queue_to_readers, reader_to_SAP)}
+  >>> set_reader, seek_reader, position_of_reader = RegisterReaderForQueue(**datasets), SeekReader(**datasets), PositionOfReader(**datasets)
+  >>> #
+  >>> # ... ... a queue with five messages, kept by a reader with no SAP ... ...
+  >>> queue_to_writers.register_queue('q')
+  >>> queue_to_writers.register('q', 'w')
+  True
+  >>> queue_to_readers.register('q', 'archive')
+  True
+  >>> for k in range(5):  queue_to_writers.append_message('q', 'w', 'm{}'.format(k))
+  True
+  True
+  True
+  True
+  True
+  >>> #
+  >>> # ... ... readers may start at the tail, at an offset, or - by default - at the head ... ...
+  >>> set_reader('tail q  8895 latest'), set_reader('middle q  8895 3'), set_reader('head q  8895')
+  ((True, '5'), (True, '3'), (True, None))
+  >>> [ position_of_reader(reader + ' q') for reader in ['tail', 'middle', 'head'] ]
+  [(True, '5'), (True, '3'), (True, '0')]
+  >>> set_reader('middle q  8895')                  # registering again without a start keeps the reader's position ...
+  (True, None)
+  >>> set_reader('middle q  8895 earliest'), position_of_reader('middle q')     # ... and with a start moves it
+  ((True, '0'), (True, '0'))
+  >>> #
+  >>> # ... ... seeking moves a reader back and forth, within the messages that the queue holds ... ...
+  >>> seek_reader('tail q 2'), seek_reader('tail q earliest'), seek_reader('tail q 99'), seek_reader('tail q latest')
+  ((True, '2'), (True, '0'), (True, '5'), (True, '5'))
+  >>> seek_reader('nobody q 0'), seek_reader('tail nosuch 0'), position_of_reader('nobody q'), seek_reader('tail q soon')
+  ((False, None), (False, None), (False, None), (False, 'error (syntax error)'))
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing SeekReader and PositionOfReader')
+    doctest_it(seek_reader_test)
+    print()
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for FetchFromQueue -
+#    class that replies to requests whose bodies are of the form   reader queue max_count [wait_ms]
+#
+# preconditions for test execution:
+# *.  firewall access for localhost, port 8896
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def fetch_from_queue_test(void):
+  """
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}, 'queue_to_readers_to_positions': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> dispatcher = RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP)
+  >>> handler = RequestHandler(dispatcher)
+  >>> #
+  >>> # ... ... a reader that registers without a SAP fetches its messages, a batch at a time ... ...
+  >>> [ handler.handle_request(request)[2] for request in [ 'register_q q', 'set_writer_for_q w q', 'set_reader_for_q r q' ] ]
+  ['OK', 'OK', 'OK']
+  >>> reader_to_SAP.SAP('r') is None
+  True
+  >>> for k in range(5):  dummy = handler.handle_request('append_message_to_q w q m{}'.format(k))
+  >>> handler.handle_request('fetch_from_q r q 3')
+  ('fetch_from_q', True, 'OK 3\\nm0\\nm1\\nm2')
+  >>> handler.handle_request('position_of_reader r q')[2], handler.handle_request('fetch_from_q r q 3')[2]
+  ('OK 3', 'OK 2\\nm3\\nm4')
+  >>> handler.handle_request('fetch_from_q r q 3')[2], handler.handle_request('fetch_from_q r q 3 100')[2]     # nothing left, even after waiting
+  ('OK 0', 'OK 0')
+  >>> handler.handle_request('fetch_from_q nobody q 3')[2], handler.handle_request('fetch_from_q r q many')[2]
+  ('error', 'error error (syntax error)')
+  >>> dispatcher.may_wait('fetch_from_q r q 3 100'), dispatcher.may_wait('append_message_to_q w q m'), dispatcher.may_wait('')
+  (True, False, False)
+  >>> #
+  >>> # ... ... a waiting fetch returns as soon as a message is appended ... ...
+  >>> appender = threading.Timer(0.2, handler.handle_request, args=('append_message_to_q w q m5',))
+  >>> start = time.monotonic(); appender.start()
+  >>> handler.handle_request('fetch_from_q r q 3 5000')[2], time.monotonic() - start < 2
+  ('OK 1\\nm5', True)
+  >>> appender.join()
+  >>> #
+  >>> # ... ... served asynchronously, a waiting fetch holds up only its own connection ... ...
+  >>> well_known_port = 8896
+  >>> server = AsyncRequestServer(handler, host='localhost', port=well_known_port, timeout=2, session_timeout=2)
+  >>> server_thread = threading.Thread(target=server.run)
+  >>> server_thread.start()
+  >>> time.sleep(0.5)                                        # give the server time to bind its port
+  >>> fetcher, writer = socket.create_connection(('localhost', well_known_port)), socket.create_connection(('localhost', well_known_port))
+  >>> fetcher_file, writer_file = fetcher.makefile(mode='rw'), writer.makefile(mode='rw')
+  >>> start = time.monotonic()
+  >>> n = fetcher_file.write('fetch_from_q r q 10 5000\\n'); fetcher_file.flush()
+  >>> time.sleep(0.2)
+  >>> n = writer_file.write('append_message_to_q w q m6\\n'); writer_file.flush()
+  >>> writer_file.readline()
+  'OK\\n'
+  >>> [ fetcher_file.readline() for k in range(2) ], time.monotonic() - start < 2
+  (['OK 1\\n', 'm6\\n'], True)
+  >>> for f in (fetcher_file, writer_file, fetcher, writer):  f.close()
+  >>> server_thread.join(10)
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing FetchFromQueue')
+    doctest_it(fetch_from_queue_test)
+    print()
+
+# ************************************************************************************************************
+# test class for recording registry state
+# ************************************************************************************************************
+
+# -----------------------------------------------------------------------------------------------------------------------------
+# test for RegistryLog -
+#    class that logs requests that change the registry, with snapshots, and restores the registry from them
+# -----------------------------------------------------------------------------------------------------------------------------
+
+def registry_log_test(void):
+  """
+  >>> import tempfile, functools, os
+  >>> directory = tempfile.mkdtemp()
+  >>> def start():              # set up a fresh registry, with disk storage, and recover it from the log
+  ...   MessageBufferCollection(**{'buffers': {}, 'buffer_factory': functools.partial(SegmentedMessageBuffer, directory=os.path.join(directory, 'queues'))})
+  ...   queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}, 'queue_to_readers_to_positions': {}})
+  ...   queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  ...   reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  ...   journal = RegistryLog(os.path.join(directory, 'registry'), snapshot_interval=4)
+  ...   deliverer = MessageDeliverer(queue_to_readers, reader_to_SAP, journal=journal)
+  ...   dispatcher = RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP, deliverer=deliverer, journal=journal)
+  ...   return queue_to_readers, queue_to_writers, reader_to_SAP, journal, dispatcher, journal.recover(dispatcher)
+  >>> queue_to_readers, queue_to_writers, reader_to_SAP, journal, dispatcher, replayed = start()
+  >>> replayed
+  0
+  >>> for request in ['register_q foo', 'register_q bar', 'set_writer_for_q w foo', 'set_reader_for_q r foo localhost 8895', 'qs_for_reader r']:
+  ...   dispatcher(request)[1]
+  True
+  True
+  True
+  True
+  True
+  >>> sorted(os.listdir(journal.directory))            # the fourth change started a new snapshot and log
+  ['log.00000000000000000002', 'snapshot']
+  >>> for k in range(3):  dispatcher('append_message_to_q w foo m{}'.format(k))[1]
+  True
+  True
+  True
+  >>> fsyncs, fsync = [], os.fsync                       # count the log's trips to disk
+  >>> os.fsync = lambda descriptor: (fsyncs.append(descriptor), fsync(descriptor))[1]
+  >>> journal.datasets['deliverer'].advance('foo', 'r', 2)     # as if r had acknowledged two messages:  logged, but not awaited
+  >>> len(fsyncs)
+  0
+  >>> dispatcher('unregister_q bar')[1]                  # a change reaches disk before it's acknowledged
+  True
+  >>> len(fsyncs)
+  1
+  >>> os.fsync = fsync
+  >>> open(journal.log_name(journal.generation)).read()   # requests that change nothing aren't logged
+  '@position r foo 2\\nunregister_q bar\\n'
+  >>> journal.close()
+  >>> #
+  >>> # ... ... restart:  the snapshot and the two records that follow it restore the registry ... ...
+  >>> queue_to_readers, queue_to_writers, reader_to_SAP, journal, dispatcher, replayed = start()
+  >>> replayed
+  2
+  >>> queue_to_writers.queues(), queue_to_writers.writers_for_queue('foo'), reader_to_SAP.SAP('r')
+  ({'foo'}, {'w'}, ('localhost', '8895'))
+  >>> queue_to_readers.reader_position('foo', 'r'), queue_to_readers.unread_messages('foo', 'r')
+  (2, (2, ['m2']))
+  >>> sorted(os.listdir(journal.directory))            # recovery compacts the log into a new snapshot
+  ['log.00000000000000000003', 'snapshot']
+  >>> #
+  >>> # ... ... deliveries that a logged request schedules are made once the log's lock is released ... ...
+  >>> def enqueue(queue_names, reader_name):           # stands in for delivery, reporting whether another thread could take the lock
+  ...   free = []
+  ...   def try_lock():
+  ...     free.append(journal.lock.acquire(blocking=False))
+  ...     if free[0]:  journal.lock.release()
+  ...   probe = threading.Thread(target=try_lock)
+  ...   probe.start(); probe.join()
+  ...   print(reader_name, 'delivered with the log free:', free[0])
+  >>> journal.datasets['deliverer'].enqueue = enqueue
+  >>> dispatcher('set_reader_for_q r2 foo localhost 8896')[1]
+  r2 delivered with the log free: True
+  True
+  >>> journal.held, journal.deferred
+  (None, [])
+  >>> journal.close()
+  >>> MessageBufferCollection(**{'buffers': {}, 'buffer_factory': MessageBuffer})    # restore the default
+  MessageBufferCollection(**{'buffers': {}})
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing RegistryLog')
+    doctest_it(registry_log_test)
+    print()
+
+# ************************************************************************************************************
+# test classes for managing interactions with other processes via message exchange
+# preconditions for test execution:
+# *.  a platform that supports a DOSshell-like command interpreter:  i.e.,
+# -.  ability to execute platform commands using syntax like "cmd /c ...some command..."
+# -.  support for a 'del foo.txt'  command that (e.g.) deletes foo.txt
+# *.  presence of Python 3 command interpreter, python, in directory in PATH variable
+# *.  ability to create, delete one file - c:\temp\testserver.txt
+# *.  firewall access for localhost, port 8881
+# ************************************************************************************************************
+
+# +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+# TestClient:  supporting class for testing communications with external client:
+#
+# class generate a process that
+# -.  writes a request to a specified (host, port)
+# -.  displays incoming connection and message
+# -.  responds to message with initial "OK " + prefix
+# -.  displays response
+# -.  exits
+
+# -.  connects to a server on specified port
+# -.  sends specified message
+# -.  checks for specified response
+# -.  exits
+# Notes:
+# -.  host_file argument must use Python syntax - e.g., c:/temp/foo.py
+# +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+
+class TestClient(object):
+  #
+  def __init__(self, client_code_file, host='localhost', well_known_port=8881, request=""):
+    self.proc_handle = GenerateSubprocess( client_code_file, self.build_client_code(host, well_known_port, request) )
+  def terminate(self):
+    self.proc_handle.terminate()
+  #
+  # auxiliary routines
+  #
+  # build the code, parameterized by well_known_port
+  def build_client_code( self, host, well_known_port, request ):
+    client_code  = [ ]
+    client_code += [ "import sys\n" ]
+    client_code += [ "import socket\n" ]
+    client_code += [ "sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)      # enable TCP connection\n" ]
+    client_code += [ "sock.settimeout(20)                                           # put 20 second timeout on the socket to prevent indefinite execution\n" ]
+    client_code += [ "sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)    # allow reuse of local addresses, for fast restart upon client termination\n" ]
+    client_code += [ "host, well_known_port, request = {!r}, {!r}, {!r}\n".format(host, well_known_port, request) ]
+    client_code += [ "try:\n" ]
+    client_code += [ "  sock.connect((host, well_known_port))\n" ]
+    client_code += [ "  try:            # use file interface for message exchange\n" ]
+    client_code += [ "    infile, outfile = sock.makefile(mode='r'), sock.makefile(mode='w')\n" ]
+    client_code += [ "    try:          # do the request/response\n" ]
+    client_code += [ "      outfile.writelines(request)\n" ]
+    client_code += [ "      outfile.flush()\n" ]
+    client_code += [ "      print('client: wrote {}'.format(request),file=sys.stderr)    # show it for diagnostic purposes\n" ]
+    client_code += [ "      try:\n" ]
+    client_code += [ "        response = infile.readline()                                # get response from server\n" ]
+    client_code += [ "        print('client: read {}'.format(response),file=sys.stderr)   # show it for diagnostic purposes\n" ]
+    client_code += [ "      except Exception as e:\n" ]
+    client_code += [ "        print('?? client: couldn\\\'t read from server{} - exiting'.format('' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
+    client_code += [ "    except Exception as e:\n" ]
+    client_code += [ "      print('?? client: couldn\\\'t write to server{} - exiting'.format('' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
+    client_code += [ "    finally:\n" ]
+    client_code += [ "      infile.close()\n" ]
+    client_code += [ "      outfile.close()\n" ]
+    client_code += [ "  except Exception as e:\n" ]
+    client_code += [ "    print('?? client: couldn\\\'t access socket to server{} - exiting'.format('' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
+    client_code += [ "  finally:\n" ]
+    client_code += [ "    sock.close()\n" ]
+    client_code += [ "except Exception as e:\n" ]
+    client_code += [ "  print('?? client: couldn\\\'t connect to ({},{}):{}; exiting'.format(host, well_known_port, '' if 'value' not in dir(e) else ' '+e.value), file=sys.stderr)\n" ]
+    return client_code
+
+# ============================================================================================================
+# tests for RequestHandler -
+#    class that represents an entity that uses a message exchanger to reply to a request
+# ============================================================================================================
+
+import subprocess
+import socket
+import sys
+
+# -------------------------------------------------------------------------------------------------------------
+# first tests: use dummy dispatcher to check basic responses
+# -------------------------------------------------------------------------------------------------------------
+
+def respond_to_request_dummy_dispatcher_test(void):
+  """
+  Test RequestHandler by creating a client program on the fly, then trading messages with it
+  >>> #
+  >>> # ... ... dispatcher checks for 'request' before space, leaves what follows after ... ...
+  >>> dispatcher = lambda request, **kwargs: (request.split(' ')[0], request.split(' ')[0] == 'request', '' if ' ' not in request else request.split(' ',maxsplit=1)[1])
+  >>> responder = RequestHandler( dispatcher )
+  >>> #
+  >>> # ... ... set up for simple server communications ... ...
+  >>> sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)      # enable TCP connection
+  >>> sock.settimeout(30)                                           # put 30 second timeout on the socket to prevent indefinite execution
+  >>> sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)    # allow reuse of local addresses, for fast restart upon server termination
+  >>> well_known_port = 8881
+  >>> #
+  >>> # ... ... initiate the lightweight test server ... ...
+  >>> sock.bind(('', well_known_port))
+  >>> sock.listen(1)    # set the number of clients waiting for a connection that the server can bind at once
+  >>> #
+  >>> # ... ... set up a lightweight test client ... ...
+  >>> client_py_syntax = 'C:/temp/testclient.py'             # the Python files API (open(), close(), etc.) seems to require / separators
+  >>> request = "request response parameters\\n"             # request with parameters
+  >>> test_client = TestClient(client_py_syntax, 'localhost', well_known_port, request)
+  >>> #
+  >>> # ... ... respond to message from client ... ...
+  >>> newSocket, address = sock.accept()
+  >>> print('Connected from {}'.format(address), file=sys.stderr)
+  >>> newSocket.settimeout(30)
+  >>> request_as_seen, request_type, status, response = responder.respond( sock=newSocket )
+  >>> request_as_seen == request
+  True
+  >>> request_type == request.split(' ')[0]
+  True
+  >>> status == True
+  True
+  >>> response == ("OK" if status else "error") + ('' if ' ' not in request else ' ' + dispatcher(request)[2])
+  True
+  >>> #
+  >>> # ... ... done; terminate the test ... ...
+  >>> newSocket.close()
+  >>> sock.close()
+  >>> test_client.terminate()
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing RequestHandler - dummy request dispatcher')
+    doctest_it(respond_to_request_dummy_dispatcher_test)
+    print()
+
+# -------------------------------------------------------------------------------------------------------------
+# remaining tests: use RequestDispatcher as dispatcher
+# -------------------------------------------------------------------------------------------------------------
+
+def respond_to_request_register_q_test(void):
+  """
+  Test RequestHandler by creating a client program on the fly, then trading messages with it
+  >>> #
+  >>> # ... ... dispatcher checks for 'request' before space, leaves what follows after ... ...
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> responder = RequestHandler( RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP) )
+  >>> #
+  >>> # ... ... confirm initial conditions ... ...
+  >>> request_type, new_q = 'register_q', 'q_bert'
+  >>> queue_to_readers.queues() == set()
+  True
+  >>> queue_to_writers.queues() == set()
+  True
+  >>> #
+  >>> # ... ... set up for simple server communications ... ...
+  >>> sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)      # enable TCP connection
+  >>> sock.settimeout(30)                                           # put 30 second timeout on the socket to prevent indefinite execution
+  >>> sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)    # allow reuse of local addresses, for fast restart upon server termination
+  >>> well_known_port = 8881
+  >>> #
+  >>> # ... ... initiate the lightweight test server ... ...
+  >>> sock.bind(('', well_known_port))
+  >>> sock.listen(1)    # set the number of clients waiting for a connection that the server can bind at once
+  >>> #
+  >>> # ... ... set up a lightweight test client ... ...
+  >>> client_py_syntax = 'C:/temp/testclient.py'             # the Python files API (open(), close(), etc.) seems to require / separators
+  >>> request = "{} {}\\n".format(request_type, new_q)
+  >>> test_client = TestClient(client_py_syntax, 'localhost', well_known_port, request)
+  >>> #
+  >>> # ... ... respond to message from client ... ...
+  >>> newSocket, address = sock.accept()
+  >>> print('Connected from {}'.format(address), file=sys.stderr)
+  >>> newSocket.settimeout(30)
+  >>> request_as_seen, parsed_request_type, status, response = responder.respond( sock=newSocket )
+  >>> request_as_seen == request
+  True
+  >>> parsed_request_type == request_type
+  True
+  >>> status
+  True
+  >>> response
+  'OK'
+  >>> #
+  >>> # ... ... check for registration ... ...
+  >>> queue_to_readers.queues() == { new_q }
+  True
+  >>> queue_to_writers.queues() == { new_q }
+  True
+  >>> #
+  >>> # ... ... done; terminate the test ... ...
+  >>> newSocket.close()
+  >>> sock.close()
+  >>> test_client.terminate()
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing RequestHandler - RequestDispatcher as dispatcher')
+    doctest_it(respond_to_request_register_q_test)
+    print()
+
+# -------------------------------------------------------------------------------------------------------------
+# keep-alive sessions: use RequestDispatcher as dispatcher, trading several requests over one connection
+# -------------------------------------------------------------------------------------------------------------
+
+def converse_keep_alive_test(void):
+  """
+  Test RequestHandler.converse by sending several requests over one end of a connected socket pair
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> responder = RequestHandler( RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP) )
+  >>> client_sock, server_sock = socket.socketpair()
+  >>> client_sock.sendall(b'register_q q_bert\\nset_writer_for_q w1 q_bert\\nqs_for_writer w1\\n')
+  >>> client_sock.shutdown(socket.SHUT_WR)                 # end of session
+  >>> for request_as_seen, request_type, status, response in responder.converse( server_sock, 5 ):
+  ...   print(request_type, status, response)
+  register_q True OK
+  set_writer_for_q True OK
+  qs_for_writer True OK q_bert
+  >>> server_sock.close()
+  >>> client_sock.makefile(mode='r').read()
+  'OK\\nOK\\nOK q_bert \\n'
+  >>> #
+  >>> # ... ... an idle session should end once its timeout passes ... ...
+  >>> client_sock, server_sock = socket.socketpair()
+  >>> client_sock.sendall(b'qs_for_writer w1\\n')
+  >>> [ response for request_as_seen, request_type, status, response in responder.converse( server_sock, 0.5 ) ]
+  ['OK q_bert ']
+  >>> server_sock.close()
+  >>> client_sock.close()
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing RequestHandler - keep-alive sessions')
+    doctest_it(converse_keep_alive_test)
+    print()
+
+# ============================================================================================================
+# tests for AsyncRequestServer -
+#    class that uses asyncio and a request handler to respond to requests from concurrently connected clients
+#
+# preconditions for test execution:
+# *.  firewall access for localhost, port 8883
+# ============================================================================================================
+
+import threading
+
+def async_request_server_test(void):
+  """
+  Test AsyncRequestServer by running it on a background thread, then holding several client connections open at once
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> handler = RequestHandler( RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP) )
+  >>> well_known_port = 8883
+  >>> server = AsyncRequestServer(handler, host='localhost', port=well_known_port, timeout=2)
+  >>> server_thread = threading.Thread(target=server.run)
+  >>> server_thread.start()
+  >>> time.sleep(0.5)                                        # give the server time to bind its port
+  >>> #
+  >>> # ... ... open two connections, then answer them in the reverse of the order in which they were opened ... ...
+  >>> first, second = socket.create_connection(('localhost', well_known_port)), socket.create_connection(('localhost', well_known_port))
+  >>> first_file, second_file = first.makefile(mode='rw'), second.makefile(mode='rw')
+  >>> n = second_file.write('register_q q_bert\\n'); second_file.flush()
+  >>> second_file.readline()
+  'OK\\n'
+  >>> n = first_file.write('qs_for_writer w1\\n'); first_file.flush()
+  >>> first_file.readline()
+  'OK \\n'
+  >>> for f in (first_file, second_file, first, second):  f.close()
+  >>> third = socket.create_connection(('localhost', well_known_port))     # a request ended by CR LF is read as if ended by LF
+  >>> third.sendall(b'register_q q_ernie\\r\\n'); third.recv(100)
+  b'OK\\n'
+  >>> third.close()
+  >>> queue_to_writers.queues() == { 'q_bert', 'q_ernie' }
+  True
+  >>> #
+  >>> # ... ... the server should shut itself down once it has been idle for its timeout ... ...
+  >>> server_thread.join(10)
+  >>> server_thread.is_alive()
+  False
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing AsyncRequestServer')
+    doctest_it(async_request_server_test)
+    print()
+
+# ============================================================================================================
+# tests for ThreadPoolRequestServer -
+#    class that uses a bounded pool of worker threads and a request handler to respond to requests
+#
+# preconditions for test execution:
+# *.  firewall access for localhost, port 8884
+# ============================================================================================================
+
+def thread_pool_request_server_test(void):
+  """
+  Test ThreadPoolRequestServer by saturating a one-worker, no-queue pool, then by appending from many threads at once
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> handler = RequestHandler( RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP) )
+  >>> well_known_port = 8884
+  >>> server = ThreadPoolRequestServer(handler, host='localhost', port=well_known_port, timeout=2, session_timeout=2, workers=1, queue_depth=0)
+  >>> server_thread = threading.Thread(target=server.run)
+  >>> server_thread.start()
+  >>> time.sleep(0.5)                                        # give the server time to bind its port
+  >>> #
+  >>> # ... ... hold the lone worker with a session; a second connection should be turned away ... ...
+  >>> first = socket.create_connection(('localhost', well_known_port))
+  >>> first_file = first.makefile(mode='rw')
+  >>> n = first_file.write('register_q q_bert\\n'); first_file.flush()
+  >>> first_file.readline()
+  'OK\\n'
+  >>> second = socket.create_connection(('localhost', well_known_port))
+  >>> second.makefile(mode='r').readline()
+  'error busy\\n'
+  >>> n = first_file.write('set_writer_for_q w1 q_bert\\n'); first_file.flush()
+  >>> first_file.readline()
+  'OK\\n'
+  >>> for f in (first_file, first, second):  f.close()
+  >>> server_thread.join(10)
+  >>> #
+  >>> # ... ... appends from many concurrent clients should all land in the queue ... ...
+  >>> server = ThreadPoolRequestServer(handler, host='localhost', port=well_known_port, timeout=2, workers=8, queue_depth=64)
+  >>> server_thread = threading.Thread(target=server.run)
+  >>> server_thread.start()
+  >>> time.sleep(0.5)
+  >>> def append(k):
+  ...   sock = socket.create_connection(('localhost', well_known_port))
+  ...   sock_file = sock.makefile(mode='rw')
+  ...   n = sock_file.write('append_message_to_q w1 q_bert m{}\\n'.format(k)); sock_file.flush()
+  ...   response = sock_file.readline()
+  ...   sock_file.close(); sock.close()
+  ...   return response
+  >>> clients = [ threading.Thread(target=append, args=(k,)) for k in range(40) ]
+  >>> for client in clients:  client.start()
+  >>> for client in clients:  client.join()
+  >>> sorted([ queue_to_writers.retrieve_message('q_bert', k) for k in range(40) ]) == sorted([ 'm{}'.format(k) for k in range(40) ])
+  True
+  >>> server_thread.join(10)
+  >>> server_thread.is_alive()
+  False
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing ThreadPoolRequestServer')
+    doctest_it(thread_pool_request_server_test)
+    print()
+
+# ============================================================================================================
+# tests for FrameAssembler and the serving of requests in frames -
+#    class that frames requests and responses in binary, and the handler and server methods that serve clients that speak in frames
+#
+# preconditions for test execution:
+# *.  firewall access for localhost, port 8897
+# ============================================================================================================
+
+def frames_test(void):
+  """
+  Test requests in frames by assembling frames from partial reads, dispatching requests whose fields hold newlines, and
+  serving frames with RequestHandler and AsyncRequestServer
+  >>> op = RequestDispatcher.opcodes.index
+  >>> frame = FrameAssembler.frame(op('append_message_to_q'), [ 'w1', 'q_bert', 'two\\nlines' ])
+  >>> frame[:FrameAssembler.header.size] == struct.pack('!BBHI', 0xB1, 5, 3, len(frame) - 8)
+  True
+  >>> assembler = FrameAssembler(16)
+  >>> assembler.add(frame[:10]); assembler.frames()
+  []
+  >>> assembler.add(frame[10:] + frame); assembler.frames()
+  [(5, ['w1', 'q_bert', 'two\\nlines']), (5, ['w1', 'q_bert', 'two\\nlines'])]
+  >>> len(assembler.buffer) >= len(frame), assembler.start, assembler.end
+  (True, 0, 0)
+  >>> assembler.add(b'register_q q_bert\\n'); assembler.frames()
+  Traceback (most recent call last):
+  ...
+  ValueError: not a frame
+  >>> #
+  >>> # ... ... the buffer grows only as a frame's bytes arrive, and a header past the limits is refused at once ... ...
+  >>> assembler = FrameAssembler(16)
+  >>> assembler.add(frame[:12]); assembler.frames(), len(assembler.buffer)
+  ([], 16)
+  >>> assembler = FrameAssembler(16, max_frame_size=1024, max_fields=8)
+  >>> assembler.add(struct.pack('!BBHI', 0xB1, 0, 1, 200000000)); assembler.frames()
+  Traceback (most recent call last):
+  ...
+  ValueError: frame too large
+  >>> len(assembler.buffer)
+  16
+  >>> assembler = FrameAssembler(16, max_frame_size=1024, max_fields=8)
+  >>> assembler.add(struct.pack('!BBHI', 0xB1, 0, 9, 36)); assembler.frames()
+  Traceback (most recent call last):
+  ...
+  ValueError: too many fields
+  >>> assembler = FrameAssembler()                          # a field's length that would be read from past the frame's body
+  >>> assembler.add(struct.pack('!BBHI', 0xB1, 0, 1, 2) + b'\\x00\\x00' + FrameAssembler.frame(0, [ 'x' ])); assembler.frames()
+  Traceback (most recent call last):
+  ...
+  ValueError: field overruns frame
+  >>> RequestDispatcher.line_for_fields(op('append_batch_to_q'), [ 'w1', 'q_bert', '2', 'm1', 'm2' ])
+  'append_batch_to_q w1 q_bert 2\\nm1\\nm2\\n'
+  >>> #
+  >>> # ... ... requests in frames are answered by the same responders as lines, with fields that may hold newlines ... ...
+  >>> reader_to_SAP = CommunicatorToSAP(**{'communicator_to_SAP': {}})
+  >>> queue_to_readers = MessageQueueToReaders(**{'buffers': {}, 'buffer_to_users': {}, 'queue_to_readers_to_positions': {}})
+  >>> queue_to_writers = MessageQueueToWriters(**{'buffers': {}, 'buffer_to_users': {}})
+  >>> dispatcher = RequestDispatcher(queue_to_readers, queue_to_writers, reader_to_SAP)
+  >>> [ dispatcher.dispatch_fields(op(request_type), fields) for (request_type, fields) in [ ('register_q', [ 'q_bert' ]), ('set_writer_for_q', [ 'w1', 'q_bert' ]), ('set_reader_for_q', [ 'r1', 'q_bert' ]),
+  ...                                                                                      ('set_reader_for_q', [ 'r2', 'q_bert' ]) ] ]      # r2 holds messages in the queue
+  [('register_q', True, []), ('set_writer_for_q', True, []), ('set_reader_for_q', True, []), ('set_reader_for_q', True, [])]
+  >>> dispatcher.dispatch_fields(op('append_message_to_q'), [ 'w1', 'q_bert', 'two\\nlines' ]), dispatcher.dispatch_fields(op('append_batch_to_q'), [ 'w1', 'q_bert', '2', 'm\\n1', ' m2' ])
+  (('append_message_to_q', True, []), ('append_batch_to_q', True, []))
+  >>> dispatcher.dispatch_fields(op('fetch_from_q'), [ 'r1', 'q_bert', '5' ])
+  ('fetch_from_q', True, ['3', 'two\\nlines', 'm\\n1', ' m2'])
+  >>> dispatcher.dispatch_fields(op('seek_reader_to_time'), [ 'r1', 'q_bert', '0' ])        # no layout:  answered with the pattern
+  ('seek_reader_to_time', True, ['0'])
+  >>> dispatcher.dispatch_fields(op('set_writer_for_q'), [ 'w 1', 'q_bert' ]), dispatcher.dispatch_fields(op('append_batch_to_q'), [ 'w1', 'q_bert', '3', 'm' ])
+  (('set_writer_for_q', False, ['error (syntax error)']), ('append_batch_to_q', False, ['bad count']))
+  >>> dispatcher.dispatch_fields(99, [])
+  ('unknown', False, ['unknown request type'])
+  >>> #
+  >>> # ... ... a handler serves a client whose first byte is the magic byte in frames, in sessions and one request at a time ... ...
+  >>> handler = RequestHandler(dispatcher)
+  >>> client_sock, server_sock = socket.socketpair()
+  >>> frames = FrameAssembler.frame(op('append_message_to_q'), [ 'w1', 'q_bert', 'three\\nlines\\nhere' ]) + FrameAssembler.frame(op('fetch_from_q'), [ 'r1', 'q_bert', '1', '0' ])
+  >>> client_sock.sendall(frames[:7])
+  >>> threading.Timer(0.2, lambda: (client_sock.sendall(frames[7:]), client_sock.shutdown(socket.SHUT_WR))).start()
+  >>> [ (request_type, response) for request, request_type, status, response in handler.converse( server_sock, 5 ) ]
+  [('append_message_to_q', 'OK'), ('fetch_from_q', 'OK 1 two\\nlines')]
+  >>> replies = FrameAssembler()
+  >>> n = replies.receive(client_sock); replies.frames()
+  [(1, []), (1, ['1', 'two\\nlines'])]
+  >>> server_sock.close(); client_sock.close()
+  >>> client_sock, server_sock = socket.socketpair()
+  >>> client_sock.sendall(FrameAssembler.frame(op('position_of_reader'), [ 'r1', 'q_bert' ]))
+  >>> handler.respond(server_sock)
+  ('position_of_reader r1 q_bert\\n', 'position_of_reader', True, 'OK 1')
+  >>> n = replies.receive(client_sock); replies.frames()
+  [(1, ['1'])]
+  >>> server_sock.close(); client_sock.close()
+  >>> client_sock, server_sock = socket.socketpair()        # a header past the limits is answered with an error, and ends the session
+  >>> client_sock.sendall(struct.pack('!BBHI', 0xB1, op('append_message_to_q'), 3, 200000000))
+  >>> list(handler.converse( server_sock, 5 ))
+  []
+  >>> n = replies.receive(client_sock); replies.frames()
+  [(0, ['frame too large'])]
+  >>> server_sock.close(); client_sock.close()
+  >>> #
+  >>> # ... ... as does an asyncio server, which pipelines the frames that have arrived ... ...
+  >>> server = AsyncRequestServer(handler, host='localhost', port=8897, timeout=2, session_timeout=2)
+  >>> server_thread = threading.Thread(target=server.run)
+  >>> server_thread.start()
+  >>> time.sleep(0.5)                                        # give the server time to bind its port
+  >>> client = socket.create_connection(('localhost', 8897))
+  >>> client.sendall(FrameAssembler.frame(op('append_batch_to_q'), [ 'w1', 'q_bert', '1', 'four\\nlines\\n\\n' ]) + FrameAssembler.frame(op('fetch_from_q'), [ 'r1', 'q_bert', '9' ]))
+  >>> received = []
+  >>> while len(received) < 2 and replies.receive(client) > 0:  received += replies.frames()
+  >>> received
+  [(1, []), (1, ['4', 'm\\n1', ' m2', 'three\\nlines\\nhere', 'four\\nlines\\n\\n'])]
+  >>> client.close()
+  >>> server_thread.join(10)
+  >>> server_thread.is_alive()
+  False
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing FrameAssembler and requests in frames')
+    doctest_it(frames_test)
+    print()
+
+# ============================================================================================================
+# tests for QueueShardMap and ShardRouter -
+#    classes that spread queues across shards and route requests to the shards that own them
+#
+# preconditions for test execution:
+# *.  firewall access for localhost, ports 8885-8887
+# ============================================================================================================
+
+def queue_shard_map_test(void):
+  """
+  Test QueueShardMap by routing requests for queues among three shards
+  >>> shard_map = QueueShardMap(3)
+  >>> eval(repr(shard_map)) == shard_map
+  True
+  >>> shard_map.shard_for_queue('q_bert') == shard_map.shard_for_queue('q_bert') == zlib.crc32(b'q_bert') % 3
+  True
+  >>> shard_map.shards_for_request('register_q q_bert\\n') == [ shard_map.shard_for_queue('q_bert') ]
+  True
+  >>> shard_map.shards_for_request('append_message_to_q w1 q_bert a message\\n') == [ shard_map.shard_for_queue('q_bert') ]
+  True
+  >>> shard_map.shards_for_request('fetch_from_q r1 q_bert 10 500\\n') == [ shard_map.shard_for_queue('q_bert') ]
+  True
+  >>> shard_map.may_wait('fetch_from_q r1 q_bert 10 500\\n'), shard_map.may_wait('register_q q_bert\\n')
+  (True, False)
+  >>> shard_map.shards_for_request('append_message_to_qs w1 q_a,q_bert,q_b,q_d a message\\n')     # split among the shards of its queues
+  [0, 1, 2]
+  >>> shard_map.requests_for_shards('append_message_to_qs w1 q_a,q_bert,q_b,q_d a message\\n')
+  [(0, 'append_message_to_qs w1 q_a,q_b a message\\n'), (1, 'append_message_to_qs w1 q_d a message\\n'), (2, 'append_message_to_qs w1 q_bert a message\\n')]
+  >>> shard_map.requests_for_shards('append_message_to_qs w1 q_a,q_b a message\\n')
+  [(0, 'append_message_to_qs w1 q_a,q_b a message\\n')]
+  >>> shard_map.shards_for_request('qs_for_reader r1\\n')           # scattered to every shard
+  [0, 1, 2]
+  >>> shard_map.shards_for_request('unregister_q\\n')               # malformed requests go to shard 0, for error reporting
+  [0]
+  >>> shard_map.gather(['OK q_a ', 'OK ', 'OK q_b '])
+  'OK q_a q_b '
+  >>> shard_map.gather(['OK', 'error shard unavailable', 'OK'])
+  'error shard unavailable'
+  >>> shard_map.gather(['OK', 'OK'])
+  'OK'
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing QueueShardMap')
+    doctest_it(queue_shard_map_test)
+    print()
+
+def shard_router_test(void):
+  """
+  Test ShardRouter by routing requests to two in-process shards, each of which names itself in its responses
+  >>> shard_ports, router_port = [ 8885, 8886 ], 8887
+  >>> shards = [ AsyncRequestServer(RequestHandler(lambda request, k=k: (request.split()[0], True, 'shard{} '.format(k))), host='localhost', port=port, timeout=3, session_timeout=3)
+  ...            for (k, port) in enumerate(shard_ports) ]
+  >>> router = ShardRouter([ ('localhost', port) for port in shard_ports ], host='localhost', port=router_port, timeout=2, session_timeout=2)
+  >>> threads = [ threading.Thread(target=server.run) for server in shards + [ router ] ]
+  >>> for thread in threads:  thread.start()
+  >>> time.sleep(0.5)
+  >>> shard_map = QueueShardMap(2)
+  >>> queues = [ 'q_{}'.format(k) for k in range(8) ]
+  >>> requests = [ 'register_q {}\\n'.format(queue) for queue in queues ] + [ 'qs_for_writer w1\\n' ]
+  >>> client = socket.create_connection(('localhost', router_port))
+  >>> client_file = client.makefile(mode='rw')
+  >>> n = client_file.write(''.join(requests)); client_file.flush()      # pipeline all requests at once
+  >>> responses = [ client_file.readline() for request in requests ]
+  >>> responses[:-1] == [ 'OK shard{} \\n'.format(shard_map.shard_for_queue(queue)) for queue in queues ]
+  True
+  >>> responses[-1]
+  'OK shard0 shard1 \\n'
+  >>> client_file.close(); client.close()
+  >>> #
+  >>> # ... ... frames are forwarded as the lines that they stand for, save for those with fields that hold newlines ... ...
+  >>> client = socket.create_connection(('localhost', router_port))
+  >>> client.sendall(FrameAssembler.frame(0, [ 'q_0' ]) + FrameAssembler.frame(5, [ 'w1', 'q_0', 'two\\nlines' ]))
+  >>> replies, received = FrameAssembler(), []
+  >>> while len(received) < 2 and replies.receive(client) > 0:  received += replies.frames()
+  >>> received == [ (1, [ 'shard{} '.format(shard_map.shard_for_queue('q_0')) ]), (0, [ 'newlines need an unsharded server' ]) ]
+  True
+  >>> client.close()
+  >>> for thread in threads:  thread.join(10)
+  """
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** testing ShardRouter')
+    doctest_it(shard_router_test)
+    print()
+
+
+# ***********************************************
+#  Tests Complete 
+# ***********************************************
+
+if 'run_tests_on_load' in dir() and 'doctest_it' in dir():
+  if run_tests_on_load:
+    print('*** tests concluded')
+    print()